@@ -0,0 +1,96 @@
+"""
+Microbenchmark of the crypto backends.
+
+Times the two operations that dominate wallet CPU time, per backend and
+against the code paths the wallet used before the backend layer:
+
+    derive  one P2WPKH address from a secret (public key + bech32)
+    ckdpub  one BIP32 public child key
+    sign    one input signature over a 32-byte sighash
+
+Run from the repository root:
+
+    python benchmarks/crypto_bench.py [--iterations N]
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wallet import crypto
+from wallet.keys import create_p2wpkh_address
+
+def per_call(func: Callable[[int], object], iterations: int) -> float:
+    """Best-of-three time per call in microseconds. func receives the call number."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(iterations):
+            func(i)
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+def make_secrets(count: int) -> List[bytes]:
+    """Distinct secrets, so no backend can reuse work between derivations."""
+    return [hashlib.sha256(b"crypto-bench" + i.to_bytes(4, "big")).digest() for i in range(count)]
+
+def legacy_timings(secrets: List[bytes], digest: bytes, iterations: int) -> Dict[str, float]:
+    """Timings of the library calls the wallet made before crypto.py."""
+    from bitcoin import SelectParams
+    from bitcoin.wallet import CBitcoinSecret
+    from bitcoinutils.keys import PrivateKey
+    from bitcoinutils.setup import setup
+
+    SelectParams("testnet")
+    setup("testnet")
+    key = PrivateKey(secret_exponent=int.from_bytes(secrets[0], "big"))
+    return {
+        "derive (python-bitcoinlib CBitcoinSecret)": per_call(
+            lambda i: create_p2wpkh_address(CBitcoinSecret.from_secret_bytes(secrets[i]).pub, "testnet"),
+            iterations),
+        # The signing step of bitcoinutils' sign_segwit_input, without the sighash
+        "sign (bitcoinutils sign_segwit_input)": per_call(lambda i: key._sign_input(digest), iterations),
+    }
+
+def backend_timings(name: str, secrets: List[bytes], digest: bytes, iterations: int) -> Dict[str, float]:
+    """Timings of one crypto backend. Signing reuses one key, as for a multi-input spend."""
+    backend = crypto.create_crypto_backend(name)
+    pubkey = backend.pubkey(secrets[0])
+    return {
+        "derive": per_call(lambda i: create_p2wpkh_address(backend.pubkey(secrets[i]), "testnet"), iterations),
+        "ckdpub": per_call(lambda i: backend.tweak_add(pubkey, secrets[i]), iterations),
+        "sign": per_call(lambda i: backend.sign(secrets[0], digest), iterations),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark secp256k1 backends")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per measurement")
+    args = parser.parse_args()
+
+    secrets = make_secrets(args.iterations)
+    digest = bytes.fromhex("9302bda273a887cb40c13e02a50b4071a31fd3aae3ae04021b0b843dd61ad18e")
+
+    legacy = legacy_timings(secrets, digest, args.iterations)
+    print("Previous code paths (µs per call):")
+    for label, micros in legacy.items():
+        print(f"  {label:<45} {micros:>10.1f}")
+
+    old_derive, old_sign = legacy.values()
+    print("\nBackends (µs per call, speedup over previous path):")
+    print(f"  {'backend':<12} {'derive':>10} {'':>7} {'ckdpub':>10} {'sign':>10} {'':>7}")
+    for name in crypto.available_backends():
+        timings = backend_timings(name, secrets, digest, args.iterations)
+        print(f"  {name:<12} {timings['derive']:>10.1f} {old_derive / timings['derive']:>6.1f}x "
+              f"{timings['ckdpub']:>10.1f} {timings['sign']:>10.1f} {old_sign / timings['sign']:>6.1f}x")
+
+    missing = [name for name in crypto.AUTO_ORDER if name not in crypto.available_backends()]
+    if missing:
+        print(f"\nNot installed: {', '.join(missing)}")
+    print(f"Active backend: {crypto.get_crypto_backend().name}")
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,15 @@ from wallet.cli import parse_args
 from wallet.commands import create_command
 from wallet.exceptions import WalletError
 from wallet import generate_wallet
+from wallet.keys import get_account_xpub
 from wallet.interactive import InteractiveWallet
 from wallet.wallet_manager import wallet_manager
+from wallet.config import config
+from wallet.singleflight import request_coalescer
 
 def save_to_json(filename: str, privkey: str, pubkey: str,
-                mnemonic: str, addresses: list, network: str):
+                mnemonic: str, addresses: list, network: str,
+                account_xpub: str = None):
     """Save wallet information to a JSON file with enhanced metadata."""
     data = {
         "version": "1.0",
@@ -34,6 +38,8 @@ def save_to_json(filename: str, privkey: str, pubkey: str,
             ))
         }
     }
+    if account_xpub:
+        data["account_xpub"] = account_xpub
     
     with open(filename, 'w') as f:
         json.dump(data, f, indent=4)
@@ -49,7 +55,7 @@ def main():
         
         # Handle interactive mode first
         if args.interactive:
-            interactive_wallet = InteractiveWallet(args.network)
+            interactive_wallet = InteractiveWallet(args.network, push=args.push)
             interactive_wallet.run()
             return
         
@@ -86,9 +92,11 @@ def main():
             try:
                 result = generate_wallet(None, args.network)
                 privkey, pubkey, mnemonic, addresses = result
+                account_xpub = get_account_xpub(mnemonic, args.network)
                 
                 # Save to file
-                save_to_json(args.output, privkey, pubkey, mnemonic, addresses, args.network)
+                save_to_json(args.output, privkey, pubkey, mnemonic, addresses, args.network,
+                             account_xpub)
                 
                 # Load wallet into manager
                 wallet_manager.load_wallet(
@@ -96,7 +104,8 @@ def main():
                     network=args.network,
                     addresses=addresses,
                     pubkey=pubkey,
-                    encrypt=False
+                    encrypt=False,
+                    account_xpub=account_xpub
                 )
                 
                 print(f"New wallet created and saved to {args.output}")
@@ -110,7 +119,7 @@ def main():
             args.send, args.check_fees, args.blockchain_info, args.mempool_info,
             args.load, args.history, args.rates, args.utxos, args.use_wallet,
             args.use_wallet_file, args.unload_wallet, args.wallet_info, args.address,
-            args.help, args.help_command, args.output
+            args.discover, args.backend_status, args.derive_range, args.help, args.help_command, args.output
         ]):
             if wallet_manager.is_wallet_loaded():
                 args = args._replace(wallet_info=True)
@@ -130,6 +139,10 @@ def main():
         command = create_command(args)
         command.execute()
         
+        if config.debug_mode:
+            stats = request_coalescer.stats()
+            print(f"\nExplorer requests: {stats['requests']} made, {stats['saved']} saved by coalescing")
+        
     except WalletError as e:
         print(f"Wallet Error: {str(e)}")
     except Exception as e:
@@ -0,0 +1,49 @@
+import pytest
+from wallet import network, backends, bitcoind, fees, commands, transactions, keys, agent, chaintip
+from wallet.backends import FakeBackend
+from wallet.txstore import TransactionStore
+from wallet.cache import BalanceCache
+from wallet.chaintip import ChainTip
+from wallet.singleflight import SingleFlight
+from wallet.endpoints import EndpointRegistry, Hedger
+from wallet.rates import RateService
+from wallet.fees import FeeEstimator
+from wallet.addrstore import AddressStore
+from wallet.agent import AgentClient
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep persistent caches out of the user's ~/.bitcoin_wallet during tests."""
+    store = TransactionStore(path=str(tmp_path / "transactions.db"))
+    monkeypatch.setattr(network, "transaction_store", store)
+    monkeypatch.setattr(chaintip, "transaction_store", store)
+    balances = BalanceCache()
+    monkeypatch.setattr(network, "balance_cache", balances)
+    monkeypatch.setattr(chaintip, "balance_cache", balances)
+    tip = ChainTip()
+    monkeypatch.setattr(network, "chain_tip", tip)
+    monkeypatch.setattr(fees, "chain_tip", tip)
+    monkeypatch.setattr(backends, "_backends", {})
+    coalescer = SingleFlight()
+    for module in (backends, bitcoind):
+        monkeypatch.setattr(module, "request_coalescer", coalescer)
+    registry = EndpointRegistry()
+    monkeypatch.setattr(network, "endpoint_registry", registry)
+    monkeypatch.setattr(backends, "hedger", Hedger(registry))
+    monkeypatch.setattr(network, "rate_service", RateService(cache_path=str(tmp_path / "rates.json")))
+    estimator = FeeEstimator()
+    for module in (network, commands, transactions):
+        monkeypatch.setattr(module, "fee_estimator", estimator)
+    addresses = AddressStore(path=str(tmp_path / "addresses.db"))
+    monkeypatch.setattr(keys, "address_store", addresses)
+    monkeypatch.setattr(agent, "key_agent", AgentClient(str(tmp_path / "agent.sock"), autostart=False))
+    yield
+    store.close()
+    addresses.close()
+
+@pytest.fixture
+def fake_backend():
+    """Serve testnet lookups from an in-process simulated chain."""
+    backend = FakeBackend(tip_height=1000)
+    backends.set_backend("testnet", backend)
+    return backend
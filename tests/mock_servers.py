@@ -0,0 +1,355 @@
+"""
+Local stand-in servers used by the offline tests.
+
+These servers bind to 127.0.0.1 on an ephemeral port and run in a
+background thread, so tests can exercise the real network code paths
+without reaching any public API.
+"""
+import json
+import base64
+import socket
+import struct
+import hashlib
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# A route handler returns (status, body) or (status, body, headers)
+RouteResult = Union[Tuple[int, object], Tuple[int, object, Dict[str, str]]]
+
+class StubHTTPServer:
+    """
+    Minimal HTTP/1.1 server that replays canned responses per path.
+
+    Routes map a request path (including the query string) to either a
+    static (status, body) tuple or a callable taking the request body and
+    returning one. Dict and list bodies are sent as JSON.
+    """
+
+    def __init__(self, routes: Dict[str, Union[RouteResult, Callable[[bytes], RouteResult]]] = None):
+        self.routes = routes or {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests.append((method, self.path, dict(self.headers)))
+
+                route = stub.routes.get(self.path)
+                if route is None:
+                    result = (404, "Not Found")
+                elif callable(route):
+                    result = route(body)
+                else:
+                    result = route
+
+                status, payload = result[0], result[1]
+                headers = result[2] if len(result) > 2 else {}
+
+                if isinstance(payload, (dict, list)):
+                    data = json.dumps(payload).encode()
+                    content_type = "application/json"
+                else:
+                    data = str(payload).encode()
+                    content_type = "text/plain"
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+        return Handler
+
+    def count(self, path: str) -> int:
+        """Number of requests received for a path."""
+        return sum(1 for _, p, _ in self.requests if p == path)
+
+    def __enter__(self) -> "StubHTTPServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+def json_rpc_route(handlers: Dict[str, Callable[..., Any]]) -> Callable[[bytes], RouteResult]:
+    """
+    Build a StubHTTPServer route answering Bitcoin Core style JSON-RPC.
+
+    Handlers map a method name to a callable taking the params and returning
+    the result; an exception becomes an RPC error with code -1. Both single
+    and batch requests are supported.
+    """
+    def answer(request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = handlers[request["method"]](*request.get("params", []))
+            return {"result": result, "error": None, "id": request.get("id")}
+        except Exception as e:
+            return {"result": None, "error": {"code": -1, "message": str(e)}, "id": request.get("id")}
+
+    def route(body: bytes) -> RouteResult:
+        message = json.loads(body)
+        if isinstance(message, list):
+            return 200, [answer(request) for request in message]
+        return 200, answer(message)
+
+    return route
+
+class FakeResponse:
+    """Response object returned by FakeTransport."""
+
+    def __init__(self, payload: Any, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+
+    @property
+    def text(self) -> str:
+        return self.payload if isinstance(self.payload, str) else json.dumps(self.payload)
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> Any:
+        return self.payload
+
+class FakeTransport:
+    """In-process transport that serves canned responses by URL and records requests."""
+
+    def __init__(self, routes: Dict[str, Any]):
+        self.routes = routes
+        self.urls: List[str] = []
+        self._lock = threading.Lock()
+
+    def _respond(self, url: str) -> FakeResponse:
+        with self._lock:
+            self.urls.append(url)
+        route = self.routes[url]
+        return route if isinstance(route, FakeResponse) else FakeResponse(route)
+
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None) -> FakeResponse:
+        return self._respond(url)
+
+    def post(self, url: str, data: Any = None, json: Any = None, timeout: float = None,
+             auth: Any = None) -> FakeResponse:
+        return self._respond(url)
+
+    def count(self, url: str) -> int:
+        """Number of requests made for a URL."""
+        return self.urls.count(url)
+
+class StubElectrumServer:
+    """
+    Minimal ElectrumX-style JSON-RPC server over plain TCP.
+
+    Handlers map a method name to a callable taking the request params and
+    returning the result; an exception becomes a JSON-RPC error. Batches
+    are answered with one JSON array. Every received line counts as one
+    round trip in `round_trips`, excluding the server.version handshake.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[..., Any]] = None):
+        self.handlers = {"server.version": lambda *params: ["StubElectrum 1.0", "1.4"]}
+        self.handlers.update(handlers or {})
+        self.methods: List[str] = []
+        self.round_trips = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address
+
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        with self._lock:
+            self.methods.append(method)
+        try:
+            result = self.handlers[method](*request.get("params", []))
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": 1, "message": str(e)}}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def handle(self):
+                for line in self.rfile:
+                    message = json.loads(line)
+                    if isinstance(message, list):
+                        reply = [stub._answer(request) for request in message]
+                    else:
+                        reply = stub._answer(message)
+                        if message.get("method") == "server.version":
+                            self.wfile.write((json.dumps(reply) + "\n").encode())
+                            continue
+                    with stub._lock:
+                        stub.round_trips += 1
+                    self.wfile.write((json.dumps(reply) + "\n").encode())
+
+        return Handler
+
+    def count(self, method: str) -> int:
+        """Number of requests received for a method."""
+        return self.methods.count(method)
+
+    def __enter__(self) -> "StubElectrumServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+class StubWebSocketServer:
+    """
+    Minimal WebSocket server standing in for a mempool.space-style feed.
+
+    Text messages from clients are decoded into `received`; `push()` sends
+    a JSON message to every open connection. Pings are answered and
+    counted, and `drop()` closes all connections from the server side.
+    """
+
+    def __init__(self):
+        self.received: List[Any] = []
+        self.pings = 0
+        self.connections = 0
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"ws://{host}:{port}/api/v1/ws"
+
+    @staticmethod
+    def _frame(opcode: int, payload: bytes) -> bytes:
+        length = len(payload)
+        if length < 126:
+            header = bytes([0x80 | opcode, length])
+        elif length < 1 << 16:
+            header = bytes([0x80 | opcode, 126]) + struct.pack("!H", length)
+        else:
+            header = bytes([0x80 | opcode, 127]) + struct.pack("!Q", length)
+        return header + payload
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                headers = {}
+                self.rfile.readline()
+                for line in iter(self.rfile.readline, b"\r\n"):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                accept = base64.b64encode(hashlib.sha1(
+                    (headers["sec-websocket-key"] + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()
+                ).digest()).decode()
+                self.wfile.write((
+                    "HTTP/1.1 101 Switching Protocols\r\n"
+                    "Upgrade: websocket\r\n"
+                    "Connection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+                ).encode())
+                with stub._lock:
+                    stub.connections += 1
+                    stub._clients.append(self.connection)
+
+                while True:
+                    head = self.rfile.read(2)
+                    if len(head) < 2:
+                        break
+                    length = head[1] & 0x7F
+                    if length == 126:
+                        length = struct.unpack("!H", self.rfile.read(2))[0]
+                    elif length == 127:
+                        length = struct.unpack("!Q", self.rfile.read(8))[0]
+                    mask = self.rfile.read(4)
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(length)))
+                    opcode = head[0] & 0x0F
+                    if opcode == 0x8:
+                        break
+                    if opcode == 0x9:
+                        with stub._lock:
+                            stub.pings += 1
+                        self.connection.sendall(stub._frame(0xA, payload))
+                    elif opcode == 0x1:
+                        with stub._lock:
+                            stub.received.append(json.loads(payload))
+
+                with stub._lock:
+                    if self.connection in stub._clients:
+                        stub._clients.remove(self.connection)
+
+        return Handler
+
+    def push(self, message: Any) -> None:
+        """Send a JSON message to every connected client."""
+        frame = self._frame(0x1, json.dumps(message).encode())
+        with self._lock:
+            for client in self._clients:
+                client.sendall(frame)
+
+    def drop(self) -> None:
+        """Close every connection from the server side."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.shutdown(socket.SHUT_RDWR)
+
+    def __enter__(self) -> "StubWebSocketServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.drop()
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,98 @@
+import pytest
+
+from wallet import commands, keys
+from wallet.addresses import AddressProvider
+from wallet.cli import CommandArguments
+from wallet.discovery import AddressDiscovery
+from wallet.keys import WatchOnlyAccount
+from wallet.privacy import AddressManager
+from wallet.wallet_manager import WalletManager
+from . import TEST_PRIVATE_KEY
+
+# BIP84 test vector account key m/84'/0'/0'
+ZPUB = "zpub6rFR7y4Q2AijBEqTUquhVz398htDFrtymD9xYYfG1m4wAcvPhXNfE3EfH1r1ADqtfSdVCToUG868RvUUkgDKf31mGDtKsAYz2oz2AGutZYs"
+
+def counting_provider(length, calls):
+    def derive(start, count):
+        calls.append((start, count))
+        return [(i, None, None, f"addr{i}") for i in range(start, start + count)]
+    return AddressProvider().add(length, derive)
+
+class TestAddressProvider:
+    def test_derives_only_what_is_read(self):
+        """Test that length is free and reads derive just the positions touched"""
+        calls = []
+        provider = counting_provider(100, calls)
+
+        assert len(provider) == 100 and provider and calls == []
+        assert provider[5][3] == "addr5"
+        assert [entry[0] for entry in provider[10:14]] == [10, 11, 12, 13]
+        assert [entry[0] for entry in provider[20:30:5]] == [20, 25]
+        assert calls == [(5, 1), (10, 4), (20, 1), (25, 1)]
+
+    def test_memoizes_and_spans_segments(self):
+        """Test that entries are derived once and slices cross segment boundaries"""
+        calls = []
+        provider = AddressProvider.from_entries([(0, "wif", "pub", "imported")])
+        provider.add(10, lambda start, count: calls.append((start, count)) or
+                     [(i, None, None, f"chain{i}") for i in range(start, start + count)])
+
+        assert [entry[3] for entry in provider[0:3]] == ["imported", "chain0", "chain1"]
+        assert provider[1:3] == provider[1:3]
+        assert calls == [(0, 2)] and provider.derived == 2
+        with pytest.raises(IndexError):
+            provider[11]
+
+    def test_iteration_is_lazy_and_skips_repeats(self):
+        """Test that iteration stops deriving when the consumer stops, without duplicates"""
+        calls = []
+        provider = AddressProvider.from_entries([(0, None, None, "addr1")])
+        provider.add(50, lambda start, count: calls.append(start) or
+                     [(i, None, None, f"addr{i}") for i in range(start, start + count)])
+
+        manager = AddressManager()
+        manager.mark_address_used("addr1")
+        assert manager.get_new_address(provider) == "addr0"
+        assert [entry[3] for entry in provider][:3] == ["addr1", "addr0", "addr2"]
+        assert calls[:2] == [0, 1]
+
+    def test_public_key_matches_private_key(self):
+        """Test that the public key gives the same address as the private key"""
+        pubkey = keys.pubkey_from_secret(keys.wif_to_secret(TEST_PRIVATE_KEY))
+
+        assert AddressProvider.for_public_key(pubkey, "testnet")[0][3] == \
+            AddressProvider.for_private_key(TEST_PRIVATE_KEY, "testnet")[0][3]
+
+class TestCommandsDeriveOnDemand:
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(WalletManager, "STATE_FILE", str(tmp_path / "wallet_state.json"))
+        monkeypatch.setattr(AddressDiscovery, "STATE_FILE", str(tmp_path / "discovery.json"))
+        manager = WalletManager()
+        monkeypatch.setattr(commands, "wallet_manager", manager)
+        return manager
+
+    def test_receive_derives_one_address(self, manager):
+        """Test that --receive derives the first address only when it runs"""
+        manager.load_wallet(TEST_PRIVATE_KEY, network="testnet", encrypt=False)
+        args = CommandArguments(network="testnet", output=None, check_balance=False, show_qr=False, receive=True)
+
+        command = commands.create_command(args)
+        assert command.addresses.derived == 0
+
+        command.execute()
+        assert command.addresses.derived == 1
+        assert command.addresses[0][3] == AddressProvider.for_private_key(TEST_PRIVATE_KEY, "testnet")[0][3]
+
+    def test_watch_addresses_derive_per_position(self, manager):
+        """Test that xpub chains up to the discovered mark derive only what is read"""
+        manager.load_wallet("not-a-key", network="mainnet", encrypt=False, account_xpub=ZPUB,
+                            addresses=[(0, None, None, "bc1qimportedkeyaddress")])
+        account = WatchOnlyAccount(ZPUB, "mainnet")
+        AddressDiscovery("mainnet")._save_state(f"mainnet:{account.account.fingerprint.hex()}", {0: 9, 1: 4})
+
+        addresses = commands.watch_addresses()
+
+        assert len(addresses) == 1 + 10 + 5
+        assert addresses[1][3] == "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu"
+        assert keys.address_store.stats() == {"hits": 0, "misses": 1}
@@ -0,0 +1,53 @@
+from wallet import keys
+from wallet.addrstore import AddressStore, key_fingerprint
+from wallet.keys import generate_wallet
+from . import TEST_PRIVATE_KEY
+
+def fake_rows(indices):
+    return [(i, f"02{i:064x}", f"0014{i:040x}", f"tb1q{i}") for i in indices]
+
+class TestAddressStore:
+    def test_derives_only_missing_indices(self, tmp_path):
+        """Test that stored indices are reused and only the gaps are derived"""
+        store = AddressStore(path=str(tmp_path / "addresses.db"))
+        requested = []
+
+        def derive(indices):
+            requested.append(list(indices))
+            return fake_rows(indices)
+
+        store.get_or_derive("ff" * 8, "testnet", 0, [0, 1, 2], derive)
+        rows = store.get_or_derive("ff" * 8, "testnet", 0, [1, 2, 3, 4], derive)
+
+        assert requested == [[0, 1, 2], [3, 4]]
+        assert [row[0] for row in rows] == [1, 2, 3, 4]
+        assert store.stats() == {"hits": 2, "misses": 5}
+
+    def test_rows_are_scoped_by_key_network_and_chain(self, tmp_path):
+        """Test that other fingerprints, networks and chains never share rows"""
+        store = AddressStore(path=str(tmp_path / "addresses.db"))
+        store.put_many("aa" * 8, "testnet", 0, fake_rows([0]))
+
+        assert store.get("aa" * 8, "testnet", 0, [0]) == {0: fake_rows([0])[0]}
+        assert store.get("bb" * 8, "testnet", 0, [0]) == {}
+        assert store.get("aa" * 8, "signet", 0, [0]) == {}
+        assert store.get("aa" * 8, "testnet", 1, [0]) == {}
+
+    def test_imported_key_derived_once(self, monkeypatch):
+        """Test that reloading a private key reads its address from the store"""
+        first = generate_wallet(TEST_PRIVATE_KEY, "testnet")
+
+        def fail(*args):
+            raise AssertionError("address derived again")
+        monkeypatch.setattr(keys, "_derive_imported_key", fail)
+
+        assert generate_wallet(TEST_PRIVATE_KEY, "testnet") == first
+        assert keys.address_store.stats() == {"hits": 1, "misses": 1}
+
+    def test_store_holds_no_private_keys(self, tmp_path):
+        """Test that only public data is written to disk"""
+        generate_wallet(TEST_PRIVATE_KEY, "testnet")
+
+        with open(keys.address_store.path, "rb") as f:
+            assert TEST_PRIVATE_KEY.encode() not in f.read()
+        assert key_fingerprint(TEST_PRIVATE_KEY) != key_fingerprint(TEST_PRIVATE_KEY + "x")
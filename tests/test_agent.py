@@ -0,0 +1,155 @@
+import os
+import stat
+import shutil
+import tempfile
+import threading
+import time
+import pytest
+from cryptography.fernet import Fernet
+
+from wallet import agent, commands, crypto
+from wallet.cli import CommandArguments
+from wallet.discovery import AddressDiscovery
+from wallet.config import config
+from wallet.agent import KeyAgent, AgentClient
+from wallet.keys import wif_to_secret, create_p2wpkh_address
+from wallet.wallet_manager import WalletManager
+from tests import TEST_PRIVATE_KEY
+
+@pytest.fixture
+def running_agent():
+    """Serve a key agent from a thread on a short socket path."""
+    directory = tempfile.mkdtemp(prefix="agent", dir="/tmp")
+    path = os.path.join(directory, "agent.sock")
+    server = KeyAgent(path)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    client = AgentClient(path, autostart=False)
+    while client.status() is None and thread.is_alive():
+        time.sleep(0.01)
+    yield server, client
+    client.stop()
+    thread.join(timeout=5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch, running_agent):
+    """A wallet manager with isolated state, sharing keys with the running agent."""
+    monkeypatch.setattr(WalletManager, "STATE_FILE", str(tmp_path / "wallet_state.json"))
+    monkeypatch.setattr(config, "key_agent", True)
+    monkeypatch.setattr(agent, "key_agent", running_agent[1])
+    manager = WalletManager()
+    manager.password = "correct horse"
+    assert manager.load_wallet(TEST_PRIVATE_KEY, network="testnet", encrypt=True)
+    return manager
+
+class TestKeyAgent:
+    def test_socket_is_private(self, running_agent):
+        """Test that only the owner can open the agent socket"""
+        server, _ = running_agent
+
+        assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+
+    def test_signs_without_revealing_the_key(self, running_agent):
+        """Test signing with the key inside a token, which the agent never returns"""
+        _, client = running_agent
+        key = Fernet.generate_key()
+        token = Fernet(key).encrypt(TEST_PRIVATE_KEY.encode())
+        digest = bytes(range(32))
+
+        assert client.sign(b"s" * 16, token, digest) is None
+        assert client.add_key(b"s" * 16, key)
+        assert "error" in client.request({"op": "decrypt", "salt": "c3Nzc3Nzc3Nzc3Nzc3Nzcw==",
+                                          "token": token.decode()})
+
+        signature = client.sign(b"s" * 16, token, digest)
+        pubkey = crypto.pubkey_from_secret(wif_to_secret(TEST_PRIVATE_KEY))
+        assert crypto.verify(pubkey, signature, digest)
+
+        assert client.remove(b"s" * 16)
+        assert client.status()["keys"] == 0
+
+    def test_keys_expire(self, monkeypatch):
+        """Test that a key is dropped after its time to live without use"""
+        server = KeyAgent("unused")
+        now = [1000.0]
+        monkeypatch.setattr(agent.time, "monotonic", lambda: now[0])
+        server.handle({"op": "add", "salt": "c2FsdA==", "key": "k", "ttl": 60})
+
+        now[0] += 59
+        assert server.handle({"op": "status"})["keys"] == 1
+        now[0] += 61
+        assert server.handle({"op": "status"})["keys"] == 0
+        assert "error" in server.handle({"op": "sign", "salt": "c2FsdA==", "token": "t", "digest": "00"})
+
+    def test_unreachable_agent_fails_soft(self, tmp_path):
+        """Test that a client without an agent reports nothing instead of raising"""
+        client = AgentClient(str(tmp_path / "missing.sock"), autostart=False)
+
+        assert client.status() is None
+        assert client.sign(b"s" * 16, b"token", bytes(32)) is None
+        assert not client.add_key(b"s" * 16, b"key")
+
+class TestWalletManagerWithAgent:
+    def test_next_invocation_signs_without_kdf_or_prompt(self, manager, monkeypatch):
+        """Test that a fresh manager signs through the agent without a password"""
+        fresh = WalletManager()
+        monkeypatch.setattr(WalletManager, "_derive_key", lambda self, salt: pytest.fail("KDF ran"))
+        monkeypatch.setattr("getpass.getpass", lambda prompt="": pytest.fail("password prompted"))
+
+        public_key, sign = fresh.get_signer()
+        digest = bytes(range(32))
+
+        assert public_key == crypto.pubkey_from_secret(wif_to_secret(TEST_PRIVATE_KEY))
+        assert crypto.verify(public_key, sign(digest), digest)
+        assert fresh._privkey is None
+
+    def test_cli_commands_are_built_without_kdf_or_prompt(self, manager, monkeypatch, tmp_path):
+        """Test that create_command builds --receive and --send from the stored public key"""
+        fresh = WalletManager()
+        calls = []
+        monkeypatch.setattr(commands, "wallet_manager", fresh)
+        monkeypatch.setattr(AddressDiscovery, "STATE_FILE", str(tmp_path / "discovery.json"))
+        monkeypatch.setattr(WalletManager, "_derive_key", lambda self, salt: calls.append("kdf"))
+        monkeypatch.setattr("getpass.getpass", lambda prompt="": calls.append("prompt"))
+        public_key = crypto.pubkey_from_secret(wif_to_secret(TEST_PRIVATE_KEY))
+        expected = create_p2wpkh_address(public_key, "testnet")
+
+        base = CommandArguments(network="testnet", output=None, check_balance=False, show_qr=False)
+        receive = commands.create_command(base._replace(receive=True))
+        send = commands.create_command(base._replace(send=expected, amount=0.001))
+        _, sign = fresh.get_signer()
+
+        assert isinstance(receive, commands.ReceiveCommand)
+        assert isinstance(send, commands.SendCommand)
+        assert receive.addresses[0][3] == send.addresses[0][3] == expected
+        assert crypto.verify(public_key, sign(bytes(32)), bytes(32))
+        assert calls == []
+
+    def test_signing_falls_back_to_the_password(self, manager, monkeypatch):
+        """Test that without the agent the key is decrypted here from the password"""
+        monkeypatch.setattr(config, "key_agent", False)
+        fresh = WalletManager()
+        monkeypatch.setattr("getpass.getpass", lambda prompt="": "correct horse")
+
+        public_key, sign = fresh.get_signer()
+
+        assert crypto.verify(public_key, sign(bytes(32)), bytes(32))
+        assert fresh._privkey == TEST_PRIVATE_KEY
+
+    def test_repeated_access_decrypts_once_and_keeps_state_file(self, manager, monkeypatch):
+        """Test that later calls neither derive the key again nor rewrite the state file"""
+        assert manager.get_active_wallet()["private_key"] == TEST_PRIVATE_KEY
+        monkeypatch.setattr(manager, "_decrypt_privkey", lambda data: pytest.fail("decrypted again"))
+        monkeypatch.setattr(manager, "_save_state", lambda: pytest.fail("state rewritten"))
+
+        for _ in range(3):
+            assert manager.get_active_wallet()["encrypted"] is False
+
+    def test_unload_forgets_key(self, manager, running_agent):
+        """Test that unloading the wallet removes its key from the agent"""
+        assert running_agent[1].status()["keys"] == 1
+
+        manager.unload_wallet()
+
+        assert running_agent[1].status()["keys"] == 0
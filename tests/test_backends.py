@@ -0,0 +1,99 @@
+import pytest
+
+from wallet import backends, network
+from wallet.backends import EsploraBackend, FakeBackend, create_backend, get_backend, set_backend
+from wallet.config import WalletConfig, NetworkConfig
+from wallet.exceptions import ConfigurationError, TransactionError
+from .mock_servers import FakeResponse, FakeTransport
+
+ADDRESS = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+
+API_URL = "http://localhost:3002"
+
+class TestEsploraBackend:
+    def test_requests_use_configured_url(self, monkeypatch):
+        """Test that lookups are sent to the configured Esplora instance"""
+        fake = FakeTransport({
+            f"{API_URL}/blocks/tip/height": "812345\n",
+            f"{API_URL}/blocks/tip/hash": "ab" * 32,
+            f"{API_URL}/address/addr/txs/chain/{'cd' * 32}": [],
+            f"{API_URL}/fee-estimates": {"1": 25.1, "3": 12.0, "6": 4.2, "144": 1.0},
+        })
+        monkeypatch.setattr(backends, "transport", fake)
+        backend = EsploraBackend(API_URL + "/", "http://localhost:5000")
+
+        assert backend.get_tip_height() == 812345
+        assert backend.get_tip_hash() == "ab" * 32
+        assert backend.get_address_transactions_chain("addr", "cd" * 32) == []
+        assert backend.get_fee_estimates()[6] == 4.2
+
+    def test_broadcast_rejection(self, monkeypatch):
+        """Test that a rejected transaction raises TransactionError"""
+        fake = FakeTransport({f"{API_URL}/tx": FakeResponse("bad-txns-inputs-missingorspent", 400)})
+        monkeypatch.setattr(backends, "transport", fake)
+
+        with pytest.raises(TransactionError, match="missingorspent"):
+            EsploraBackend(API_URL).broadcast("00")
+
+class TestBackendRegistry:
+    def test_backend_built_from_network_config(self):
+        """Test that get_backend uses WalletConfig.network_configs"""
+        backend = get_backend("signet")
+
+        assert isinstance(backend, EsploraBackend)
+        assert backend.api_url == "https://blockstream.info/signet/api"
+        assert get_backend("signet") is backend
+
+    def test_config_overrides_are_merged(self):
+        """Test pointing a network at a self-hosted backend from the config file"""
+        wallet_config = WalletConfig(network="testnet", network_configs={
+            "testnet": {"api_url": API_URL, "backend_options": {"explorer_url": "http://localhost:5000"}}
+        })
+        network_config = wallet_config.network_configs["testnet"]
+
+        assert network_config.fee_levels == {'high': 10, 'medium': 5, 'low': 1}
+        backend = create_backend(network_config)
+        assert backend.api_url == API_URL
+        assert backend.explorer_url == "http://localhost:5000"
+
+    def test_unknown_backend_type(self):
+        """Test that a misspelled backend type is a configuration error"""
+        network_config = NetworkConfig("", "", "testnet", {}, "tb1", backend="esplroa")
+
+        with pytest.raises(ConfigurationError):
+            create_backend(network_config)
+
+    def test_unsupported_network(self):
+        """Test that unknown networks are rejected"""
+        with pytest.raises(ValueError, match="Unsupported network"):
+            get_backend("regtest")
+
+class TestFakeBackend:
+    def test_mainnet_fee_rates_from_estimates(self):
+        """Test that fee priorities map to 1, 3 and 6 block targets"""
+        set_backend("mainnet", FakeBackend(fee_estimates={1: 30.2, 3: 14.0, 6: 2.5}))
+
+        assert network.get_recommended_fee_rate("mainnet") == {'high': 31, 'medium': 14, 'low': 3}
+
+    def test_balance_and_utxos_follow_spends(self):
+        """Test that the simulated chain tracks spent outputs"""
+        backend = FakeBackend(tip_height=10)
+        backend.add_transaction({
+            "txid": "aa" * 32, "vin": [],
+            "vout": [{"scriptpubkey_address": ADDRESS, "value": 7_000}],
+            "status": {"confirmed": True, "block_height": 9},
+        })
+        backend.add_transaction({
+            "txid": "bb" * 32,
+            "vin": [{"txid": "aa" * 32, "vout": 0,
+                     "prevout": {"scriptpubkey_address": ADDRESS, "value": 7_000}}],
+            "vout": [{"scriptpubkey": "0014" + "11" * 20, "scriptpubkey_address": ADDRESS, "value": 6_000}],
+            "status": {"confirmed": False},
+        })
+        set_backend("testnet", backend)
+
+        balance = network.fetch_address_balance(ADDRESS, "testnet")
+        assert balance["balance_sat"] == 6_000
+        assert balance["tx_count"] == 2
+        assert [u["txid"] for u in network.fetch_utxos(ADDRESS, "testnet")] == ["bb" * 32]
+        assert network.fetch_utxos_with_details(ADDRESS, "testnet")[0]["confirmations"] == 0
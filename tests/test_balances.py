@@ -0,0 +1,56 @@
+import threading
+import time
+from bitcoin.core import CTransaction
+from wallet import network
+from wallet.transactions import broadcast_transaction
+
+class TestConcurrentBalances:
+    def test_balances_fetched_in_parallel_with_limit(self, monkeypatch):
+        """Test that balance lookups overlap but respect max_in_flight"""
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def slow_balance(address, network_name):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return {"confirmed_balance_btc": 0.0, "address": address, "error": None}
+
+        monkeypatch.setattr(network, "fetch_address_balance", slow_balance)
+        addresses = [f"tb1qaddress{i}" for i in range(20)]
+
+        start = time.monotonic()
+        results = dict(network.iter_address_balances(addresses, "testnet", max_in_flight=5))
+        elapsed = time.monotonic() - start
+
+        assert set(results) == set(addresses)
+        assert all(results[a]["address"] == a for a in addresses)
+        assert peak == 5, f"Expected 5 concurrent lookups, saw {peak}"
+        assert elapsed < 20 * 0.05, "Lookups did not run concurrently"
+
+class TestBroadcastInvalidation:
+    def test_broadcast_drops_cached_balances(self, fake_backend):
+        """Test that an accepted transaction drops the network's cached balances"""
+        network.balance_cache.get("testnet", "tb1qsender", lambda: {"balance_sat": 5000})
+        network.balance_cache.get("mainnet", "bc1qother", lambda: {"balance_sat": 1})
+
+        broadcast_transaction(CTransaction(), "testnet")
+
+        assert fake_backend.count("broadcast") == 1
+        assert not network.balance_cache.contains("testnet", "tb1qsender")
+        assert network.balance_cache.contains("mainnet", "bc1qother")
+
+    def test_forget_balances_of_addresses(self):
+        """Test that only the addresses a send touched are dropped"""
+        for address in ("tb1qsender", "tb1qbystander"):
+            network.balance_cache.get("testnet", address, lambda: {"balance_sat": 5000})
+
+        network.forget_balances("testnet", ["tb1qsender", "tb1qrecipient"])
+
+        assert not network.balance_cache.contains("testnet", "tb1qsender")
+        assert network.balance_cache.contains("testnet", "tb1qbystander")
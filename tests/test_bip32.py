@@ -0,0 +1,152 @@
+import pytest
+
+from wallet import commands, keys
+from wallet.bip32 import ExtendedPublicKey, ExtendedPrivateKey, HARDENED, parse_path
+from wallet.discovery import AddressDiscovery
+from wallet.keys import WatchOnlyAccount, get_account_xpub, get_account_key, derive_segwit_addresses, to_hdkey
+from wallet.wallet_manager import WalletManager
+
+MNEMONIC = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+# BIP84 test vector account key m/84'/0'/0'
+ZPUB = "zpub6rFR7y4Q2AijBEqTUquhVz398htDFrtymD9xYYfG1m4wAcvPhXNfE3EfH1r1ADqtfSdVCToUG868RvUUkgDKf31mGDtKsAYz2oz2AGutZYs"
+ZPRV = "zprvAdG4iTXWBoARxkkzNpNh8r6Qag3irQB8PzEMkAFeTRXxHpbF9z4QgEvBRmfvqWvGp42t42nvgGpNgYSJA9iefm1yYNZKEm7z6qUWCroSQnE"
+
+# BIP32 test vector 1
+SEED_1 = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+VECTOR_1 = {
+    "m": ("xprv9s21ZrQH143K3QTDL4LXw2F7HEK3wJUD2nW2nRk4stbPy6cq3jPPqjiChkVvvNKmPGJxWUtg6LnF5kejMRNNU3TGtRBeJgk33yuGBxrMPHi",
+          "xpub661MyMwAqRbcFtXgS5sYJABqqG9YLmC4Q1Rdap9gSE8NqtwybGhePY2gZ29ESFjqJoCu1Rupje8YtGqsefD265TMg7usUDFdp6W1EGMcet8"),
+    "m/0H": ("xprv9uHRZZhk6KAJC1avXpDAp4MDc3sQKNxDiPvvkX8Br5ngLNv1TxvUxt4cV1rGL5hj6KCesnDYUhd7oWgT11eZG7XnxHrnYeSvkzY7d2bhkJ7",
+             "xpub68Gmy5EdvgibQVfPdqkBBCHxA5htiqg55crXYuXoQRKfDBFA1WEjWgP6LHhwBZeNK1VTsfTFUHCdrfp1bgwQ9xv5ski8PX9rL2dZXvgGDnw"),
+    "m/0H/1/2H/2/1000000000": ("xprvA41z7zogVVwxVSgdKUHDy1SKmdb533PjDz7J6N6mV6uS3ze1ai8FHa8kmHScGpWmj4WggLyQjgPie1rFSruoUihUZREPSL39UNdE3BBDu76",
+                               "xpub6H1LXWLaKsWFhvm6RVpEL9P4KfRZSW7abD2ttkWP3SSQvnyA8FSVqNTEcYFgJS2UaFcxupHiYkro49S8yGasTvXEYBVPamhGW6cFJodrTHy"),
+}
+
+class TestExtendedPublicKey:
+    def test_round_trip(self):
+        """Test that parsing and serializing an extended key is lossless"""
+        node = ExtendedPublicKey.from_string(ZPUB)
+
+        assert node.depth == 3
+        assert node.to_string() == ZPUB
+
+    def test_rejects_bad_keys(self):
+        """Test that corrupted strings and hardened children are refused"""
+        with pytest.raises(ValueError):
+            ExtendedPublicKey.from_string(ZPUB[:-1] + "t")
+        with pytest.raises(ValueError):
+            ExtendedPublicKey.from_string(ZPUB).child(0x80000000)
+
+class TestExtendedPrivateKey:
+    def test_bip32_vector_1(self):
+        """Test private and public serialization along BIP32 test vector 1"""
+        master = ExtendedPrivateKey.from_seed(SEED_1)
+
+        for path, (xprv, xpub) in VECTOR_1.items():
+            node = master.derive_path(path)
+            assert node.to_string() == xprv
+            assert node.public_key().to_string() == xpub
+            assert ExtendedPrivateKey.from_string(xprv).to_string() == xprv
+
+    def test_bip32_vector_3_keeps_leading_zeros(self):
+        """Test BIP32 test vector 3, whose master secret starts with a zero byte"""
+        seed = bytes.fromhex(
+            "4b381541583be4423346c643850da4b320e46a87ae3d2a4e6da11eba819cd4acba45d239"
+            "319ac14f863b8d5ab5a0d0c64d2e8a1e7d1457df2e5a3c51c73235be"
+        )
+        master = ExtendedPrivateKey.from_seed(seed)
+
+        assert master.to_string() == "xprv9s21ZrQH143K25QhxbucbDDuQ4naNntJRi4KUfWT7xo4EKsHt2QJDu7KXp1A3u7Bi1j8ph3EGsZ9Xvz9dGuVrtHHs7pXeTzjuxBrCmmhgC6"
+        assert master.child(HARDENED).to_string() == "xprv9uPDJpEQgRQfDcW7BkF7eTya6RPxXeJCqCJGHuCJ4GiRVLzkTXBAJMu2qaMWPrS7AANYqdq6vcBcBUdJCVVFceUvJFjaPdGZ2y9WACViL4L"
+
+    def test_public_derivation_matches_private(self):
+        """Test that CKDpub from an xpub gives the xpub of the CKDpriv child"""
+        parent = ExtendedPublicKey.from_string(VECTOR_1["m/0H"][1])
+
+        assert parent.derive_path("1").to_string() == \
+            ExtendedPrivateKey.from_seed(SEED_1).derive_path("m/0H/1").public_key().to_string()
+
+    def test_parse_path(self):
+        """Test path parsing with both hardened markers"""
+        assert parse_path("m/84'/0h/0H/1/5") == [84 + HARDENED, HARDENED, HARDENED, 1, 5]
+        assert parse_path("m") == []
+        for bad in ("m/x", "m/1//2", f"m/{HARDENED}"):
+            with pytest.raises(ValueError):
+                parse_path(bad)
+
+    def test_bip84_account_and_first_key(self):
+        """Test the BIP84 account zprv and the WIF of m/84'/0'/0'/0/0"""
+        account = get_account_key(MNEMONIC, "mainnet")
+
+        assert account.to_string() == ZPRV
+        assert derive_segwit_addresses(account.child(0), 0, 1, "mainnet")[0][1] == \
+            "KyZpNDKnfs94vbrwhJneDi77V6jF64PWPF8x5cdJb8ifgg2DUc9d"
+
+    def test_bitcoinlib_conversion(self):
+        """Test that the legacy HDKey conversion describes the same node"""
+        account = get_account_key(MNEMONIC, "testnet")
+        legacy = to_hdkey(account, "testnet")
+
+        assert legacy.child_private(0).child_private(3).public_byte == account.derive_path("0/3").key
+
+class TestWatchOnlyAccount:
+    def test_account_xpub_matches_bip84_vector(self):
+        """Test the account key exported from the BIP84 test mnemonic"""
+        assert get_account_xpub(MNEMONIC, "mainnet") == ZPUB
+
+    def test_derives_bip84_addresses(self):
+        """Test receive and change addresses against the BIP84 vectors"""
+        account = WatchOnlyAccount(ZPUB, "mainnet")
+
+        receive = account.derive(0, 0, 2)
+        change = account.derive(1, 0, 1)
+
+        assert [entry[3] for entry in receive] == [
+            "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu",
+            "bc1qnjg0jd8228aq7egyzacy8cys3knf9xvrerkf9g",
+        ]
+        assert receive[0][2] == "0330d54fd0dd420a6e5f8d3624f5f3482cae350f79d5f0753bf5beef9c2d91af3c"
+        assert change[0][3] == "bc1q8c6fshw2dlwun7ekn9qwf37cu2rn755upcp6el"
+        assert all(entry[1] is None for entry in receive + change)
+
+    def test_matches_private_derivation(self):
+        """Test that public derivation agrees with deriving through private keys"""
+        xpub = get_account_xpub(MNEMONIC, "testnet")
+        private = derive_segwit_addresses(get_account_key(MNEMONIC, "testnet").child(1), 0, 3, "testnet")
+
+        public = WatchOnlyAccount(xpub, "testnet").derive(1, 0, 3)
+
+        assert [entry[3] for entry in public] == [entry[3] for entry in private]
+        assert [entry[2] for entry in public] == [entry[2] for entry in private]
+
+    def test_chain_nodes_and_addresses_are_cached(self, monkeypatch):
+        """Test that chain nodes are derived once and stored addresses are not re-derived"""
+        account = WatchOnlyAccount(ZPUB, "mainnet")
+        assert account.chain_key(0) is account.chain_key(0)
+
+        account.derive(0, 0, 5)
+        monkeypatch.setattr(ExtendedPublicKey, "child", lambda self, index: pytest.fail("derived again"))
+        assert len(WatchOnlyAccount(ZPUB, "mainnet").derive(0, 0, 5)) == 5
+        assert keys.address_store.stats()["hits"] == 5
+
+class TestWatchAddresses:
+    def test_read_only_commands_skip_private_key(self, tmp_path, monkeypatch):
+        """Test that balance lookups use xpub-derived addresses up to the discovered mark"""
+        monkeypatch.setattr(WalletManager, "STATE_FILE", str(tmp_path / "wallet_state.json"))
+        monkeypatch.setattr(AddressDiscovery, "STATE_FILE", str(tmp_path / "discovery.json"))
+        manager = WalletManager()
+        manager.load_wallet("not-a-key", network="mainnet", encrypt=False, account_xpub=ZPUB,
+                            addresses=[(0, None, None, "bc1qimportedkeyaddress")])
+        monkeypatch.setattr(commands, "wallet_manager", manager)
+        monkeypatch.setattr(manager, "get_active_wallet", lambda: pytest.fail("private key accessed"))
+
+        account = ExtendedPublicKey.from_string(ZPUB)
+        AddressDiscovery("mainnet")._save_state(f"mainnet:{account.fingerprint.hex()}", {0: 1, 1: -1})
+
+        addresses = [entry[3] for entry in commands.watch_addresses()]
+
+        assert addresses == [
+            "bc1qimportedkeyaddress",
+            "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu",
+            "bc1qnjg0jd8228aq7egyzacy8cys3knf9xvrerkf9g",
+        ]
@@ -0,0 +1,158 @@
+import pytest
+
+from wallet import network
+from wallet.backends import set_backend, create_backend
+from wallet.bitcoind import BitcoindBackend, SCAN_TIMEOUT
+from wallet.config import WalletConfig
+from wallet.exceptions import TransactionError
+from wallet.transport import transport
+from .mock_servers import StubHTTPServer, json_rpc_route
+
+ADDRESS = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+OTHER = "tb1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3q0sl5k7"
+BLOCK_HASH = "00" * 31 + "ab"
+
+# Outpoints an unconfirmed transaction already spends
+MEMPOOL_SPENT = set()
+
+def scan(action, descriptors):
+    """Canned scantxoutset result with one output for each scanned address."""
+    return {
+        "success": True,
+        "unspents": [
+            {"txid": f"{i + 1:064x}", "vout": 0, "desc": f"{d}#checksum",
+             "amount": 0.0001 * (i + 1), "height": 100}
+            for i, d in enumerate(descriptors)
+        ],
+    }
+
+def gettxout(txid, vout, include_mempool):
+    """Canned gettxout result: null for outputs spent in the mempool."""
+    if include_mempool and (txid, vout) in MEMPOOL_SPENT:
+        return None
+    return {"bestblock": BLOCK_HASH, "confirmations": 5, "value": 0.0001}
+
+HANDLERS = {
+    "scantxoutset": scan,
+    "gettxout": gettxout,
+    "getblockhash": lambda height: BLOCK_HASH,
+    "getblockheader": lambda block_hash: {"hash": block_hash, "time": 1_700_000_000},
+    "getblockchaininfo": lambda: {"blocks": 104, "bestblockhash": BLOCK_HASH},
+    "getblockcount": lambda: 104,
+    "getrawtransaction": lambda txid, verbosity: {
+        "txid": txid, "version": 2, "locktime": 0, "size": 110, "weight": 440,
+        "vin": [{"txid": "cc" * 32, "vout": 1}],
+        "vout": [{"value": 0.0001, "n": 0, "scriptPubKey": {"hex": "0014" + "00" * 20, "address": ADDRESS}}],
+        "confirmations": 5, "blockhash": BLOCK_HASH, "blocktime": 1_700_000_000,
+    },
+    "estimatesmartfee": lambda target: {"feerate": 0.00012, "blocks": target} if target < 6
+                                       else {"errors": ["Insufficient data or no feerate found"], "blocks": 6},
+}
+
+def recorded(methods):
+    """HANDLERS that append each called method name to a list."""
+    def record(name, handler):
+        return lambda *params: methods.append(name) or handler(*params)
+    return {name: record(name, handler) for name, handler in HANDLERS.items()}
+
+@pytest.fixture
+def node():
+    """Local fake bitcoind serving testnet lookups; server.methods lists the RPC calls."""
+    MEMPOOL_SPENT.clear()
+    methods = []
+    with StubHTTPServer({"/": json_rpc_route(recorded(methods))}) as server:
+        server.methods = methods
+        set_backend("testnet", BitcoindBackend(server.url, rpc_user="user", rpc_password="pass"))
+        yield server
+
+class TestBitcoindBackend:
+    def test_balances_use_one_batched_scan(self, node):
+        """Test that all addresses are covered by a single scantxoutset call"""
+        balances = dict(network.iter_address_balances([ADDRESS, OTHER], "testnet"))
+
+        assert node.methods == ["scantxoutset", "gettxout", "gettxout"]
+        assert node.count("/") == 2
+        assert balances[ADDRESS]["balance_sat"] == 10_000
+        assert balances[OTHER]["balance_sat"] == 20_000
+        _, _, headers = node.requests[0]
+        assert headers["Authorization"].startswith("Basic ")
+
+    def test_utxos_with_details(self, node):
+        """Test UTXO status from block headers and scripts derived from the address"""
+        utxos = network.fetch_utxos_with_details(ADDRESS, "testnet")
+
+        assert utxos[0]["value"] == 10_000
+        assert utxos[0]["confirmations"] == 5
+        assert utxos[0]["script_pubkey"] == "0014751e76e8199196d454941c45d1b3a323f1433bd6"
+        assert "getrawtransaction" not in node.methods
+        assert utxos[0]["date"] != "Pending"
+
+    def test_outputs_spent_in_mempool_are_not_offered(self, node):
+        """Test that an output an unconfirmed transaction spends is left out and shown as pending"""
+        MEMPOOL_SPENT.add((f"{1:064x}", 0))
+
+        assert network.fetch_utxos(ADDRESS, "testnet") == []
+        balance = network.fetch_address_balance(ADDRESS, "testnet")
+        assert balance["confirmed_balance_btc"] == 0.0001
+        assert balance["balance_sat"] == 0
+
+    def test_utxos_for_many_addresses_use_one_scan(self, node, monkeypatch):
+        """Test that listing UTXOs scans the UTXO set once, with the longer scan timeout"""
+        timeouts = []
+        post = transport.post
+        monkeypatch.setattr(transport, "post", lambda *a, **kw: timeouts.append(kw.get("timeout")) or post(*a, **kw))
+
+        utxos = dict(network.iter_utxos_with_details([ADDRESS, OTHER], "testnet"))
+
+        assert [u["value"] for u in utxos[ADDRESS]] == [10_000]
+        assert [u["value"] for u in utxos[OTHER]] == [20_000]
+        assert node.methods.count("scantxoutset") == 1
+        assert timeouts[0] == SCAN_TIMEOUT
+
+    def test_block_times_follow_a_reorg(self):
+        """Test that cached block hashes near a new best block are fetched again"""
+        chain = {"tip": "11" * 32, "hash": BLOCK_HASH, "time": 1_700_000_000}
+        handlers = dict(HANDLERS)
+        handlers["scantxoutset"] = lambda action, descriptors: {
+            **scan(action, descriptors), "height": 104, "bestblock": chain["tip"]
+        }
+        handlers["getblockhash"] = lambda height: chain["hash"]
+        handlers["getblockheader"] = lambda block_hash: {"hash": block_hash, "time": chain["time"]}
+
+        with StubHTTPServer({"/": json_rpc_route(handlers)}) as server:
+            backend = BitcoindBackend(server.url)
+            before = backend.get_utxos(ADDRESS)[0]["status"]
+            assert backend.get_utxos(ADDRESS)[0]["status"] == before
+
+            chain.update(tip="22" * 32, hash="00" * 31 + "cd", time=1_700_000_100)
+            after = backend.get_utxos(ADDRESS)[0]["status"]
+
+        assert before["block_hash"] == BLOCK_HASH
+        assert after == {"confirmed": True, "block_height": 100,
+                         "block_hash": "00" * 31 + "cd", "block_time": 1_700_000_100}
+
+    def test_fee_rates_and_tip(self, node):
+        """Test estimatesmartfee conversion with fallback for missing targets"""
+        set_backend("mainnet", BitcoindBackend(node.url))
+
+        assert network.get_recommended_fee_rate("mainnet") == {'high': 12, 'medium': 12, 'low': 5}
+        assert network.get_blockchain_info("testnet") == {"block_height": 104, "block_hash": BLOCK_HASH}
+
+    def test_broadcast_rejection(self):
+        """Test that sendrawtransaction errors raise TransactionError"""
+        def reject(tx_hex):
+            raise ValueError("bad-txns-inputs-missingorspent")
+
+        with StubHTTPServer({"/": json_rpc_route({"sendrawtransaction": reject})}) as server:
+            with pytest.raises(TransactionError, match="missingorspent"):
+                BitcoindBackend(server.url).broadcast("00")
+
+    def test_default_port_from_network(self):
+        """Test selecting the backend from network_configs"""
+        wallet_config = WalletConfig(network="signet", network_configs={
+            "signet": {"backend": "bitcoind", "backend_options": {"cookie_file": "~/.bitcoin/signet/.cookie"}}
+        })
+        backend = create_backend(wallet_config.network_configs["signet"])
+
+        assert isinstance(backend, BitcoindBackend)
+        assert backend.rpc_url == "http://127.0.0.1:38332"
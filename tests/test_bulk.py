@@ -0,0 +1,88 @@
+import csv
+import json
+import pytest
+
+from wallet import commands
+from wallet.bulk import BulkDeriver, parse_range, derive_range
+from wallet.cli import CommandArguments
+from wallet.keys import WatchOnlyAccount
+from wallet.wallet_manager import WalletManager
+
+# BIP84 test vector account key m/84'/0'/0'
+ZPUB = "zpub6rFR7y4Q2AijBEqTUquhVz398htDFrtymD9xYYfG1m4wAcvPhXNfE3EfH1r1ADqtfSdVCToUG868RvUUkgDKf31mGDtKsAYz2oz2AGutZYs"
+
+class TestParseRange:
+    def test_valid_and_invalid_ranges(self):
+        """Test START:END parsing with END exclusive"""
+        assert parse_range("0:1000") == (0, 1000)
+        for bad in ("10", "5:5", "9:3", "a:b", "-1:4"):
+            with pytest.raises(ValueError):
+                parse_range(bad)
+
+class TestBulkDeriver:
+    def test_shards_cover_the_range(self):
+        """Test that shards are consecutive and the last one is cut short"""
+        deriver = BulkDeriver(ZPUB, "mainnet", workers=1, shard_size=4)
+
+        assert list(deriver.shards(3, 13)) == [(3, 7), (7, 11), (11, 13)]
+
+    def test_process_pool_matches_watch_only_derivation(self):
+        """Test that sharded rows arrive in order and match single-process derivation"""
+        deriver = BulkDeriver(ZPUB, "mainnet", workers=2, shard_size=3)
+
+        rows = list(deriver.rows(2, 12))
+        expected = WatchOnlyAccount(ZPUB, "mainnet").derive(0, 2, 10)
+
+        assert [row[0] for row in rows] == list(range(2, 12))
+        assert [(row[1], row[3]) for row in rows] == [(entry[2], entry[3]) for entry in expected]
+        assert all(row[2].startswith("0014") and len(row[2]) == 44 for row in rows)
+
+    def test_limits_pending_shards(self, monkeypatch):
+        """Test that no more than two shards per worker wait for collection"""
+        submitted = []
+
+        class InlineExecutor:
+            def submit(self, func, *args):
+                submitted.append(args[3])
+                class Done:
+                    def result(self):
+                        return func(*args)
+                return Done()
+
+        deriver = BulkDeriver(ZPUB, "mainnet", workers=2, shard_size=1)
+        stream = deriver._ordered(InlineExecutor(), 0, 10)
+        next(stream)
+
+        assert submitted == [0, 1, 2, 3]
+
+class TestOutput:
+    def test_csv_and_jsonl_files(self, tmp_path):
+        """Test that the file extension picks the format and stats are reported"""
+        deriver = BulkDeriver(ZPUB, "mainnet", workers=1)
+
+        stats = derive_range(deriver, 0, 2, str(tmp_path / "pool.csv"))
+        derive_range(deriver, 0, 2, str(tmp_path / "pool.jsonl"))
+
+        with open(tmp_path / "pool.csv", newline="") as f:
+            rows = list(csv.DictReader(f))
+        with open(tmp_path / "pool.jsonl") as f:
+            lines = [json.loads(line) for line in f]
+        assert stats["count"] == 2 and stats["rate"] > 0
+        assert rows[0]["address"] == "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu"
+        assert lines[1] == {**rows[1], "index": 1}
+
+    def test_command_uses_active_wallet_xpub(self, tmp_path, monkeypatch, capsys):
+        """Test --derive-range against the loaded wallet's account xpub"""
+        monkeypatch.setattr(WalletManager, "STATE_FILE", str(tmp_path / "wallet_state.json"))
+        manager = WalletManager()
+        manager.load_wallet("not-a-key", network="mainnet", encrypt=False, account_xpub=ZPUB,
+                            addresses=[(0, None, None, "bc1qimportedkeyaddress")])
+        monkeypatch.setattr(commands, "wallet_manager", manager)
+        args = CommandArguments(network="testnet", output=None, check_balance=False, show_qr=False,
+                                derive_range="0:1", derive_output=str(tmp_path / "out.jsonl"), workers=1)
+
+        commands.create_command(args).execute()
+
+        with open(tmp_path / "out.jsonl") as f:
+            assert json.loads(f.readline())["address"] == "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu"
+        assert "addresses/s" in capsys.readouterr().out
@@ -0,0 +1,72 @@
+import time
+
+from wallet import network
+from wallet.cache import BalanceCache
+from wallet.chaintip import ChainTip
+from .test_history import ADDRESS, make_tx
+
+class TestBalanceCache:
+    def test_repeated_lookups_hit_cache(self, fake_backend):
+        """Test that a fresh entry is served without another request"""
+        fake_backend.add_transaction(make_tx(1))
+
+        first = network.fetch_address_balance(ADDRESS, "testnet")
+        second = network.fetch_address_balance(ADDRESS, "testnet")
+
+        assert first == second
+        assert first["balance_sat"] == 5_000
+        assert fake_backend.count("get_address_stats") == 1
+
+    def test_lookups_check_the_tip_first(self, fake_backend, monkeypatch):
+        """Test that a cached balance is not served once the chain has moved on"""
+        monkeypatch.setattr(network, "chain_tip", ChainTip(ttl=0))
+        fake_backend.add_transaction(make_tx(1))
+        network.fetch_address_balance(ADDRESS, "testnet")
+        network.fetch_address_balance(ADDRESS, "testnet")
+        fetched = fake_backend.count("get_address_stats")
+
+        assert network.fetch_address_balance(ADDRESS, "testnet")["balance_sat"] == 5_000
+        assert fake_backend.count("get_address_stats") == fetched
+
+        fake_backend.add_transaction(make_tx(2))
+        fake_backend.set_tip(1001, "bb" * 32)
+        assert network.fetch_address_balance(ADDRESS, "testnet")["balance_sat"] == 10_000
+        assert fake_backend.count("get_address_stats") == fetched + 1
+
+    def test_new_tip_invalidates_entries(self):
+        """Test that observing a different tip hash drops cached balances"""
+        cache = BalanceCache(ttl=60, stale_ttl=0)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return {"confirmed": len(calls)}
+
+        cache.observe_tip("testnet", "aa" * 32)
+        assert cache.get("testnet", ADDRESS, fetch)["confirmed"] == 1
+        cache.observe_tip("testnet", "aa" * 32)
+        assert cache.get("testnet", ADDRESS, fetch)["confirmed"] == 1
+
+        cache.observe_tip("testnet", "bb" * 32)
+        assert cache.get("testnet", ADDRESS, fetch)["confirmed"] == 2
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test stale-while-revalidate returns the old value and refreshes it"""
+        cache = BalanceCache(ttl=0, stale_ttl=60)
+        values = iter([{"confirmed": 1}, {"confirmed": 2}])
+
+        assert cache.get("testnet", ADDRESS, lambda: next(values))["confirmed"] == 1
+        assert cache.get("testnet", ADDRESS, lambda: next(values))["confirmed"] == 1
+
+        deadline = time.time() + 2
+        while cache._refreshing and time.time() < deadline:
+            time.sleep(0.01)
+        assert cache._entries[("testnet", ADDRESS)].value["confirmed"] == 2
+
+    def test_errors_are_not_cached(self):
+        """Test that failed lookups are retried on the next call"""
+        cache = BalanceCache(ttl=60, stale_ttl=0)
+        results = iter([{"error": "timeout"}, {"confirmed": 7}])
+
+        assert "error" in cache.get("testnet", ADDRESS, lambda: next(results))
+        assert cache.get("testnet", ADDRESS, lambda: next(results))["confirmed"] == 7
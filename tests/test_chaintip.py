@@ -0,0 +1,43 @@
+from wallet import network, chaintip
+from wallet.cache import BalanceCache
+from wallet.chaintip import ChainTip
+
+class TestChainTip:
+    def test_tip_is_memoized(self, fake_backend):
+        """Test that height and hash are fetched once within the memo window"""
+        fake_backend.set_tip(200, "aa" * 32)
+        tip = ChainTip(ttl=60)
+
+        assert tip.get("testnet") == {"height": 200, "hash": "aa" * 32}
+        assert tip.height("testnet") == 200
+        assert tip.confirmations("testnet", 195) == 6
+        assert tip.confirmations("testnet", None) == 0
+        assert fake_backend.count("get_tip_height") == 1
+        assert fake_backend.count("get_tip_hash") == 1
+
+        tip.invalidate("testnet")
+        tip.get("testnet")
+        assert fake_backend.count("get_tip_height") == 2
+
+    def test_new_tip_invalidates_balances(self, fake_backend, monkeypatch):
+        """Test that the provider reports fetched hashes to the balance cache"""
+        fake_backend.set_tip(200, "aa" * 32)
+        cache = BalanceCache(ttl=60, stale_ttl=0)
+        monkeypatch.setattr(chaintip, "balance_cache", cache)
+        tip = ChainTip(ttl=0)
+
+        tip.get("testnet")
+        cache.get("testnet", "addr", lambda: {"balance_sat": 1})
+        fake_backend.set_tip(201, "bb" * 32)
+        tip.get("testnet")
+
+        assert cache.stats()["entries"] == 0
+
+    def test_info_commands_share_one_tip(self, fake_backend):
+        """Test that network info commands need only one tip snapshot"""
+        fake_backend.set_tip(300, "cc" * 32)
+
+        info = network.get_mempool_info("testnet")
+        assert info["block_tip"] == 300 and info["last_block_hash"] == "cc" * 32
+        assert network.get_blockchain_info("testnet")["block_height"] == 300
+        assert len(fake_backend.calls) == 2
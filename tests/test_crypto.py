@@ -0,0 +1,89 @@
+import pytest
+from bitcoin import SelectParams
+from bitcoin.wallet import CBitcoinSecret
+
+from wallet import crypto
+from wallet.bip32 import ExtendedPublicKey
+from wallet.exceptions import ConfigurationError
+from wallet.keys import wif_to_secret, secret_to_wif
+from . import TEST_PRIVATE_KEY
+
+SECRET = bytes.fromhex("0c28fca386c7a227600b2fe50b7cae11ec86d3bf1fbe471be89827e19d72aa1d")
+DIGEST = bytes.fromhex("9302bda273a887cb40c13e02a50b4071a31fd3aae3ae04021b0b843dd61ad18e")
+# BIP84 test vector account key m/84'/0'/0'
+ZPUB = "zpub6rFR7y4Q2AijBEqTUquhVz398htDFrtymD9xYYfG1m4wAcvPhXNfE3EfH1r1ADqtfSdVCToUG868RvUUkgDKf31mGDtKsAYz2oz2AGutZYs"
+
+@pytest.fixture(params=crypto.available_backends())
+def backend(request, monkeypatch):
+    """Run a test once per installed backend, as the active backend."""
+    active = crypto.create_crypto_backend(request.param)
+    monkeypatch.setattr(crypto, "_backend", active)
+    return active
+
+class TestCryptoBackends:
+    def test_public_keys_match_python_bitcoinlib(self, backend):
+        """Test that every backend derives the same key as the previous library"""
+        SelectParams("testnet")
+        expected = CBitcoinSecret.from_secret_bytes(SECRET).pub
+
+        assert backend.pubkey(SECRET) == expected
+        assert backend.tweak_add(backend.pubkey(b"\x00" * 31 + b"\x01"), SECRET[:31] + b"\x1c") == \
+            backend.pubkey(SECRET[:31] + b"\x1d")
+
+    def test_signatures_are_low_s_and_verify_everywhere(self, backend):
+        """Test that signatures are low-S DER and accepted by every backend"""
+        pubkey = backend.pubkey(SECRET)
+        signature = backend.sign(SECRET, DIGEST)
+
+        s_length = signature[5 + signature[3]]
+        s = int.from_bytes(signature[6 + signature[3]:6 + signature[3] + s_length], "big")
+        assert signature[0] == 0x30 and s <= crypto.CURVE_ORDER // 2
+        for name in crypto.available_backends():
+            other = crypto.create_crypto_backend(name)
+            assert other.verify(pubkey, signature, DIGEST)
+            assert not other.verify(pubkey, signature, DIGEST[::-1])
+
+    def test_ckdpub_matches_bip84_vector(self, backend):
+        """Test that xpub derivation gives the BIP84 receive key on every backend"""
+        child = ExtendedPublicKey.from_string(ZPUB).child(0).child(0)
+
+        assert child.key.hex() == "0330d54fd0dd420a6e5f8d3624f5f3482cae350f79d5f0753bf5beef9c2d91af3c"
+
+    def test_rejects_invalid_secrets(self, backend):
+        """Test that zero and out-of-range secrets are refused"""
+        with pytest.raises(ValueError):
+            backend.pubkey(b"\x00" * 32)
+        with pytest.raises(ValueError):
+            backend.sign(crypto.CURVE_ORDER.to_bytes(32, "big"), DIGEST)
+
+class TestBackendSelection:
+    def test_auto_prefers_the_first_available(self, monkeypatch):
+        """Test that auto follows the preference order and can be overridden"""
+        monkeypatch.setattr(crypto, "_backend", None)
+
+        assert crypto.set_crypto_backend("auto").name == crypto.available_backends()[0]
+        assert crypto.set_crypto_backend("fastecdsa").name == "fastecdsa"
+        assert crypto.get_crypto_backend().name == "fastecdsa"
+
+    def test_unknown_or_missing_backend(self, monkeypatch):
+        """Test that unusable backends raise a configuration error"""
+        monkeypatch.setattr(crypto.CoincurveBackend, "available", classmethod(lambda cls: False))
+
+        with pytest.raises(ConfigurationError):
+            crypto.create_crypto_backend("openssl3")
+        with pytest.raises(ConfigurationError):
+            crypto.create_crypto_backend("coincurve")
+
+class TestWif:
+    def test_round_trip(self):
+        """Test decoding a WIF key and encoding it again"""
+        SelectParams("testnet")
+        secret = wif_to_secret(TEST_PRIVATE_KEY, "testnet")
+
+        assert secret_to_wif(secret, "testnet") == TEST_PRIVATE_KEY
+        assert crypto.pubkey_from_secret(secret) == CBitcoinSecret(TEST_PRIVATE_KEY).pub
+
+    def test_rejects_wrong_network(self):
+        """Test that a testnet key is refused for mainnet"""
+        with pytest.raises(ValueError):
+            wif_to_secret(TEST_PRIVATE_KEY, "mainnet")
@@ -0,0 +1,84 @@
+import json
+import pytest
+from wallet import network
+from wallet.keys import get_account_key, derive_segwit_addresses
+from wallet.discovery import AddressDiscovery, RECEIVE_CHAIN, CHANGE_CHAIN
+from wallet.exceptions import NetworkError
+
+MNEMONIC = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+
+@pytest.fixture(scope="module")
+def account_key():
+    return get_account_key(MNEMONIC, "testnet")
+
+def fund(backend, account_key, chain: int, index: int) -> None:
+    """Give the address at m/84'/1'/0'/chain/index one confirmed transaction."""
+    address = derive_segwit_addresses(account_key.child(chain), index, 1, "testnet")[0][3]
+    backend.add_transaction({
+        "txid": f"{chain:02x}{index:062x}",
+        "vin": [],
+        "vout": [{"scriptpubkey_address": address, "value": 10_000}],
+        "status": {"confirmed": True, "block_height": 900, "block_hash": "00" * 32, "block_time": 1_700_000_000},
+    })
+
+class TestAddressDiscovery:
+    def test_finds_used_addresses_on_both_chains(self, fake_backend, account_key, tmp_path):
+        """Test that scanning continues past gaps shorter than the gap limit"""
+        fund(fake_backend, account_key, RECEIVE_CHAIN, 2)
+        fund(fake_backend, account_key, RECEIVE_CHAIN, 7)
+        fund(fake_backend, account_key, CHANGE_CHAIN, 0)
+
+        discovery = AddressDiscovery("testnet", gap_limit=5, batch_size=3,
+                                     state_path=str(tmp_path / "discovery.json"))
+        chains = discovery.discover(account_key)
+
+        assert [entry[0] for entry in chains[RECEIVE_CHAIN]] == list(range(8))
+        assert [entry[0] for entry in chains[CHANGE_CHAIN]] == [0]
+        assert chains[RECEIVE_CHAIN][0][3] == "tb1q6rz28mcfaxtmd6v789l9rrlrusdprr9pqcpvkl"
+
+    def test_stops_after_gap_limit(self, fake_backend, account_key, tmp_path):
+        """Test that usage beyond the gap limit is not found"""
+        fund(fake_backend, account_key, RECEIVE_CHAIN, 6)
+
+        discovery = AddressDiscovery("testnet", gap_limit=4, batch_size=2,
+                                     state_path=str(tmp_path / "discovery.json"))
+        chains = discovery.discover(account_key)
+
+        assert chains[RECEIVE_CHAIN] == []
+        assert fake_backend.count("get_address_stats") == 8
+
+    def test_high_water_marks_are_persisted(self, fake_backend, account_key, tmp_path):
+        """Test that a second scan starts lookups after the saved marks"""
+        state_path = tmp_path / "discovery.json"
+        fund(fake_backend, account_key, RECEIVE_CHAIN, 2)
+        AddressDiscovery("testnet", gap_limit=3, state_path=str(state_path)).discover(account_key)
+
+        saved = json.loads(state_path.read_text())
+        assert saved == {f"testnet:{account_key.fingerprint.hex()}": {"0": 2, "1": -1}}
+
+        fake_backend.calls.clear()
+        network.balance_cache.invalidate()
+        discovery = AddressDiscovery("testnet", gap_limit=3, state_path=str(state_path))
+        chains = discovery.discover(account_key)
+
+        assert len(chains[RECEIVE_CHAIN]) == 3
+        # Only the lookahead past index 2 and the change chain are queried again
+        assert fake_backend.count("get_address_stats") == 6
+
+    def test_lookup_errors_raise(self, account_key, tmp_path, monkeypatch):
+        """Test that a failed usage lookup aborts discovery"""
+        monkeypatch.setattr(network, "iter_address_balances",
+                            lambda addresses, net: ((a, {"error": "API request failed"}) for a in addresses))
+
+        discovery = AddressDiscovery("testnet", gap_limit=2, state_path=str(tmp_path / "discovery.json"))
+        with pytest.raises(NetworkError):
+            discovery.discover(account_key)
+
+    def test_refuses_backend_without_address_index(self, fake_backend, account_key, tmp_path, monkeypatch):
+        """Test that discovery stops instead of treating spent addresses as unused"""
+        monkeypatch.setattr(fake_backend, "has_address_index", False)
+
+        discovery = AddressDiscovery("testnet", gap_limit=2, state_path=str(tmp_path / "discovery.json"))
+        with pytest.raises(NetworkError, match="address index"):
+            discovery.discover(account_key)
+        assert fake_backend.count("get_address_stats") == 0
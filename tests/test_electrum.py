@@ -0,0 +1,211 @@
+import threading
+
+import pytest
+from bitcoin.core import CMutableTransaction, CMutableTxIn, CMutableTxOut, COutPoint, CScript, b2lx, lx
+from bitcoin.wallet import CBitcoinSecret
+
+from wallet import electrum, network
+from wallet.backends import set_backend
+from wallet.electrum import ElectrumBackend, electrum_scripthash
+from wallet.exceptions import TransactionError
+from wallet.keys import create_p2wpkh_script, script_to_address
+from .mock_servers import StubElectrumServer
+
+def make_key(n: int):
+    """Deterministic test key: returns (P2WPKH script, testnet address)."""
+    pubkey = CBitcoinSecret.from_secret_bytes(n.to_bytes(32, 'big')).pub
+    script = create_p2wpkh_script(pubkey)
+    return script, script_to_address(script, "testnet")
+
+def make_header(timestamp: int) -> str:
+    """80-byte block header with only the timestamp set."""
+    return (bytes(68) + timestamp.to_bytes(4, 'little') + bytes(8)).hex()
+
+def make_tx(inputs, outputs) -> CMutableTransaction:
+    """Build a transaction from (txid, vout) inputs and (script, value) outputs."""
+    return CMutableTransaction(
+        [CMutableTxIn(COutPoint(lx(txid), n)) for txid, n in inputs],
+        [CMutableTxOut(value, CScript(script)) for script, value in outputs]
+    )
+
+def backend_for(server: StubElectrumServer) -> ElectrumBackend:
+    host, port = server.address
+    return ElectrumBackend(host, port, use_ssl=False, network="testnet")
+
+class TestElectrumBackend:
+    def test_balances_for_500_addresses_in_one_round_trip(self):
+        """Test that a large wallet's balances are fetched with a single batch"""
+        keys = [make_key(n) for n in range(1, 501)]
+        funded = {electrum_scripthash(script): 1_000 * i for i, (script, _) in enumerate(keys)}
+        handlers = {
+            "blockchain.scripthash.get_balance": lambda sh: {"confirmed": funded[sh], "unconfirmed": 0},
+            "blockchain.scripthash.get_history": lambda sh: [{"tx_hash": "aa" * 32, "height": 10}],
+        }
+
+        with StubElectrumServer(handlers) as server:
+            set_backend("testnet", backend_for(server))
+            balances = dict(network.iter_address_balances([a for _, a in keys], "testnet"))
+
+        assert server.round_trips == 1
+        assert server.connections == 1
+        assert balances[keys[7][1]]["balance_sat"] == 7_000
+        assert balances[keys[7][1]]["tx_count"] == 1
+
+    def test_history_decoded_to_esplora_shape(self):
+        """Test that raw transactions are decoded with input prevouts and status"""
+        script, address = make_key(1)
+        other_script, other = make_key(2)
+        parent = make_tx([("11" * 32, 0)], [(script, 10_000)])
+        parent_txid = b2lx(parent.GetTxid())
+        child = make_tx([(parent_txid, 0)], [(other_script, 6_000), (script, 3_800)])
+        child_txid = b2lx(child.GetTxid())
+        funding = make_tx([("22" * 32, 0)], [(other_script, 10_000)])
+        raw = {
+            parent_txid: parent.serialize().hex(),
+            child_txid: child.serialize().hex(),
+            "11" * 32: funding.serialize().hex(),
+        }
+        handlers = {
+            "blockchain.scripthash.get_history": lambda sh: [
+                {"tx_hash": parent_txid, "height": 100},
+                {"tx_hash": child_txid, "height": 0},
+            ],
+            "blockchain.transaction.get": lambda txid, verbose=False: raw[txid],
+            "blockchain.block.header": lambda height: make_header(1_700_000_000),
+            "blockchain.headers.subscribe": lambda: {"height": 105, "hex": make_header(1_700_000_500)},
+        }
+
+        with StubElectrumServer(handlers) as server:
+            set_backend("testnet", backend_for(server))
+            history = network.fetch_transaction_history(address, "testnet")
+
+        sent, received = history
+        assert sent["txid"] == child_txid and sent["status"] == "pending"
+        assert sent["amount_sat"] == -(6_000 + 200)
+        assert received["amount_sat"] == 10_000
+        assert received["confirmations"] == 6
+        assert received["date"] != "1970-01-01 00:00"
+
+    def test_utxos_and_fee_estimates(self):
+        """Test listunspent conversion and BTC/kvB to sat/vB fee estimates"""
+        handlers = {
+            "blockchain.scripthash.listunspent": lambda sh: [
+                {"tx_hash": "aa" * 32, "tx_pos": 1, "height": 0, "value": 5_000},
+            ],
+            "blockchain.estimatefee": lambda target: {1: 0.0002, 3: 0.0001, 6: -1}[target],
+        }
+
+        with StubElectrumServer(handlers) as server:
+            backend = backend_for(server)
+            utxos = backend.get_utxos(make_key(1)[1])
+            estimates = backend.get_fee_estimates()
+
+        assert utxos == [{"txid": "aa" * 32, "vout": 1, "value": 5_000, "status": {"confirmed": False}}]
+        assert estimates == pytest.approx({1: 20.0, 3: 10.0})
+
+    def test_status_without_verbose_transactions(self):
+        """Test that a server without verbose transaction.get still reports confirmations"""
+        script, _ = make_key(1)
+        tx = make_tx([("11" * 32, 0)], [(script, 10_000)])
+        txid = b2lx(tx.GetTxid())
+        handlers = {
+            # electrs answers verbose requests with the raw hex
+            "blockchain.transaction.get": lambda txid, verbose=False: tx.serialize().hex(),
+            "blockchain.headers.subscribe": lambda: {"height": 105, "hex": make_header(1_700_000_500)},
+            "blockchain.scripthash.get_history": lambda sh: [{"tx_hash": txid, "height": 100}]
+                                                           if sh == electrum_scripthash(script) else [],
+            "blockchain.block.header": lambda height: make_header(1_700_000_000),
+        }
+
+        with StubElectrumServer(handlers) as server:
+            status = backend_for(server).get_transaction(txid)["status"]
+
+        assert status["confirmed"] is True
+        assert status["block_height"] == 100
+        assert status["block_time"] == 1_700_000_000
+
+    def test_cached_headers_follow_a_reorg(self):
+        """Test that headers near a new tip are fetched again and caches stay bounded"""
+        headers = {100: make_header(1_700_000_000)}
+        tip = {"height": 105, "hex": make_header(1_700_000_500)}
+        handlers = {
+            "blockchain.scripthash.listunspent": lambda sh: [
+                {"tx_hash": "aa" * 32, "tx_pos": 0, "height": 100, "value": 5_000},
+            ],
+            "blockchain.block.header": lambda height: headers[height],
+            "blockchain.headers.subscribe": lambda: tip,
+        }
+
+        with StubElectrumServer(handlers) as server:
+            backend = backend_for(server)
+            address = make_key(1)[1]
+            before = backend.get_utxos(address)[0]["status"]
+            assert backend.get_utxos(address)[0]["status"] == before
+
+            headers[100] = make_header(1_700_000_100)
+            tip = {"height": 106, "hex": make_header(1_700_000_600)}
+            after = backend.get_utxos(address)[0]["status"]
+
+        assert after["block_time"] == 1_700_000_100
+        assert after["block_hash"] != before["block_hash"]
+
+    def test_caches_are_bounded(self, monkeypatch):
+        """Test that the oldest raw transactions and headers are evicted first"""
+        monkeypatch.setattr(electrum, "MAX_CACHED_HEADERS", 2)
+        handlers = {
+            "blockchain.block.header": lambda height: make_header(height),
+            "blockchain.headers.subscribe": lambda: {"height": 500, "hex": make_header(0)},
+        }
+
+        with StubElectrumServer(handlers) as server:
+            backend = backend_for(server)
+            backend._fetch([], [1, 2, 3])
+
+        assert list(backend._headers) == [2, 3]
+
+    def test_tip_costs_one_round_trip(self):
+        """Test that the tip height and hash share one headers.subscribe call"""
+        tip = {"height": 500, "hex": make_header(1_700_000_000)}
+        with StubElectrumServer({"blockchain.headers.subscribe": lambda: tip}) as server:
+            backend = backend_for(server)
+            threads = [threading.Thread(target=backend.get_tip_height),
+                       threading.Thread(target=backend.get_tip_hash)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert backend.get_tip_hash() == electrum._header_status(500, tip["hex"])["block_hash"]
+            assert server.count("blockchain.headers.subscribe") == 1
+
+    def test_caches_survive_concurrent_tip_changes(self, monkeypatch):
+        """Test that header caching and reorg eviction can run on several threads"""
+        monkeypatch.setattr(electrum, "MAX_CACHED_HEADERS", 50)
+        backend = ElectrumBackend("127.0.0.1", 1, use_ssl=False, network="testnet")
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(500):
+                    backend._remember(backend._headers, i % 100, make_header(i), electrum.MAX_CACHED_HEADERS)
+                    backend._observe_tip({"height": 100, "hex": make_header(n * 1000 + i)})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(backend._headers) <= 50
+
+    def test_broadcast_rejection(self):
+        """Test that a server error on broadcast raises TransactionError"""
+        def reject(tx_hex):
+            raise ValueError("min relay fee not met")
+
+        with StubElectrumServer({"blockchain.transaction.broadcast": reject}) as server:
+            with pytest.raises(TransactionError, match="min relay fee"):
+                backend_for(server).broadcast("00")
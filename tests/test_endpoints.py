@@ -0,0 +1,242 @@
+import time
+import threading
+import pytest
+import requests
+from wallet.backends import EsploraBackend
+from wallet import backends, network
+from wallet.config import config, WalletConfig
+from wallet.endpoints import EndpointRegistry, EndpointStats, Hedger
+from wallet.transport import HttpTransport
+from .mock_servers import StubHTTPServer
+
+PRIMARY = "https://primary.invalid/api"
+MIRROR = "https://mirror.invalid/api"
+
+def slow(seconds, result):
+    """Fetch function answering after a delay."""
+    def fetch(url):
+        time.sleep(seconds)
+        return result
+    return fetch
+
+def by_url(**behaviour):
+    """Fetch function dispatching on the endpoint host."""
+    def fetch(url):
+        return behaviour[url.split("//")[1].split(".")[0]](url)
+    return fetch
+
+def http_error(status):
+    def fetch(url):
+        response = requests.Response()
+        response.status_code = status
+        raise requests.exceptions.HTTPError(f"HTTP {status}", response=response)
+    return fetch
+
+class TestEndpointStats:
+    def test_percentiles_need_samples(self):
+        """Test percentiles over the recent latency window"""
+        stats = EndpointStats(PRIMARY)
+        assert stats.percentile(95) is None
+
+        for ms in range(1, 101):
+            stats.record_success(ms / 1000)
+        stats.record_error()
+
+        assert stats.percentile(50) == pytest.approx(0.051)
+        assert stats.percentile(95) == pytest.approx(0.096)
+        assert stats.requests == 101 and stats.errors == 1
+
+class TestHedger:
+    def test_slow_primary_is_hedged(self):
+        """Test that the mirror's answer is used when the primary is slow"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=0.02, max_extra_load=1.0)
+        fetch = by_url(primary=slow(0.3, "primary"), mirror=slow(0, "mirror"))
+
+        start = time.monotonic()
+        assert hedger.call([PRIMARY, MIRROR], fetch) == "mirror"
+        assert time.monotonic() - start < 0.2
+        assert hedger.stats() == {"requests": 1, "hedges": 1, "hedge_wins": 1}
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test that no hedge is sent when the primary answers in time"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=0.2)
+        fetch = by_url(primary=slow(0, "primary"), mirror=slow(0, "mirror"))
+
+        assert hedger.call([PRIMARY, MIRROR], fetch) == "primary"
+        assert hedger.stats()["hedges"] == 0
+
+    def test_hedge_delay_follows_p95(self):
+        """Test that the hedge delay adapts to the primary's latency"""
+        registry = EndpointRegistry()
+        hedger = Hedger(registry, initial_delay=0.5)
+        for _ in range(20):
+            registry.get(PRIMARY).record_success(0.08)
+
+        assert hedger.hedge_delay(PRIMARY) == pytest.approx(0.08)
+        assert hedger.hedge_delay(MIRROR) == 0.5
+
+    def test_extra_load_is_capped(self):
+        """Test that hedges stay within the configured share of requests"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=0.01, max_extra_load=0.1)
+        fetch = by_url(primary=slow(0.03, "primary"), mirror=slow(0.03, "mirror"))
+
+        for _ in range(20):
+            hedger.call([PRIMARY, MIRROR], fetch)
+
+        assert hedger.stats()["hedges"] <= 2
+
+    def test_failed_primary_fails_over(self):
+        """Test that a transient failure is retried on a mirror without using budget"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=1, max_extra_load=0)
+        fetch = by_url(primary=http_error(503), mirror=slow(0, "mirror"))
+
+        assert hedger.call([PRIMARY, MIRROR], fetch) == "mirror"
+        assert hedger.registry.get(PRIMARY).errors == 1
+
+    def test_client_errors_are_answers(self):
+        """Test that a 404 from the primary is not retried on mirrors"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=1)
+        calls = []
+        fetch = by_url(primary=http_error(404), mirror=lambda url: calls.append(url))
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            hedger.call([PRIMARY, MIRROR], fetch)
+        assert calls == []
+
+    def test_losing_request_stops_retrying(self):
+        """Test that a retrying primary is abandoned on daemon threads once a hedge wins"""
+        hedger = Hedger(EndpointRegistry(), initial_delay=0.05, max_extra_load=1.0)
+        transport = HttpTransport(timeout=5, max_retries=5, backoff_base=2)
+
+        def overloaded(body):
+            time.sleep(0.15)
+            return 503, "busy"
+
+        with StubHTTPServer({"/blocks/tip/height": overloaded}) as primary:
+            def fetch(url):
+                if url == "mirror":
+                    return "mirror"
+                return transport.get(f"{url}/blocks/tip/height")
+
+            assert hedger.call([primary.url, "mirror"], fetch) == "mirror"
+            racers = [t for t in threading.enumerate() if t.name == "hedge"]
+            assert racers and all(t.daemon for t in racers)
+
+            for racer in racers:
+                racer.join(timeout=1)
+            assert not any(racer.is_alive() for racer in racers)
+            assert primary.count("/blocks/tip/height") == 1
+        transport.close()
+
+class TestEsploraHedging:
+    def test_backend_reads_hedge_to_mirror(self, monkeypatch):
+        """Test that a slow Esplora primary is hedged to its mirror"""
+        monkeypatch.setattr(backends, "hedger", Hedger(EndpointRegistry(), initial_delay=0.05))
+
+        def slow_tip(body):
+            time.sleep(0.5)
+            return 200, "100"
+
+        with StubHTTPServer({"/blocks/tip/height": slow_tip}) as primary, \
+             StubHTTPServer({"/blocks/tip/height": (200, "100")}) as mirror:
+            backend = EsploraBackend(primary.url, mirror_urls=[mirror.url + "/"])
+            start = time.monotonic()
+            assert backend.get_tip_height() == 100
+            assert time.monotonic() - start < 0.4
+
+        assert mirror.count("/blocks/tip/height") == 1
+
+class TestEndpointHealth:
+    def test_faster_endpoint_ranked_first(self):
+        """Test that requests are routed to the endpoint with the best score"""
+        registry = EndpointRegistry()
+        for _ in range(20):
+            registry.get(PRIMARY).record_success(0.4)
+            registry.get(MIRROR).record_success(0.1)
+
+        assert registry.rank([PRIMARY, MIRROR], 0.5) == [MIRROR, PRIMARY]
+
+    def test_errors_and_down_endpoints_rank_last(self):
+        """Test that failing endpoints lose their place even when fast"""
+        registry = EndpointRegistry(probe_interval=60)
+        for _ in range(20):
+            registry.get(PRIMARY).record_success(0.05)
+            registry.get(MIRROR).record_success(0.3)
+        for _ in range(config.endpoint_down_after):
+            registry.get(PRIMARY).record_error()
+
+        assert registry.get(PRIMARY).is_down
+        assert registry.rank([PRIMARY, MIRROR], 0.5) == [MIRROR, PRIMARY]
+
+    def test_down_endpoint_is_probed_back(self):
+        """Test that a background probe restores an endpoint that answers again"""
+        probed = []
+        registry = EndpointRegistry(probe_interval=0.01, probe=probed.append)
+
+        for _ in range(config.endpoint_down_after):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                registry.timed(PRIMARY, lambda url: (_ for _ in ()).throw(requests.exceptions.ConnectionError()))
+        assert registry.get(PRIMARY).is_down
+
+        deadline = time.monotonic() + 2
+        while registry.get(PRIMARY).is_down and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert probed == [PRIMARY]
+        assert not registry.get(PRIMARY).is_down
+
+    def test_statistics_persist_across_runs(self, tmp_path):
+        """Test that saved statistics are loaded by the next registry"""
+        path = str(tmp_path / "endpoints.json")
+        registry = EndpointRegistry(path=path)
+        for ms in range(1, 21):
+            registry.get(PRIMARY).record_success(ms / 1000)
+        registry.get(PRIMARY).record_error()
+        registry.save()
+
+        reloaded = EndpointRegistry(path=path).get(PRIMARY)
+        assert reloaded.requests == 21
+        assert reloaded.error_rate() == pytest.approx(1 / 21)
+        assert reloaded.percentile(50) == pytest.approx(0.011)
+
+    def test_endpoint_saved_as_down_is_probed_by_next_run(self, tmp_path):
+        """Test that an endpoint persisted as down is probed back by a later registry"""
+        path = str(tmp_path / "endpoints.json")
+        registry = EndpointRegistry(path=path, probe_interval=60)
+        for _ in range(config.endpoint_down_after):
+            registry.get(PRIMARY).record_error()
+        registry.get(PRIMARY).last_failure -= 60
+        registry.save()
+        registry.cancel_probes()
+
+        probed = []
+        reloaded = EndpointRegistry(path=path, probe_interval=60, probe=probed.append)
+        assert reloaded.get(PRIMARY).is_down
+
+        deadline = time.monotonic() + 2
+        while reloaded.get(PRIMARY).is_down and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert probed == [PRIMARY]
+        assert not reloaded.get(PRIMARY).is_down
+
+    def test_backend_status_report(self, monkeypatch):
+        """Test the --backend-status report for configured endpoints"""
+        with StubHTTPServer({"/blocks/tip/height": (200, "100")}) as primary, \
+             StubHTTPServer() as mirror:
+            testnet = config.network_configs["testnet"]
+            monkeypatch.setattr(testnet, "api_url", primary.url)
+            monkeypatch.setattr(testnet, "mirror_urls", [mirror.url])
+
+            status = network.get_backend_status("testnet")
+
+        assert [e["url"] for e in status["endpoints"]] == [primary.url, mirror.url]
+        up, failing = status["endpoints"]
+        assert up["requests"] == 1 and up["error_rate"] == 0 and up["p99"] is not None
+        assert failing["error_rate"] == 1.0 and failing["p50"] is None
+
+    def test_no_mirrors_by_default(self):
+        """Test that address lookups go only to the configured API unless mirrors are set"""
+        defaults = WalletConfig(network="testnet").network_configs
+
+        assert all(not network_config.mirror_urls for network_config in defaults.values())
@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+from wallet import fees, network
+from wallet.backends import FakeBackend, set_backend
+from wallet.chaintip import ChainTip
+from wallet.exceptions import FeeEstimationError
+from wallet.fees import FeeEstimator, MempoolSnapshot, MIN_RELAY_FEERATE
+
+# 3.5 blocks of demand: 1 MvB above 50 sat/vB, 1 MvB at 20, 1.5 MvB at 5
+HISTOGRAM = [(5.0, 1_500_000), (50.0, 1_000_000), (20.0, 1_000_000)]
+
+class TestMempoolSnapshot:
+    def test_targets_map_to_projected_blocks(self):
+        """Test that each target reads the fee rate at its block boundary"""
+        snapshot = MempoolSnapshot(HISTOGRAM)
+
+        # Block 3 ends two thirds into the 20 -> 5 sat/vB bucket
+        assert list(snapshot.feerates_for_targets([1, 2, 3])) == [50.0, 20.0, 10.0]
+
+    def test_interpolates_within_bucket(self):
+        """Test that a boundary inside a bucket falls between its neighbours"""
+        snapshot = MempoolSnapshot([(30.0, 500_000), (10.0, 1_000_000)])
+
+        rate = snapshot.feerates_for_targets([1])[0]
+        assert 10.0 < rate < 30.0
+
+    def test_targets_beyond_mempool_pay_relay_minimum(self):
+        """Test that targets deeper than the mempool only need the minimum fee rate"""
+        snapshot = MempoolSnapshot(HISTOGRAM)
+
+        assert list(snapshot.feerates_for_targets([4, 25])) == [MIN_RELAY_FEERATE] * 2
+        assert list(MempoolSnapshot([]).feerates_for_targets([1])) == [MIN_RELAY_FEERATE]
+
+class TestFeeEstimator:
+    def test_snapshot_cached_per_tip(self, fake_backend, monkeypatch):
+        """Test that the histogram is refetched only when the tip changes"""
+        monkeypatch.setattr(fees, "chain_tip", ChainTip(ttl=0))
+        fake_backend.fee_histogram = HISTOGRAM
+        estimator = FeeEstimator()
+
+        assert estimator.estimate("testnet", 1) == 50.0
+        assert estimator.estimate("testnet", 2) == 20.0
+        assert fake_backend.count("get_fee_histogram") == 1
+
+        fake_backend.set_tip(1001, "11" * 32)
+        estimator.estimate("testnet", 1)
+        assert fake_backend.count("get_fee_histogram") == 2
+
+    def test_backend_estimates_without_histogram(self, fake_backend):
+        """Test the fallback to per-target estimates when no histogram exists"""
+        fake_backend.fee_estimates = {1: 30.0, 6: 8.0, 144: 0.5}
+        assert fake_backend.get_fee_histogram() is None
+        estimator = FeeEstimator()
+
+        assert estimator.estimate_many("testnet", [1, 4, 6, 1008]) == [30.0, 30.0, 8.0, 1.0]
+
+    def test_failure_raises_fee_error(self, fake_backend, monkeypatch):
+        """Test that network failures surface as FeeEstimationError"""
+        def fail():
+            raise requests.exceptions.ConnectionError("offline")
+        monkeypatch.setattr(fake_backend, "get_fee_histogram", fail)
+
+        with pytest.raises(FeeEstimationError):
+            FeeEstimator().estimate("testnet", 3)
+
+    def test_recommended_rates_warn_on_fallback(self, fake_backend, monkeypatch):
+        """Test that configured fee levels come with a warning when estimation fails"""
+        monkeypatch.setattr(fake_backend, "get_fee_estimates", lambda: {})
+
+        fee_rates = network.get_recommended_fee_rate("testnet")
+
+        assert fee_rates["medium"] == 5
+        assert "configured fee levels" in fee_rates["warning"]
+
+    def test_recommended_rates_from_histogram(self):
+        """Test that priority levels follow the 1, 3 and 6 block projections"""
+        set_backend("mainnet", FakeBackend(fee_histogram=HISTOGRAM))
+
+        assert network.get_recommended_fee_rate("mainnet") == {'high': 50, 'medium': 10, 'low': 1}
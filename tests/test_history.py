@@ -0,0 +1,75 @@
+from wallet import network
+
+ADDRESS = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+OTHER = "tb1qother"
+
+def make_tx(n: int, confirmed: bool = True, outgoing: bool = False) -> dict:
+    """Build an Esplora-style transaction paying to or from ADDRESS."""
+    return {
+        "txid": f"{n:064x}",
+        "fee": 200,
+        "vin": [{"prevout": {"scriptpubkey_address": ADDRESS if outgoing else OTHER, "value": 10_000}}],
+        "vout": [
+            {"scriptpubkey_address": OTHER if outgoing else ADDRESS, "value": 5_000},
+            {"scriptpubkey_address": ADDRESS if outgoing else OTHER, "value": 4_800},
+        ],
+        "status": {
+            "confirmed": confirmed,
+            "block_height": 1000 - n if confirmed else None,
+            "block_hash": "00" * 32 if confirmed else None,
+            "block_time": 1_700_000_000 - n,
+        },
+    }
+
+def add_history(backend, total: int) -> None:
+    """Give ADDRESS `total` confirmed transactions, newest first by n."""
+    for n in range(total):
+        backend.add_transaction(make_tx(n))
+
+def history_requests(backend) -> int:
+    """Number of address history pages requested from the backend."""
+    return (backend.count("get_address_transactions") +
+            backend.count("get_address_transactions_chain"))
+
+class TestTransactionHistory:
+    def test_history_classified_without_per_tx_lookups(self, fake_backend):
+        """Test that history is built from the list payload alone"""
+        fake_backend.add_transaction(make_tx(1, confirmed=False))
+        fake_backend.add_transaction(make_tx(2, outgoing=True))
+
+        history = network.fetch_transaction_history(ADDRESS, "testnet", limit=10)
+
+        assert history_requests(fake_backend) == 1
+        assert fake_backend.count("get_transaction") == 0
+        received, sent = history
+        assert received["type"] == "received" and received["amount_sat"] == 5_000
+        assert received["status"] == "pending"
+        assert sent["type"] == "sent" and sent["amount_sat"] == -(5_000 + 200)
+        assert sent["explorer_url"] == f"{fake_backend.explorer_url}/tx/{sent['txid']}"
+        assert received["confirmations"] == 0
+        assert sent["confirmations"] == 1000 - 998 + 1
+
+    def test_pagination_stops_at_limit(self, fake_backend):
+        """Test that chain pages are only fetched as far as the limit needs"""
+        add_history(fake_backend, 100)
+
+        history = network.fetch_transaction_history(ADDRESS, "testnet", limit=40)
+
+        assert len(history) == 40
+        assert history_requests(fake_backend) == 2, "Expected the first page plus one chain page"
+        assert [tx["txid"] for tx in history] == [f"{n:064x}" for n in range(40)]
+
+    def test_pagination_stops_when_history_exhausted(self, fake_backend):
+        """Test that a short confirmed page ends pagination"""
+        add_history(fake_backend, 30)
+
+        history = network.fetch_transaction_history(ADDRESS, "testnet", limit=100)
+
+        assert len(history) == 30
+        assert history_requests(fake_backend) == 2
+
+    def test_unsupported_network(self):
+        """Test that an unknown network is reported as an error entry"""
+        history = network.fetch_transaction_history(ADDRESS, "regtest")
+
+        assert history == [{"error": "Unsupported network: regtest"}]
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from wallet import network
+from wallet.config import ConfigManager, WalletConfig
+from wallet.exceptions import ConfigurationError
+from wallet.push import PushSubscriber, WebSocketClient
+from .mock_servers import StubWebSocketServer
+from .test_history import ADDRESS, make_tx
+
+def wait_for(condition, timeout=5.0):
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def feed():
+    with StubWebSocketServer() as server:
+        yield server
+
+@pytest.fixture
+def subscriber(feed, fake_backend):
+    events = []
+    sub = PushSubscriber("testnet", [ADDRESS], url=feed.url, on_event=events.append, keepalive=0.2)
+    sub.events = events
+    sub.start()
+    assert wait_for(lambda: len(feed.received) == 2)
+    yield sub
+    sub.stop()
+
+class TestWebSocketClient:
+    def test_round_trip(self, feed):
+        """Test the handshake and text messages in both directions, including long frames"""
+        client = WebSocketClient(feed.url, timeout=5)
+        client.connect()
+        try:
+            client.send('{"hello": "feed"}')
+            assert wait_for(lambda: feed.received == [{"hello": "feed"}])
+
+            feed.push({"data": "x" * 70_000})
+            assert client.recv() == '{"data": "' + "x" * 70_000 + '"}'
+        finally:
+            client.close()
+
+class TestPushSubscriber:
+    def test_subscribes_to_blocks_and_addresses(self, subscriber, feed):
+        """Test that the block feed and the wallet's addresses are requested"""
+        assert feed.received == [
+            {"action": "want", "data": ["blocks"]},
+            {"track-addresses": [ADDRESS]}
+        ]
+
+    def test_new_block_moves_tip_without_polling(self, subscriber, feed, fake_backend):
+        """Test that a pushed block becomes the chain tip and is announced"""
+        feed.push({"block": {"id": "ab" * 32, "height": 1001}})
+
+        assert wait_for(lambda: subscriber.events)
+        assert network.chain_tip.get("testnet") == {"height": 1001, "hash": "ab" * 32}
+        assert fake_backend.count("get_tip_height") == 0
+        assert subscriber.events == ["New block 1001"]
+
+    def test_address_event_invalidates_balance(self, subscriber, feed, fake_backend):
+        """Test that a payment to a tracked address drops its cached balance"""
+        fake_backend.add_transaction(make_tx(1))
+        network.fetch_address_balance(ADDRESS, "testnet")
+        network.fetch_address_balance(ADDRESS, "testnet")
+        assert fake_backend.count("get_address_stats") == 1
+
+        feed.push({"multi-address-transactions": {ADDRESS: {"mempool": [{"txid": "cd" * 32}]}}})
+        assert wait_for(lambda: subscriber.state.unconfirmed.get(ADDRESS))
+
+        network.fetch_address_balance(ADDRESS, "testnet")
+        assert fake_backend.count("get_address_stats") == 2
+        assert subscriber.events == [f"Incoming transaction {'cd' * 8}... for {ADDRESS}"]
+
+    def test_idle_connection_only_pings(self, subscriber, feed, fake_backend):
+        """Test that nothing is polled while idle and keepalive pings are sent"""
+        calls_before = len(fake_backend.calls)
+
+        assert wait_for(lambda: feed.pings >= 2)
+        assert len(fake_backend.calls) == calls_before
+
+    def test_reconnects_and_unpins_tip(self, subscriber, feed, fake_backend):
+        """Test that a dropped feed stops trusting the pushed tip and reconnects"""
+        feed.push({"block": {"id": "ab" * 32, "height": 1001}})
+        assert wait_for(lambda: subscriber.state.tip is not None)
+
+        feed.drop()
+        assert wait_for(lambda: not subscriber.connected.is_set())
+        assert network.chain_tip.get("testnet")["height"] == 1000
+
+        assert wait_for(lambda: feed.connections == 2 and len(feed.received) == 4)
+
+    def test_malformed_messages_are_skipped(self, subscriber, feed):
+        """Test that bad feed messages are skipped without ending the subscription"""
+        assert subscriber.handle([1, 2]) is False
+        assert subscriber.handle({"block": {"height": 5}}) is False
+        assert subscriber.handle({"multi-address-transactions": {ADDRESS: {"mempool": [1]}}}) is False
+        assert subscriber.state.tip is None
+
+        feed.push({"blocks": "nope"})
+        feed.push({"block": {"id": "ab" * 32, "height": 1001}})
+
+        assert wait_for(lambda: subscriber.state.tip is not None)
+        assert subscriber.state.skipped == 4
+        assert subscriber.connected.is_set()
+
+    def test_no_feed_is_configured_by_default(self, monkeypatch):
+        """Test that push needs an explicit push_url, since the feed sees every address"""
+        defaults = WalletConfig(network="testnet")
+        assert all(not net.push_url for net in defaults.network_configs.values())
+
+        monkeypatch.setattr("wallet.push.config", defaults)
+        with pytest.raises(ConfigurationError, match="push_url"):
+            PushSubscriber("testnet", [ADDRESS])
+
+        configured = WalletConfig(network="testnet", network_configs={"testnet": {"push_url": "wss://node.lan/ws"}})
+        monkeypatch.setattr("wallet.push.config", configured)
+        assert PushSubscriber("testnet", [ADDRESS]).url == "wss://node.lan/ws"
+
+    def test_settings_survive_save(self, tmp_path):
+        """Test that the push settings are written with the rest of the config"""
+        path = str(tmp_path / "config.json")
+        ConfigManager.save_config(WalletConfig(network="testnet", push_updates=True, push_keepalive=12.5), path)
+
+        loaded = ConfigManager.load_config(path)
+        assert loaded.push_updates is True
+        assert loaded.push_keepalive == 12.5
@@ -0,0 +1,107 @@
+import time
+import threading
+from unittest.mock import patch
+from wallet.ratelimit import TokenBucket, HostLimiter, RateLimiter
+
+class TestTokenBucket:
+    def test_rate_is_enforced_after_burst(self):
+        """Test that requests beyond the burst are paced at the rate"""
+        bucket = TokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(7):
+            bucket.acquire()
+
+        # Two come from the burst, the other five wait 20ms each
+        assert time.monotonic() - start >= 0.09
+
+class TestHostLimiter:
+    def test_aimd_adjusts_concurrency(self):
+        """Test multiplicative decrease on throttling and additive increase after"""
+        limiter = HostLimiter(rate=1000, burst=1000, max_concurrency=8)
+
+        limiter.acquire()
+        limiter.release(throttled=True)
+        assert limiter.limit == 4
+
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.limit == 5
+
+        for _ in range(100):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.limit == 8
+
+    def test_aimd_adjusts_rate(self):
+        """Test that the rate rises on success and halves on throttling"""
+        limiter = HostLimiter(rate=10, burst=100, max_rate=20)
+
+        for _ in range(4):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.rate == 14
+
+        limiter.acquire()
+        limiter.release(throttled=True)
+        assert limiter.rate == 7
+
+        for _ in range(50):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.rate == 20
+
+    def test_in_flight_requests_are_capped(self):
+        """Test that no more than the current limit run at once"""
+        limiter = HostLimiter(rate=1000, burst=1000, max_concurrency=2)
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            limiter.acquire()
+            with lock:
+                peak.append(limiter.in_flight)
+            time.sleep(0.02)
+            limiter.release()
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+
+    def test_retry_after_pauses_host(self):
+        """Test that Retry-After holds back the next request"""
+        limiter = HostLimiter(rate=1000, burst=1000)
+        limiter.acquire()
+        limiter.release(throttled=True, retry_after=0.1)
+
+        start = time.monotonic()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_limiters_are_per_host(self):
+        """Test that each host gets its own limiter"""
+        limiters = RateLimiter()
+        a = limiters.for_url("https://blockstream.info/api/tx/1")
+        assert limiters.for_url("https://blockstream.info/testnet/api") is a
+        assert limiters.for_url("https://mempool.space/api") is not a
+
+    def test_loopback_and_configured_hosts_are_not_paced(self):
+        """Test that local and self-hosted explorers skip the token bucket"""
+        limiters = RateLimiter()
+        with patch("wallet.ratelimit.config.unmetered_hosts", ["electrs.lan:3002"]):
+            assert limiters.for_url("http://127.0.0.1:3002/api").rate is None
+            assert limiters.for_url("http://localhost:8332").rate is None
+            assert limiters.for_url("http://[::1]:50001").rate is None
+            assert limiters.for_url("http://electrs.lan:3002/api").rate is None
+            assert limiters.for_url("https://mempool.space/api").rate is not None
+
+        limiter = limiters.for_url("http://127.0.0.1:3002/api")
+        start = time.monotonic()
+        for _ in range(200):
+            limiter.acquire()
+            limiter.release()
+        assert time.monotonic() - start < 1
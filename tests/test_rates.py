@@ -0,0 +1,114 @@
+import json
+import time
+from wallet import network
+from wallet.display import WalletDisplay
+from wallet.rates import RateService, PriceSource, _parse_coingecko, _parse_coinbase, _parse_blockchain_info
+from .mock_servers import StubHTTPServer
+
+COINGECKO = {"bitcoin": {"usd": 60000, "eur": 55000, "jpy": 9000000}}
+COINBASE = {"data": {"currency": "BTC", "rates": {"USD": "61000.5", "EUR": "56000", "GBP": "48000"}}}
+BLOCKCHAIN_INFO = {"USD": {"last": 59000, "symbol": "$"}, "EUR": {"last": 54000, "symbol": "€"}}
+
+def slow(seconds, payload):
+    def route(body):
+        time.sleep(seconds)
+        return 200, payload
+    return route
+
+def sources_for(server):
+    """Price sources pointing at the stub price server."""
+    return [
+        PriceSource("coingecko", f"{server.url}/coingecko", _parse_coingecko),
+        PriceSource("coinbase", f"{server.url}/coinbase", _parse_coinbase),
+        PriceSource("blockchain.info", f"{server.url}/ticker", _parse_blockchain_info),
+    ]
+
+class TestRateService:
+    def test_median_across_sources(self, tmp_path):
+        """Test that each currency is the median of the sources quoting it"""
+        with StubHTTPServer({"/coingecko": (200, COINGECKO), "/coinbase": (200, COINBASE),
+                           "/ticker": (200, BLOCKCHAIN_INFO)}) as server:
+            service = RateService(sources_for(server), cache_path=str(tmp_path / "rates.json"), deadline=2)
+            rates = service.get_rates()
+
+        assert rates["usd"] == 60000
+        assert rates["eur"] == 55000
+        assert rates["gbp"] == 48000
+        assert rates["jpy"] == 9000000
+        assert "cad" not in rates
+
+    def test_slow_source_is_left_out(self, tmp_path):
+        """Test that a source missing the deadline does not delay the result"""
+        with StubHTTPServer({"/coingecko": slow(1.5, COINGECKO), "/coinbase": (200, COINBASE),
+                           "/ticker": (200, BLOCKCHAIN_INFO)}) as server:
+            service = RateService(sources_for(server), cache_path=str(tmp_path / "rates.json"), deadline=0.3)
+            start = time.monotonic()
+            rates = service.get_rates()
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 1.0
+        assert rates["usd"] == 60000.25
+        assert "jpy" not in rates
+
+    def test_fresh_cache_skips_sources(self, tmp_path):
+        """Test that cached rates within the TTL are served without requests"""
+        with StubHTTPServer({"/coingecko": (200, COINGECKO)}) as server:
+            service = RateService(sources_for(server)[:1], cache_path=str(tmp_path / "rates.json"), ttl=60)
+            service.get_rates()
+            service.get_rates()
+
+        assert server.count("/coingecko") == 1
+
+    def test_stale_rates_served_while_refreshing(self, tmp_path):
+        """Test stale-while-revalidate: old rates now, new rates on disk soon after"""
+        cache_path = tmp_path / "rates.json"
+        cache_path.write_text(json.dumps({"fetched_at": time.time() - 120, "rates": {"usd": 1.0}}))
+
+        with StubHTTPServer({"/coingecko": slow(0.2, COINGECKO)}) as server:
+            service = RateService(sources_for(server)[:1], cache_path=str(cache_path), ttl=60, deadline=2)
+            start = time.monotonic()
+            rates = service.get_rates()
+            assert time.monotonic() - start < 0.1
+            assert rates["usd"] == 1.0 and rates["stale"] is True
+
+            deadline = time.monotonic() + 3
+            while json.loads(cache_path.read_text())["rates"]["usd"] == 1.0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+        assert json.loads(cache_path.read_text())["rates"]["usd"] == 60000
+
+    def test_old_rates_are_marked_when_sources_fail(self, tmp_path, capsys):
+        """Test that day-old rates served after every source failed say how old they are"""
+        fetched_at = time.time() - 90_000
+        cache_path = tmp_path / "rates.json"
+        cache_path.write_text(json.dumps({"fetched_at": fetched_at, "rates": {"usd": 1.0}}))
+
+        with StubHTTPServer({}) as server:
+            service = RateService(sources_for(server), cache_path=str(cache_path), stale_ttl=86400)
+            rates = service.get_rates()
+
+        assert rates == {"usd": 1.0, "as_of": fetched_at, "stale": True}
+        WalletDisplay.show_exchange_rates(rates)
+        assert "1500 minutes old" in capsys.readouterr().out
+
+    def test_fresh_rates_are_not_stale(self, tmp_path):
+        """Test that freshly fetched rates carry their fetch time"""
+        with StubHTTPServer({"/coinbase": (200, COINBASE)}) as server:
+            service = RateService(sources_for(server)[1:2], cache_path=str(tmp_path / "rates.json"))
+            rates = service.get_rates()
+
+        assert rates["stale"] is False
+        assert time.time() - rates["as_of"] < 5
+
+    def test_no_source_and_no_cache(self, tmp_path):
+        """Test the error returned when nothing is available"""
+        with StubHTTPServer({}) as server:
+            service = RateService(sources_for(server), cache_path=str(tmp_path / "rates.json"))
+            assert "error" in service.get_rates()
+
+    def test_network_uses_rate_service(self, tmp_path, monkeypatch):
+        """Test that get_exchange_rates goes through the rate service"""
+        with StubHTTPServer({"/coinbase": (200, COINBASE)}) as server:
+            monkeypatch.setattr(network, "rate_service",
+                                RateService(sources_for(server)[1:2], cache_path=str(tmp_path / "r.json")))
+            assert network.get_exchange_rates()["usd"] == 61000.5
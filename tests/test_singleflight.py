@@ -0,0 +1,91 @@
+import time
+import threading
+import pytest
+from wallet import backends
+from wallet.backends import EsploraBackend
+from wallet.singleflight import SingleFlight
+from .mock_servers import FakeTransport
+
+API_URL = "http://localhost:3002"
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_request(self):
+        """Test that callers arriving while a request is in flight wait for it"""
+        flight = SingleFlight(window=0)
+        started = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return {"height": 100}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("tip", fetch)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(flight.do("tip", fetch)))
+                     for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"height": 100}] * 5
+        assert results[0] is results[4]
+        assert flight.stats() == {"requests": 1, "saved": 4}
+
+    def test_results_reused_within_window(self):
+        """Test that a finished result is memoized only for the window"""
+        flight = SingleFlight(window=0.05)
+        calls = []
+        fetch = lambda: calls.append(1) or len(calls)
+
+        assert flight.do("fees", fetch) == 1
+        assert flight.do("fees", fetch) == 1
+        time.sleep(0.06)
+        assert flight.do("fees", fetch) == 2
+
+    def test_errors_are_not_memoized(self):
+        """Test that a failed request is retried by the next caller"""
+        flight = SingleFlight(window=10)
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do("tx", fail)
+        assert flight.do("tx", lambda: "ok") == "ok"
+
+    def test_clear_forgets_results(self):
+        """Test that clear forces the next caller to fetch again"""
+        flight = SingleFlight(window=10)
+        flight.do("utxos", lambda: [])
+        flight.clear()
+        assert flight.do("utxos", lambda: ["new"]) == ["new"]
+
+class TestEsploraCoalescing:
+    def test_repeated_reads_share_one_request(self, monkeypatch):
+        """Test that repeated fee and tip reads hit the API once"""
+        fake = FakeTransport({
+            f"{API_URL}/fee-estimates": {"1": 25.1, "3": 12.0, "6": 4.2},
+            f"{API_URL}/blocks/tip/height": "812345",
+            f"{API_URL}/tx": "ab" * 32,
+        })
+        monkeypatch.setattr(backends, "transport", fake)
+        backend = EsploraBackend(API_URL)
+
+        for _ in range(3):
+            backend.get_fee_estimates()
+            backend.get_tip_height()
+
+        assert fake.count(f"{API_URL}/fee-estimates") == 1
+        assert fake.count(f"{API_URL}/blocks/tip/height") == 1
+        assert backends.request_coalescer.stats()["saved"] == 4
+
+        # A broadcast changes chain state, so reads go out again
+        backend.broadcast("00")
+        backend.get_fee_estimates()
+        assert fake.count(f"{API_URL}/fee-estimates") == 2
@@ -0,0 +1,108 @@
+import pytest
+from wallet.transport import HttpTransport, parse_retry_after
+from wallet.exceptions import TransientNetworkError, NetworkError
+from .mock_servers import StubHTTPServer
+
+def sequence(*results):
+    """Route answering with each result in turn, repeating the last one."""
+    results = list(results)
+    def route(body):
+        return results.pop(0) if len(results) > 1 else results[0]
+    return route
+
+class TestTransport:
+    def test_connections_are_reused(self):
+        """Test that repeated requests to one host share a pooled connection"""
+        with StubHTTPServer({"/blocks/tip/height": (200, "100")}) as server:
+            transport = HttpTransport(timeout=5)
+            for _ in range(10):
+                response = transport.get(f"{server.url}/blocks/tip/height")
+                assert response.text == "100"
+            transport.close()
+
+        assert server.count("/blocks/tip/height") == 10
+        assert server.connections == 1, "Expected a single keep-alive connection"
+
+    def test_gzip_negotiation_and_timeout(self):
+        """Test default headers and configured timeout"""
+        with StubHTTPServer({"/tx": (200, "txid")}) as server:
+            transport = HttpTransport(timeout=7)
+            transport.post(f"{server.url}/tx", data="00")
+            transport.close()
+
+        _, _, headers = server.requests[0]
+        assert "gzip" in headers.get("Accept-Encoding", "")
+        assert transport.timeout == 7
+
+    def test_configure_pool_sizes(self):
+        """Test that pool sizes can be changed at runtime"""
+        transport = HttpTransport(pool_connections=2, pool_maxsize=4)
+        transport.configure(pool_maxsize=16)
+
+        adapter = transport.session.get_adapter("https://example.com")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 16
+        transport.close()
+
+class TestRetries:
+    def test_throttled_request_is_retried(self):
+        """Test that a 429 is retried and shrinks the host's concurrency limit"""
+        with StubHTTPServer({"/fee-estimates": sequence(
+            (429, "slow down", {"Retry-After": "0"}), (200, {"1": 5.0})
+        )}) as server:
+            transport = HttpTransport(timeout=5, backoff_base=0.01)
+            response = transport.get(f"{server.url}/fee-estimates")
+            transport.close()
+
+        assert response.json() == {"1": 5.0}
+        assert server.count("/fee-estimates") == 2
+        assert transport.retries == 1
+        stats = transport.limiter.stats()[server.url.split("//")[1]]
+        assert stats["throttled"] == 1
+        assert stats["limit"] < transport.limiter.for_url(server.url).max_concurrency
+
+    def test_transient_failures_exhaust_retries(self):
+        """Test that persistent 5xx responses raise a transient NetworkError"""
+        with StubHTTPServer({"/tx/ab": (502, "bad gateway")}) as server:
+            transport = HttpTransport(timeout=5, max_retries=2, backoff_base=0.01)
+            with pytest.raises(TransientNetworkError) as info:
+                transport.get(f"{server.url}/tx/ab")
+            transport.close()
+
+        assert server.count("/tx/ab") == 3
+        assert info.value.status_code == 502
+        assert isinstance(info.value, NetworkError)
+
+    def test_permanent_errors_are_not_retried(self):
+        """Test that a 404 is returned to the caller after one attempt"""
+        with StubHTTPServer() as server:
+            transport = HttpTransport(timeout=5, backoff_base=0.01)
+            response = transport.get(f"{server.url}/tx/missing")
+            transport.close()
+
+        assert response.status_code == 404
+        assert server.count("/tx/missing") == 1
+
+    def test_post_is_not_retried_on_server_error(self):
+        """Test that a POST the server may have processed is not resent"""
+        with StubHTTPServer({"/tx": (500, "error")}) as server:
+            transport = HttpTransport(timeout=5, backoff_base=0.01)
+            response = transport.post(f"{server.url}/tx", data="00")
+            transport.close()
+
+        assert response.status_code == 500
+        assert server.count("/tx") == 1
+
+    def test_connection_errors_are_transient(self):
+        """Test that an unreachable host raises after retrying"""
+        transport = HttpTransport(timeout=1, max_retries=1, backoff_base=0.01)
+        with pytest.raises(TransientNetworkError):
+            transport.get("http://127.0.0.1:1/blocks/tip/height")
+        assert transport.retries == 1
+
+    def test_parse_retry_after(self):
+        """Test both Retry-After formats"""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
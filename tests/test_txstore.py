@@ -0,0 +1,102 @@
+from wallet import network
+from wallet.txstore import TransactionStore
+from .test_history import ADDRESS, make_tx, add_history, history_requests
+
+class TestTransactionStore:
+    def test_only_confirmed_transactions_are_cached(self, tmp_path):
+        """Test that mempool transactions are never stored"""
+        store = TransactionStore(path=str(tmp_path / "tx.db"))
+        store.put_many("testnet", [make_tx(1), make_tx(2, confirmed=False)])
+
+        assert store.get("testnet", make_tx(1)["txid"])["status"]["block_hash"] == "00" * 32
+        assert store.get("testnet", make_tx(2)["txid"]) is None
+        assert store.get("signet", make_tx(1)["txid"]) is None
+        assert store.stats() == {"hits": 1, "misses": 2, "entries": 1}
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted first"""
+        store = TransactionStore(path=str(tmp_path / "tx.db"), max_entries=3)
+        for n in range(3):
+            store.put("testnet", make_tx(n))
+        store.get("testnet", make_tx(0)["txid"])  # Touch the oldest entry
+        store.put("testnet", make_tx(3))
+
+        assert store.stats()["entries"] == 3
+        assert store.get("testnet", make_tx(0)["txid"]) is not None
+        assert store.get("testnet", make_tx(1)["txid"]) is None
+
+    def test_invalidate_block(self, tmp_path):
+        """Test dropping transactions from a reorganized block"""
+        store = TransactionStore(path=str(tmp_path / "tx.db"))
+        store.put("testnet", make_tx(1))
+        store.invalidate_block("testnet", "00" * 32)
+
+        assert store.get("testnet", make_tx(1)["txid"]) is None
+        assert store.stats()["entries"] == 0
+
+    def test_tip_change_drops_orphaned_blocks(self, tmp_path):
+        """Test that cached transactions and pages from a reorganized block are dropped"""
+        store = TransactionStore(path=str(tmp_path / "tx.db"))
+        stale, kept = make_tx(1), make_tx(2)
+        stale["status"]["block_hash"] = "aa" * 32
+        store.put_chain_page("testnet", ADDRESS, "ff" * 32, [stale, kept])
+        lookups = []
+
+        def block_hash_at(height):
+            lookups.append(height)
+            return "00" * 32
+
+        orphaned = store.observe_tip("testnet", {"height": 1001, "hash": "bb" * 32}, block_hash_at)
+
+        assert orphaned == ["aa" * 32]
+        assert lookups == [999, 998]
+        assert store.get("testnet", stale["txid"]) is None
+        assert store.get("testnet", kept["txid"]) is not None
+        assert store.get_chain_page("testnet", ADDRESS, "ff" * 32) is None
+
+    def test_unchanged_chain_costs_one_lookup(self, tmp_path):
+        """Test that checking stops at the newest block still in the chain"""
+        store = TransactionStore(path=str(tmp_path / "tx.db"))
+        store.put_many("testnet", [make_tx(n) for n in range(1, 5)])
+        lookups = []
+        tip = {"height": 1001, "hash": "bb" * 32}
+
+        store.observe_tip("testnet", tip, lambda height: lookups.append(height) or "00" * 32)
+        store.observe_tip("testnet", tip, lambda height: lookups.append(height) or "00" * 32)
+
+        assert lookups == [999]
+        assert store.stats()["entries"] == 4
+
+    def test_chain_tip_reports_reorgs(self, fake_backend):
+        """Test that a fetched tip checks the shared store against the chain"""
+        orphan = make_tx(1)
+        orphan["status"]["block_hash"] = "aa" * 32
+        network.transaction_store.put("testnet", orphan)
+        fake_backend.block_hashes[999] = "cc" * 32
+
+        network.chain_tip.get("testnet")
+
+        assert network.transaction_store.get("testnet", orphan["txid"]) is None
+        assert fake_backend.count("get_block_hash") == 1
+
+    def test_second_history_run_uses_cache(self, fake_backend):
+        """Test that cached chain pages are not requested again"""
+        add_history(fake_backend, 100)
+
+        first = network.fetch_transaction_history(ADDRESS, "testnet", limit=100)
+        requests_first_run = history_requests(fake_backend)
+        second = network.fetch_transaction_history(ADDRESS, "testnet", limit=100)
+
+        assert first == second
+        assert requests_first_run == 4
+        assert history_requests(fake_backend) - requests_first_run == 1, \
+            "Only the newest page should be refetched"
+
+    def test_get_transaction_reads_through_store(self, fake_backend):
+        """Test that confirmed transactions are downloaded only once"""
+        tx = make_tx(7)
+        fake_backend.add_transaction(tx)
+
+        assert network.get_transaction(tx["txid"], "testnet") == tx
+        assert network.get_transaction(tx["txid"], "testnet") == tx
+        assert fake_backend.count("get_transaction") == 1
@@ -0,0 +1,49 @@
+from wallet import network
+
+ADDRESS = "tb1qw508d6qejxtdg4y5r3zarvary0c5xw7kxpjzsx"
+OTHER = "tb1qother"
+SHARED_TXID = "aa" * 32
+OTHER_TXID = "bb" * 32
+
+def parent_tx(txid: str, paid_outputs, height: int = None) -> dict:
+    """Build a transaction whose listed outputs pay ADDRESS."""
+    status = {"confirmed": height is not None}
+    if height is not None:
+        status.update(block_height=height, block_hash="00" * 32, block_time=1_700_000_000)
+    return {
+        "txid": txid,
+        "vin": [],
+        "vout": [
+            {
+                "scriptpubkey": f"0014{i:040x}",
+                "scriptpubkey_address": ADDRESS if i in paid_outputs else OTHER,
+                "value": 1000 * (i + 1),
+            }
+            for i in range(3)
+        ],
+        "status": status,
+    }
+
+class TestUTXODetails:
+    def test_single_tip_and_no_parent_fetches(self, fake_backend):
+        """Test one tip lookup and output scripts derived from the address"""
+        fake_backend.set_tip(105, "cc" * 32)
+        fake_backend.add_transaction(parent_tx(SHARED_TXID, {0, 2}, height=100))
+        fake_backend.add_transaction(parent_tx(OTHER_TXID, {1}))
+
+        utxos = network.fetch_utxos_with_details(ADDRESS, "testnet")
+
+        assert fake_backend.count("get_tip_height") == 1
+        assert fake_backend.count("get_transaction") == 0
+        assert [u["confirmations"] for u in utxos] == [0, 6, 6]
+        assert {u["script_pubkey"] for u in utxos} == {"0014751e76e8199196d454941c45d1b3a323f1433bd6"}
+        assert utxos[0]["date"] == "Pending"
+
+    def test_tip_snapshot_is_reused(self, fake_backend):
+        """Test that a caller-provided tip height skips the tip request"""
+        fake_backend.add_transaction(parent_tx(SHARED_TXID, {0}, height=90))
+
+        utxos = network.fetch_utxos_with_details(ADDRESS, "testnet", tip_height=99)
+
+        assert fake_backend.count("get_tip_height") == 0
+        assert utxos[0]["confirmations"] == 10
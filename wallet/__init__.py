@@ -4,7 +4,7 @@ from .transactions import (
     create_and_sign_transaction,
     broadcast_transaction
 )
-from .network import fetch_address_balance, fetch_utxos, get_recommended_fee_rate, get_blockchain_info, get_mempool_info
+from .network import fetch_address_balance, iter_address_balances, fetch_utxos, get_recommended_fee_rate, get_blockchain_info, get_mempool_info
 from .display import WalletDisplay
 from .qrcode import generate_ascii_qr
 from .privacy import address_manager, randomize_amount
@@ -16,6 +16,7 @@ __all__ = [
     'create_and_sign_transaction',
     'broadcast_transaction',
     'fetch_address_balance',
+    'iter_address_balances',
     'fetch_utxos',
     'WalletDisplay',
     'generate_ascii_qr',
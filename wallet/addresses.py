@@ -0,0 +1,134 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .keys import generate_wallet, create_p2wpkh_address, WatchOnlyAccount
+
+# (index, private_key_wif or None, public_key_hex or None, address)
+AddressEntry = Tuple[int, str, str, str]
+
+# Derives `count` entries of a segment starting at a segment-relative position
+SegmentDeriver = Callable[[int, int], List[AddressEntry]]
+
+class AddressProvider:
+    """
+    A wallet's addresses, derived on demand.
+
+    The provider replaces the fully built list of (index, wif, pubkey_hex,
+    address) tuples that generate_wallet returns. It is made of segments
+    of known length - entries already at hand, an imported private key,
+    a chain of an account xpub - so its length is known up front, and
+    indexing, slicing and iteration derive only the entries they reach.
+    Derived entries are memoized.
+
+    Iteration skips addresses it has already yielded, since an imported
+    key usually also sits on its account's receive chain; indexing and
+    slicing are positional.
+    """
+
+    def __init__(self):
+        """Initialize an empty provider; add segments with the add_* methods."""
+        self._segments: List[Tuple[int, int, SegmentDeriver]] = []
+        self._length = 0
+        self._entries: Dict[int, AddressEntry] = {}
+        self.derived = 0
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[AddressEntry]) -> "AddressProvider":
+        """Create a provider over entries that are already derived."""
+        return cls().add_entries(entries)
+
+    @classmethod
+    def for_private_key(cls, privkey: str, network: str = "testnet") -> "AddressProvider":
+        """Create a provider for the address of an imported private key."""
+        return cls().add_private_key(privkey, network)
+
+    @classmethod
+    def for_public_key(cls, pubkey: bytes, network: str = "testnet") -> "AddressProvider":
+        """Create a provider for the SegWit address of a public key, derived on first access."""
+        return cls().add(1, lambda start, count: [(0, None, pubkey.hex(), create_p2wpkh_address(pubkey, network))])
+
+    def add(self, length: int, derive: SegmentDeriver) -> "AddressProvider":
+        """
+        Append a segment.
+
+        Args:
+            length: Number of entries in the segment
+            derive: Called with (start, count) relative to the segment
+
+        Returns:
+            The provider, for chaining
+        """
+        if length > 0:
+            self._segments.append((self._length, length, derive))
+            self._length += length
+        return self
+
+    def add_entries(self, entries: Iterable[AddressEntry]) -> "AddressProvider":
+        """Append entries that are already derived."""
+        offset = self._length
+        entries = list(entries)
+        self._entries.update((offset + i, entry) for i, entry in enumerate(entries))
+        return self.add(len(entries), lambda start, count: entries[start:start + count])
+
+    def add_private_key(self, privkey: str, network: str = "testnet") -> "AddressProvider":
+        """Append the address of an imported private key, derived on first access."""
+        return self.add(1, lambda start, count: generate_wallet(privkey, network)[3][:1])
+
+    def add_account_chain(self, account: WatchOnlyAccount, chain: int, count: int) -> "AddressProvider":
+        """
+        Append the first `count` addresses of one chain of an account.
+
+        Args:
+            account: Watch-only account deriving from the xpub
+            chain: 0 for receive addresses, 1 for change
+            count: Number of addresses
+        """
+        return self.add(count, lambda start, n: account.derive(chain, start, n))
+
+    def _fetch(self, positions: Iterable[int]) -> None:
+        """Derive the missing entries among `positions`, one call per consecutive run."""
+        missing = sorted(i for i in set(positions) if i not in self._entries)
+        runs: List[List[int]] = []
+        for position in missing:
+            if runs and position == runs[-1][-1] + 1 and self._segment(position) is self._segment(runs[-1][0]):
+                runs[-1].append(position)
+            else:
+                runs.append([position])
+
+        for run in runs:
+            offset, _, derive = self._segment(run[0])
+            entries = derive(run[0] - offset, len(run))
+            self.derived += len(entries)
+            self._entries.update(zip(run, entries))
+
+    def _segment(self, position: int) -> Tuple[int, int, SegmentDeriver]:
+        for segment in self._segments:
+            if segment[0] <= position < segment[0] + segment[1]:
+                return segment
+        raise IndexError("address index out of range")
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[AddressEntry, List[AddressEntry]]:
+        if isinstance(key, slice):
+            positions = range(*key.indices(self._length))
+            self._fetch(positions)
+            return [self._entries[i] for i in positions]
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("address index out of range")
+        self._fetch([key])
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[AddressEntry]:
+        seen = set()
+        for position in range(self._length):
+            entry = self[position]
+            if entry[3] not in seen:
+                seen.add(entry[3])
+                yield entry
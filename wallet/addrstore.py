@@ -0,0 +1,184 @@
+"""
+On-disk cache of derived wallet addresses.
+
+Commands that list, scan or pay from a wallet would otherwise repeat the
+same key derivations on every run. Derived rows are saved in a SQLite
+database under ~/.bitcoin_wallet, so later runs look them up by key
+fingerprint and child index and derive only the indices they have not
+seen. The store holds public data only; if the database cannot be
+opened, derivation simply runs every time.
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# (index, public_key_hex, script_pubkey_hex, address)
+AddressRow = Tuple[int, str, str, str]
+
+def key_fingerprint(key: str) -> str:
+    """
+    Identify a key without deriving anything from it.
+
+    The fingerprint is a truncated, domain-separated SHA256 of the encoded
+    key, so looking up a wallet's addresses costs no elliptic curve work
+    and the stored value reveals nothing about the key itself.
+
+    Args:
+        key: WIF private key or extended key string
+
+    Returns:
+        16 hex characters
+    """
+    return hashlib.sha256(b"bitcoin-wallet-cli/address-store\x00" + key.encode()).hexdigest()[:16]
+
+class AddressStore:
+    """
+    Persistent cache of derived addresses.
+
+    Deriving an address costs a secp256k1 point multiplication plus hashing
+    and bech32 encoding, and most commands re-derive the same wallet. Rows
+    are keyed by key fingerprint, network, chain and index and hold only
+    public data (public key, scriptPubKey and address); private keys are
+    never written.
+    """
+
+    # Constants
+    STORE_DIR = os.path.expanduser("~/.bitcoin_wallet")
+    STORE_FILE = os.path.join(STORE_DIR, "addresses.db")
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            path: Database file path (default: ~/.bitcoin_wallet/addresses.db)
+        """
+        self.path = path or self.STORE_FILE
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database and create tables if needed."""
+        if self._conn is not None or not self.enabled:
+            return self._conn
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS addresses (
+                    fingerprint TEXT NOT NULL,
+                    network TEXT NOT NULL,
+                    chain INTEGER NOT NULL,
+                    idx INTEGER NOT NULL,
+                    pubkey TEXT NOT NULL,
+                    script TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    PRIMARY KEY (fingerprint, network, chain, idx)
+                );
+            """)
+            self._conn = conn
+        except sqlite3.Error as e:
+            print(f"Address cache disabled: {str(e)}")
+            self.enabled = False
+
+        return self._conn
+
+    def get(self, fingerprint: str, network: str, chain: int,
+            indices: Sequence[int]) -> Dict[int, AddressRow]:
+        """
+        Look up stored addresses.
+
+        Args:
+            fingerprint: Key fingerprint from key_fingerprint()
+            network: Network type (mainnet, testnet, signet)
+            chain: Chain number (0 receive, 1 change)
+            indices: Child indices to look up
+
+        Returns:
+            Mapping of index to row for the indices that are stored
+        """
+        if not indices:
+            return {}
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return {}
+            rows = conn.execute(
+                "SELECT idx, pubkey, script, address FROM addresses "
+                "WHERE fingerprint = ? AND network = ? AND chain = ? AND idx BETWEEN ? AND ?",
+                (fingerprint, network, chain, min(indices), max(indices))
+            ).fetchall()
+
+        wanted = set(indices)
+        return {row[0]: tuple(row) for row in rows if row[0] in wanted}
+
+    def put_many(self, fingerprint: str, network: str, chain: int,
+                 rows: List[AddressRow]) -> None:
+        """
+        Store derived addresses.
+
+        Args:
+            fingerprint: Key fingerprint from key_fingerprint()
+            network: Network type
+            chain: Chain number
+            rows: (index, public_key_hex, script_pubkey_hex, address) tuples
+        """
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO addresses "
+                "(fingerprint, network, chain, idx, pubkey, script, address) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(fingerprint, network, chain) + tuple(row) for row in rows]
+            )
+            conn.commit()
+
+    def get_or_derive(self, fingerprint: str, network: str, chain: int, indices: Sequence[int],
+                      derive: Callable[[List[int]], List[AddressRow]]) -> List[AddressRow]:
+        """
+        Get addresses, deriving and storing only the missing indices.
+
+        Args:
+            fingerprint: Key fingerprint from key_fingerprint()
+            network: Network type
+            chain: Chain number
+            indices: Child indices wanted
+            derive: Derives rows for a list of missing indices
+
+        Returns:
+            Rows in the order of `indices`
+        """
+        found = self.get(fingerprint, network, chain, indices)
+        missing = [index for index in indices if index not in found]
+        self.hits += len(indices) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            derived = derive(missing)
+            self.put_many(fingerprint, network, chain, derived)
+            found.update((row[0], row) for row in derived)
+        return [found[index] for index in indices]
+
+    def stats(self) -> Dict[str, int]:
+        """Get lookup hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Create global address store instance
+address_store = AddressStore()
@@ -0,0 +1,333 @@
+"""
+Session key agent for encrypted wallets.
+
+The active wallet's private key is stored encrypted with a Fernet key
+derived from the wallet password by PBKDF2-HMAC-SHA256 (100,000
+iterations), which costs a password prompt and a few hundred
+milliseconds every time a CLI invocation needs the key. Like ssh-agent,
+the key agent is a small background process that keeps derived keys in
+memory and answers requests on a Unix socket only the owner can open,
+so later invocations ask it to sign instead of deriving the key again.
+
+The agent only signs: the private key is decrypted inside the agent and
+never leaves it, so a process that can read the wallet state cannot get
+the key without the password. It can still have digests signed while
+the agent holds the key, which is why the agent is opt-in
+(config.key_agent).
+
+A key expires SESSION_TIMEOUT after its last use, and the agent exits
+once it has held no keys for IDLE_EXIT seconds. Requests and replies are
+single JSON lines:
+
+    {"op": "add", "salt": ..., "key": ..., "ttl": 1800}
+    {"op": "sign", "salt": ..., "token": ..., "digest": ...} -> {"signature": ...}
+    {"op": "remove", "salt": ...}
+    {"op": "status"}                                        -> {"keys": n, "pid": ...}
+    {"op": "stop"}
+
+Salts and keys travel base64 encoded; Fernet tokens are already ASCII.
+Failures come back as {"error": ...}.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import socket
+import struct
+import subprocess
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet, InvalidToken
+
+# Default socket, next to the wallet state
+AGENT_SOCKET = os.path.expanduser("~/.bitcoin_wallet/agent.sock")
+
+# Seconds a key is kept after its last use, as for the wallet session
+SESSION_TIMEOUT = 30 * 60
+
+# Seconds the agent stays up without any keys before exiting
+IDLE_EXIT = 10.0
+
+# Largest request accepted, in bytes
+MAX_REQUEST = 64 * 1024
+
+def _encode(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+class KeyAgent:
+    """In-memory store of derived wallet keys served over a Unix socket."""
+
+    def __init__(self, path: str = AGENT_SOCKET, idle_exit: float = IDLE_EXIT):
+        """
+        Initialize the agent. Call serve() to start answering requests.
+
+        Args:
+            path: Socket path
+            idle_exit: Seconds without keys after which serve() returns
+        """
+        self.path = path
+        self.idle_exit = idle_exit
+        # salt (base64) -> (Fernet key, ttl, expiry time)
+        self._keys: Dict[str, Tuple[bytes, float, float]] = {}
+        self._running = False
+        self._last_request = time.monotonic()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for salt in [salt for salt, entry in self._keys.items() if entry[2] <= now]:
+            del self._keys[salt]
+
+    def _fernet(self, salt: str) -> Optional[Fernet]:
+        """Get the cipher for a salt and extend its key's lifetime."""
+        entry = self._keys.get(salt)
+        if entry is None:
+            return None
+        key, ttl, _ = entry
+        self._keys[salt] = (key, ttl, time.monotonic() + ttl)
+        return Fernet(key)
+
+    def handle(self, request: Dict) -> Dict:
+        """
+        Answer one request.
+
+        Args:
+            request: Decoded request with an "op" field
+
+        Returns:
+            Reply dictionary, with an "error" field on failure
+        """
+        self._expire()
+        self._last_request = time.monotonic()
+        op = request.get("op")
+
+        if op == "add":
+            ttl = float(request.get("ttl", SESSION_TIMEOUT))
+            self._keys[request["salt"]] = (request["key"].encode(), ttl, time.monotonic() + ttl)
+            return {"ok": True}
+
+        if op == "sign":
+            fernet = self._fernet(request["salt"])
+            if fernet is None:
+                return {"error": "No key for this wallet"}
+            try:
+                wif = fernet.decrypt(request["token"].encode()).decode()
+            except InvalidToken:
+                return {"error": "Key does not decrypt this wallet"}
+
+            # Imported here so the agent starts without the curve libraries
+            from . import crypto
+            from .keys import wif_to_secret
+            signature = crypto.sign(wif_to_secret(wif), bytes.fromhex(request["digest"]))
+            return {"signature": signature.hex()}
+
+        if op == "remove":
+            self._keys.pop(request["salt"], None)
+            return {"ok": True}
+
+        if op == "status":
+            return {"keys": len(self._keys), "pid": os.getpid()}
+
+        if op == "stop":
+            self._keys.clear()
+            self._running = False
+            return {"ok": True}
+
+        return {"error": f"Unknown operation: {op}"}
+
+    def _peer_allowed(self, conn: socket.socket) -> bool:
+        """Refuse connections from other users where the platform reports the peer."""
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", creds)
+        return uid == os.getuid()
+
+    def _serve_connection(self, conn: socket.socket) -> None:
+        conn.settimeout(2.0)
+        if not self._peer_allowed(conn):
+            return
+        data = b""
+        while not data.endswith(b"\n") and len(data) < MAX_REQUEST:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        try:
+            reply = self.handle(json.loads(data))
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"error": f"Bad request: {str(e)}"}
+        conn.sendall(json.dumps(reply).encode() + b"\n")
+
+    def bind(self) -> socket.socket:
+        """
+        Create the listening socket, readable and writable by the owner only.
+
+        Raises:
+            OSError: If another agent is already listening on the path
+        """
+        if os.path.exists(self.path):
+            if AgentClient(self.path, autostart=False).status() is not None:
+                raise OSError(f"Key agent already running on {self.path}")
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket file without group or world access, then make sure
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.path, 0o600)
+        server.listen(8)
+        server.settimeout(0.5)
+        return server
+
+    def serve(self) -> None:
+        """Answer requests until stopped or idle without keys."""
+        server = self.bind()
+        self._running = True
+        self._last_request = time.monotonic()
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    self._expire()
+                    if not self._keys and time.monotonic() - self._last_request > self.idle_exit:
+                        break
+                    continue
+                with conn:
+                    try:
+                        self._serve_connection(conn)
+                    except OSError:
+                        pass
+        finally:
+            server.close()
+            self._keys.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+class AgentClient:
+    """Talks to the key agent; every method fails soft when no agent answers."""
+
+    def __init__(self, path: str = AGENT_SOCKET, autostart: bool = True, timeout: float = 2.0):
+        """
+        Initialize the client.
+
+        Args:
+            path: Socket path of the agent
+            autostart: Start an agent process when adding a key and none answers
+            timeout: Socket timeout in seconds
+        """
+        self.path = path
+        self.autostart = autostart
+        self.timeout = timeout
+
+    def request(self, message: Dict) -> Optional[Dict]:
+        """
+        Send one request.
+
+        Returns:
+            The reply, or None if no agent answered
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                sock.sendall(json.dumps(message).encode() + b"\n")
+                data = b""
+                while not data.endswith(b"\n"):
+                    chunk = sock.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+            return json.loads(data)
+        except (OSError, ValueError):
+            return None
+
+    def status(self) -> Optional[Dict]:
+        """Get the number of keys held and the agent's process id, or None if not running."""
+        reply = self.request({"op": "status"})
+        return None if reply is None or "error" in reply else reply
+
+    def add_key(self, salt: bytes, key: bytes, ttl: float = SESSION_TIMEOUT) -> bool:
+        """
+        Hand a derived key to the agent, starting one if needed.
+
+        Args:
+            salt: PBKDF2 salt identifying the encrypted private key
+            key: URL-safe base64 Fernet key
+            ttl: Seconds to keep the key after its last use
+
+        Returns:
+            True if the agent holds the key
+        """
+        message = {"op": "add", "salt": _encode(salt), "key": key.decode(), "ttl": ttl}
+        reply = self.request(message)
+        if reply is None and self.autostart and start_agent(self.path):
+            reply = self.request(message)
+        return bool(reply and reply.get("ok"))
+
+    def sign(self, salt: bytes, token: bytes, digest: bytes) -> Optional[bytes]:
+        """
+        Sign a 32-byte digest with the WIF private key inside a Fernet token.
+
+        The private key is decrypted inside the agent and never sent back.
+
+        Returns:
+            Low-S DER signature without a sighash byte, or None if no agent holds the key
+        """
+        reply = self.request({
+            "op": "sign", "salt": _encode(salt), "token": token.decode(), "digest": digest.hex()
+        })
+        return bytes.fromhex(reply["signature"]) if reply and "signature" in reply else None
+
+    def remove(self, salt: bytes) -> bool:
+        """Make the agent forget the key for a salt."""
+        reply = self.request({"op": "remove", "salt": _encode(salt)})
+        return bool(reply and reply.get("ok"))
+
+    def stop(self) -> bool:
+        """Make the agent drop all keys and exit."""
+        reply = self.request({"op": "stop"})
+        return bool(reply and reply.get("ok"))
+
+def start_agent(path: str = AGENT_SOCKET, wait: float = 5.0) -> bool:
+    """
+    Start an agent in a detached background process.
+
+    Args:
+        path: Socket path for the agent
+        wait: Seconds to wait for it to answer
+
+    Returns:
+        True if the agent answers
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "wallet.agent", path],
+            cwd=package_root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return False
+
+    client = AgentClient(path, autostart=False)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if client.status() is not None:
+            return True
+        time.sleep(0.05)
+    return False
+
+# Create global client instance
+key_agent = AgentClient()
+
+if __name__ == "__main__":
+    KeyAgent(sys.argv[1] if len(sys.argv) > 1 else AGENT_SOCKET).serve()
@@ -0,0 +1,504 @@
+"""
+Blockchain data backends.
+
+Every lookup the wallet makes goes through a ChainBackend. Backends return
+data in the Esplora JSON shape (address stats, UTXOs with a status block,
+transactions with vin prevouts and vout scripts), which is the format the
+rest of the wallet is written against. Which backend serves a network is
+chosen by WalletConfig.network_configs.
+"""
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+import requests
+
+from .config import config, NetworkConfig
+from .exceptions import ConfigurationError, TransactionError
+from .transport import transport
+from .singleflight import request_coalescer
+from .endpoints import hedger
+
+# Esplora returns confirmed address history in pages of this many transactions
+CHAIN_PAGE_SIZE = 25
+
+class ChainBackend(ABC):
+    """
+    Interface for a source of blockchain data.
+
+    Methods raise requests.RequestException when the data source cannot be
+    reached or rejects a lookup.
+    """
+
+    explorer_url: str = ""
+
+    # Whether lookups for many addresses are cheaper through get_balances
+    # and get_utxos_for than through concurrent per-address calls
+    batches_requests: bool = False
+
+    # Whether the backend sees every transaction of an address. Without an
+    # index, tx_count cannot tell used from unused addresses and incoming
+    # mempool payments are invisible.
+    has_address_index: bool = True
+
+    @classmethod
+    def from_config(cls, network_config: NetworkConfig) -> "ChainBackend":
+        """
+        Build the backend from a network configuration.
+
+        Args:
+            network_config: Network configuration; backend_options are
+                passed to the constructor as keyword arguments
+
+        Returns:
+            The configured backend
+        """
+        options = {"explorer_url": network_config.explorer_url}
+        options.update(network_config.backend_options or {})
+        return cls(**options)
+
+    @abstractmethod
+    def get_address_stats(self, address: str) -> Dict:
+        """
+        Get balance and transaction count statistics for an address.
+
+        Returns:
+            Dictionary with Esplora-style chain_stats and mempool_stats
+        """
+
+    def get_balances(self, addresses: List[str]) -> Dict[str, Dict]:
+        """
+        Get address statistics for many addresses.
+
+        Backends that can batch lookups override this; the default looks
+        addresses up one at a time.
+
+        Returns:
+            Mapping of address to its get_address_stats result
+        """
+        return {address: self.get_address_stats(address) for address in addresses}
+
+    @abstractmethod
+    def get_utxos(self, address: str) -> List[Dict]:
+        """
+        Get unspent outputs paying to an address.
+
+        Returns:
+            List of {txid, vout, value, status} dictionaries
+        """
+
+    def get_utxos_for(self, addresses: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get unspent outputs for many addresses.
+
+        Backends that can batch lookups override this; the default looks
+        addresses up one at a time.
+
+        Returns:
+            Mapping of address to its get_utxos result
+        """
+        return {address: self.get_utxos(address) for address in addresses}
+
+    @abstractmethod
+    def get_address_transactions(self, address: str) -> List[Dict]:
+        """
+        Get the newest page of an address's history.
+
+        Returns:
+            Mempool transactions followed by up to CHAIN_PAGE_SIZE confirmed ones
+        """
+
+    @abstractmethod
+    def get_address_transactions_chain(self, address: str, last_seen_txid: str) -> List[Dict]:
+        """
+        Get the next page of confirmed history after a given transaction.
+
+        Returns:
+            Up to CHAIN_PAGE_SIZE confirmed transactions, newest first
+        """
+
+    @abstractmethod
+    def get_transaction(self, txid: str) -> Dict:
+        """Get a transaction by ID."""
+
+    @abstractmethod
+    def get_tip_height(self) -> int:
+        """Get the height of the best block."""
+
+    @abstractmethod
+    def get_tip_hash(self) -> str:
+        """Get the hash of the best block."""
+
+    @abstractmethod
+    def get_block_hash(self, height: int) -> str:
+        """Get the hash of the best chain's block at a height."""
+
+    @abstractmethod
+    def broadcast(self, tx_hex: str) -> str:
+        """
+        Broadcast a signed transaction.
+
+        Args:
+            tx_hex: Serialized transaction in hex
+
+        Returns:
+            Transaction ID
+
+        Raises:
+            TransactionError: If the transaction was rejected
+        """
+
+    @abstractmethod
+    def get_fee_estimates(self) -> Dict[int, float]:
+        """
+        Get fee rate estimates.
+
+        Returns:
+            Mapping of confirmation target in blocks to fee rate in sat/vB
+        """
+
+    def get_fee_histogram(self) -> Optional[List[Tuple[float, int]]]:
+        """
+        Get the mempool fee histogram.
+
+        Backends that can see the mempool override this; the default has
+        no histogram to offer.
+
+        Returns:
+            (fee rate in sat/vB, vsize) buckets, highest fee rate first,
+            or None if the backend cannot provide a histogram
+        """
+        return None
+
+class EsploraBackend(ChainBackend):
+    """Backend for the Esplora REST API (Blockstream, mempool.space or a self-hosted electrs)."""
+
+    def __init__(self, api_url: str, explorer_url: str = "",
+                 mirror_urls: Optional[List[str]] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            api_url: Base URL of the Esplora API, e.g. http://localhost:3002
+            explorer_url: Block explorer base URL used for links
+            mirror_urls: Other Esplora APIs for the same network that slow
+                or failing reads are hedged to
+        """
+        self.api_url = api_url.rstrip('/')
+        self.explorer_url = explorer_url.rstrip('/')
+        self.mirror_urls = [url.rstrip('/') for url in mirror_urls or []]
+
+    @classmethod
+    def from_config(cls, network_config: NetworkConfig) -> "EsploraBackend":
+        options = {
+            "api_url": network_config.api_url,
+            "explorer_url": network_config.explorer_url,
+            "mirror_urls": network_config.mirror_urls
+        }
+        options.update(network_config.backend_options or {})
+        return cls(**options)
+
+    def _get(self, path: str) -> requests.Response:
+        """
+        Send a GET request to the API and raise on HTTP errors.
+
+        Reads the primary API has not answered within its p95 latency are
+        also sent to a mirror, and the first good response is used.
+        """
+        def fetch(base_url: str) -> requests.Response:
+            response = transport.get(f"{base_url}{path}")
+            response.raise_for_status()
+            return response
+
+        return hedger.call([self.api_url] + self.mirror_urls, fetch)
+
+    def _get_json(self, path: str):
+        """GET a JSON resource, sharing identical concurrent or recent requests."""
+        return request_coalescer.do(
+            ("json", f"{self.api_url}{path}"),
+            lambda: self._get(path).json()
+        )
+
+    def _get_text(self, path: str) -> str:
+        """GET a plain-text resource, sharing identical concurrent or recent requests."""
+        return request_coalescer.do(
+            ("text", f"{self.api_url}{path}"),
+            lambda: self._get(path).text.strip()
+        )
+
+    def get_address_stats(self, address: str) -> Dict:
+        return self._get_json(f"/address/{address}")
+
+    def get_utxos(self, address: str) -> List[Dict]:
+        return self._get_json(f"/address/{address}/utxo")
+
+    def get_address_transactions(self, address: str) -> List[Dict]:
+        return self._get_json(f"/address/{address}/txs")
+
+    def get_address_transactions_chain(self, address: str, last_seen_txid: str) -> List[Dict]:
+        return self._get_json(f"/address/{address}/txs/chain/{last_seen_txid}")
+
+    def get_transaction(self, txid: str) -> Dict:
+        return self._get_json(f"/tx/{txid}")
+
+    def get_tip_height(self) -> int:
+        return int(self._get_text("/blocks/tip/height"))
+
+    def get_tip_hash(self) -> str:
+        return self._get_text("/blocks/tip/hash")
+
+    def get_block_hash(self, height: int) -> str:
+        return self._get_text(f"/block-height/{height}")
+
+    def broadcast(self, tx_hex: str) -> str:
+        response = transport.post(f"{self.api_url}/tx", data=tx_hex)
+
+        if response.status_code != 200:
+            error_msg = response.text if response.text else f"HTTP {response.status_code}"
+            raise TransactionError("broadcast", error_msg)
+
+        # Recently read address data no longer reflects the mempool
+        request_coalescer.clear()
+        return response.text.strip()
+
+    def get_fee_estimates(self) -> Dict[int, float]:
+        estimates = self._get_json("/fee-estimates")
+        return {int(target): float(rate) for target, rate in estimates.items()}
+
+    def get_fee_histogram(self) -> List[Tuple[float, int]]:
+        return [(float(rate), int(vsize)) for rate, vsize in self._get_json("/mempool")["fee_histogram"]]
+
+class FakeBackend(ChainBackend):
+    """
+    In-process backend holding a small simulated chain.
+
+    Transactions are added in Esplora format and every query is answered
+    from them, so tests and benchmarks can exercise the wallet without any
+    network access. Each call is recorded in `calls`.
+    """
+
+    def __init__(self, tip_height: int = 0, tip_hash: str = "00" * 32,
+                 explorer_url: str = "https://explorer.invalid",
+                 fee_estimates: Optional[Dict[int, float]] = None,
+                 fee_histogram: Optional[List[Tuple[float, int]]] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            tip_height: Height of the simulated best block
+            tip_hash: Hash of the simulated best block
+            explorer_url: Block explorer base URL used for links
+            fee_estimates: Mapping of confirmation target to sat/vB
+            fee_histogram: Simulated mempool fee histogram; without one the
+                backend behaves like one that cannot see the mempool
+        """
+        self.tip_height = tip_height
+        self.tip_hash = tip_hash
+        self.explorer_url = explorer_url
+        self.fee_estimates = fee_estimates or {1: 20.0, 3: 10.0, 6: 5.0}
+        self.fee_histogram = fee_histogram
+        self.transactions: Dict[str, Dict] = {}
+        # Block hashes by height, for blocks without transactions here
+        self.block_hashes: Dict[int, str] = {}
+        self.broadcasts: List[str] = []
+        self.calls: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def _record(self, method: str, *args) -> None:
+        with self._lock:
+            self.calls.append((method,) + args)
+
+    def count(self, method: str) -> int:
+        """Number of calls made to a backend method."""
+        return sum(1 for call in self.calls if call[0] == method)
+
+    def add_transaction(self, tx: Dict) -> None:
+        """Add an Esplora-style transaction to the simulated chain."""
+        self.transactions[tx['txid']] = tx
+
+    def set_tip(self, height: int, block_hash: str) -> None:
+        """Move the simulated best block."""
+        self.tip_height = height
+        self.tip_hash = block_hash
+
+    def _address_history(self, address: str) -> List[Dict]:
+        """All transactions touching an address, mempool first then newest confirmed."""
+        txs = [
+            tx for tx in self.transactions.values()
+            if any(vout.get('scriptpubkey_address') == address for vout in tx.get('vout', [])) or
+               any(vin.get('prevout', {}).get('scriptpubkey_address') == address for vin in tx.get('vin', []))
+        ]
+        return sorted(txs, key=lambda tx: (
+            tx.get('status', {}).get('confirmed', False),
+            -(tx.get('status', {}).get('block_height') or 0)
+        ))
+
+    def _spent_outpoints(self) -> set:
+        return {
+            (vin.get('txid'), vin.get('vout'))
+            for tx in self.transactions.values() for vin in tx.get('vin', [])
+        }
+
+    def get_address_stats(self, address: str) -> Dict:
+        self._record("get_address_stats", address)
+        stats = {
+            "chain_stats": {"funded_txo_sum": 0, "spent_txo_sum": 0, "tx_count": 0},
+            "mempool_stats": {"funded_txo_sum": 0, "spent_txo_sum": 0, "tx_count": 0},
+        }
+        for tx in self._address_history(address):
+            bucket = stats["chain_stats" if tx.get('status', {}).get('confirmed') else "mempool_stats"]
+            bucket["tx_count"] += 1
+            bucket["funded_txo_sum"] += sum(
+                vout.get('value', 0) for vout in tx.get('vout', [])
+                if vout.get('scriptpubkey_address') == address
+            )
+            bucket["spent_txo_sum"] += sum(
+                vin['prevout'].get('value', 0) for vin in tx.get('vin', [])
+                if vin.get('prevout', {}).get('scriptpubkey_address') == address
+            )
+        return {"address": address, **stats}
+
+    def get_utxos(self, address: str) -> List[Dict]:
+        self._record("get_utxos", address)
+        spent = self._spent_outpoints()
+        return [
+            {"txid": tx['txid'], "vout": n, "value": vout.get('value', 0), "status": tx.get('status', {})}
+            for tx in self._address_history(address)
+            for n, vout in enumerate(tx.get('vout', []))
+            if vout.get('scriptpubkey_address') == address and (tx['txid'], n) not in spent
+        ]
+
+    def get_address_transactions(self, address: str) -> List[Dict]:
+        self._record("get_address_transactions", address)
+        history = self._address_history(address)
+        mempool = [tx for tx in history if not tx.get('status', {}).get('confirmed')]
+        confirmed = history[len(mempool):]
+        return mempool + confirmed[:CHAIN_PAGE_SIZE]
+
+    def get_address_transactions_chain(self, address: str, last_seen_txid: str) -> List[Dict]:
+        self._record("get_address_transactions_chain", address, last_seen_txid)
+        confirmed = [
+            tx for tx in self._address_history(address)
+            if tx.get('status', {}).get('confirmed')
+        ]
+        txids = [tx['txid'] for tx in confirmed]
+        if last_seen_txid not in txids:
+            return []
+        start = txids.index(last_seen_txid) + 1
+        return confirmed[start:start + CHAIN_PAGE_SIZE]
+
+    def get_transaction(self, txid: str) -> Dict:
+        self._record("get_transaction", txid)
+        if txid not in self.transactions:
+            raise requests.exceptions.HTTPError(f"404 Client Error: Transaction not found: {txid}")
+        return self.transactions[txid]
+
+    def get_tip_height(self) -> int:
+        self._record("get_tip_height")
+        return self.tip_height
+
+    def get_tip_hash(self) -> str:
+        self._record("get_tip_hash")
+        return self.tip_hash
+
+    def get_block_hash(self, height: int) -> str:
+        self._record("get_block_hash", height)
+        if height in self.block_hashes:
+            return self.block_hashes[height]
+        if height == self.tip_height:
+            return self.tip_hash
+        for tx in self.transactions.values():
+            status = tx.get('status', {})
+            if status.get('confirmed') and status.get('block_height') == height:
+                return status['block_hash']
+        raise requests.exceptions.HTTPError(f"404 Client Error: Block not found: {height}")
+
+    def broadcast(self, tx_hex: str) -> str:
+        self._record("broadcast", tx_hex)
+        try:
+            raw = bytes.fromhex(tx_hex)
+        except ValueError:
+            raise TransactionError("broadcast", "TX decode failed")
+        self.broadcasts.append(tx_hex)
+        # Not a real txid for SegWit transactions, but unique per payload
+        return hashlib.sha256(hashlib.sha256(raw).digest()).digest()[::-1].hex()
+
+    def get_fee_estimates(self) -> Dict[int, float]:
+        self._record("get_fee_estimates")
+        return dict(self.fee_estimates)
+
+    def get_fee_histogram(self) -> Optional[List[Tuple[float, int]]]:
+        self._record("get_fee_histogram")
+        if self.fee_histogram is None:
+            return super().get_fee_histogram()
+        return list(self.fee_histogram)
+
+# Backend classes selectable through NetworkConfig.backend
+BACKEND_TYPES: Dict[str, Type[ChainBackend]] = {
+    "esplora": EsploraBackend,
+    "fake": FakeBackend,
+}
+
+_backends: Dict[str, ChainBackend] = {}
+_backends_lock = threading.Lock()
+
+def create_backend(network_config: NetworkConfig) -> ChainBackend:
+    """
+    Build a backend from a network configuration.
+
+    Args:
+        network_config: Network configuration naming the backend type
+
+    Returns:
+        The configured backend
+
+    Raises:
+        ConfigurationError: If the backend type is unknown
+    """
+    backend_class = BACKEND_TYPES.get(network_config.backend)
+    if backend_class is None:
+        raise ConfigurationError("backend", f"Unknown backend type: {network_config.backend}")
+
+    return backend_class.from_config(network_config)
+
+def get_backend(network: str) -> ChainBackend:
+    """
+    Get the backend serving a network, creating it on first use.
+
+    Args:
+        network: Network type (mainnet, testnet, signet)
+
+    Returns:
+        The network's backend
+
+    Raises:
+        ValueError: If the network is not supported
+    """
+    with _backends_lock:
+        backend = _backends.get(network)
+        if backend is None:
+            network_config = config.network_configs.get(network)
+            if network_config is None:
+                raise ValueError(f"Unsupported network: {network}")
+            backend = _backends[network] = create_backend(network_config)
+        return backend
+
+def set_backend(network: str, backend: ChainBackend) -> None:
+    """
+    Replace the backend serving a network.
+
+    Args:
+        network: Network type
+        backend: Backend to use for all later lookups
+    """
+    with _backends_lock:
+        _backends[network] = backend
+
+def reset_backends() -> None:
+    """Forget all backends so they are rebuilt from the configuration."""
+    with _backends_lock:
+        _backends.clear()
+
+# Backends in their own modules register themselves in BACKEND_TYPES
+from . import electrum, bitcoind  # noqa: E402,F401
@@ -0,0 +1,374 @@
+"""
+BIP32 hierarchical deterministic keys.
+
+Child keys come from HMAC-SHA512 over the parent's chain code and key.
+Private children (CKDpriv) add the tweak to the parent secret modulo the
+curve order; public children (CKDpub) add tweak * G to the parent point,
+so addresses can be watched from an account xpub alone. Curve work goes
+through the crypto backend; everything else here is hashing and
+serialization.
+"""
+import hmac
+import hashlib
+from typing import Dict, Iterable, List, Optional, Union
+
+from bitcoin import base58
+from bitcoin.core import Hash, Hash160
+
+from . import crypto
+
+# First hardened child index
+HARDENED = 0x80000000
+
+# Extended public key version bytes: BIP32 (xpub/tpub) and SLIP-132 P2WPKH (zpub/vpub)
+PUBLIC_VERSIONS: Dict[str, bytes] = {
+    "xpub": bytes.fromhex("0488b21e"),
+    "tpub": bytes.fromhex("043587cf"),
+    "zpub": bytes.fromhex("04b24746"),
+    "vpub": bytes.fromhex("045f1cf6"),
+}
+
+# Extended private key version bytes, paired with PUBLIC_VERSIONS by name
+PRIVATE_VERSIONS: Dict[str, bytes] = {
+    "xprv": bytes.fromhex("0488ade4"),
+    "tprv": bytes.fromhex("04358394"),
+    "zprv": bytes.fromhex("04b2430c"),
+    "vprv": bytes.fromhex("045f18bc"),
+}
+
+# Version used for BIP84 account keys on each network
+BIP84_PUBLIC_PREFIXES = {
+    "mainnet": "zpub",
+    "testnet": "vpub",
+    "signet": "vpub",
+}
+BIP84_PRIVATE_PREFIXES = {
+    "mainnet": "zprv",
+    "testnet": "vprv",
+    "signet": "vprv",
+}
+
+# Public version matching each private version
+_PUBLIC_FOR_PRIVATE = {
+    version: PUBLIC_VERSIONS[prefix[:1] + "pub"] for prefix, version in PRIVATE_VERSIONS.items()
+}
+
+def hash160(data: bytes) -> bytes:
+    """RIPEMD160(SHA256(data)), using hashlib when OpenSSL still provides RIPEMD160."""
+    try:
+        return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+    except ValueError:
+        return Hash160(data)
+
+def base58check_encode(payload: bytes) -> str:
+    """Base58 encode a payload with its 4-byte double-SHA256 checksum."""
+    return base58.encode(payload + Hash(payload)[:4])
+
+def base58check_decode(text: str) -> bytes:
+    """
+    Decode a Base58Check string.
+
+    Raises:
+        ValueError: If the string is not valid Base58 or the checksum fails
+    """
+    try:
+        data = base58.decode(text)
+    except base58.Base58Error as e:
+        raise ValueError(f"Invalid base58 string: {str(e)}") from e
+    payload, checksum = data[:-4], data[-4:]
+    if len(data) < 5 or Hash(payload)[:4] != checksum:
+        raise ValueError("Invalid base58 checksum")
+    return payload
+
+def parse_path(path: str) -> List[int]:
+    """
+    Parse a derivation path such as "m/84'/0'/0'/0/5".
+
+    Hardened steps are marked with ' or h; the leading "m" is optional.
+
+    Returns:
+        Child indices, hardened ones offset by HARDENED
+
+    Raises:
+        ValueError: If a step is not a valid index
+    """
+    parts = path.strip().split("/")
+    if parts[0] in ("m", "M"):
+        parts = parts[1:]
+
+    indices = []
+    for part in parts:
+        hardened = part[-1:] in ("'", "h", "H")
+        digits = part[:-1] if hardened else part
+        if not digits.isdigit() or int(digits) >= HARDENED:
+            raise ValueError(f"Invalid derivation path step: {part!r}")
+        indices.append(int(digits) + (HARDENED if hardened else 0))
+    return indices
+
+def _path_indices(path: Union[str, Iterable[int]]) -> List[int]:
+    return parse_path(path) if isinstance(path, str) else list(path)
+
+class ExtendedPublicKey:
+    """A BIP32 public node: compressed key, chain code and position in the tree."""
+
+    def __init__(self, key: bytes, chain_code: bytes, depth: int = 0,
+                 parent_fingerprint: bytes = b"\x00" * 4, child_number: int = 0,
+                 version: bytes = PUBLIC_VERSIONS["xpub"]):
+        """
+        Initialize the node.
+
+        Args:
+            key: 33-byte compressed public key
+            chain_code: 32-byte chain code
+            depth: Number of derivation steps from the master key
+            parent_fingerprint: First 4 bytes of HASH160 of the parent key
+            child_number: Index this node was derived at
+            version: 4 serialization version bytes
+        """
+        if len(key) != 33 or key[0] not in (2, 3):
+            raise ValueError("Extended public key must hold a compressed public key")
+        self.key = key
+        self.chain_code = chain_code
+        self.depth = depth
+        self.parent_fingerprint = parent_fingerprint
+        self.child_number = child_number
+        self.version = version
+        self._fingerprint = None
+
+    @classmethod
+    def from_string(cls, text: str) -> "ExtendedPublicKey":
+        """
+        Parse an xpub, tpub, zpub or vpub string.
+
+        Raises:
+            ValueError: If the string is not a valid extended public key
+        """
+        payload = base58check_decode(text)
+        if len(payload) != 78:
+            raise ValueError("Extended key must be 78 bytes")
+        version = payload[:4]
+        if version not in PUBLIC_VERSIONS.values():
+            raise ValueError(f"Not an extended public key: {text[:4]}")
+        return cls(
+            key=payload[45:78],
+            chain_code=payload[13:45],
+            depth=payload[4],
+            parent_fingerprint=payload[5:9],
+            child_number=int.from_bytes(payload[9:13], "big"),
+            version=version
+        )
+
+    def to_string(self, prefix: Optional[str] = None) -> str:
+        """
+        Serialize the node.
+
+        Args:
+            prefix: Version to use ("xpub", "tpub", "zpub", "vpub");
+                defaults to the node's own version
+        """
+        version = PUBLIC_VERSIONS[prefix] if prefix else self.version
+        return base58check_encode(
+            version + bytes([self.depth]) + self.parent_fingerprint +
+            self.child_number.to_bytes(4, "big") + self.chain_code + self.key
+        )
+
+    @property
+    def fingerprint(self) -> bytes:
+        """First 4 bytes of HASH160 of the public key."""
+        if self._fingerprint is None:
+            self._fingerprint = hash160(self.key)[:4]
+        return self._fingerprint
+
+    def child(self, index: int) -> "ExtendedPublicKey":
+        """
+        Derive a non-hardened child node (CKDpub).
+
+        Args:
+            index: Child index below 2^31
+
+        Returns:
+            The child node
+
+        Raises:
+            ValueError: For hardened indices, or in the ~2^-127 case where
+                the index yields no valid key and the next one must be used
+        """
+        if index >= HARDENED:
+            raise ValueError("Hardened children cannot be derived from a public key")
+
+        digest = hmac.new(self.chain_code, self.key + index.to_bytes(4, "big"), hashlib.sha512).digest()
+        if int.from_bytes(digest[:32], "big") >= crypto.CURVE_ORDER:
+            raise ValueError(f"Invalid child at index {index}")
+
+        return ExtendedPublicKey(
+            key=crypto.tweak_add(self.key, digest[:32]),
+            chain_code=digest[32:],
+            depth=self.depth + 1,
+            parent_fingerprint=self.fingerprint,
+            child_number=index,
+            version=self.version
+        )
+
+    def derive_path(self, path: Union[str, Iterable[int]]) -> "ExtendedPublicKey":
+        """
+        Derive a descendant along a non-hardened path relative to this node.
+
+        Args:
+            path: Path string ("m/0/5" or "0/5") or child indices
+        """
+        node = self
+        for index in _path_indices(path):
+            node = node.child(index)
+        return node
+
+class ExtendedPrivateKey:
+    """A BIP32 private node: secret, chain code and position in the tree."""
+
+    def __init__(self, secret: bytes, chain_code: bytes, depth: int = 0,
+                 parent_fingerprint: bytes = b"\x00" * 4, child_number: int = 0,
+                 version: bytes = PRIVATE_VERSIONS["xprv"]):
+        """
+        Initialize the node.
+
+        Args:
+            secret: 32-byte private key
+            chain_code: 32-byte chain code
+            depth: Number of derivation steps from the master key
+            parent_fingerprint: First 4 bytes of HASH160 of the parent key
+            child_number: Index this node was derived at
+            version: 4 serialization version bytes
+
+        Raises:
+            ValueError: If the secret is not a valid private key
+        """
+        if len(secret) != 32 or not 0 < int.from_bytes(secret, "big") < crypto.CURVE_ORDER:
+            raise ValueError("Invalid extended private key")
+        self.secret = secret
+        self.chain_code = chain_code
+        self.depth = depth
+        self.parent_fingerprint = parent_fingerprint
+        self.child_number = child_number
+        self.version = version
+        self._key = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_seed(cls, seed: bytes, version: bytes = PRIVATE_VERSIONS["xprv"]) -> "ExtendedPrivateKey":
+        """
+        Create the master node of a seed (for example a BIP39 seed).
+
+        Raises:
+            ValueError: In the ~2^-127 case where the seed gives no valid key
+        """
+        digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+        return cls(digest[:32], digest[32:], version=version)
+
+    @classmethod
+    def from_string(cls, text: str) -> "ExtendedPrivateKey":
+        """
+        Parse an xprv, tprv, zprv or vprv string.
+
+        Raises:
+            ValueError: If the string is not a valid extended private key
+        """
+        payload = base58check_decode(text)
+        if len(payload) != 78:
+            raise ValueError("Extended key must be 78 bytes")
+        version = payload[:4]
+        if version not in PRIVATE_VERSIONS.values() or payload[45] != 0:
+            raise ValueError(f"Not an extended private key: {text[:4]}")
+        return cls(
+            secret=payload[46:78],
+            chain_code=payload[13:45],
+            depth=payload[4],
+            parent_fingerprint=payload[5:9],
+            child_number=int.from_bytes(payload[9:13], "big"),
+            version=version
+        )
+
+    def to_string(self, prefix: Optional[str] = None) -> str:
+        """
+        Serialize the node.
+
+        Args:
+            prefix: Version to use ("xprv", "tprv", "zprv", "vprv");
+                defaults to the node's own version
+        """
+        version = PRIVATE_VERSIONS[prefix] if prefix else self.version
+        return base58check_encode(
+            version + bytes([self.depth]) + self.parent_fingerprint +
+            self.child_number.to_bytes(4, "big") + self.chain_code + b"\x00" + self.secret
+        )
+
+    @property
+    def key(self) -> bytes:
+        """The compressed public key, computed once."""
+        if self._key is None:
+            self._key = crypto.pubkey_from_secret(self.secret)
+        return self._key
+
+    @property
+    def fingerprint(self) -> bytes:
+        """First 4 bytes of HASH160 of the public key."""
+        if self._fingerprint is None:
+            self._fingerprint = hash160(self.key)[:4]
+        return self._fingerprint
+
+    def public_key(self) -> ExtendedPublicKey:
+        """Get the public node, keeping the matching version (xprv -> xpub, zprv -> zpub)."""
+        return ExtendedPublicKey(
+            key=self.key,
+            chain_code=self.chain_code,
+            depth=self.depth,
+            parent_fingerprint=self.parent_fingerprint,
+            child_number=self.child_number,
+            version=_PUBLIC_FOR_PRIVATE.get(self.version, PUBLIC_VERSIONS["xpub"])
+        )
+
+    def child(self, index: int) -> "ExtendedPrivateKey":
+        """
+        Derive a child node (CKDpriv).
+
+        Hardened children (index >= HARDENED) hash the parent secret, others
+        the parent public key, so they match the CKDpub children.
+
+        Args:
+            index: Child index
+
+        Returns:
+            The child node
+
+        Raises:
+            ValueError: In the ~2^-127 case where the index yields no valid key
+        """
+        if index >= HARDENED:
+            data = b"\x00" + self.secret
+        else:
+            data = self.key
+        digest = hmac.new(self.chain_code, data + index.to_bytes(4, "big"), hashlib.sha512).digest()
+
+        tweak = int.from_bytes(digest[:32], "big")
+        secret = (tweak + int.from_bytes(self.secret, "big")) % crypto.CURVE_ORDER
+        if tweak >= crypto.CURVE_ORDER or secret == 0:
+            raise ValueError(f"Invalid child at index {index}")
+
+        return ExtendedPrivateKey(
+            secret=secret.to_bytes(32, "big"),
+            chain_code=digest[32:],
+            depth=self.depth + 1,
+            parent_fingerprint=self.fingerprint,
+            child_number=index,
+            version=self.version
+        )
+
+    def derive_path(self, path: Union[str, Iterable[int]]) -> "ExtendedPrivateKey":
+        """
+        Derive a descendant relative to this node.
+
+        Args:
+            path: Path string ("m/84'/0'/0'" or "0/5") or child indices
+        """
+        node = self
+        for index in _path_indices(path):
+            node = node.child(index)
+        return node
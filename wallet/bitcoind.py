@@ -0,0 +1,338 @@
+"""
+Bitcoin Core JSON-RPC backend.
+
+Lets a wallet run entirely against its own node. Calls are sent as JSON-RPC
+batches over the shared HTTP transport. Bitcoin Core keeps no address
+index, so balances and UTXOs come from `scantxoutset` over the UTXO set and
+address history is not available.
+
+`scantxoutset` sees only confirmed outputs. Each scan is followed by one
+batch of `gettxout` calls that include the mempool, so outputs already
+spent by an unconfirmed transaction are not offered for spending again.
+Incoming unconfirmed payments remain invisible until they confirm, and
+transaction counts only cover transactions with unspent outputs, so gap-
+limit discovery refuses this backend.
+
+Block hashes and times are cached by height; when the node reports a new
+best block, the entries a reorganization could have replaced are dropped.
+"""
+import os
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .backends import ChainBackend, BACKEND_TYPES
+from .config import NetworkConfig
+from .exceptions import TransactionError
+from .transport import transport
+from .singleflight import request_coalescer
+from .txstore import TransactionStore
+
+# Default RPC ports per network
+RPC_PORTS = {
+    "mainnet": 8332,
+    "testnet": 18332,
+    "signet": 38332
+}
+
+# Seconds allowed for a UTXO set scan, which reads the whole chainstate
+SCAN_TIMEOUT = 300.0
+
+class BitcoinRPCError(requests.exceptions.RequestException):
+    """Raised when bitcoind returns an error for an RPC call."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        self.code = code
+        super().__init__(message)
+
+def _to_sat(amount_btc: float) -> int:
+    """Convert a BTC amount from an RPC result to satoshis."""
+    return int(round(amount_btc * 100_000_000))
+
+class BitcoindBackend(ChainBackend):
+    """Backend for a Bitcoin Core node's JSON-RPC interface."""
+
+    batches_requests = True
+    has_address_index = False
+
+    def __init__(self, rpc_url: str = "http://127.0.0.1:18332",
+                 rpc_user: Optional[str] = None, rpc_password: Optional[str] = None,
+                 cookie_file: Optional[str] = None, explorer_url: str = "",
+                 scan_timeout: float = SCAN_TIMEOUT):
+        """
+        Initialize the backend.
+
+        Args:
+            rpc_url: URL of the node's RPC server
+            rpc_user: RPC user name (rpcuser / rpcauth)
+            rpc_password: RPC password
+            cookie_file: Path to the node's .cookie file, used when no
+                user name is given
+            explorer_url: Block explorer base URL used for links
+            scan_timeout: Request timeout in seconds for scantxoutset
+        """
+        self.rpc_url = rpc_url
+        self.rpc_user = rpc_user
+        self.rpc_password = rpc_password
+        self.cookie_file = cookie_file
+        self.explorer_url = explorer_url.rstrip('/')
+        self.scan_timeout = scan_timeout
+        self._ids = itertools.count(1)
+        self._block_times: Dict[int, Tuple[str, int]] = {}
+        self._tip_hash: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, network_config: NetworkConfig) -> "BitcoindBackend":
+        port = RPC_PORTS.get(network_config.network_type, RPC_PORTS["testnet"])
+        options = {"rpc_url": f"http://127.0.0.1:{port}", "explorer_url": network_config.explorer_url}
+        options.update(network_config.backend_options or {})
+        return cls(**options)
+
+    def _auth(self) -> Optional[Tuple[str, str]]:
+        """Get RPC credentials from the configuration or the cookie file."""
+        if self.rpc_user is not None:
+            return self.rpc_user, self.rpc_password or ""
+        if self.cookie_file:
+            with open(os.path.expanduser(self.cookie_file)) as f:
+                user, _, password = f.read().strip().partition(":")
+            return user, password
+        return None
+
+    def batch(self, calls: List[Tuple[str, List]], raise_errors: bool = True,
+              timeout: Optional[float] = None) -> List[Any]:
+        """
+        Send several RPC calls in one HTTP request.
+
+        Args:
+            calls: (method, params) pairs
+            raise_errors: Raise the first RPC error instead of returning
+                BitcoinRPCError instances in place of failed results
+            timeout: Request timeout in seconds (default: config.api_timeout)
+
+        Returns:
+            Results in the same order as the calls
+        """
+        if not calls:
+            return []
+
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "1.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        response = transport.post(self.rpc_url, json=payload, auth=self._auth(), timeout=timeout)
+        if response.status_code in (401, 403):
+            raise BitcoinRPCError(f"RPC authentication failed (HTTP {response.status_code})")
+        response.raise_for_status()
+
+        by_id = {item.get("id"): item for item in response.json()}
+        results = []
+        for request_id in ids:
+            item = by_id.get(request_id, {})
+            error = item.get("error")
+            if error:
+                result = BitcoinRPCError(error.get("message", str(error)), error.get("code"))
+                if raise_errors:
+                    raise result
+                results.append(result)
+            else:
+                results.append(item.get("result"))
+        return results
+
+    def call(self, method: str, *params) -> Any:
+        """Send a single RPC call."""
+        return self.batch([(method, list(params))])[0]
+
+    def _observe_tip(self, height: int, tip_hash: str) -> None:
+        """
+        Note the node's best block.
+
+        When it changes, cached block times within the transaction store's
+        REORG_DEPTH of it are dropped, since a reorganization may have
+        replaced those blocks.
+        """
+        if self._tip_hash is not None and tip_hash != self._tip_hash:
+            floor = height - TransactionStore.REORG_DEPTH
+            for cached in [h for h in list(self._block_times) if h > floor]:
+                self._block_times.pop(cached, None)
+        self._tip_hash = tip_hash
+
+    def _block_info(self, heights: List[int]) -> Dict[int, Tuple[str, int]]:
+        """Get (block hash, block time) for heights, fetching unknown ones in two batches."""
+        missing = [h for h in dict.fromkeys(heights) if h not in self._block_times]
+        hashes = self.batch([("getblockhash", [h]) for h in missing])
+        headers = self.batch([("getblockheader", [block_hash]) for block_hash in hashes])
+        for height, block_hash, header in zip(missing, hashes, headers):
+            self._block_times[height] = (block_hash, header["time"])
+        return {h: self._block_times[h] for h in heights}
+
+    def _scan(self, addresses: List[str]) -> List[Dict]:
+        """
+        Scan the UTXO set for outputs paying to any of the addresses.
+
+        Each output gets a "mempool_spent" flag, set when an unconfirmed
+        transaction already spends it.
+        """
+        # Only addresses are known at this level, so addr() descriptors are used;
+        # for P2WPKH they match exactly what wpkh(<pubkey>) would.
+        descriptors = [f"addr({address})" for address in addresses]
+        result = self.batch([("scantxoutset", ["start", descriptors])], timeout=self.scan_timeout)[0]
+        if not result.get("success", True):
+            raise BitcoinRPCError("scantxoutset was aborted")
+        # Bitcoin Core 22+ reports the block the scan was made at
+        if "bestblock" in result and "height" in result:
+            self._observe_tip(result["height"], result["bestblock"])
+        unspents = result.get("unspents", [])
+
+        # gettxout with include_mempool returns null for outputs spent in the mempool
+        outputs = self.batch([("gettxout", [u["txid"], u["vout"], True]) for u in unspents])
+        for unspent, output in zip(unspents, outputs):
+            unspent["mempool_spent"] = output is None
+        return unspents
+
+    @staticmethod
+    def _descriptor_address(unspent: Dict) -> str:
+        """Get the address from a scantxoutset result's addr() descriptor."""
+        return unspent["desc"].split("#")[0][len("addr("):-1]
+
+    def get_address_stats(self, address: str) -> Dict:
+        return self.get_balances([address])[address]
+
+    def get_balances(self, addresses: List[str]) -> Dict[str, Dict]:
+        stats = {
+            address: {
+                "address": address,
+                "chain_stats": {"funded_txo_sum": 0, "spent_txo_sum": 0, "tx_count": 0},
+                "mempool_stats": {"funded_txo_sum": 0, "spent_txo_sum": 0, "tx_count": 0}
+            }
+            for address in addresses
+        }
+        txids: Dict[str, set] = {address: set() for address in addresses}
+        for unspent in self._scan(addresses) if addresses else []:
+            address = self._descriptor_address(unspent)
+            if address not in stats:
+                continue
+            stats[address]["chain_stats"]["funded_txo_sum"] += _to_sat(unspent["amount"])
+            if unspent["mempool_spent"]:
+                stats[address]["mempool_stats"]["spent_txo_sum"] += _to_sat(unspent["amount"])
+            txids[address].add(unspent["txid"])
+
+        # Without an address index only transactions with unspent outputs are
+        # counted, which is why has_address_index is False
+        for address, funding in txids.items():
+            stats[address]["chain_stats"]["tx_count"] = len(funding)
+        return stats
+
+    def get_utxos(self, address: str) -> List[Dict]:
+        return self.get_utxos_for([address])[address]
+
+    def get_utxos_for(self, addresses: List[str]) -> Dict[str, List[Dict]]:
+        # One scan covers every address; outputs spent in the mempool are left out
+        unspents = [u for u in self._scan(addresses) if not u["mempool_spent"]] if addresses else []
+        blocks = self._block_info([u["height"] for u in unspents])
+        utxos: Dict[str, List[Dict]] = {address: [] for address in addresses}
+        for u in unspents:
+            address = self._descriptor_address(u)
+            if address not in utxos:
+                continue
+            utxos[address].append({
+                "txid": u["txid"],
+                "vout": u["vout"],
+                "value": _to_sat(u["amount"]),
+                "status": {
+                    "confirmed": True,
+                    "block_height": u["height"],
+                    "block_hash": blocks[u["height"]][0],
+                    "block_time": blocks[u["height"]][1]
+                }
+            })
+        return utxos
+
+    def get_address_transactions(self, address: str) -> List[Dict]:
+        raise BitcoinRPCError("Bitcoin Core has no address index; transaction history is unavailable")
+
+    def get_address_transactions_chain(self, address: str, last_seen_txid: str) -> List[Dict]:
+        raise BitcoinRPCError("Bitcoin Core has no address index; transaction history is unavailable")
+
+    @staticmethod
+    def _output(vout: Dict) -> Dict:
+        """Convert a decoded RPC output to Esplora form."""
+        script = vout.get("scriptPubKey", {})
+        return {
+            "scriptpubkey": script.get("hex"),
+            "scriptpubkey_address": script.get("address"),
+            "value": _to_sat(vout.get("value", 0))
+        }
+
+    def get_transaction(self, txid: str) -> Dict:
+        # Verbosity 2 adds input prevouts and the fee on Bitcoin Core 25+;
+        # older nodes treat it as plain verbose output
+        tx, tip_height = self.batch([("getrawtransaction", [txid, 2]), ("getblockcount", [])])
+
+        status = {"confirmed": False}
+        if tx.get("confirmations", 0) > 0:
+            status = {
+                "confirmed": True,
+                "block_height": tip_height - tx["confirmations"] + 1,
+                "block_hash": tx.get("blockhash"),
+                "block_time": tx.get("blocktime")
+            }
+
+        vin = []
+        for txin in tx.get("vin", []):
+            if "coinbase" in txin:
+                vin.append({"txid": "00" * 32, "vout": 0xffffffff, "is_coinbase": True, "prevout": None})
+            else:
+                prevout = self._output(txin["prevout"]) if "prevout" in txin else None
+                vin.append({"txid": txin["txid"], "vout": txin["vout"], "is_coinbase": False, "prevout": prevout})
+
+        return {
+            "txid": tx["txid"],
+            "version": tx.get("version"),
+            "locktime": tx.get("locktime"),
+            "vin": vin,
+            "vout": [self._output(vout) for vout in tx.get("vout", [])],
+            "size": tx.get("size"),
+            "weight": tx.get("weight"),
+            "fee": _to_sat(tx["fee"]) if "fee" in tx else None,
+            "status": status
+        }
+
+    def _blockchain_info(self) -> Dict:
+        """getblockchaininfo, shared by the concurrent tip height and hash lookups."""
+        info = request_coalescer.do(
+            ("rpc", self.rpc_url, "getblockchaininfo"),
+            lambda: self.call("getblockchaininfo")
+        )
+        self._observe_tip(info["blocks"], info["bestblockhash"])
+        return info
+
+    def get_tip_height(self) -> int:
+        return self._blockchain_info()["blocks"]
+
+    def get_tip_hash(self) -> str:
+        return self._blockchain_info()["bestblockhash"]
+
+    def get_block_hash(self, height: int) -> str:
+        return self.call("getblockhash", height)
+
+    def broadcast(self, tx_hex: str) -> str:
+        try:
+            txid = self.call("sendrawtransaction", tx_hex)
+        except BitcoinRPCError as e:
+            raise TransactionError("broadcast", str(e))
+        request_coalescer.clear()
+        return txid
+
+    def get_fee_estimates(self) -> Dict[int, float]:
+        targets = [1, 3, 6]
+        results = self.batch([("estimatesmartfee", [target]) for target in targets], raise_errors=False)
+        # feerate is in BTC/kvB and missing when the node has no estimate yet
+        return {
+            target: result["feerate"] * 100_000
+            for target, result in zip(targets, results)
+            if isinstance(result, dict) and result.get("feerate")
+        }
+
+BACKEND_TYPES["bitcoind"] = BitcoindBackend
@@ -0,0 +1,180 @@
+"""
+Bulk address generation from an account xpub.
+
+Large receive-address pools (for invoicing) are derived by splitting the
+index range into shards and deriving each shard in a separate process,
+since every address costs a point multiplication and the work is
+CPU-bound. Results come back shard by shard in index order and are
+written out as they arrive, with only a bounded number of shards in
+flight, so memory stays flat however long the range is.
+"""
+import os
+import csv
+import sys
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from bitcoin import segwit_addr
+
+from .bip32 import ExtendedPublicKey, hash160
+from .keys import BECH32_HRPS
+
+# (index, public_key_hex, script_pubkey_hex, address), as in the address store
+AddressRow = Tuple[int, str, str, str]
+
+# Output columns
+FIELDS = ("index", "pubkey", "script_pubkey", "address")
+
+def parse_range(text: str) -> Tuple[int, int]:
+    """
+    Parse an index range "START:END" (END exclusive).
+
+    Raises:
+        ValueError: If the range is malformed or empty
+    """
+    start_text, sep, end_text = text.partition(":")
+    if not sep or not start_text.isdigit() or not end_text.isdigit():
+        raise ValueError(f"Invalid range {text!r}; expected START:END, e.g. 0:1000")
+    start, end = int(start_text), int(end_text)
+    if end <= start:
+        raise ValueError(f"Invalid range {text!r}; END must be greater than START")
+    return start, end
+
+def derive_shard(account_xpub: str, network: str, chain: int, start: int, end: int) -> List[AddressRow]:
+    """
+    Derive the addresses of one shard. Runs in a worker process.
+
+    Args:
+        account_xpub: Account extended public key (m/84'/coin'/0')
+        network: Network type (mainnet, testnet, signet)
+        chain: 0 for receive addresses, 1 for change
+        start: First child index
+        end: Index after the last one
+
+    Returns:
+        Rows for indices start..end-1
+    """
+    chain_key = ExtendedPublicKey.from_string(account_xpub).child(chain)
+    hrp = BECH32_HRPS.get(network, "tb")
+    rows = []
+    for index in range(start, end):
+        pubkey = chain_key.child(index).key
+        program = hash160(pubkey)
+        rows.append((index, pubkey.hex(), "0014" + program.hex(), segwit_addr.encode(hrp, 0, program)))
+    return rows
+
+class BulkDeriver:
+    """Derives an index range of one chain across a process pool."""
+
+    def __init__(self, account_xpub: str, network: str = "testnet", chain: int = 0,
+                 workers: Optional[int] = None, shard_size: int = 1000):
+        """
+        Initialize the deriver.
+
+        Args:
+            account_xpub: Account extended public key
+            network: Network type
+            chain: 0 for receive addresses, 1 for change
+            workers: Worker processes (default: CPU count); 1 derives in this process
+            shard_size: Indices derived per task
+
+        Raises:
+            ValueError: If the extended key cannot be parsed
+        """
+        ExtendedPublicKey.from_string(account_xpub)
+        self.account_xpub = account_xpub
+        self.network = network
+        self.chain = chain
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.shard_size = max(1, shard_size)
+
+    def shards(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Split [start, end) into consecutive shards."""
+        for shard_start in range(start, end, self.shard_size):
+            yield shard_start, min(shard_start + self.shard_size, end)
+
+    def rows(self, start: int, end: int) -> Iterator[AddressRow]:
+        """
+        Derive rows for indices start..end-1 in index order.
+
+        At most two shards per worker are pending at any time.
+        """
+        if self.workers == 1:
+            for shard_start, shard_end in self.shards(start, end):
+                yield from derive_shard(self.account_xpub, self.network, self.chain, shard_start, shard_end)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from self._ordered(executor, start, end)
+
+    def _ordered(self, executor: Executor, start: int, end: int) -> Iterator[AddressRow]:
+        pending = deque()
+        for shard_start, shard_end in self.shards(start, end):
+            pending.append(executor.submit(
+                derive_shard, self.account_xpub, self.network, self.chain, shard_start, shard_end
+            ))
+            if len(pending) >= self.workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def write_rows(rows: Iterator[AddressRow], stream: IO[str], fmt: str = "jsonl") -> int:
+    """
+    Write rows as CSV (with a header) or JSON Lines.
+
+    Args:
+        rows: Rows to write
+        stream: Text stream
+        fmt: "csv" or "jsonl"
+
+    Returns:
+        Number of rows written
+    """
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+            count += 1
+    return count
+
+def output_format(path: Optional[str]) -> str:
+    """Pick the output format from a file name: .csv gives CSV, anything else JSON Lines."""
+    return "csv" if path and path.lower().endswith(".csv") else "jsonl"
+
+def derive_range(deriver: BulkDeriver, start: int, end: int,
+                 path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Derive a range and stream it to a file or standard output.
+
+    Args:
+        deriver: Configured deriver
+        start: First child index
+        end: Index after the last one
+        path: Output file (default: standard output)
+
+    Returns:
+        Dictionary with count, seconds and addresses per second
+    """
+    began = time.perf_counter()
+    fmt = output_format(path)
+    if path:
+        with open(path, "w", newline="") as f:
+            count = write_rows(deriver.rows(start, end), f, fmt)
+    else:
+        count = write_rows(deriver.rows(start, end), sys.stdout, fmt)
+    seconds = time.perf_counter() - began
+    return {
+        "count": count,
+        "seconds": seconds,
+        "rate": count / seconds if seconds > 0 else 0.0,
+        "workers": deriver.workers,
+    }
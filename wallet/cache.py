@@ -0,0 +1,167 @@
+import time
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .config import config
+
+@dataclass
+class CacheEntry:
+    """A cached value with the time and chain tip it was fetched at."""
+    value: Dict
+    fetched_at: float
+    tip_hash: Optional[str]
+
+class BalanceCache:
+    """
+    In-memory cache of address balance lookups.
+
+    Entries are keyed by (network, address) and expire after a TTL. Every
+    entry remembers the chain tip hash that was current when it was fetched;
+    once a different tip is observed for the network, all older entries are
+    dropped. Entries past their TTL but still within the stale window are
+    served immediately while a background thread refreshes them.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry is considered fresh (default: config.balance_cache_ttl)
+            stale_ttl: Extra seconds an expired entry may be served while it
+                is refreshed (default: config.balance_cache_stale_ttl)
+        """
+        self.ttl = ttl if ttl is not None else config.balance_cache_ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else config.balance_cache_stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], CacheEntry] = {}
+        self._tips: Dict[str, str] = {}
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def get(self, network: str, address: str, fetch: Callable[[], Dict]) -> Dict:
+        """
+        Get a balance, fetching it only when there is no usable entry.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            address: Bitcoin address
+            fetch: Function that performs the actual lookup
+
+        Returns:
+            Balance information dictionary
+        """
+        key = (network, address)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.tip_hash == self._tips.get(network):
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self.hits += 1
+                    self._refresh_in_background(key, fetch)
+                    return entry.value
+            self.misses += 1
+
+        return self._fetch_and_store(key, fetch)
+
+    def contains(self, network: str, address: str) -> bool:
+        """
+        Check whether a lookup would be answered without fetching.
+
+        Args:
+            network: Network type
+            address: Bitcoin address
+
+        Returns:
+            True if a fresh or still-servable stale entry exists
+        """
+        with self._lock:
+            entry = self._entries.get((network, address))
+            return (entry is not None and entry.tip_hash == self._tips.get(network) and
+                    time.monotonic() - entry.fetched_at < self.ttl + self.stale_ttl)
+
+    def _fetch_and_store(self, key: Tuple[str, str], fetch: Callable[[], Dict]) -> Dict:
+        """Run a lookup and cache the result unless it failed."""
+        with self._lock:
+            tip_hash = self._tips.get(key[0])
+
+        value = fetch()
+
+        if not value.get("error"):
+            with self._lock:
+                # Skip storing if the tip moved while the request was in flight
+                if self._tips.get(key[0]) == tip_hash:
+                    self._entries[key] = CacheEntry(value, time.monotonic(), tip_hash)
+        return value
+
+    def _refresh_in_background(self, key: Tuple[str, str], fetch: Callable[[], Dict]) -> None:
+        """Start a background refresh for a key unless one is already running."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch_and_store(key, fetch)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def observe_tip(self, network: str, tip_hash: str) -> None:
+        """
+        Record the current chain tip, dropping entries from older tips.
+
+        Args:
+            network: Network type
+            tip_hash: Hash of the current best block
+        """
+        with self._lock:
+            previous = self._tips.get(network)
+            if previous == tip_hash:
+                return
+            self._tips[network] = tip_hash
+            if previous is None:
+                # Entries fetched before any tip was seen belong to this one
+                for key, entry in self._entries.items():
+                    if key[0] == network:
+                        entry.tip_hash = tip_hash
+                return
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if key[0] != network
+            }
+
+    def invalidate(self, network: Optional[str] = None, address: Optional[str] = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            network: Only drop entries for this network (default: all)
+            address: Only drop the entry for this address
+        """
+        with self._lock:
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if not ((network is None or key[0] == network) and
+                        (address is None or key[1] == address))
+            }
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries)
+        }
+
+# Create global balance cache instance
+balance_cache = BalanceCache()
@@ -0,0 +1,143 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Tuple
+
+import requests
+
+from .config import config
+from .backends import get_backend
+from .cache import balance_cache
+from .txstore import transaction_store
+
+class ChainTip:
+    """
+    Shared source of chain tip data.
+
+    Height and hash are fetched concurrently and memoized per network for a
+    short window, so every command that needs confirmation counts works
+    from the same snapshot without refetching it. Each fetched hash is
+    reported to the balance cache so balances from older tips are dropped,
+    and to the transaction store so transactions from orphaned blocks are.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Initialize the provider.
+
+        Args:
+            ttl: Seconds a fetched tip is reused (default: config.chain_tip_ttl)
+        """
+        self.ttl = ttl if ttl is not None else config.chain_tip_ttl
+        self._tips: Dict[str, Tuple[float, Dict]] = {}
+        self._pinned: Set[str] = set()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _network_lock(self, network: str) -> threading.Lock:
+        """Get the lock that serializes fetches for one network."""
+        with self._lock:
+            return self._locks.setdefault(network, threading.Lock())
+
+    def get(self, network: str) -> Dict:
+        """
+        Get the current chain tip.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+
+        Returns:
+            Dictionary with "height" and "hash" of the best block
+
+        Raises:
+            ValueError: If the network is not supported
+            requests.RequestException: If the tip cannot be fetched
+        """
+        # Concurrent callers wait for one fetch instead of starting their own
+        with self._network_lock(network):
+            cached = self._tips.get(network)
+            if cached and (network in self._pinned or time.monotonic() - cached[0] < self.ttl):
+                return cached[1]
+
+            tip = self._fetch(network)
+            self._tips[network] = (time.monotonic(), tip)
+
+        self._observe(network, tip)
+        return tip
+
+    def height(self, network: str) -> int:
+        """Get the current chain tip height."""
+        return self.get(network)["height"]
+
+    def confirmations(self, network: str, block_height: Optional[int]) -> int:
+        """
+        Count confirmations for a transaction mined at a given height.
+
+        Args:
+            network: Network type
+            block_height: Height of the block the transaction was mined in,
+                or None if it is unconfirmed
+
+        Returns:
+            Number of confirmations (0 for unconfirmed transactions)
+        """
+        if block_height is None:
+            return 0
+        return self.height(network) - block_height + 1
+
+    def update(self, network: str, tip: Dict, pinned: bool = False) -> None:
+        """
+        Record a tip learned without polling, e.g. from a push feed.
+
+        Args:
+            network: Network type
+            tip: Dictionary with "height" and "hash" of the best block
+            pinned: Keep serving this tip past the TTL until it is
+                updated or invalidated
+        """
+        with self._network_lock(network):
+            self._tips[network] = (time.monotonic(), tip)
+            if pinned:
+                self._pinned.add(network)
+            else:
+                self._pinned.discard(network)
+
+        self._observe(network, tip)
+
+    def _observe(self, network: str, tip: Dict) -> None:
+        """Report a tip to the caches that depend on it."""
+        balance_cache.observe_tip(network, tip["hash"])
+        try:
+            transaction_store.observe_tip(network, tip, get_backend(network).get_block_hash)
+        except (requests.exceptions.RequestException, ValueError):
+            # Checked again with the next tip
+            pass
+
+    def invalidate(self, network: Optional[str] = None) -> None:
+        """
+        Forget memoized tips so the next lookup fetches again.
+
+        Args:
+            network: Only forget this network's tip (default: all)
+        """
+        if network is None:
+            self._tips.clear()
+            self._pinned.clear()
+        else:
+            self._tips.pop(network, None)
+            self._pinned.discard(network)
+
+    def _fetch(self, network: str) -> Dict:
+        """Fetch tip height and hash in parallel."""
+        backend = get_backend(network)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            height = executor.submit(backend.get_tip_height)
+            block_hash = executor.submit(backend.get_tip_hash)
+            return {
+                "height": height.result(),
+                "hash": block_hash.result()
+            }
+
+# Create global chain tip provider instance
+chain_tip = ChainTip()
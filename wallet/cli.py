@@ -16,6 +16,7 @@ class CommandArguments(NamedTuple):
     message: Optional[str] = None
     send: Optional[str] = None
     fee_priority: str = "medium"
+    target_blocks: Optional[int] = None
     privacy: bool = False
     check_fees: bool = False
     blockchain_info: bool = False
@@ -25,12 +26,19 @@ class CommandArguments(NamedTuple):
     limit: int = 10
     rates: bool = False
     interactive: bool = False
+    push: bool = False
     utxos: bool = False
     use_wallet: Optional[str] = None
     use_wallet_file: Optional[str] = None
     unload_wallet: bool = False
     wallet_info: bool = False
     address: Optional[str] = None
+    discover: Optional[str] = None
+    gap_limit: Optional[int] = None
+    backend_status: bool = False
+    derive_range: Optional[str] = None
+    derive_output: Optional[str] = None
+    workers: Optional[int] = None
     help: bool = False
     help_command: Optional[str] = None
 
@@ -86,6 +94,12 @@ def create_argument_parser() -> argparse.ArgumentParser:
         default='medium',
         help="Fee priority level (default: medium)"
     )
+    parser.add_argument(
+        "--target-blocks",
+        type=int,
+        default=None,
+        help="Confirmation target in blocks; overrides --fee-priority"
+    )
     parser.add_argument(
         "--privacy",
         action="store_true",
@@ -159,6 +173,12 @@ def create_argument_parser() -> argparse.ArgumentParser:
     "--interactive",
     action="store_true",
     help="Start in interactive mode"
+)
+    parser.add_argument(
+    "--push",
+    action="store_true",
+    help="In interactive mode, follow new blocks and payments over a WebSocket feed. "
+         "Requires push_url in config.json; the feed sees all wallet addresses"
 )
     parser.add_argument(
     "--utxos",
@@ -192,6 +212,41 @@ def create_argument_parser() -> argparse.ArgumentParser:
         "--address",
         type=str,
         help="Check balance of any Bitcoin address (without loading a wallet)"
+)
+    parser.add_argument(
+        "--discover",
+        type=str,
+        metavar="FILE",
+        help="Scan receive and change chains of a wallet file for used addresses"
+)
+    parser.add_argument(
+        "--gap-limit",
+        type=int,
+        default=None,
+        help="Unused addresses in a row that end discovery (default: 20)"
+)
+    parser.add_argument(
+        "--backend-status",
+        action="store_true",
+        help="Show latency and error rates of the explorer endpoints"
+)
+    parser.add_argument(
+        "--derive-range",
+        type=str,
+        metavar="START:END",
+        help="Derive receive addresses START..END-1 of the active wallet's account"
+)
+    parser.add_argument(
+        "--derive-output",
+        type=str,
+        metavar="FILE",
+        help="Write derived addresses to FILE (.csv for CSV, otherwise JSON Lines; default: stdout)"
+)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used by --derive-range (default: number of CPUs)"
 )
     help_group = parser.add_argument_group('help')
     help_group.add_argument(
@@ -224,6 +279,7 @@ def parse_args() -> CommandArguments:
         message=args.message,
         send=args.send,
         fee_priority=args.fee_priority,
+        target_blocks=args.target_blocks,
         privacy=args.privacy,
         check_fees=args.check_fees,
         blockchain_info=args.blockchain_info,
@@ -233,12 +289,19 @@ def parse_args() -> CommandArguments:
         limit=args.limit,
         rates=args.rates,
         interactive=args.interactive,
+        push=args.push,
         utxos=args.utxos,
         use_wallet=args.use_wallet,
         use_wallet_file=args.use_wallet_file,
         unload_wallet=args.unload_wallet,
         wallet_info=args.wallet_info,
         address=args.address,
+        discover=args.discover,
+        gap_limit=args.gap_limit,
+        backend_status=args.backend_status,
+        derive_range=args.derive_range,
+        derive_output=args.derive_output,
+        workers=args.workers,
         help=args.help,
         help_command=args.help_command
     )
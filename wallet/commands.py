@@ -1,11 +1,13 @@
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
+import sys
 import json
+import math
 import datetime
 from bitcoinutils.setup import setup
-from bitcoinutils.transactions import Transaction, TxInput, TxOutput
+from bitcoinutils.transactions import Transaction, TxInput, TxOutput, TxWitnessInput
+from bitcoinutils.constants import SIGHASH_ALL
 from bitcoinutils.keys import PrivateKey, P2wpkhAddress
 from bitcoinutils.script import Script
-import requests
 import random
 from .privacy import randomize_amount
 from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress, CBech32BitcoinAddress
@@ -37,109 +39,41 @@ from .network import (
     fetch_address_balance, 
     get_recommended_fee_rate, 
     get_exchange_rates,
-    fetch_utxos_with_details,
-    fetch_utxos  
+    iter_utxos_with_details,
+    fetch_utxos,
+    fetch_transaction_history,
+    fetch_tip_height,
+    get_backend_status,
+    forget_balances
 )
 from .wallet_manager import wallet_manager
+from .backends import get_backend
+from .exceptions import TransactionError, NetworkError, FeeEstimationError
+from .fees import fee_estimator
+from .keys import get_account_key, WatchOnlyAccount, create_p2wpkh_address
+from .bip32 import hash160
+from .discovery import AddressDiscovery, CHAINS, RECEIVE_CHAIN, CHANGE_CHAIN
+from .bulk import BulkDeriver, parse_range, derive_range
+from .addresses import AddressProvider
 
-# Add this new import for transaction history
-def fetch_transaction_history(address: str, network: str, limit: int = 10) -> List[dict]:
-    """
-    Fetch transaction history for an address with detailed information.
-    
-    Args:
-        address: Bitcoin address to check
-        network: Network type (mainnet, testnet, signet)
-        limit: Maximum number of transactions to fetch
-        
-    Returns:
-        List of transaction details
-    """
-    import requests
-    
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    
-    base_url = api_urls.get(network)
-    if not base_url:
-        return [{"error": f"Unsupported network: {network}"}]
-    
+# A command's addresses: an AddressProvider, or a plain list from generate_wallet
+Addresses = Union[AddressProvider, List[Tuple]]
+
+def print_index_note(network: str) -> None:
+    """Warn that a backend without an address index misses unconfirmed incoming payments."""
     try:
-        # Get transactions for the address
-        response = requests.get(f"{base_url}/address/{address}/txs")
-        response.raise_for_status()
-        txs = response.json()[:limit]  # Limit number of transactions
-        
-        # Process each transaction to get more details
-        tx_details = []
-        for tx in txs:
-            tx_id = tx.get('txid')
-            
-            # Get full transaction details
-            tx_response = requests.get(f"{base_url}/tx/{tx_id}")
-            tx_response.raise_for_status()
-            full_tx = tx_response.json()
-            
-            # Determine if this is incoming or outgoing
-            is_incoming = True
-            tx_value = 0
-            
-            # Check inputs to see if our address is there (outgoing)
-            for vin in full_tx.get('vin', []):
-                if vin.get('prevout', {}).get('scriptpubkey_address') == address:
-                    is_incoming = False
-                    break
-            
-            # Calculate value based on inputs/outputs
-            if is_incoming:
-                # Sum outputs to our address
-                for vout in full_tx.get('vout', []):
-                    if vout.get('scriptpubkey_address') == address:
-                        tx_value += vout.get('value', 0)
-            else:
-                # For outgoing, calculate the net amount sent
-                # This is more complex as we need to consider change outputs
-                # For simplicity, we'll just report the fee and outputs to non-change addresses
-                # A more accurate calculation would track all wallet addresses as potential change
-                fee = full_tx.get('fee', 0)
-                outgoing = 0
-                
-                for vout in full_tx.get('vout', []):
-                    out_addr = vout.get('scriptpubkey_address')
-                    if out_addr != address:  # Assume all other outputs are true sends
-                        outgoing += vout.get('value', 0)
-                
-                tx_value = -(outgoing + fee)
-            
-            # Format transaction details
-            tx_detail = {
-                "txid": tx_id,
-                "date": datetime.datetime.fromtimestamp(full_tx.get('status', {}).get('block_time', 0)).strftime('%Y-%m-%d %H:%M'),
-                "confirmations": full_tx.get('status', {}).get('confirmed') and full_tx.get('status', {}).get('block_height', 0) or 0,
-                "type": "received" if is_incoming else "sent",
-                "amount_sat": tx_value,
-                "amount_btc": tx_value / 100_000_000,
-                "fee_sat": full_tx.get('fee', 0),
-                "status": "confirmed" if full_tx.get('status', {}).get('confirmed') else "pending",
-                "block_height": full_tx.get('status', {}).get('block_height'),
-                "block_hash": full_tx.get('status', {}).get('block_hash'),
-                "explorer_url": f"{api_urls.get(network).replace('/api', '')}/tx/{tx_id}"
-            }
-            
-            tx_details.append(tx_detail)
-            
-        return tx_details
-        
-    except requests.exceptions.RequestException as e:
-        return [{"error": f"Failed to fetch transaction history: {str(e)}"}]
+        backend = get_backend(network)
+    except ValueError:
+        return
+    if not backend.has_address_index:
+        print("Note: this backend has no address index. Incoming payments appear only once "
+              "confirmed, and transaction counts include only transactions with unspent outputs.")
 
 class CheckFeesCommand(Command):
     def __init__(self, args: CommandArguments):
         self.network = args.network
         self.fee_priority = args.fee_priority
+        self.target_blocks = args.target_blocks
 
     def execute(self) -> None:
         fee_rates = get_recommended_fee_rate(self.network)
@@ -147,6 +81,16 @@ class CheckFeesCommand(Command):
         print(f"High Priority: {fee_rates['high']} sat/vB")
         print(f"Medium Priority: {fee_rates['medium']} sat/vB")
         print(f"Low Priority: {fee_rates['low']} sat/vB")
+        if fee_rates.get('warning'):
+            print(f"Warning: {fee_rates['warning']}")
+        
+        if self.target_blocks:
+            try:
+                fee_rate = fee_estimator.estimate(self.network, self.target_blocks)
+                print(f"\nUsing {self.target_blocks}-block target: {fee_rate:.1f} sat/vB")
+                return
+            except FeeEstimationError as e:
+                print(f"\nWarning: {e.message}; using {self.fee_priority} priority instead")
         print(f"\nUsing {self.fee_priority} priority: {fee_rates[self.fee_priority]} sat/vB")
 
 class BlockchainInfoCommand(Command):
@@ -165,41 +109,44 @@ class MempoolInfoCommand(Command):
         mempool_info = get_mempool_info(self.network)
         WalletDisplay.show_mempool_info(mempool_info)
 
+class BackendStatusCommand(Command):
+    def __init__(self, args: CommandArguments):
+        self.network = args.network
+
+    def execute(self) -> None:
+        status = get_backend_status(self.network)
+        WalletDisplay.show_backend_status(status)
+
 class CheckBalanceCommand(Command):
     """Command to check balance of wallet addresses."""
     
-    def __init__(self, args: CommandArguments, addresses: Optional[List[Tuple]] = None):
+    def __init__(self, args: CommandArguments, addresses: Optional[Addresses] = None):
         self.args = args
         self.network = args.network
+        self.addresses = addresses
         
         # Double-check address type from wallet manager
-        active_wallet = wallet_manager.get_active_wallet()
-        if active_wallet and not args.address_type:
+        if wallet_manager.is_wallet_loaded() and not args.address_type:
             # If no address type was explicitly provided, use the one from wallet manager
-            self.address_type = active_wallet.get('address_type', 'segwit')
+            self.address_type = wallet_manager.get_address_type()
         else:
             # Otherwise use the explicit address type from command line
             self.address_type = args.address_type
 
     def execute(self) -> None:
         """Check balances of wallet addresses."""
-        # Get active wallet from manager
-        active_wallet = wallet_manager.get_active_wallet()
-        if not active_wallet:
+        if not wallet_manager.is_wallet_loaded():
             print("No wallet loaded. Use 'create', 'load', or 'use-wallet' first.")
             return
-            
-        # Get wallet details from active wallet
-        privkey = active_wallet.get('private_key')
-        network = active_wallet.get('network', self.network)
+        network = wallet_manager.get_network()
         
-        # Generate addresses from private key
-        result = generate_wallet(privkey, network)
-        if None in result[:3]:
-            print(f"Error generating addresses: {result[3]}")
-            return
-            
-        _, _, _, addresses = result
+        addresses = self.addresses
+        if addresses is None:
+            # The stored public key is enough to know the address
+            public_key = wallet_manager.get_public_key()
+            if public_key is None:
+                return
+            addresses = AddressProvider.for_public_key(public_key, network)
         
         # Display title
         WalletDisplay.display_title(
@@ -261,7 +208,8 @@ class LoadWalletCommand(Command):
                 address_type=address_type,  # Store the correct address type
                 addresses=addresses,
                 pubkey=pubkey,
-                encrypt=False
+                encrypt=False,
+                account_xpub=wallet_data.get('account_xpub')
             )
             
             WalletDisplay.show_wallet_info(
@@ -279,7 +227,7 @@ class LoadWalletCommand(Command):
             print(f"Failed to load wallet: {str(e)}")
 
 class TransactionHistoryCommand(Command):
-    def __init__(self, args: CommandArguments, addresses: List[Tuple]):
+    def __init__(self, args: CommandArguments, addresses: Addresses):
         self.args = args
         self.addresses = addresses
         self.network = args.network
@@ -420,7 +368,7 @@ class GenerateWalletCommand(Command):
                 self.args.show_qr, address_type
             )
 class ReceiveCommand(Command):
-    def __init__(self, args: CommandArguments, addresses: List[Tuple]):
+    def __init__(self, args: CommandArguments, addresses: Addresses):
         self.args = args
         self.addresses = addresses
 
@@ -453,7 +401,7 @@ class ReceiveCommand(Command):
             print(f"Failed to create payment request: {str(e)}")
 
 class SendCommand(Command):
-    def __init__(self, args: CommandArguments, addresses: Optional[List[Tuple]] = None):
+    def __init__(self, args: CommandArguments, addresses: Optional[Addresses] = None):
         self.args = args
         self.addresses = addresses
         self.fee_priority = args.fee_priority
@@ -464,16 +412,17 @@ class SendCommand(Command):
             print("Please specify amount to send using --amount")
             return
         
-        # Get active wallet from wallet_manager
-        active_wallet = wallet_manager.get_active_wallet()
-        if not active_wallet:
-            print("No wallet loaded. Please load a wallet first.")
+        # The public key comes from the wallet state; signing goes through
+        # the key agent when it holds the key
+        try:
+            signer = wallet_manager.get_signer()
+        except ValueError as e:
+            print(f"No usable key in the active wallet: {str(e)}")
             return
-            
-        privkey = active_wallet.get('private_key')
-        if not privkey:
-            print("No private key available in the active wallet.")
+        if not signer:
+            print("No wallet loaded. Please load a wallet first.")
             return
+        pubkey, sign = signer
             
         try:
             # Display current fee rates before sending
@@ -481,12 +430,7 @@ class SendCommand(Command):
             
             # Get addresses if not provided
             if not self.addresses:
-                result = generate_wallet(privkey, self.args.network)
-                if None not in result[:3]:
-                    _, _, _, self.addresses = result
-                else:
-                    print(f"Error generating addresses: {result[3]}")
-                    return
+                self.addresses = AddressProvider.for_public_key(pubkey, self.args.network)
             
             # Get the from address
             from_address = self.addresses[0][3]
@@ -510,13 +454,9 @@ class SendCommand(Command):
             if self.args.privacy:
                 amount_sat = int(randomize_amount(self.args.amount) * 100_000_000)
             
-            # Create private key from WIF
-            priv_key = PrivateKey(wif=privkey)
-            pub_key = priv_key.get_public_key()
-            
-            # Derive the SegWit address from our private key for verification
-            derived_addr = pub_key.get_segwit_address()
-            print(f"Derived address from private key: {derived_addr.to_string()}")
+            # Derive the SegWit address from our public key for verification
+            derived_addr = P2wpkhAddress(create_p2wpkh_address(pubkey, self.args.network))
+            print(f"Derived address from public key: {derived_addr.to_string()}")
             
             # Get UTXOs for the address
             utxos = fetch_utxos(from_address, self.args.network)
@@ -527,11 +467,18 @@ class SendCommand(Command):
             # Sort UTXOs by value (largest first)
             utxos.sort(key=lambda x: x['value'], reverse=True)
             
-            # Get fee rate with slight randomization
-            fee_rates = get_recommended_fee_rate(self.args.network)
-            fee_rate = fee_rates.get(self.fee_priority, fee_rates['medium'])
+            # Get fee rate for the confirmation target or priority, with slight randomization
+            fee_rate = None
+            if self.args.target_blocks:
+                try:
+                    fee_rate = fee_estimator.estimate(self.args.network, self.args.target_blocks)
+                except FeeEstimationError:
+                    pass
+            if fee_rate is None:
+                fee_rates = get_recommended_fee_rate(self.args.network)
+                fee_rate = fee_rates.get(self.fee_priority, fee_rates['medium'])
             if self.args.privacy:
-                fee_rate += random.randint(-1, 1)
+                fee_rate = max(1, fee_rate + random.randint(-1, 1))
             
             # Select UTXOs
             selected_utxos = []
@@ -543,7 +490,7 @@ class SendCommand(Command):
                 
                 # Estimate transaction size (vbytes for SegWit: ~68 per input, ~31 per output, plus overhead)
                 estimated_vsize = 10 + (len(selected_utxos) * 68) + (2 * 31)  # 10 bytes overhead
-                estimated_fee = estimated_vsize * fee_rate
+                estimated_fee = math.ceil(estimated_vsize * fee_rate)
                 
                 if total_input >= amount_sat + estimated_fee:
                     break
@@ -572,59 +519,47 @@ class SendCommand(Command):
             ]
             
             # Add change output if above dust threshold
+            touched_addresses = [from_address, self.args.send]
             if change_amount > 546:
                 change_addr = derived_addr if not self.args.privacy else P2wpkhAddress(address_manager.get_new_address(self.addresses))
                 tx_outputs.append(TxOutput(change_amount, change_addr.to_script_pub_key()))
+                touched_addresses.append(change_addr.to_string())
             
             # Create unsigned transaction
             tx = Transaction(tx_inputs, tx_outputs, has_segwit=True)
             
-            # Sign each input
+            # Sign each input. The BIP143 scriptCode of a P2WPKH output is
+            # the P2PKH script of its key hash
+            script_code = Script(['OP_DUP', 'OP_HASH160', hash160(pubkey).hex(), 'OP_EQUALVERIFY', 'OP_CHECKSIG'])
             for i, utxo in enumerate(selected_utxos):
-                pubkey_hash = pub_key.to_hash160()
-                if isinstance(pubkey_hash, bytes):
-                    pubkey_hash_hex = pubkey_hash.hex()
-                else:
-                    pubkey_hash_hex = pubkey_hash  # Shouldn't happen, but safe fallback
-                
-                script_code = Script(['OP_0', pubkey_hash_hex])
-                sig = priv_key.sign_segwit_input(
-                    tx,
-                    i,
-                    script_code,
-                    utxo['value']
-                )
-                # Append witness data as a list of items (signature and public key)
-                tx.witnesses.append([sig, pub_key.to_hex()])
+                digest = tx.get_transaction_segwit_digest(i, script_code, utxo['value'])
+                sig = sign(digest) + bytes([SIGHASH_ALL])
+                # Witness stack: signature and public key
+                tx.witnesses.append(TxWitnessInput([sig.hex(), pubkey.hex()]))
             
             # Serialize signed transaction
             signed_tx_hex = tx.serialize()
             print(f"\nSigned Transaction Hex: {signed_tx_hex}")
             
             # Broadcast the transaction
-            api_urls = {
-                "mainnet": "https://blockstream.info/api",
-                "testnet": "https://blockstream.info/testnet/api",
-                "signet": "https://blockstream.info/signet/api"
-            }
-            
-            base_url = api_urls.get(self.args.network)
-            if not base_url:
-                print(f"Unsupported network: {self.args.network}")
+            try:
+                backend = get_backend(self.args.network)
+            except ValueError as e:
+                print(str(e))
                 return
             
-            response = requests.post(f"{base_url}/tx", data=signed_tx_hex)
-            
-            if response.status_code == 200:
-                tx_id = response.text.strip()
+            try:
+                tx_id = backend.broadcast(signed_tx_hex)
+                forget_balances(self.args.network, touched_addresses)
                 print("\nTransaction sent successfully!")
                 print(f"Transaction ID: {tx_id}")
-                explorer_prefix = base_url.replace('/api', '')
-                print(f"Track your transaction: {explorer_prefix}/tx/{tx_id}")
-            else:
-                error_msg = response.text if response.text else f"HTTP {response.status_code}"
-                print(f"Failed to broadcast transaction: {error_msg}")
+                print(f"Track your transaction: {backend.explorer_url}/tx/{tx_id}")
+            except TransactionError as e:
+                print(f"Failed to broadcast transaction: {e.message}")
                 
+        except NetworkError as e:
+            print(f"Failed to send transaction: {e.message}")
+            print("The explorer is unavailable or rate limiting requests; please try again shortly.")
         except Exception as e:
             print(f"Failed to send transaction: {str(e)}")
             import traceback
@@ -642,7 +577,7 @@ class ExchangeRatesCommand(Command):
             print(f"Failed to fetch exchange rates: {str(e)}")
     
 class UTXOCommand(Command):
-    def __init__(self, args: CommandArguments, addresses: List[Tuple]):
+    def __init__(self, args: CommandArguments, addresses: Addresses):
         self.args = args
         self.addresses = addresses
         self.network = args.network
@@ -659,6 +594,13 @@ class UTXOCommand(Command):
         # Fetch UTXOs for each address
         all_utxos = []
         
+        # One tip snapshot for the whole command keeps confirmations consistent
+        try:
+            tip_height = fetch_tip_height(self.network)
+        except Exception as e:
+            print(f"Error fetching chain tip: {str(e)}")
+            return
+        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -669,17 +611,19 @@ class UTXOCommand(Command):
                 total=len(filtered_addresses)
             )
             
-            for address in filtered_addresses:
-                try:
-                    utxos = fetch_utxos_with_details(address, self.network)
+            try:
+                for address, utxos in iter_utxos_with_details(filtered_addresses, self.network, tip_height):
                     if utxos and "error" not in utxos[0]:
                         all_utxos.extend(utxos)
+                    elif utxos:
+                        print(f"Error fetching UTXOs for {address}: {utxos[0]['error']}")
                     progress.update(task, advance=1)
-                except Exception as e:
-                    print(f"Error fetching UTXOs for {address}: {str(e)}")
+            except Exception as e:
+                print(f"Error fetching UTXOs: {str(e)}")
         
         # Display UTXOs
         WalletDisplay.show_utxos(all_utxos, self.network)
+        print_index_note(self.network)
 
 class UseWalletCommand(Command):
     def __init__(self, args: CommandArguments):
@@ -855,9 +799,95 @@ class AddressInfoCommand(Command):
         print(f"Pending Balance: {unconfirmed:.8f} BTC")
         print(f"Total Balance: {confirmed + unconfirmed:.8f} BTC")
         print(f"Transactions: {tx_count} ({unconf_count} pending)")
+        print_index_note(self.network)
         
         # Optional: offer to show transaction history
         print(f"\nTip: Use '--address {self.address} --history' to see transaction history")
+class DiscoverCommand(Command):
+    """Find every used address of a wallet file's account with a gap-limit scan."""
+
+    def __init__(self, args: CommandArguments):
+        self.args = args
+        self.wallet_file = args.discover
+
+    def execute(self) -> None:
+        try:
+            with open(self.wallet_file, 'r') as f:
+                wallet_data = json.load(f)
+        except FileNotFoundError:
+            print(f"Error: Wallet file '{self.wallet_file}' not found.")
+            return
+        except json.JSONDecodeError:
+            print(f"Error: Invalid JSON in wallet file '{self.wallet_file}'.")
+            return
+
+        mnemonic = wallet_data.get('mnemonic')
+        network = wallet_data.get('network', self.args.network)
+        if not mnemonic or mnemonic.startswith("N/A"):
+            print("Error: Address discovery needs the wallet's seed phrase, "
+                  "but this wallet file has none.")
+            return
+
+        WalletDisplay.display_title(
+            "Bitcoin Wallet",
+            command_name="Address Discovery",
+            network=network
+        )
+
+        try:
+            discovery = AddressDiscovery(network, gap_limit=self.args.gap_limit)
+            print(f"\nScanning receive and change addresses (gap limit {discovery.gap_limit})...")
+            chains = discovery.discover(get_account_key(mnemonic, network))
+        except NetworkError as e:
+            print(f"Error: {str(e)}")
+            return
+
+        receive = chains[RECEIVE_CHAIN]
+        change = chains[CHANGE_CHAIN]
+        print(f"Found {len(receive)} receive and {len(change)} change addresses in use.")
+
+        # Keep a loaded copy of this wallet in sync with what was found
+        active_wallet = wallet_manager.get_active_wallet()
+        if active_wallet and receive and wallet_manager.get_addresses()[:1] == [receive[0][3]]:
+            wallet_manager.update_wallet_info(receive + change)
+
+        if receive:
+            print("\nReceive addresses (m/84'/*'/0'/0):")
+            WalletDisplay._show_balances(receive, network)
+        if change:
+            print("\nChange addresses (m/84'/*'/0'/1):")
+            WalletDisplay._show_balances(change, network)
+
+class DeriveRangeCommand(Command):
+    """Derive a range of receive addresses from the active wallet's account xpub."""
+
+    def __init__(self, args: CommandArguments):
+        self.args = args
+
+    def execute(self) -> None:
+        try:
+            start, end = parse_range(self.args.derive_range)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return
+
+        account_xpub = wallet_manager.get_account_xpub()
+        if not account_xpub:
+            print("Error: Bulk derivation needs a wallet with an account xpub. "
+                  "Load a wallet created with --output first.")
+            return
+
+        network = wallet_manager.get_network()
+        deriver = BulkDeriver(account_xpub, network, RECEIVE_CHAIN, workers=self.args.workers)
+        stats = derive_range(deriver, start, end, self.args.derive_output)
+
+        # Keep standard output clean when the rows themselves go there
+        report = sys.stdout if self.args.derive_output else sys.stderr
+        print(f"Derived {stats['count']} addresses in {stats['seconds']:.2f}s "
+              f"({stats['rate']:.0f} addresses/s, {stats['workers']} workers)", file=report)
+        if self.args.derive_output:
+            print(f"Addresses written to {self.args.derive_output}")
+
 class HelpCommand(Command):
     """Command to display help information for the wallet."""
     
@@ -937,10 +967,13 @@ class HelpCommand(Command):
             ("--message MSG", "Add message to payment request", "--message \"Coffee payment\""),
             ("--send ADDR", "Send Bitcoin to address", "--send tb1qds6redgk9lk9zcspmc43a9a77p9gtrz8gney6l --amount 0.001"),
             ("--fee-priority LEVEL", "Set fee priority (high, medium, low)", "--fee-priority high"),
+            ("--target-blocks N", "Pay just enough to confirm within N blocks", "--send ADDR --amount 0.001 --target-blocks 4"),
             ("--privacy", "Enable privacy features", "--send ADDR --amount 0.001 --privacy"),
             ("--history", "Show transaction history", "--history"),
             ("--limit N", "Limit history results", "--history --limit 5"),
-            ("--utxos", "Show unspent transaction outputs", "--utxos")
+            ("--utxos", "Show unspent transaction outputs", "--utxos"),
+            ("--discover FILE", "Find used receive and change addresses", "--discover wallet.json --gap-limit 50"),
+            ("--derive-range START:END", "Pre-generate receive addresses", "--derive-range 0:100000 --derive-output pool.csv")
         ]
         
         for cmd, desc, example in tx_commands:
@@ -958,7 +991,8 @@ class HelpCommand(Command):
             ("--check-fees", "Check current recommended fees", "--check-fees"),
             ("--blockchain-info", "Show blockchain information", "--blockchain-info"),
             ("--mempool-info", "Show mempool information", "--mempool-info"),
-            ("--rates", "Show Bitcoin exchange rates", "--rates")
+            ("--rates", "Show Bitcoin exchange rates", "--rates"),
+            ("--backend-status", "Show explorer endpoint latency and errors", "--backend-status")
         ]
         
         for cmd, desc, example in network_commands:
@@ -970,7 +1004,9 @@ class HelpCommand(Command):
         console.print(Panel(
             "Start an interactive session with the wallet using the [bold]--interactive[/bold] flag.\n"
             "In interactive mode, you can use commands like: [italic]create, load, wallet, balance, "
-            "receive, send, history, fees, blockchain, help, exit[/italic]",
+            "receive, send, history, fees, blockchain, help, exit[/italic]\n"
+            "Add [bold]--push[/bold] to follow new blocks and incoming payments live "
+            "(needs a [italic]push_url[/italic] in config.json; that feed sees every wallet address).",
             title="Interactive Mode",
             border_style="blue"
         ))
@@ -1043,10 +1079,14 @@ class HelpCommand(Command):
         print("--message MSG            Add message to payment request")
         print("--send ADDR              Send Bitcoin to address")
         print("--fee-priority LEVEL     Set fee priority (high, medium, low)")
+        print("--target-blocks N        Pay just enough to confirm within N blocks")
         print("--privacy                Enable privacy features")
         print("--history                Show transaction history")
         print("--limit N                Limit history results")
         print("--utxos                  Show unspent transaction outputs")
+        print("--discover FILE          Find used receive and change addresses")
+        print("--gap-limit N            Unused addresses in a row that end discovery")
+        print("--derive-range START:END Pre-generate receive addresses (--derive-output FILE, --workers N)")
         
         print("\n" + "=" * 80)
         print("NETWORK INFORMATION")
@@ -1055,6 +1095,7 @@ class HelpCommand(Command):
         print("--blockchain-info        Show blockchain information")
         print("--mempool-info           Show mempool information")
         print("--rates                  Show Bitcoin exchange rates")
+        print("--backend-status         Show explorer endpoint latency and errors")
         
         print("\n" + "=" * 80)
         print("INTERACTIVE MODE")
@@ -1062,6 +1103,8 @@ class HelpCommand(Command):
         print("--interactive            Start an interactive session with the wallet")
         print("                         In interactive mode, use commands like: create, load,")
         print("                         balance, receive, send, history, fees, exit")
+        print("--push                   Follow new blocks and payments live (with --interactive)")
+        print("                         Needs push_url in config.json; the feed sees all addresses")
         
         print("\n" + "=" * 80)
         print("EXAMPLE WORKFLOWS")
@@ -1288,10 +1331,14 @@ class HelpCommand(Command):
             "interactive": {
                 "title": "--interactive",
                 "description": "Start in interactive mode for a more user-friendly experience.",
-                "options": [],
+                "options": [
+                    ("--push", "Follow new blocks and incoming payments over the WebSocket feed "
+                               "set as push_url in config.json, which sees every wallet address")
+                ],
                 "examples": [
                     "python main.py --interactive",
-                    "python main.py --network testnet --interactive"
+                    "python main.py --network testnet --interactive",
+                    "python main.py --interactive --push"
                 ]
             }
         }
@@ -1348,6 +1395,34 @@ class NoWalletCommand(Command):
         print("  --use-wallet-file FILE  Use wallet from wallet file")
         print("  --privkey KEY         Import wallet from private key")
 
+def watch_addresses() -> Optional[AddressProvider]:
+    """
+    Get the active wallet's addresses without touching its private key.
+    
+    The imported key's own addresses come from the wallet state. Receive
+    and change addresses are derived from the account xpub up to the
+    highest used index found by --discover (at least the first receive
+    address), as the command reaches them.
+    
+    Returns:
+        Provider of (index, None, public_key_hex or None, address) tuples,
+        or None if the active wallet has no account xpub
+    """
+    account_xpub = wallet_manager.get_account_xpub()
+    if not account_xpub:
+        return None
+    
+    network = wallet_manager.get_network()
+    account = WatchOnlyAccount(account_xpub, network)
+    marks = AddressDiscovery(network).high_water_marks(account.account)
+    
+    addresses = AddressProvider.from_entries(
+        (i, None, None, address) for i, address in enumerate(wallet_manager.get_addresses())
+    )
+    for chain in CHAINS:
+        addresses.add_account_chain(account, chain, max(marks[chain] + 1, 1 if chain == RECEIVE_CHAIN else 0))
+    return addresses
+
 def create_command(args: CommandArguments) -> Command:
     """Factory function to create appropriate command based on arguments."""
     # Handle simple non-wallet commands first
@@ -1361,6 +1436,8 @@ def create_command(args: CommandArguments) -> Command:
         return MempoolInfoCommand(args)
     elif args.rates:
         return ExchangeRatesCommand(args)
+    elif args.backend_status:
+        return BackendStatusCommand(args)
     
     # Handle wallet management commands
     if args.load:
@@ -1373,17 +1450,27 @@ def create_command(args: CommandArguments) -> Command:
         return UnloadWalletCommand(args)
     elif args.address:
         return AddressInfoCommand(args)
+    elif args.discover:
+        return DiscoverCommand(args)
+    elif args.derive_range:
+        return DeriveRangeCommand(args)
     
     
-    active_wallet = wallet_manager.get_active_wallet()
+    # Addresses come from the account xpub or the stored public key, so the
+    # private key is never decrypted to build a command. --send signs
+    # through wallet_manager.get_signer() when it needs the key.
     addresses = None
-    if active_wallet:
-        privkey = active_wallet.get('private_key')
-        network = active_wallet.get('network', args.network)
-        address_type = active_wallet.get('address_type', args.address_type)
-        result = generate_wallet(privkey, network, address_type)
-        if None not in result[:3]:
-            _, _, _, addresses = result
+    if not args.wallet_info and not args.send:
+        addresses = watch_addresses()
+    
+    if addresses is None and not args.wallet_info and wallet_manager.is_wallet_loaded():
+        try:
+            public_key = wallet_manager.get_public_key()
+        except ValueError as e:
+            print(f"No usable key in the active wallet: {str(e)}")
+            public_key = None
+        if public_key is not None:
+            addresses = AddressProvider.for_public_key(public_key, wallet_manager.get_network())
 
     # Process wallet-dependent commands with addresses
     if args.wallet_info:
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
 import json
 import os
 
@@ -11,6 +11,12 @@ class NetworkConfig:
     network_type: str
     fee_levels: Dict[str, int]
     address_prefix: str
+    backend: str = "esplora"
+    backend_options: Dict = field(default_factory=dict)
+    # Other Esplora APIs that slow reads are hedged to. Empty by default:
+    # a hedged read sends the looked-up address to each mirror as well
+    mirror_urls: List[str] = field(default_factory=list)
+    push_url: str = ""
     
 @dataclass
 class WalletConfig:
@@ -19,11 +25,39 @@ class WalletConfig:
     privacy_enabled: bool = False
     debug_mode: bool = False
     api_timeout: int = 30
+    http_pool_connections: int = 10
+    http_pool_maxsize: int = 10
+    max_concurrent_requests: int = 8
+    tx_cache_max_entries: int = 10000
+    balance_cache_ttl: int = 30
+    balance_cache_stale_ttl: int = 300
+    chain_tip_ttl: int = 10
+    gap_limit: int = 20
+    rate_limit_per_second: float = 10.0
+    rate_limit_burst: int = 10
+    rate_limit_max_per_second: float = 100.0
+    unmetered_hosts: List[str] = field(default_factory=list)
+    max_retries: int = 3
+    retry_backoff_base: float = 0.5
+    retry_max_delay: float = 30.0
+    request_coalesce_window: float = 2.0
+    hedge_initial_delay: float = 0.5
+    hedge_max_extra_load: float = 0.1
+    endpoint_down_after: int = 3
+    endpoint_probe_interval: float = 30.0
+    rates_cache_ttl: int = 60
+    rates_stale_ttl: int = 86400
+    rates_deadline: float = 2.0
+    push_updates: bool = False
+    push_keepalive: float = 30.0
+    crypto_backend: str = "auto"
+    key_agent: bool = False
     max_fee_rate: int = 100
     dust_threshold: int = 546
     network_configs: Dict[str, NetworkConfig] = None
     
     def __post_init__(self):
+        overrides = self.network_configs or {}
         self.network_configs = {
             "mainnet": NetworkConfig(
                 api_url="https://blockstream.info/api",
@@ -59,6 +93,14 @@ class WalletConfig:
                 address_prefix="tb1"
             )
         }
+        
+        # Settings from the config file replace the defaults field by field
+        for name, settings in overrides.items():
+            if isinstance(settings, NetworkConfig):
+                settings = asdict(settings)
+            if name in self.network_configs:
+                settings = {**asdict(self.network_configs[name]), **settings}
+            self.network_configs[name] = NetworkConfig(**settings)
     
     @property
     def current_network_config(self) -> NetworkConfig:
@@ -108,8 +150,39 @@ class ConfigManager:
                 'privacy_enabled': config.privacy_enabled,
                 'debug_mode': config.debug_mode,
                 'api_timeout': config.api_timeout,
+                'http_pool_connections': config.http_pool_connections,
+                'http_pool_maxsize': config.http_pool_maxsize,
+                'max_concurrent_requests': config.max_concurrent_requests,
+                'tx_cache_max_entries': config.tx_cache_max_entries,
+                'balance_cache_ttl': config.balance_cache_ttl,
+                'balance_cache_stale_ttl': config.balance_cache_stale_ttl,
+                'chain_tip_ttl': config.chain_tip_ttl,
+                'gap_limit': config.gap_limit,
+                'rate_limit_per_second': config.rate_limit_per_second,
+                'rate_limit_burst': config.rate_limit_burst,
+                'rate_limit_max_per_second': config.rate_limit_max_per_second,
+                'unmetered_hosts': config.unmetered_hosts,
+                'max_retries': config.max_retries,
+                'retry_backoff_base': config.retry_backoff_base,
+                'retry_max_delay': config.retry_max_delay,
+                'request_coalesce_window': config.request_coalesce_window,
+                'hedge_initial_delay': config.hedge_initial_delay,
+                'hedge_max_extra_load': config.hedge_max_extra_load,
+                'endpoint_down_after': config.endpoint_down_after,
+                'endpoint_probe_interval': config.endpoint_probe_interval,
+                'rates_cache_ttl': config.rates_cache_ttl,
+                'rates_stale_ttl': config.rates_stale_ttl,
+                'rates_deadline': config.rates_deadline,
+                'crypto_backend': config.crypto_backend,
+                'key_agent': config.key_agent,
+                'push_updates': config.push_updates,
+                'push_keepalive': config.push_keepalive,
                 'max_fee_rate': config.max_fee_rate,
-                'dust_threshold': config.dust_threshold
+                'dust_threshold': config.dust_threshold,
+                'network_configs': {
+                    name: asdict(network_config)
+                    for name, network_config in config.network_configs.items()
+                }
             }, f, indent=4)
 
 # Global configuration instance
@@ -0,0 +1,264 @@
+"""
+secp256k1 operations behind a switchable backend.
+
+Deriving addresses and signing inputs need only four curve operations:
+a public key from a secret, a public key plus tweak * G (BIP32 CKDpub),
+ECDSA signing and verification. Each backend implements them on one
+library:
+
+    coincurve   libsecp256k1 bindings (in requirements.txt)
+    bitcoinlib  python-bitcoinlib's OpenSSL wrapper, which the wallet used before
+    fastecdsa   fastecdsa's C point arithmetic
+
+"auto" picks the first available backend in that order, fastest first
+as measured by benchmarks/crypto_bench.py. Only coincurve is faster than
+the old OpenSSL path; an install without it falls back to bitcoinlib and
+runs at the old speed. Every backend returns compressed public keys and
+low-S DER signatures, so they are interchangeable.
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from fastecdsa import ecdsa
+from fastecdsa.curve import secp256k1
+from fastecdsa.encoding.der import DEREncoder, InvalidDerSignature
+from fastecdsa.encoding.sec1 import SEC1Encoder, InvalidSEC1PublicKey
+
+from .config import config
+from .exceptions import ConfigurationError
+
+# Order of the secp256k1 group
+CURVE_ORDER = secp256k1.q
+
+# Signs a 32-byte digest, returning a low-S DER signature
+Signer = Callable[[bytes], bytes]
+
+def _scalar(secret: bytes) -> int:
+    """Read a 32-byte secret as an integer in [1, n-1]."""
+    value = int.from_bytes(secret, "big")
+    if len(secret) != 32 or not 0 < value < CURVE_ORDER:
+        raise ValueError("Invalid private key")
+    return value
+
+def _low_s(r: int, s: int) -> Tuple[int, int]:
+    """Replace s by n - s when it is in the upper half (BIP 62)."""
+    return r, CURVE_ORDER - s if s > CURVE_ORDER // 2 else s
+
+def _decode_point(pubkey: bytes):
+    return SEC1Encoder.decode_public_key(pubkey, secp256k1)
+
+def _encode_point(point) -> bytes:
+    return SEC1Encoder.encode_public_key(point, compressed=True)
+
+class CryptoBackend(ABC):
+    """Curve operations on one library. Keys and signatures are raw bytes."""
+
+    name = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the library behind this backend can be loaded."""
+        return True
+
+    @abstractmethod
+    def pubkey(self, secret: bytes) -> bytes:
+        """
+        Compute the compressed public key of a 32-byte secret.
+
+        Raises:
+            ValueError: If the secret is not a valid private key
+        """
+
+    def tweak_add(self, pubkey: bytes, tweak: bytes) -> bytes:
+        """
+        Compute pubkey + tweak * G as a compressed public key.
+
+        The default multiplies with this backend and adds the points with
+        fastecdsa; an addition costs a small fraction of a multiplication.
+        """
+        return _encode_point(_decode_point(self.pubkey(tweak)) + _decode_point(pubkey))
+
+    @abstractmethod
+    def sign(self, secret: bytes, digest: bytes) -> bytes:
+        """
+        Sign a 32-byte digest.
+
+        Returns:
+            DER encoded signature with low S, without a sighash byte
+        """
+
+    @abstractmethod
+    def verify(self, pubkey: bytes, signature: bytes, digest: bytes) -> bool:
+        """Check a DER signature over a 32-byte digest."""
+
+class CoincurveBackend(CryptoBackend):
+    """libsecp256k1 through coincurve: constant-time, RFC 6979 nonces."""
+
+    name = "coincurve"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import coincurve  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def pubkey(self, secret: bytes) -> bytes:
+        import coincurve
+        _scalar(secret)
+        return coincurve.PrivateKey(secret).public_key.format(compressed=True)
+
+    def tweak_add(self, pubkey: bytes, tweak: bytes) -> bytes:
+        import coincurve
+        return coincurve.PublicKey(pubkey).add(tweak).format(compressed=True)
+
+    def sign(self, secret: bytes, digest: bytes) -> bytes:
+        import coincurve
+        _scalar(secret)
+        return coincurve.PrivateKey(secret).sign(digest, hasher=None)
+
+    def verify(self, pubkey: bytes, signature: bytes, digest: bytes) -> bool:
+        import coincurve
+        try:
+            return coincurve.PublicKey(pubkey).verify(signature, digest, hasher=None)
+        except ValueError:
+            return False
+
+class BitcoinlibBackend(CryptoBackend):
+    """OpenSSL through python-bitcoinlib's CECKey; random nonces."""
+
+    name = "bitcoinlib"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            from bitcoin.core.key import CECKey
+            CECKey()
+        except (ImportError, OSError, AttributeError):
+            return False
+        return True
+
+    @staticmethod
+    def _key(secret: bytes):
+        # Not cached: a cache would keep raw secrets alive as its keys
+        from bitcoin.core.key import CECKey
+        _scalar(secret)
+        key = CECKey()
+        key.set_secretbytes(secret)
+        key.set_compressed(True)
+        return key
+
+    def pubkey(self, secret: bytes) -> bytes:
+        return self._key(secret).get_pubkey()
+
+    def sign(self, secret: bytes, digest: bytes) -> bytes:
+        # CECKey.sign already normalizes to low S
+        return self._key(secret).sign(digest)
+
+    def verify(self, pubkey: bytes, signature: bytes, digest: bytes) -> bool:
+        from bitcoin.core.key import CPubKey
+        return bool(CPubKey(pubkey).verify(digest, signature))
+
+class FastecdsaBackend(CryptoBackend):
+    """fastecdsa's GMP point arithmetic; RFC 6979 nonces."""
+
+    name = "fastecdsa"
+
+    def pubkey(self, secret: bytes) -> bytes:
+        return _encode_point(secp256k1.G * _scalar(secret))
+
+    def tweak_add(self, pubkey: bytes, tweak: bytes) -> bytes:
+        return _encode_point(secp256k1.G * int.from_bytes(tweak, "big") + _decode_point(pubkey))
+
+    def sign(self, secret: bytes, digest: bytes) -> bytes:
+        r, s = ecdsa.sign(digest, _scalar(secret), curve=secp256k1, prehashed=True)
+        return DEREncoder.encode_signature(*_low_s(r, s))
+
+    def verify(self, pubkey: bytes, signature: bytes, digest: bytes) -> bool:
+        try:
+            sig = DEREncoder.decode_signature(signature)
+            point = _decode_point(pubkey)
+        except (InvalidDerSignature, InvalidSEC1PublicKey, ValueError):
+            return False
+        return ecdsa.verify(sig, digest, point, curve=secp256k1, prehashed=True)
+
+# Backend classes selectable through config.crypto_backend
+CRYPTO_BACKENDS: Dict[str, Type[CryptoBackend]] = {
+    "coincurve": CoincurveBackend,
+    "bitcoinlib": BitcoinlibBackend,
+    "fastecdsa": FastecdsaBackend,
+}
+
+# Preference for "auto", fastest first
+AUTO_ORDER = ("coincurve", "bitcoinlib", "fastecdsa")
+
+_backend: Optional[CryptoBackend] = None
+_backend_lock = threading.Lock()
+
+def available_backends() -> List[str]:
+    """Names of the backends whose libraries can be loaded, in preference order."""
+    return [name for name in AUTO_ORDER if CRYPTO_BACKENDS[name].available()]
+
+def create_crypto_backend(name: str = "auto") -> CryptoBackend:
+    """
+    Build a crypto backend.
+
+    Args:
+        name: Backend name, or "auto" for the fastest available one
+
+    Returns:
+        The backend
+
+    Raises:
+        ConfigurationError: If the backend is unknown or its library is missing
+    """
+    if name == "auto":
+        name = available_backends()[0]
+    backend_class = CRYPTO_BACKENDS.get(name)
+    if backend_class is None:
+        raise ConfigurationError("crypto_backend", f"Unknown crypto backend: {name}")
+    if not backend_class.available():
+        raise ConfigurationError("crypto_backend", f"Crypto backend {name} is not installed")
+    return backend_class()
+
+def get_crypto_backend() -> CryptoBackend:
+    """Get the active backend, creating it from config.crypto_backend on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_crypto_backend(config.crypto_backend)
+        return _backend
+
+def set_crypto_backend(name: str) -> CryptoBackend:
+    """
+    Switch the backend used by all later curve operations.
+
+    Args:
+        name: Backend name, or "auto"
+
+    Returns:
+        The new active backend
+    """
+    global _backend
+    backend = create_crypto_backend(name)
+    with _backend_lock:
+        _backend = backend
+    return backend
+
+def pubkey_from_secret(secret: bytes) -> bytes:
+    """Compressed public key of a 32-byte secret, using the active backend."""
+    return get_crypto_backend().pubkey(secret)
+
+def tweak_add(pubkey: bytes, tweak: bytes) -> bytes:
+    """pubkey + tweak * G, using the active backend."""
+    return get_crypto_backend().tweak_add(pubkey, tweak)
+
+def sign(secret: bytes, digest: bytes) -> bytes:
+    """Low-S DER signature of a 32-byte digest, using the active backend."""
+    return get_crypto_backend().sign(secret, digest)
+
+def verify(pubkey: bytes, signature: bytes, digest: bytes) -> bool:
+    """Check a DER signature, using the active backend."""
+    return get_crypto_backend().verify(pubkey, signature, digest)
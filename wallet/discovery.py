@@ -0,0 +1,169 @@
+"""
+Gap-limit address discovery for BIP-84 accounts.
+
+Both the receive (0) and change (1) chains of an account are scanned in
+batches. Each batch is derived locally and its usage looked up
+concurrently; a chain is finished once `gap_limit` consecutive addresses
+have never been used. The highest used index of each chain is saved so
+later scans derive everything up to it without asking the network again.
+"""
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from . import network as network_api
+from .bip32 import ExtendedPrivateKey, ExtendedPublicKey
+from .config import config
+from .exceptions import NetworkError
+from .keys import derive_segwit_addresses
+
+# Receive and change chains of a BIP-84 account
+RECEIVE_CHAIN = 0
+CHANGE_CHAIN = 1
+CHAINS = (RECEIVE_CHAIN, CHANGE_CHAIN)
+
+class AddressDiscovery:
+    """Finds the used addresses of an account on both of its chains."""
+
+    # Constants
+    STATE_DIR = os.path.expanduser("~/.bitcoin_wallet")
+    STATE_FILE = os.path.join(STATE_DIR, "discovery.json")
+
+    def __init__(self, network: str, gap_limit: Optional[int] = None,
+                 batch_size: Optional[int] = None, state_path: Optional[str] = None):
+        """
+        Initialize the scanner.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            gap_limit: Unused addresses in a row that end a chain
+                (default: config.gap_limit)
+            batch_size: Addresses derived and looked up per round
+                (default: the gap limit)
+            state_path: File holding saved high-water marks
+                (default: ~/.bitcoin_wallet/discovery.json)
+        """
+        self.network = network
+        self.gap_limit = gap_limit or config.gap_limit
+        self.batch_size = batch_size or self.gap_limit
+        self.state_path = state_path or self.STATE_FILE
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, Dict[str, int]]:
+        """Load saved high-water marks, ignoring a missing or corrupt file."""
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, key: str, marks: Dict[int, int]) -> None:
+        """Save the high-water marks of one account."""
+        with self._lock:
+            state = self._load_state()
+            state[key] = {str(chain): last_used for chain, last_used in marks.items()}
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            with open(self.state_path, 'w') as f:
+                json.dump(state, f, indent=4)
+
+    def _state_key(self, account_key: Union[ExtendedPrivateKey, ExtendedPublicKey]) -> str:
+        """Identify an account by network and key fingerprint."""
+        return f"{self.network}:{account_key.fingerprint.hex()}"
+
+    def high_water_marks(self, account_key: Union[ExtendedPrivateKey, ExtendedPublicKey]) -> Dict[int, int]:
+        """
+        Get the saved highest used index of each chain.
+
+        Args:
+            account_key: Account key (m/84'/coin'/0'), private or public
+
+        Returns:
+            Mapping of chain to highest used index (-1 if none is known)
+        """
+        saved = self._load_state().get(self._state_key(account_key), {})
+        return {chain: saved.get(str(chain), -1) for chain in CHAINS}
+
+    def _used(self, addresses: List[str]) -> Dict[str, bool]:
+        """Look up which addresses have any transactions."""
+        try:
+            backend = network_api.get_backend(self.network)
+        except ValueError as e:
+            raise NetworkError("Address discovery failed", str(e))
+        if not backend.has_address_index:
+            # Fully spent addresses would look unused and end the scan early
+            raise NetworkError("Address discovery failed",
+                               "the backend has no address index to tell used addresses apart")
+
+        used = {}
+        for address, info in network_api.iter_address_balances(addresses, self.network):
+            if info.get("error"):
+                raise NetworkError("Address discovery failed", info["error"])
+            used[address] = (info.get("tx_count") or 0) > 0
+        return used
+
+    def scan_chain(self, chain_key: ExtendedPrivateKey, last_used: int = -1) -> Tuple[List[Tuple], int]:
+        """
+        Scan one chain until the gap limit is reached.
+
+        Args:
+            chain_key: Chain key (m/84'/coin'/0'/chain)
+            last_used: Highest index already known to be used
+
+        Returns:
+            Tuple of (addresses up to the highest used index, highest used index)
+
+        Raises:
+            NetworkError: If usage lookups fail
+        """
+        # Addresses up to the saved mark are known to matter; derive them without lookups
+        found = derive_segwit_addresses(chain_key, 0, last_used + 1, self.network)
+
+        scanned = []
+        next_index = last_used + 1
+        while next_index - last_used - 1 < self.gap_limit:
+            batch = derive_segwit_addresses(chain_key, next_index, self.batch_size, self.network)
+            used = self._used([entry[3] for entry in batch])
+
+            for entry in batch:
+                if used[entry[3]]:
+                    last_used = entry[0]
+            scanned.extend(batch)
+            next_index += self.batch_size
+
+        # Keep the scanned addresses only up to the highest used one
+        found.extend(scanned[:last_used + 1 - len(found)])
+        return found, last_used
+
+    def discover(self, account_key: ExtendedPrivateKey) -> Dict[int, List[Tuple]]:
+        """
+        Discover the used addresses of an account on both chains.
+
+        The chains are scanned concurrently and the resulting high-water
+        marks are saved for the next scan.
+
+        Args:
+            account_key: Account key (m/84'/coin'/0')
+
+        Returns:
+            Mapping of chain to (index, private_key_wif, public_key_hex, address)
+            tuples up to and including the highest used index
+
+        Raises:
+            NetworkError: If usage lookups fail
+        """
+        marks = self.high_water_marks(account_key)
+
+        with ThreadPoolExecutor(max_workers=len(CHAINS)) as executor:
+            futures = {
+                chain: executor.submit(self.scan_chain, account_key.child(chain), marks[chain])
+                for chain in CHAINS
+            }
+            results = {chain: future.result() for chain, future in futures.items()}
+
+        self._save_state(
+            self._state_key(account_key),
+            {chain: last_used for chain, (_, last_used) in results.items()}
+        )
+        return {chain: addresses for chain, (addresses, _) in results.items()}
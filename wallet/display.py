@@ -1,7 +1,11 @@
-from typing import List, Tuple, Optional, Dict
+import time
+import datetime
+from typing import Iterable, List, Tuple, Optional, Dict
 from art import text2art
 from .qrcode import generate_ascii_qr
-from .network import fetch_address_balance
+from .network import iter_address_balances
+from .config import config
+from .rates import CURRENCIES
 
 try:
     from rich.console import Console
@@ -208,8 +212,8 @@ class WalletDisplay:
             ) as progress:
                 task = progress.add_task("[cyan]Fetching balances...", total=len(addresses_to_check))
                 
-                for index, _, _, address in addresses_to_check:
-                    balance_info = fetch_address_balance(address, network)
+                for address, balance_info in iter_address_balances(
+                        [addr[3] for addr in addresses_to_check], network):
                     address_balances[address] = balance_info
                     progress.update(task, advance=1)
         
@@ -468,10 +472,16 @@ class WalletDisplay:
             )
     
     @staticmethod
-    def _show_balances(derived_addresses: List[Tuple], network: str) -> None:
+    def _show_balances(derived_addresses: Iterable[Tuple], network: str) -> None:
         """
         Display balance information for all addresses with improved formatting.
+        
+        Args:
+            derived_addresses: List or AddressProvider of (index, wif, pubkey, address)
+            network: Network type
         """
+        # Every address is shown, so derive them all once up front
+        derived_addresses = list(derived_addresses)
         if HAS_RICH:
             WalletDisplay._show_balances_rich(derived_addresses, network)
         else:
@@ -489,19 +499,21 @@ class WalletDisplay:
         ) as progress:
             task = progress.add_task("[cyan]Fetching balances...", total=len(derived_addresses))
             
-            # Only process SegWit addresses now
-            addresses_with_balances = []
-            
-            for index, privkey, pubkey, address in derived_addresses:
-                balance_info = fetch_address_balance(address, network)
-                
-                addresses_with_balances.append({
+            # Only process SegWit addresses now; rows keep derivation order
+            # and are filled in as each concurrent lookup completes
+            addresses_with_balances = [
+                {
                     'index': index,
                     'address': address,
                     'type': 'SegWit',
-                    'balance_info': balance_info
-                })
-                
+                    'balance_info': None
+                }
+                for index, privkey, pubkey, address in derived_addresses
+            ]
+            rows_by_address = {row['address']: row for row in addresses_with_balances}
+            
+            for address, balance_info in iter_address_balances(rows_by_address, network):
+                rows_by_address[address]['balance_info'] = balance_info
                 progress.update(task, advance=1)
         
         # Create table for all addresses (now only SegWit)
@@ -579,8 +591,12 @@ class WalletDisplay:
         segwit_addresses = []
         legacy_addresses = []
         
+        balances = dict(iter_address_balances(
+            [addr[3] for addr in derived_addresses], network
+        ))
+        
         for index, privkey, pubkey, address in derived_addresses:
-            balance_info = fetch_address_balance(address, network)
+            balance_info = balances[address]
             
             # Determine address type
             if address.startswith(('tb1', 'bc1')):
@@ -839,7 +855,6 @@ class WalletDisplay:
         # Format mempool information
         content = [
             f"Current Block Height: [bold cyan]{mempool_info.get('block_tip', 'N/A')}[/bold cyan]",
-            f"Recent Blocks: {mempool_info.get('recent_blocks_count', 'N/A')}",
             f"Last Block Hash: [dim]{mempool_info.get('last_block_hash', 'N/A')}[/dim]",
             f"Fee Information: {mempool_info.get('fee_info', 'N/A')}"
         ]
@@ -874,7 +889,6 @@ class WalletDisplay:
         # Display network information
         info_display = [
             ("Current Block Height", mempool_info.get("block_tip", "N/A")),
-            ("Recent Blocks", mempool_info.get("recent_blocks_count", "N/A")),
             ("Last Block Hash", mempool_info.get("last_block_hash", "N/A")),
             ("Fee Information", mempool_info.get("fee_info", "N/A"))
         ]
@@ -884,6 +898,85 @@ class WalletDisplay:
         
         print("=" * 50)
     
+    @staticmethod
+    def show_backend_status(status: dict) -> None:
+        """
+        Display latency and error statistics for each explorer endpoint.
+        """
+        if HAS_RICH:
+            WalletDisplay._show_backend_status_rich(status)
+        else:
+            WalletDisplay._show_backend_status_basic(status)
+    
+    @staticmethod
+    def _format_latency(seconds) -> str:
+        """Format a latency in milliseconds, or n/a if unknown."""
+        return f"{seconds * 1000:.0f} ms" if seconds is not None else "n/a"
+    
+    @staticmethod
+    def _show_backend_status_rich(status: dict) -> None:
+        """
+        Rich version of backend status display.
+        """
+        if "error" in status:
+            console.print(f"[bold red]Error:[/bold red] {status['error']}")
+            return
+        
+        if not status["endpoints"]:
+            console.print(f"Backend [cyan]{status['backend']}[/cyan] has no explorer endpoints to report.")
+            return
+        
+        table = Table(title=f"Backend Status ({status['network']}, {status['backend']})")
+        table.add_column("Endpoint", style="cyan", overflow="fold")
+        table.add_column("State")
+        table.add_column("Requests", justify="right")
+        table.add_column("Error Rate", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("p99", justify="right")
+        
+        for endpoint in status["endpoints"]:
+            table.add_row(
+                endpoint["url"],
+                "[red]down[/red]" if endpoint["down"] else "[green]up[/green]",
+                str(endpoint["requests"]),
+                f"{endpoint['error_rate']:.1%}",
+                WalletDisplay._format_latency(endpoint["p50"]),
+                WalletDisplay._format_latency(endpoint["p95"]),
+                WalletDisplay._format_latency(endpoint["p99"])
+            )
+        
+        console.print(table)
+        console.print("[dim]Requests go to the first healthy endpoint listed.[/dim]")
+    
+    @staticmethod
+    def _show_backend_status_basic(status: dict) -> None:
+        """
+        Basic version of backend status display.
+        """
+        if "error" in status:
+            print(f"Error: {status['error']}")
+            return
+        
+        print("\n" + "=" * 100)
+        print(f"{' BACKEND STATUS (' + status['network'] + ', ' + status['backend'] + ') ':.^100}")
+        print("=" * 100)
+        
+        if not status["endpoints"]:
+            print(f"Backend {status['backend']} has no explorer endpoints to report.")
+            return
+        
+        print(f"{'Endpoint':<45} {'State':<6} {'Requests':>8} {'Errors':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+        print("-" * 100)
+        for endpoint in status["endpoints"]:
+            print(f"{endpoint['url']:<45} {'down' if endpoint['down'] else 'up':<6} "
+                  f"{endpoint['requests']:>8} {endpoint['error_rate']:>8.1%} "
+                  f"{WalletDisplay._format_latency(endpoint['p50']):>9} "
+                  f"{WalletDisplay._format_latency(endpoint['p95']):>9} "
+                  f"{WalletDisplay._format_latency(endpoint['p99']):>9}")
+        print("=" * 100)
+        print("Requests go to the first healthy endpoint listed.")
+    
     @staticmethod
     def show_wallet_file_info(wallet_data: dict) -> None:
         """
@@ -1024,18 +1117,28 @@ class WalletDisplay:
         print(f"Net Amount: {received - sent - fees:.8f} BTC")
         print("=" * 100)
     @staticmethod
-    def show_exchange_rates(rates: Dict[str, float]) -> None:
+    def show_exchange_rates(rates: Dict) -> None:
         """
-        Display current Bitcoin exchange rates.
+        Display current Bitcoin exchange rates and how old they are.
         """
         if "error" in rates:
             print(f"Error: {rates['error']}")
             return
             
+        prices = {currency: rate for currency, rate in rates.items() if currency in CURRENCIES}
         if HAS_RICH:
-            WalletDisplay._show_exchange_rates_rich(rates)
+            WalletDisplay._show_exchange_rates_rich(prices)
         else:
-            WalletDisplay._show_exchange_rates_basic(rates)
+            WalletDisplay._show_exchange_rates_basic(prices)
+        
+        if rates.get("as_of"):
+            as_of = datetime.datetime.fromtimestamp(rates["as_of"]).strftime('%Y-%m-%d %H:%M')
+            if rates.get("stale"):
+                minutes = int(time.time() - rates["as_of"]) // 60
+                print(f"Warning: rates are from {as_of} ({minutes} minutes old); "
+                      "price sources have not answered since")
+            else:
+                print(f"Rates as of {as_of}")
 
     @staticmethod
     def _show_exchange_rates_rich(rates: Dict[str, float]) -> None:
@@ -1131,11 +1234,7 @@ class WalletDisplay:
         """
         Rich version of UTXO display.
         """
-        explorer_urls = {
-            "mainnet": "https://blockstream.info",
-            "testnet": "https://blockstream.info/testnet",
-            "signet": "https://blockstream.info/signet"
-        }
+        network_config = config.network_configs.get(network, config.network_configs["testnet"])
         
         table = Table(title="Unspent Transaction Outputs (UTXOs)")
         table.add_column("#", style="cyan", no_wrap=True)
@@ -1150,7 +1249,7 @@ class WalletDisplay:
         for i, utxo in enumerate(sorted_utxos):
             tx_id = utxo.get('txid', '')
             short_tx_id = f"{tx_id[:8]}...{tx_id[-8:]}" if tx_id else "N/A"
-            explorer_url = f"{explorer_urls.get(network, explorer_urls['testnet'])}/tx/{tx_id}"
+            explorer_url = f"{network_config.explorer_url}/tx/{tx_id}"
             tx_id_display = f"[link={explorer_url}]{short_tx_id}[/link]"
             
             # Format confirmations
@@ -0,0 +1,520 @@
+"""
+Electrum protocol backend.
+
+Talks to an ElectrumX, Fulcrum or electrs server over one persistent TCP or
+TLS connection. Requests for many addresses are sent as JSON-RPC batches,
+so a whole wallet's balances cost a single round trip instead of one HTTP
+request per address. Results are converted to the Esplora JSON shape the
+rest of the wallet uses.
+"""
+import json
+import time
+import socket
+import ssl
+import hashlib
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from bitcoin.core import CTransaction, b2lx
+
+from .backends import ChainBackend, BACKEND_TYPES, CHAIN_PAGE_SIZE
+from .config import config, NetworkConfig
+from .exceptions import TransactionError
+from .keys import address_to_script, script_to_address
+from .txstore import TransactionStore
+
+# Protocol version negotiated with the server
+PROTOCOL_VERSION = "1.4"
+CLIENT_NAME = "bitcoin-wallet-cli/0.1.0"
+
+# Most raw transactions and block headers kept in memory; the oldest go first
+MAX_CACHED_TXS = 10_000
+MAX_CACHED_HEADERS = 10_000
+
+# Seconds a headers.subscribe answer is reused for tip height and hash lookups
+TIP_MEMO_SECONDS = 1.0
+
+class ElectrumError(requests.exceptions.RequestException):
+    """Raised when an Electrum server returns an error for a request."""
+
+def electrum_scripthash(script: bytes) -> str:
+    """
+    Compute the Electrum scripthash of an output script.
+
+    Args:
+        script: scriptPubKey bytes
+
+    Returns:
+        Reversed SHA256 of the script, hex encoded
+    """
+    return hashlib.sha256(script).digest()[::-1].hex()
+
+def _header_status(height: int, header_hex: str) -> Dict:
+    """Build an Esplora status block from a block height and raw header."""
+    header = bytes.fromhex(header_hex)
+    return {
+        "confirmed": True,
+        "block_height": height,
+        "block_hash": hashlib.sha256(hashlib.sha256(header).digest()).digest()[::-1].hex(),
+        "block_time": int.from_bytes(header[68:72], 'little')
+    }
+
+class ElectrumClient:
+    """
+    JSON-RPC client for a single persistent Electrum server connection.
+
+    Calls are serialized on the connection. A dropped connection is reopened
+    once before the error is reported.
+    """
+
+    def __init__(self, host: str, port: int, use_ssl: bool = True,
+                 timeout: Optional[float] = None, verify_ssl: bool = True,
+                 max_batch_size: int = 1000):
+        """
+        Initialize the client. The connection is opened on first use.
+
+        Args:
+            host: Server host name
+            port: Server port
+            use_ssl: Whether to wrap the connection in TLS
+            timeout: Socket timeout in seconds (default: config.api_timeout)
+            verify_ssl: Whether to verify the server certificate; many
+                public servers use self-signed certificates
+            max_batch_size: Maximum requests per batch message; larger
+                batches are split and pipelined on the same connection
+        """
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout or config.api_timeout
+        self.verify_ssl = verify_ssl
+        self.max_batch_size = max_batch_size
+        self.server_version = None
+        self._sock = None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        """Open the connection and negotiate the protocol version."""
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            if not self.verify_ssl:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=self.host)
+
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self.server_version = self._exchange([("server.version", [CLIENT_NAME, PROTOCOL_VERSION])])[0]
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _exchange(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """Send calls as pipelined batches and collect results in call order."""
+        requests_by_id = {}
+        messages = []
+        for start in range(0, len(calls), self.max_batch_size):
+            batch = []
+            for method, params in calls[start:start + self.max_batch_size]:
+                request_id = next(self._ids)
+                requests_by_id[request_id] = len(requests_by_id)
+                batch.append({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            messages.append(json.dumps(batch if len(batch) > 1 else batch[0]))
+
+        self._sock.sendall(("\n".join(messages) + "\n").encode())
+
+        results: List[Any] = [None] * len(calls)
+        pending = set(requests_by_id)
+        while pending:
+            line = self._reader.readline()
+            if not line:
+                raise ConnectionError("Connection closed by server")
+            message = json.loads(line)
+            for response in message if isinstance(message, list) else [message]:
+                request_id = response.get("id")
+                if request_id not in pending:
+                    continue  # Subscription notification
+                pending.discard(request_id)
+                if response.get("error"):
+                    error = response["error"]
+                    text = error.get("message", error) if isinstance(error, dict) else error
+                    results[requests_by_id[request_id]] = ElectrumError(str(text))
+                else:
+                    results[requests_by_id[request_id]] = response.get("result")
+        return results
+
+    def batch(self, calls: List[Tuple[str, List]], raise_errors: bool = True) -> List[Any]:
+        """
+        Send several requests in one round trip.
+
+        Args:
+            calls: (method, params) pairs
+            raise_errors: Raise the first server error instead of returning
+                ElectrumError instances in place of failed results
+
+        Returns:
+            Results in the same order as the calls
+
+        Raises:
+            requests.exceptions.ConnectionError: If the server cannot be reached
+            ElectrumError: If the server rejects a request and raise_errors is set
+        """
+        if not calls:
+            return []
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    results = self._exchange(calls)
+                    break
+                except (OSError, ValueError) as e:
+                    self._close()
+                    if attempt:
+                        raise requests.exceptions.ConnectionError(
+                            f"Electrum server {self.host}:{self.port} unreachable: {str(e)}"
+                        )
+
+        if raise_errors:
+            for result in results:
+                if isinstance(result, ElectrumError):
+                    raise result
+        return results
+
+    def call(self, method: str, *params) -> Any:
+        """Send a single request."""
+        return self.batch([(method, list(params))])[0]
+
+class ElectrumBackend(ChainBackend):
+    """Backend for Electrum protocol servers."""
+
+    batches_requests = True
+
+    def __init__(self, host: str, port: int = 50002, use_ssl: bool = True,
+                 network: str = "testnet", explorer_url: str = "",
+                 timeout: Optional[float] = None, verify_ssl: bool = True,
+                 max_batch_size: int = 1000):
+        """
+        Initialize the backend.
+
+        Args:
+            host: Server host name
+            port: Server port (50002 is the usual TLS port, 50001 plain TCP)
+            use_ssl: Whether to connect over TLS
+            network: Network type, used to render output addresses
+            explorer_url: Block explorer base URL used for links
+            timeout: Socket timeout in seconds
+            verify_ssl: Whether to verify the server certificate
+            max_batch_size: Maximum requests per batch message
+        """
+        self.network = network
+        self.explorer_url = explorer_url.rstrip('/')
+        self.client = ElectrumClient(host, port, use_ssl, timeout, verify_ssl, max_batch_size)
+        self._raw_txs: Dict[str, CTransaction] = {}
+        self._headers: Dict[int, str] = {}
+        self._tip_hash: Optional[str] = None
+        self._tip: Optional[Tuple[float, Dict]] = None
+        # Guards the caches above; callers may share the backend across threads
+        self._cache_lock = threading.RLock()
+        self._tip_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, network_config: NetworkConfig) -> "ElectrumBackend":
+        options = {"network": network_config.network_type, "explorer_url": network_config.explorer_url}
+        options.update(network_config.backend_options or {})
+        return cls(**options)
+
+    @staticmethod
+    def _scripthash(address: str) -> str:
+        return electrum_scripthash(address_to_script(address))
+
+    def _output(self, txout) -> Dict:
+        """Convert a transaction output to Esplora form."""
+        script = bytes(txout.scriptPubKey)
+        return {
+            "scriptpubkey": script.hex(),
+            "scriptpubkey_address": script_to_address(script, self.network),
+            "value": txout.nValue
+        }
+
+    def _status(self, height: int) -> Dict:
+        """Build a status block for a history height, using cached headers."""
+        if height <= 0:
+            return {"confirmed": False}
+        with self._cache_lock:
+            header = self._headers[height]
+        return _header_status(height, header)
+
+    def _remember(self, cache: Dict, key, value, limit: int) -> None:
+        """Store a cache entry, evicting the oldest ones beyond the limit."""
+        with self._cache_lock:
+            cache[key] = value
+            while len(cache) > limit:
+                del cache[next(iter(cache))]
+
+    def _observe_tip(self, tip: Dict) -> None:
+        """
+        Note the server's chain tip from a headers.subscribe result.
+
+        When the tip changes, cached headers within the transaction store's
+        REORG_DEPTH of it are dropped, since a reorganization may have
+        replaced those blocks.
+        """
+        tip_hash = _header_status(tip["height"], tip["hex"])["block_hash"]
+        with self._cache_lock:
+            if self._tip_hash is not None and tip_hash != self._tip_hash:
+                floor = tip["height"] - TransactionStore.REORG_DEPTH
+                for height in [h for h in list(self._headers) if h > floor]:
+                    self._headers.pop(height, None)
+            self._tip_hash = tip_hash
+            self._tip = (time.monotonic(), tip)
+
+    def _current_tip(self) -> Dict:
+        """
+        Get the server's chain tip, reusing a headers.subscribe answer for
+        TIP_MEMO_SECONDS so that a tip's height and hash cost one round trip.
+        """
+        with self._tip_lock:
+            memo = self._tip
+            if memo is not None and time.monotonic() - memo[0] < TIP_MEMO_SECONDS:
+                return memo[1]
+            tip = self.client.call("blockchain.headers.subscribe")
+            self._observe_tip(tip)
+            return tip
+
+    def _fetch(self, txids: List[str], heights: List[int]) -> None:
+        """
+        Download raw transactions and block headers that are not cached yet.
+
+        When headers are needed the current tip is requested in the same
+        batch, so headers cached under an older tip are checked for free.
+        """
+        wanted = [h for h in dict.fromkeys(heights) if h > 0]
+        with self._cache_lock:
+            txids = [txid for txid in dict.fromkeys(txids) if txid not in self._raw_txs]
+            heights = [h for h in wanted if h not in self._headers]
+
+        results = self.client.batch(
+            [("blockchain.transaction.get", [txid]) for txid in txids] +
+            [("blockchain.block.header", [height]) for height in heights] +
+            ([("blockchain.headers.subscribe", [])] if wanted else [])
+        )
+        fetched = list(zip(heights, results[len(txids):]))
+        if wanted:
+            self._observe_tip(results[-1])
+            # A new tip may have dropped headers that were going to be served from the cache
+            with self._cache_lock:
+                stale = [h for h in wanted if h not in self._headers and h not in heights]
+            fetched += zip(stale, self.client.batch([("blockchain.block.header", [h]) for h in stale]))
+
+        for txid, raw in zip(txids, results):
+            self._remember(self._raw_txs, txid, CTransaction.deserialize(bytes.fromhex(raw)), MAX_CACHED_TXS)
+        for height, header in fetched:
+            self._remember(self._headers, height, header, MAX_CACHED_HEADERS)
+
+    def _confirmation_status(self, txid: str) -> Dict:
+        """
+        Find a cached transaction's confirming block without verbose results.
+
+        The history of one of its output scripts lists the transaction with
+        its height.
+        """
+        scripts = [bytes(txout.scriptPubKey) for txout in self._raw_txs[txid].vout]
+        # OP_RETURN outputs are not indexed by script
+        scripts = [script for script in scripts if not script.startswith(b"\x6a")]
+        if not scripts:
+            return {"confirmed": False}
+
+        history = self.client.call("blockchain.scripthash.get_history", electrum_scripthash(scripts[0]))
+        height = next((e["height"] for e in history if e["tx_hash"] == txid), 0)
+        if height <= 0:
+            return {"confirmed": False}
+        self._fetch([], [height])
+        return self._status(height)
+
+    def _decode(self, txid: str, status: Dict) -> Dict:
+        """Convert a cached raw transaction to Esplora form."""
+        tx = self._raw_txs[txid]
+        vin = []
+        input_value = 0
+        for txin in tx.vin:
+            if txin.prevout.is_null():
+                vin.append({"txid": "00" * 32, "vout": 0xffffffff, "is_coinbase": True, "prevout": None})
+                continue
+            prev_txid = b2lx(txin.prevout.hash)
+            prevout = self._output(self._raw_txs[prev_txid].vout[txin.prevout.n])
+            input_value += prevout["value"]
+            vin.append({"txid": prev_txid, "vout": txin.prevout.n, "is_coinbase": False, "prevout": prevout})
+
+        vout = [self._output(txout) for txout in tx.vout]
+        is_coinbase = tx.is_coinbase()
+        return {
+            "txid": txid,
+            "version": tx.nVersion,
+            "locktime": tx.nLockTime,
+            "vin": vin,
+            "vout": vout,
+            "size": len(tx.serialize()),
+            "fee": 0 if is_coinbase else input_value - sum(o["value"] for o in vout),
+            "status": status
+        }
+
+    def _decode_history(self, entries: List[Dict]) -> List[Dict]:
+        """Fetch and decode the transactions of history entries, with input prevouts."""
+        self._fetch([e["tx_hash"] for e in entries], [e["height"] for e in entries])
+        parents = [
+            b2lx(txin.prevout.hash)
+            for e in entries for txin in self._raw_txs[e["tx_hash"]].vin
+            if not txin.prevout.is_null()
+        ]
+        self._fetch(parents, [])
+        return [self._decode(e["tx_hash"], self._status(e["height"])) for e in entries]
+
+    def _history(self, address: str) -> Tuple[List[Dict], List[Dict]]:
+        """Get (mempool, confirmed newest first) history entries for an address."""
+        history = self.client.call("blockchain.scripthash.get_history", self._scripthash(address))
+        mempool = [e for e in history if e["height"] <= 0]
+        confirmed = sorted((e for e in history if e["height"] > 0), key=lambda e: e["height"])
+        return mempool, confirmed[::-1]
+
+    def get_address_stats(self, address: str) -> Dict:
+        return self.get_balances([address])[address]
+
+    def get_balances(self, addresses: List[str]) -> Dict[str, Dict]:
+        calls = []
+        for address in addresses:
+            scripthash = self._scripthash(address)
+            calls.append(("blockchain.scripthash.get_balance", [scripthash]))
+            calls.append(("blockchain.scripthash.get_history", [scripthash]))
+        results = self.client.batch(calls)
+
+        stats = {}
+        for i, address in enumerate(addresses):
+            balance, history = results[2 * i], results[2 * i + 1]
+            unconfirmed = balance.get("unconfirmed", 0)
+            mempool_count = sum(1 for e in history if e["height"] <= 0)
+            stats[address] = {
+                "address": address,
+                "chain_stats": {
+                    "funded_txo_sum": balance.get("confirmed", 0),
+                    "spent_txo_sum": 0,
+                    "tx_count": len(history) - mempool_count
+                },
+                "mempool_stats": {
+                    "funded_txo_sum": max(unconfirmed, 0),
+                    "spent_txo_sum": max(-unconfirmed, 0),
+                    "tx_count": mempool_count
+                }
+            }
+        return stats
+
+    def get_utxos(self, address: str) -> List[Dict]:
+        return self.get_utxos_for([address])[address]
+
+    def get_utxos_for(self, addresses: List[str]) -> Dict[str, List[Dict]]:
+        results = self.client.batch([
+            ("blockchain.scripthash.listunspent", [self._scripthash(address)]) for address in addresses
+        ])
+        self._fetch([], [u["height"] for unspent in results for u in unspent])
+        return {
+            address: [
+                {
+                    "txid": u["tx_hash"],
+                    "vout": u["tx_pos"],
+                    "value": u["value"],
+                    "status": self._status(u["height"])
+                }
+                for u in unspent
+            ]
+            for address, unspent in zip(addresses, results)
+        }
+
+    def get_address_transactions(self, address: str) -> List[Dict]:
+        mempool, confirmed = self._history(address)
+        return self._decode_history(mempool + confirmed[:CHAIN_PAGE_SIZE])
+
+    def get_address_transactions_chain(self, address: str, last_seen_txid: str) -> List[Dict]:
+        _, confirmed = self._history(address)
+        txids = [e["tx_hash"] for e in confirmed]
+        if last_seen_txid not in txids:
+            return []
+        start = txids.index(last_seen_txid) + 1
+        return self._decode_history(confirmed[start:start + CHAIN_PAGE_SIZE])
+
+    def get_transaction(self, txid: str) -> Dict:
+        # Verbose results carry the confirming block; electrs does not support them
+        verbose, tip = self.client.batch([
+            ("blockchain.transaction.get", [txid, True]),
+            ("blockchain.headers.subscribe", [])
+        ], raise_errors=False)
+        if isinstance(tip, ElectrumError):
+            raise tip
+        self._observe_tip(tip)
+
+        if isinstance(verbose, dict):
+            self._remember(self._raw_txs, txid, CTransaction.deserialize(bytes.fromhex(verbose["hex"])),
+                           MAX_CACHED_TXS)
+            status = {"confirmed": False}
+            if verbose.get("confirmations", 0) > 0:
+                status = {
+                    "confirmed": True,
+                    "block_height": tip["height"] - verbose["confirmations"] + 1,
+                    "block_hash": verbose.get("blockhash"),
+                    "block_time": verbose.get("blocktime")
+                }
+        else:
+            self._fetch([txid], [])
+            status = self._confirmation_status(txid)
+
+        self._fetch([b2lx(txin.prevout.hash) for txin in self._raw_txs[txid].vin
+                     if not txin.prevout.is_null()], [])
+        return self._decode(txid, status)
+
+    def get_tip_height(self) -> int:
+        return self._current_tip()["height"]
+
+    def get_tip_hash(self) -> str:
+        tip = self._current_tip()
+        return _header_status(tip["height"], tip["hex"])["block_hash"]
+
+    def get_block_hash(self, height: int) -> str:
+        return _header_status(height, self.client.call("blockchain.block.header", height))["block_hash"]
+
+    def broadcast(self, tx_hex: str) -> str:
+        try:
+            return self.client.call("blockchain.transaction.broadcast", tx_hex)
+        except ElectrumError as e:
+            raise TransactionError("broadcast", str(e))
+
+    def get_fee_estimates(self) -> Dict[int, float]:
+        targets = [1, 3, 6]
+        results = self.client.batch([("blockchain.estimatefee", [target]) for target in targets])
+        # Servers report BTC/kvB, or -1 when they have no estimate
+        return {
+            target: btc_per_kvb * 100_000
+            for target, btc_per_kvb in zip(targets, results)
+            if btc_per_kvb is not None and btc_per_kvb > 0
+        }
+
+    def get_fee_histogram(self) -> List[Tuple[float, int]]:
+        return [(float(rate), int(vsize)) for rate, vsize in self.client.call("mempool.get_fee_histogram")]
+
+BACKEND_TYPES["electrum"] = ElectrumBackend
@@ -0,0 +1,453 @@
+"""
+Per-endpoint health tracking and hedged reads across explorer mirrors.
+
+Every read sent to an Esplora endpoint records its latency or failure,
+and reads go to the healthiest of a network's endpoints first. A read that
+the chosen endpoint has not
+answered within its recent p95 latency is also sent to the next
+one, and the first good answer wins. Hedges are capped to a fraction of the
+primary requests so that hedging cannot multiply the load on mirrors.
+Racing requests run on daemon threads and stop retrying once the race is
+decided, so a slow loser never holds up the answer or the CLI's exit.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import requests
+
+from .config import config
+from .transport import transport, abandon_when
+
+T = TypeVar("T")
+
+# Cheap request used to check whether an endpoint is answering
+PROBE_PATH = "/blocks/tip/height"
+PROBE_TIMEOUT = 5
+
+def _is_definitive(error: Exception) -> bool:
+    """Whether a failure is an answer about the request itself, such as 404."""
+    response = getattr(error, "response", None)
+    return (isinstance(error, requests.exceptions.HTTPError) and response is not None
+            and 400 <= response.status_code < 500 and response.status_code != 429)
+
+class EndpointStats:
+    """Recent latencies, failures and health of one endpoint."""
+
+    # Samples needed before percentiles are trusted
+    MIN_SAMPLES = 10
+    # Each point of recent error rate weighs like this many typical latencies
+    ERROR_PENALTY = 10
+
+    def __init__(self, url: str, window: int = 200):
+        """
+        Initialize empty statistics.
+
+        Args:
+            url: Endpoint base URL
+            window: Number of recent outcomes kept
+        """
+        self.url = url
+        # Latency in seconds for answered requests, None for failures
+        self.outcomes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        # Wall-clock time of the latest failure, kept across runs
+        self.last_failure: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def latencies(self) -> List[float]:
+        """Latencies of the recently answered requests."""
+        with self._lock:
+            return [latency for latency in self.outcomes if latency is not None]
+
+    @property
+    def is_down(self) -> bool:
+        """Whether the endpoint failed too many times in a row to be routed to."""
+        return self.consecutive_failures >= config.endpoint_down_after
+
+    def record_success(self, latency: float) -> None:
+        """Record a request that was answered after `latency` seconds."""
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.outcomes.append(latency)
+
+    def record_error(self) -> None:
+        """Record a request that failed."""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+            self.last_failure = time.time()
+            self.outcomes.append(None)
+
+    def error_rate(self) -> float:
+        """Share of recent requests that failed."""
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return sum(1 for latency in self.outcomes if latency is None) / len(self.outcomes)
+
+    def percentile(self, p: float, min_samples: Optional[int] = None) -> Optional[float]:
+        """
+        Get a latency percentile over the recent window.
+
+        Args:
+            p: Percentile between 0 and 100
+            min_samples: Samples required (default: MIN_SAMPLES)
+
+        Returns:
+            Latency in seconds, or None if too few samples were recorded
+        """
+        ordered = sorted(self.latencies)
+        if not ordered or len(ordered) < (min_samples or self.MIN_SAMPLES):
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def score(self, default_latency: float) -> float:
+        """
+        Rate the endpoint's health; lower is better.
+
+        Args:
+            default_latency: Latency assumed while too few samples exist
+
+        Returns:
+            Median latency inflated by the recent error rate
+        """
+        p50 = self.percentile(50)
+        latency = p50 if p50 is not None else default_latency
+        return latency * (1 + self.ERROR_PENALTY * self.error_rate())
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "outcomes": list(self.outcomes),
+                "requests": self.requests,
+                "errors": self.errors,
+                "consecutive_failures": self.consecutive_failures,
+                "last_failure": self.last_failure
+            }
+
+    @classmethod
+    def from_dict(cls, url: str, data: Dict) -> "EndpointStats":
+        stats = cls(url)
+        stats.outcomes.extend(data.get("outcomes", []))
+        stats.requests = data.get("requests", 0)
+        stats.errors = data.get("errors", 0)
+        stats.consecutive_failures = data.get("consecutive_failures", 0)
+        stats.last_failure = data.get("last_failure")
+        return stats
+
+def _http_probe(url: str) -> None:
+    """Check an Esplora endpoint with a cheap request, raising if it fails."""
+    response = transport.get(f"{url}{PROBE_PATH}", timeout=PROBE_TIMEOUT)
+    response.raise_for_status()
+
+class EndpointRegistry:
+    """
+    Health statistics for every endpoint, optionally persisted across runs.
+
+    Endpoints that fail several times in a row are ranked last and probed
+    in the background with growing intervals until they answer again.
+    """
+
+    # Constants
+    STATE_DIR = os.path.expanduser("~/.bitcoin_wallet")
+    STATE_FILE = os.path.join(STATE_DIR, "endpoints.json")
+    MAX_PROBE_INTERVAL = 600
+
+    def __init__(self, path: Optional[str] = None, probe_interval: Optional[float] = None,
+                 probe: Callable[[str], None] = _http_probe):
+        """
+        Initialize the registry.
+
+        Args:
+            path: File the statistics are loaded from and saved to at exit
+                (default: kept in memory only)
+            probe_interval: Seconds before a down endpoint is first probed
+                (default: config.endpoint_probe_interval)
+            probe: Checks one endpoint, raising if it is unhealthy
+        """
+        self.path = path
+        self.probe_interval = probe_interval if probe_interval is not None else config.endpoint_probe_interval
+        self.probe = probe
+        self._stats: Dict[str, EndpointStats] = {}
+        self._probing: Dict[str, threading.Timer] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        """
+        Load saved statistics once and save them again at exit.
+
+        Endpoints saved as down are probed in the background once the probe
+        interval since their last failure has passed, as the process that
+        scheduled their probes is gone. Called with the lock held.
+        """
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            for url, data in saved.items():
+                self._stats[url] = EndpointStats.from_dict(url, data)
+        except (OSError, ValueError):
+            pass
+        atexit.register(self.save)
+
+        now = time.time()
+        for url, stats in self._stats.items():
+            if stats.is_down:
+                elapsed = now - (stats.last_failure or 0)
+                self._start_probe(url, self.probe_interval, max(0.0, self.probe_interval - elapsed))
+
+    def save(self) -> None:
+        """Write the statistics to the state file."""
+        if not self.path:
+            return
+        with self._lock:
+            state = {url: stats.to_dict() for url, stats in self._stats.items()}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(state, f)
+        except OSError:
+            pass
+
+    def get(self, url: str) -> EndpointStats:
+        """Get the statistics for an endpoint."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if url not in self._stats:
+                self._stats[url] = EndpointStats(url)
+            return self._stats[url]
+
+    def all(self) -> List[EndpointStats]:
+        """Get the statistics of every endpoint used so far."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return list(self._stats.values())
+
+    def rank(self, urls: List[str], default_latency: float) -> List[str]:
+        """
+        Order endpoints from healthiest to least healthy.
+
+        Endpoints without enough samples are scored at `default_latency`,
+        and ties keep the configured order. Down endpoints come last.
+        """
+        def key(item):
+            position, url = item
+            stats = self.get(url)
+            return stats.is_down, stats.score(default_latency), position
+
+        return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def timed(self, url: str, fetch: Callable[[str], T]) -> T:
+        """Call fetch(url) and record its latency or failure."""
+        stats = self.get(url)
+        start = time.monotonic()
+        try:
+            result = fetch(url)
+        except Exception as e:
+            # Client errors are answers, not a sign of a bad endpoint
+            if _is_definitive(e):
+                stats.record_success(time.monotonic() - start)
+            else:
+                stats.record_error()
+                if stats.is_down:
+                    self._schedule_probe(url, self.probe_interval)
+            raise
+        stats.record_success(time.monotonic() - start)
+        return result
+
+    def _schedule_probe(self, url: str, interval: float) -> None:
+        """Probe a down endpoint in the background after `interval` seconds."""
+        with self._lock:
+            self._start_probe(url, interval, interval)
+
+    def _start_probe(self, url: str, interval: float, delay: float) -> None:
+        """Start a probe timer unless one is pending. Called with the lock held."""
+        if url in self._probing:
+            return
+        timer = threading.Timer(delay, self._run_probe, (url, interval))
+        timer.daemon = True
+        self._probing[url] = timer
+        timer.start()
+
+    def _run_probe(self, url: str, interval: float) -> None:
+        with self._lock:
+            self._probing.pop(url, None)
+
+        stats = self.get(url)
+        if not stats.is_down:
+            return
+        try:
+            start = time.monotonic()
+            self.probe(url)
+        except Exception:
+            # Still failing: try again later, backing off
+            self._schedule_probe(url, min(interval * 2, self.MAX_PROBE_INTERVAL))
+            return
+        stats.record_success(time.monotonic() - start)
+
+    def check(self, urls: List[str]) -> None:
+        """Probe endpoints once, concurrently, recording the results."""
+        def probe(url: str) -> None:
+            stats = self.get(url)
+            start = time.monotonic()
+            try:
+                self.probe(url)
+            except Exception:
+                # Any failure counts here, as the probe path always exists
+                stats.record_error()
+                return
+            stats.record_success(time.monotonic() - start)
+
+        threads = [threading.Thread(target=probe, args=(url,), daemon=True) for url in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def cancel_probes(self) -> None:
+        """Stop all scheduled background probes."""
+        with self._lock:
+            timers, self._probing = list(self._probing.values()), {}
+        for timer in timers:
+            timer.cancel()
+
+class Hedger:
+    """Sends reads to a primary endpoint and hedges slow ones to mirrors."""
+
+    def __init__(self, registry: EndpointRegistry, initial_delay: Optional[float] = None,
+                 max_extra_load: Optional[float] = None):
+        """
+        Initialize the hedger.
+
+        Args:
+            registry: Latency statistics to read and update
+            initial_delay: Hedge delay until the primary has enough samples
+                (default: config.hedge_initial_delay)
+            max_extra_load: Hedges allowed as a fraction of primary requests
+                (default: config.hedge_max_extra_load)
+        """
+        self.registry = registry
+        self.initial_delay = initial_delay if initial_delay is not None else config.hedge_initial_delay
+        self.max_extra_load = max_extra_load if max_extra_load is not None else config.hedge_max_extra_load
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, url: str) -> float:
+        """How long to wait on an endpoint before hedging: its p95 latency."""
+        p95 = self.registry.get(url).percentile(95)
+        return p95 if p95 is not None else self.initial_delay
+
+    def _take_hedge(self) -> bool:
+        """Reserve a hedge if the extra-load budget allows one."""
+        with self._lock:
+            if self.hedges >= max(1.0, self.requests * self.max_extra_load):
+                return False
+            self.hedges += 1
+            return True
+
+    def _start(self, url: str, fetch: Callable[[str], T], settled: threading.Event) -> Future:
+        """Race fetch(url) on a daemon thread that stops retrying once `settled` is set."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                with abandon_when(settled):
+                    future.set_result(self.registry.timed(url, fetch))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedge", daemon=True).start()
+        return future
+
+    def call(self, urls: List[str], fetch: Callable[[str], T]) -> T:
+        """
+        Read from the healthiest endpoint, hedging to the others when it is slow.
+
+        The other endpoints are also tried when the first fails with a
+        transient error; client errors such as 404 are returned as the answer.
+
+        Args:
+            urls: Endpoints in configured order of preference
+            fetch: Performs the read against one endpoint base URL
+
+        Returns:
+            The first good result
+
+        Raises:
+            The first error seen if no endpoint answered
+        """
+        with self._lock:
+            self.requests += 1
+
+        if len(urls) == 1:
+            return self.registry.timed(urls[0], fetch)
+
+        urls = self.registry.rank(urls, self.initial_delay)
+
+        settled = threading.Event()
+        try:
+            return self._race(urls, fetch, settled)
+        finally:
+            # Losers finish their current attempt but make no more
+            settled.set()
+
+    def _race(self, urls: List[str], fetch: Callable[[str], T], settled: threading.Event) -> T:
+        """Run the hedged race over ranked endpoints until one answers."""
+        delay = self.hedge_delay(urls[0])
+        pending = {self._start(urls[0], fetch, settled): urls[0]}
+        remaining = list(urls[1:])
+        first_error = None
+
+        while pending:
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if _is_definitive(e):
+                        raise
+                    first_error = first_error or e
+                    continue
+                if url != urls[0]:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+
+            # Send to the next mirror after a failure, or on a timeout if the budget allows
+            if remaining and (done or self._take_hedge()):
+                url = remaining.pop(0)
+                pending[self._start(url, fetch, settled)] = url
+                delay = self.hedge_delay(url)
+            elif not done:
+                delay = None
+
+        raise first_error
+
+    def stats(self) -> Dict[str, int]:
+        """Number of reads, hedges sent and hedges that answered first."""
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+# Create global endpoint statistics and hedger instances
+endpoint_registry = EndpointRegistry(path=EndpointRegistry.STATE_FILE)
+hedger = Hedger(endpoint_registry)
@@ -2,6 +2,7 @@
 Custom exceptions for the Bitcoin wallet application.
 These exceptions provide more specific error handling and better error messages.
 """
+import requests
 
 class WalletError(Exception):
     """Base exception class for all wallet-related errors."""
@@ -16,6 +17,17 @@ class NetworkError(WalletError):
         super_message = f"{message}: {details}" if details else message
         super().__init__(super_message)
 
+class TransientNetworkError(NetworkError, requests.exceptions.RequestException):
+    """
+    Raised when a request still fails after all retries for a transient cause
+    (connection failure, timeout, 429 or 5xx). It is also a RequestException
+    so existing request error handling keeps working.
+    """
+    def __init__(self, message: str = "Network operation failed", details: str = None,
+                 status_code: int = None):
+        self.status_code = status_code
+        super().__init__(message, details)
+
 class InsufficientFundsError(WalletError):
     """Raised when trying to send more than available balance."""
     def __init__(self, required: float, available: float):
@@ -43,10 +55,12 @@ class InvalidPrivateKeyError(WalletError):
 
 class FeeEstimationError(WalletError):
     """Raised when fee estimation fails."""
-    def __init__(self, fee_type: str = None):
+    def __init__(self, fee_type: str = None, reason: str = None):
         message = "Failed to estimate transaction fee"
         if fee_type:
             message += f" for {fee_type} priority"
+        if reason:
+            message += f": {reason}"
         super().__init__(message)
 
 class TransactionError(WalletError):
@@ -0,0 +1,195 @@
+"""
+Fee estimation from the mempool fee histogram.
+
+The histogram lists how many vbytes are waiting at each fee rate. Sorted
+from the highest fee rate down, its cumulative vsize says how deep into
+the mempool a fee rate sits, and every block takes about one million
+vbytes off the top. The fee rate needed to confirm within N blocks is the
+rate at depth N * 1,000,000 vB, interpolated within the bucket that
+straddles it. Snapshots are cached until the chain tip moves.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from .backends import get_backend
+from .chaintip import chain_tip
+from .exceptions import FeeEstimationError
+
+# Block weight limit expressed in vbytes
+BLOCK_VSIZE = 1_000_000
+# Default minimum relay fee rate in sat/vB
+MIN_RELAY_FEERATE = 1.0
+# Confirmation targets behind the fee priority levels
+PRIORITY_TARGETS = {"high": 1, "medium": 3, "low": 6}
+
+class MempoolSnapshot:
+    """Cumulative mempool depth by fee rate, ready for target lookups."""
+
+    def __init__(self, histogram: Iterable[Tuple[float, int]]):
+        """
+        Build the snapshot.
+
+        Args:
+            histogram: (fee rate in sat/vB, vsize) buckets in any order
+        """
+        buckets = np.asarray(list(histogram), dtype=float).reshape(-1, 2)
+        buckets = buckets[np.argsort(-buckets[:, 0], kind="stable")]
+        self.feerates = buckets[:, 0]
+        self.depths = np.cumsum(buckets[:, 1])
+        self.total_vsize = float(self.depths[-1]) if len(self.depths) else 0.0
+
+    def feerates_for_targets(self, targets: Iterable[int]) -> np.ndarray:
+        """
+        Get the fee rates needed to confirm within each target.
+
+        Args:
+            targets: Confirmation targets in blocks
+
+        Returns:
+            Fee rates in sat/vB, never below the minimum relay fee rate
+        """
+        capacity = np.asarray(list(targets), dtype=float) * BLOCK_VSIZE
+        if not len(self.depths):
+            return np.full(capacity.shape, MIN_RELAY_FEERATE)
+
+        # Depth 0 is the top of the mempool; each bucket ends at its own fee rate
+        depths = np.concatenate(([0.0], self.depths))
+        feerates = np.concatenate(([self.feerates[0]], self.feerates))
+        rates = np.interp(capacity, depths, feerates)
+
+        # Targets deeper than the whole mempool only need the relay minimum
+        rates = np.where(capacity >= self.total_vsize, MIN_RELAY_FEERATE, rates)
+        return np.maximum(rates, MIN_RELAY_FEERATE)
+
+class FeeEstimator:
+    """
+    Maps confirmation targets to fee rates for each network.
+
+    Backends that cannot provide a mempool histogram fall back to their
+    own per-target fee estimates.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, Tuple[str, Optional[MempoolSnapshot]]] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, network: str) -> Optional[MempoolSnapshot]:
+        """
+        Get the mempool snapshot for the current tip.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+
+        Returns:
+            The snapshot, or None if the backend has no histogram
+
+        Raises:
+            ValueError: If the network is not supported
+            requests.RequestException: If the histogram cannot be fetched
+        """
+        tip_hash = chain_tip.get(network)["hash"]
+        with self._lock:
+            cached = self._snapshots.get(network)
+        if cached and cached[0] == tip_hash:
+            return cached[1]
+
+        histogram = get_backend(network).get_fee_histogram()
+        snapshot = MempoolSnapshot(histogram) if histogram is not None else None
+
+        with self._lock:
+            self._snapshots[network] = (tip_hash, snapshot)
+        return snapshot
+
+    def estimate_many(self, network: str, targets: List[int]) -> List[float]:
+        """
+        Estimate fee rates for several confirmation targets at once.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            targets: Confirmation targets in blocks
+
+        Returns:
+            Fee rates in sat/vB, one per target
+
+        Raises:
+            FeeEstimationError: If no estimate can be made
+        """
+        try:
+            snapshot = self.snapshot(network)
+            if snapshot is not None:
+                return [float(rate) for rate in snapshot.feerates_for_targets(targets)]
+            return self._from_backend_estimates(network, targets)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise FeeEstimationError(reason=str(e))
+
+    def estimate(self, network: str, target_blocks: int) -> float:
+        """
+        Estimate the fee rate to confirm within a number of blocks.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            target_blocks: Confirmation target in blocks
+
+        Returns:
+            Fee rate in sat/vB
+
+        Raises:
+            FeeEstimationError: If no estimate can be made
+        """
+        return self.estimate_many(network, [target_blocks])[0]
+
+    def fee_levels(self, network: str) -> Dict[str, int]:
+        """
+        Get whole sat/vB fee rates for the high, medium and low priorities.
+
+        Without a histogram only levels the backend has an estimate for
+        are returned, so the caller can fill in the rest.
+
+        Raises:
+            FeeEstimationError: If no estimate can be made
+        """
+        try:
+            snapshot = self.snapshot(network)
+            if snapshot is None:
+                estimates = get_backend(network).get_fee_estimates()
+                levels = {
+                    level: math.ceil(max(float(estimates[target]), MIN_RELAY_FEERATE))
+                    for level, target in PRIORITY_TARGETS.items() if target in estimates
+                }
+                if not levels:
+                    raise ValueError("backend returned no fee estimates")
+                return levels
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise FeeEstimationError(reason=str(e))
+
+        rates = snapshot.feerates_for_targets(PRIORITY_TARGETS.values())
+        return {level: math.ceil(rate) for level, rate in zip(PRIORITY_TARGETS, rates)}
+
+    @staticmethod
+    def _from_backend_estimates(network: str, targets: List[int]) -> List[float]:
+        """Use the backend's estimate for the longest target not beyond each requested one."""
+        estimates = get_backend(network).get_fee_estimates()
+        if not estimates:
+            raise ValueError("backend returned no fee estimates")
+
+        rates = []
+        for target_blocks in targets:
+            eligible = [target for target in estimates if target <= target_blocks]
+            target = max(eligible) if eligible else min(estimates)
+            rates.append(max(float(estimates[target]), MIN_RELAY_FEERATE))
+        return rates
+
+    def invalidate(self, network: Optional[str] = None) -> None:
+        """Forget cached snapshots."""
+        with self._lock:
+            if network is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(network, None)
+
+# Create global fee estimator instance
+fee_estimator = FeeEstimator()
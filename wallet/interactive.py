@@ -9,6 +9,7 @@ try:
     from prompt_toolkit.history import FileHistory
     from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
     from prompt_toolkit.styles import Style
+    from prompt_toolkit.patch_stdout import patch_stdout
     from rich.console import Console
     HAS_PROMPT_TOOLKIT = True
     console = Console()
@@ -30,7 +31,11 @@ from .commands import (
     ExchangeRatesCommand, TransactionHistoryCommand, WalletInfoCommand
 )
 from .cli import CommandArguments
+from .config import config
 from .display import WalletDisplay
+from .push import PushSubscriber, get_push_url
+from .exceptions import ConfigurationError
+from .addresses import AddressProvider
 from . import generate_wallet
 
 class InteractiveWallet:
@@ -41,8 +46,13 @@ class InteractiveWallet:
     interacting with the wallet through commands and subcommands.
     """
     
-    def __init__(self, network: str = "testnet"):
+    def __init__(self, network: str = "testnet", push: bool = False):
         self.network = network
+        self.push = push or config.push_updates
+        if self.push:
+            # Fail before the REPL starts when there is no feed to connect to
+            get_push_url(network)
+        self.subscriber = None
         self.privkey = None
         self.addresses = None
         self.address_type = "segwit"
@@ -80,10 +90,20 @@ class InteractiveWallet:
         """
         self._print_welcome()
         
+        try:
+            self._repl()
+        finally:
+            self._stop_push()
+    
+    def _repl(self) -> None:
+        """Read and run commands until the user exits."""
         while True:
             try:
+                self._sync_push()
                 if HAS_PROMPT_TOOLKIT and self.session:
-                    command = self.session.prompt('wallet> ', completer=self.completer)
+                    # Keep push notifications from garbling the prompt
+                    with patch_stdout():
+                        command = self.session.prompt('wallet> ', completer=self.completer)
                 else:
                     command = input('wallet> ')
                 
@@ -108,6 +128,35 @@ class InteractiveWallet:
             except Exception as e:
                 print(f"Error: {str(e)}")
     
+    def _sync_push(self) -> None:
+        """Point the push subscription at the current network and wallet addresses."""
+        if not self.push:
+            return
+        addresses = [address[3] for address in self.addresses or []]
+        subscriber = self.subscriber
+        if subscriber and subscriber.network == self.network and subscriber.addresses == addresses:
+            return
+        
+        self._stop_push()
+        try:
+            self.subscriber = PushSubscriber(self.network, addresses, on_event=self._on_push_event)
+        except ConfigurationError as e:
+            # Switched to a network without a feed
+            print(f"Push updates off: {e}")
+            self.push = False
+            return
+        self.subscriber.start()
+    
+    def _stop_push(self) -> None:
+        """Close the push subscription, if any."""
+        if self.subscriber:
+            self.subscriber.stop()
+            self.subscriber = None
+    
+    def _on_push_event(self, text: str) -> None:
+        """Show a block or payment announced by the push feed."""
+        print(f"\n* {text}")
+    
     def _process_command(self, command_line: str) -> None:
         """
         Process a command entered by the user.
@@ -615,22 +664,20 @@ class InteractiveWallet:
         from .network import fetch_utxos, get_recommended_fee_rate
         import requests
         
-        # Check local wallet first, then wallet manager
-        if not self.addresses:
-            active_wallet = wallet_manager.get_active_wallet()
-            if active_wallet:
-                # Use wallet from manager
-                self.privkey = active_wallet.get('private_key')
-                self.network = active_wallet.get('network', 'testnet')
-                self.address_type = active_wallet.get('address_type', 'segwit')
-                
-                # Generate addresses
-                result = generate_wallet(self.privkey, self.network)
-                if None not in result[:3]:
-                    _, _, _, self.addresses = result
-                else:
-                    print("Failed to load wallet from manager.")
-                    return
+        # Check local wallet first, then wallet manager. The manager's
+        # sending address comes from the stored public key, so the private
+        # key is only needed (or asked of the key agent) when signing
+        addresses = self.addresses
+        if not addresses:
+            try:
+                signer = wallet_manager.get_signer()
+            except ValueError as e:
+                print(f"Failed to load wallet from manager: {str(e)}")
+                return
+            if signer:
+                self.network = wallet_manager.get_network()
+                self.address_type = wallet_manager.get_address_type()
+                addresses = AddressProvider.for_public_key(signer[0], self.network)
             else:
                 print("No wallet loaded. Use 'create', 'load', or 'use' first.")
                 return
@@ -679,6 +726,8 @@ class InteractiveWallet:
             print(f"Medium Priority: {fee_rates['medium']} sat/vB")
             print(f"Low Priority: {fee_rates['low']} sat/vB")
             print(f"\nUsing {fee_priority} priority: {fee_rates[fee_priority]} sat/vB")
+            if fee_rates.get('warning'):
+                print(f"Warning: {fee_rates['warning']}")
             
             # Set network
             if self.network == "mainnet":
@@ -687,7 +736,7 @@ class InteractiveWallet:
                 bitcoin.SelectParams("testnet")
             
             # Get sender address
-            from_address = self.addresses[0][3]
+            from_address = addresses[0][3]
             
             print(f"\nPreparing to send {amount} BTC")
             print(f"From: {from_address}")
@@ -727,7 +776,7 @@ class InteractiveWallet:
             )
             
             # Execute using the existing command implementation
-            cmd = SendCommand(args, self.addresses)
+            cmd = SendCommand(args, addresses)
             cmd.execute()
             
         except Exception as e:
@@ -1,11 +1,18 @@
 import bitcoin
 from mnemonic import Mnemonic
 from bitcoin import SelectParams
-from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress, CBech32BitcoinAddress
+from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress
 from bitcoin.core import Hash160
 from bitcoin.core.script import CScript, OP_0
-from bitcoinlib.keys import HDKey
-from typing import Tuple, List, Optional, Union
+from bitcoin import base58, segwit_addr
+from typing import Dict, Tuple, List, Optional, Union
+
+from .addrstore import address_store, key_fingerprint
+from .bip32 import (
+    ExtendedPublicKey, ExtendedPrivateKey, PRIVATE_VERSIONS, BIP84_PUBLIC_PREFIXES, BIP84_PRIVATE_PREFIXES,
+    hash160, base58check_encode, base58check_decode
+)
+from .crypto import pubkey_from_secret
 
 def get_bitcoinlib_network(network: str) -> str:
     """Convert python-bitcoinlib network names to bitcoinlib network names."""
@@ -16,15 +23,289 @@ def get_bitcoinlib_network(network: str) -> str:
     }
     return network_mapping.get(network, "testnet")
 
+# Human-readable parts of bech32 addresses per network
+BECH32_HRPS = {
+    "mainnet": "bc",
+    "testnet": "tb",
+    "signet": "tb"
+}
+
+# Base58 version bytes per network: (P2PKH, P2SH)
+BASE58_VERSIONS = {
+    "mainnet": (0, 5),
+    "testnet": (111, 196),
+    "signet": (111, 196)
+}
+
+# WIF private key version bytes per network
+WIF_VERSIONS = {
+    "mainnet": 0x80,
+    "testnet": 0xef,
+    "signet": 0xef
+}
+
+def secret_to_wif(secret: bytes, network: str = "testnet") -> str:
+    """
+    Encode a 32-byte secret as a compressed-key WIF string.
+    """
+    return base58check_encode(bytes([WIF_VERSIONS[network]]) + secret + b"\x01")
+
+def wif_to_secret(wif: str, network: Optional[str] = None) -> bytes:
+    """
+    Decode a WIF private key without computing its public key.
+    
+    Args:
+        wif: WIF encoded private key
+        network: If given, the key must belong to this network
+        
+    Returns:
+        The 32-byte secret
+        
+    Raises:
+        ValueError: If the key is malformed, for another network, or
+            uncompressed (SegWit outputs require compressed keys)
+    """
+    payload = base58check_decode(wif)
+    if len(payload) == 33:
+        raise ValueError("SegWit addresses require a compressed private key")
+    if len(payload) != 34 or payload[33] != 1:
+        raise ValueError("Invalid WIF private key")
+    if network is not None and payload[0] != WIF_VERSIONS[network]:
+        raise ValueError(f"Private key is not a {network} key")
+    return payload[1:33]
+
+def create_p2wpkh_script(pubkey: bytes) -> bytes:
+    """
+    Create the P2WPKH output script (OP_0 <hash160(pubkey)>) for a public key.
+    """
+    return bytes(CScript([OP_0, Hash160(pubkey)]))
+
 def create_p2wpkh_address(pubkey: bytes, network: str = "testnet") -> str:
     """
     Create a native SegWit (bech32) P2WPKH address from a public key.
     """
-    # Get the hash160 of the public key
-    pubkey_hash = Hash160(pubkey)
+    # For P2WPKH, the witness version is 0 and witness program is the pubkey
+    # hash. The prefix follows `network`, not python-bitcoinlib's selected params
+    return segwit_addr.encode(BECH32_HRPS.get(network, "tb"), 0, Hash160(pubkey))
+
+def address_to_script(address: str) -> bytes:
+    """
+    Get the output script an address pays to.
+    
+    Works for bech32 (SegWit v0) and base58 (P2PKH/P2SH) addresses on any
+    network, without depending on the selected chain parameters.
+    
+    Args:
+        address: Bitcoin address
+        
+    Returns:
+        The scriptPubKey bytes
+        
+    Raises:
+        ValueError: If the address cannot be decoded
+    """
+    hrp = address.lower().rsplit('1', 1)[0]
+    if hrp in BECH32_HRPS.values():
+        version, program = segwit_addr.decode(hrp, address)
+        if version is None:
+            raise ValueError(f"Invalid bech32 address: {address}")
+        op_version = 0 if version == 0 else 0x50 + version
+        return bytes([op_version, len(program)]) + bytes(program)
+    
+    try:
+        data = base58.decode(address)
+    except base58.Base58Error as e:
+        raise ValueError(f"Invalid address: {address}") from e
+    if len(data) != 25 or bitcoin.core.Hash(data[:21])[:4] != data[21:]:
+        raise ValueError(f"Invalid address checksum: {address}")
+    
+    version, payload = data[0], data[1:21]
+    if version in (0, 111):
+        return bytes([0x76, 0xa9, 0x14]) + payload + bytes([0x88, 0xac])
+    if version in (5, 196):
+        return bytes([0xa9, 0x14]) + payload + bytes([0x87])
+    raise ValueError(f"Unknown address version: {address}")
+
+def script_to_address(script: bytes, network: str = "testnet") -> Optional[str]:
+    """
+    Get the address an output script pays to.
+    
+    Args:
+        script: scriptPubKey bytes
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        The address, or None for scripts without a standard address form
+    """
+    # Version 0 witness programs (P2WPKH, P2WSH). Later versions use bech32m,
+    # which python-bitcoinlib cannot encode.
+    if len(script) in (22, 34) and script[0] == 0 and script[1] == len(script) - 2:
+        return segwit_addr.encode(BECH32_HRPS.get(network, "tb"), 0, script[2:])
+    
+    p2pkh_version, p2sh_version = BASE58_VERSIONS.get(network, BASE58_VERSIONS["testnet"])
+    if len(script) == 25 and script[:3] == bytes([0x76, 0xa9, 0x14]) and script[23:] == bytes([0x88, 0xac]):
+        payload = bytes([p2pkh_version]) + script[3:23]
+    elif len(script) == 23 and script[:2] == bytes([0xa9, 0x14]) and script[22] == 0x87:
+        payload = bytes([p2sh_version]) + script[2:22]
+    else:
+        return None
+    return base58.encode(payload + bitcoin.core.Hash(payload)[:4])
+
+def get_master_key(seed: bytes, network: str = "testnet") -> ExtendedPrivateKey:
+    """
+    Create the BIP32 master key of a seed, serialized as zprv (mainnet)
+    or vprv (testnet, signet) like the BIP-84 accounts below it.
+    """
+    return ExtendedPrivateKey.from_seed(seed, PRIVATE_VERSIONS[BIP84_PRIVATE_PREFIXES.get(network, "vprv")])
+
+def get_account_key(mnemonic_words: str, network: str = "testnet") -> ExtendedPrivateKey:
+    """
+    Derive the BIP-84 account key m/84'/coin'/0' from a seed phrase.
     
-    # For P2WPKH, the witness version is 0 and witness program is the pubkey hash
-    return str(CBech32BitcoinAddress.from_bytes(0, pubkey_hash))
+    Args:
+        mnemonic_words: BIP-39 seed phrase
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        Extended private key of the first account
+    """
+    seed = Mnemonic("english").to_seed(mnemonic_words)
+    coin_type = "0" if network == "mainnet" else "1"
+    return get_master_key(seed, network).derive_path(f"m/84'/{coin_type}'/0'")
+
+def get_account_xpub(mnemonic_words: str, network: str = "testnet") -> str:
+    """
+    Get the BIP-84 account extended public key for a seed phrase.
+    
+    Args:
+        mnemonic_words: BIP-39 seed phrase
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        The account key as a zpub (mainnet) or vpub (testnet, signet)
+    """
+    account_key = get_account_key(mnemonic_words, network)
+    return account_key.public_key().to_string(BIP84_PUBLIC_PREFIXES.get(network, "vpub"))
+
+def to_hdkey(key: ExtendedPrivateKey, network: str = "testnet"):
+    """
+    Convert a key to a bitcoinlib HDKey for code that still expects one.
+    
+    bitcoinlib is only imported here: importing it sets up its SQLAlchemy
+    database, which used to dominate the wallet's start-up time.
+    
+    Args:
+        key: Extended private key
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        bitcoinlib.keys.HDKey for the same node
+    """
+    from bitcoinlib.keys import HDKey
+    return HDKey(
+        key=key.secret,
+        chain=key.chain_code,
+        depth=key.depth,
+        parent_fingerprint=key.parent_fingerprint,
+        child_index=key.child_number,
+        network=get_bitcoinlib_network(network)
+    )
+
+class WatchOnlyAccount:
+    """
+    Derives an account's receive and change addresses from its xpub.
+    
+    Only public derivation is used, so no private key is needed or held.
+    The account node and each chain node are derived once and cached, and
+    every derived address goes through the address store, so a new index
+    costs one CKDpub step (an HMAC-SHA512, a fixed-base point
+    multiplication and a point addition) plus hashing and encoding.
+    """
+    
+    def __init__(self, account_xpub: str, network: str = "testnet"):
+        """
+        Initialize the account.
+        
+        Args:
+            account_xpub: Account extended public key (m/84'/coin'/0')
+            network: Network type (mainnet, testnet, signet)
+            
+        Raises:
+            ValueError: If the extended key cannot be parsed
+        """
+        self.account_xpub = account_xpub
+        self.network = network
+        self.account = ExtendedPublicKey.from_string(account_xpub)
+        self.fingerprint = key_fingerprint(account_xpub)
+        self._chains: Dict[int, ExtendedPublicKey] = {}
+    
+    def chain_key(self, chain: int) -> ExtendedPublicKey:
+        """Get the cached node of the receive (0) or change (1) chain."""
+        if chain not in self._chains:
+            self._chains[chain] = self.account.child(chain)
+        return self._chains[chain]
+    
+    def _derive_rows(self, chain: int, indices: List[int]) -> List[Tuple[int, str, str, str]]:
+        chain_key = self.chain_key(chain)
+        hrp = BECH32_HRPS.get(self.network, "tb")
+        rows = []
+        for index in indices:
+            pubkey = chain_key.child(index).key
+            program = hash160(pubkey)
+            rows.append((index, pubkey.hex(), "0014" + program.hex(), segwit_addr.encode(hrp, 0, program)))
+        return rows
+    
+    def derive(self, chain: int, start: int, count: int) -> List[Tuple]:
+        """
+        Derive a run of addresses on one chain.
+        
+        Args:
+            chain: 0 for receive addresses, 1 for change
+            start: First child index
+            count: Number of addresses
+            
+        Returns:
+            List of (index, None, public_key_hex, address) tuples; the
+            private key slot is always empty
+        """
+        rows = address_store.get_or_derive(
+            self.fingerprint, self.network, chain, list(range(start, start + count)),
+            lambda indices: self._derive_rows(chain, indices)
+        )
+        return [(index, None, pubkey, address) for index, pubkey, _, address in rows]
+
+def derive_segwit_addresses(chain_key: ExtendedPrivateKey, start: int, count: int,
+                            network: str = "testnet") -> List[Tuple]:
+    """
+    Derive a run of SegWit addresses from a chain key (m/84'/coin'/0'/chain).
+    
+    Args:
+        chain_key: Extended private key of the receive (0) or change (1) chain
+        start: First child index
+        count: Number of addresses to derive
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        List of (index, private_key_wif, public_key_hex, address) tuples
+    """
+    SelectParams(network)
+    
+    addresses = []
+    for i in range(start, start + count):
+        secret_bytes = chain_key.child(i).secret
+        pubkey = pubkey_from_secret(secret_bytes)
+        addresses.append((
+            i,
+            secret_to_wif(secret_bytes, network),
+            pubkey.hex(),
+            create_p2wpkh_address(pubkey, network)
+        ))
+    return addresses
+
+def _derive_imported_key(privkey: str, network: str) -> Tuple[int, str, str, str]:
+    """Derive the address store row for an imported private key."""
+    pubkey = pubkey_from_secret(wif_to_secret(privkey, network))
+    return (0, pubkey.hex(), create_p2wpkh_script(pubkey).hex(), create_p2wpkh_address(pubkey, network))
 
 def generate_wallet(privkey: Optional[str] = None, 
                    network: str = "testnet",
@@ -43,9 +324,7 @@ def generate_wallet(privkey: Optional[str] = None,
             mnemonic_words = mnemo.generate(strength=256)
             seed = mnemo.to_seed(mnemonic_words)
             
-            # Convert network name for bitcoinlib
-            bitcoinlib_network = get_bitcoinlib_network(network)
-            master_key = HDKey.from_seed(seed, network=bitcoinlib_network)
+            master_key = get_master_key(seed, network)
             
             # Set derivation paths
             coin_type = "0" if network == "mainnet" else "1"
@@ -57,17 +336,13 @@ def generate_wallet(privkey: Optional[str] = None,
             # Track unique addresses to prevent duplicates
             unique_addresses = set()
             
-            account_key = master_key.subkey_for_path(derivation_path)
+            account_key = master_key.derive_path(derivation_path)
             
             for i in range(10):
                 try:
-                    derived_key = account_key.subkey_for_path(str(i))
-                    secret_bytes = derived_key.secret
-                    if isinstance(secret_bytes, int):
-                        secret_bytes = secret_bytes.to_bytes(32, 'big')
+                    secret_bytes = account_key.child(i).secret
                     
-                    derived_private_key = CBitcoinSecret.from_secret_bytes(secret_bytes)
-                    derived_public_key = derived_private_key.pub
+                    derived_public_key = pubkey_from_secret(secret_bytes)
                     
                     # Only generate SegWit addresses
                     derived_address = create_p2wpkh_address(derived_public_key, network)
@@ -76,7 +351,7 @@ def generate_wallet(privkey: Optional[str] = None,
                     if derived_address not in unique_addresses:
                         derived_addresses.append((
                             len(derived_addresses),  # Use sequential index
-                            str(derived_private_key),
+                            secret_to_wif(secret_bytes, network),
                             derived_public_key.hex(),
                             derived_address
                         ))
@@ -88,32 +363,26 @@ def generate_wallet(privkey: Optional[str] = None,
             if not derived_addresses:
                 raise ValueError("Failed to generate any valid addresses")
                 
-            base_private_key = CBitcoinSecret(derived_addresses[0][1])
-            base_pubkey = base_private_key.pub
+            base_private_key = derived_addresses[0][1]
+            base_pubkey = bytes.fromhex(derived_addresses[0][2])
+            
+            # The wallet is reloaded from this key later; remember its address
+            address_store.put_many(key_fingerprint(base_private_key), network, 0, [(
+                0, base_pubkey.hex(), create_p2wpkh_script(base_pubkey).hex(), derived_addresses[0][3]
+            )])
             
         else:
-            # Import existing private key
-            base_private_key = CBitcoinSecret(privkey)
+            # Import existing private key; its address comes from the address
+            # store when this key was seen before, skipping the derivation
             mnemonic_words = "N/A (provided private key)"
-            base_pubkey = base_private_key.pub
-            #print("Public key length:", len(base_pubkey))
+            _, pubkey_hex, _, segwit_address = address_store.get_or_derive(
+                key_fingerprint(privkey), network, 0, [0],
+                lambda indices: [_derive_imported_key(privkey, network)]
+            )[0]
+            derived_addresses = [(0, privkey, pubkey_hex, segwit_address)]
+            return (privkey, pubkey_hex, mnemonic_words, derived_addresses)
 
-            
-            derived_addresses = []
-            unique_addresses = set()
-            
-            # Generate SegWit address
-            segwit_address = create_p2wpkh_address(base_pubkey, network)
-            if segwit_address not in unique_addresses:
-                derived_addresses.append((
-                    0, 
-                    str(base_private_key),
-                    base_pubkey.hex(), 
-                    segwit_address
-                ))
-                unique_addresses.add(segwit_address)
-
-        return (str(base_private_key), base_pubkey.hex(),
+        return (base_private_key, base_pubkey.hex(),
                 mnemonic_words, derived_addresses)
                 
     except Exception as e:
@@ -1,66 +1,213 @@
 import requests
 import datetime
-from typing import Dict, Union, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Union, List, Iterable, Iterator, Tuple, Callable, Any, Optional
+from .config import config
+from .transport import transport
+from .txstore import transaction_store
+from .cache import balance_cache
+from .endpoints import endpoint_registry
+from .rates import rate_service
+from .fees import fee_estimator
+from .exceptions import FeeEstimationError
+from .chaintip import chain_tip
+from .backends import get_backend, CHAIN_PAGE_SIZE
+from .keys import address_to_script
+
+def _run_concurrently(func: Callable[[Any], Any], items: Iterable[Any],
+                      max_in_flight: Optional[int] = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    Run func over items on a bounded thread pool.
+    
+    Args:
+        func: Function to call for each item
+        items: Items to process
+        max_in_flight: Maximum concurrent calls (default: config.max_concurrent_requests)
+        
+    Yields:
+        (item, result) pairs in completion order
+    """
+    items = list(items)
+    if not items:
+        return
+    
+    workers = min(max_in_flight or config.max_concurrent_requests, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def _observe_chain_tip(network: str, addresses: Iterable[str]) -> None:
+    """
+    Bring the balance cache up to the current chain tip before it serves
+    any of the addresses.
+    
+    Nothing is looked up when none of them is cached, and the tip itself is
+    cached for config.chain_tip_ttl seconds. If the tip cannot be fetched
+    the cache keeps the last tip it saw.
+    """
+    if not any(balance_cache.contains(network, address) for address in addresses):
+        return
+    try:
+        chain_tip.get(network)
+    except (ValueError, requests.exceptions.RequestException):
+        pass
 
 def fetch_address_balance(address: str, network: str) -> Dict[str, Union[int, str, None]]:
     """
     Fetch both confirmed and unconfirmed balance of a Bitcoin address.
+    
+    Results are served from the balance cache while fresh and for the
+    current chain tip, which is checked first.
     """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
+    _observe_chain_tip(network, [address])
+    return balance_cache.get(
+        network, address,
+        lambda: _fetch_address_balance_uncached(address, network)
+    )
+
+def forget_balances(network: str, addresses: Optional[Iterable[str]] = None) -> None:
+    """
+    Drop cached balances after a broadcast changed them.
+    
+    A cached balance may otherwise be served for up to the stale window
+    after the transaction that spent from it.
     
-    base_url = api_urls.get(network)
-    if not base_url:
+    Args:
+        network: Network the transaction was broadcast on
+        addresses: Addresses the transaction spends from or pays to
+            (default: every cached address of the network)
+    """
+    if addresses is None:
+        balance_cache.invalidate(network)
+        return
+    for address in addresses:
+        balance_cache.invalidate(network, address)
+
+def _fetch_address_balance_uncached(address: str, network: str) -> Dict[str, Union[int, str, None]]:
+    """
+    Fetch both confirmed and unconfirmed balance of a Bitcoin address from the API.
+    """
+    try:
+        backend = get_backend(network)
+    except ValueError as e:
         return {
             "balance": None,
-            "error": f"Unsupported network: {network}"
+            "error": str(e)
         }
 
     try:
-        response = requests.get(f"{base_url}/address/{address}")
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Calculate confirmed balance
-        confirmed_balance_sat = data.get('chain_stats', {}).get('funded_txo_sum', 0) - \
-                              data.get('chain_stats', {}).get('spent_txo_sum', 0)
-        
-        # Calculate unconfirmed balance
-        unconfirmed_balance_sat = data.get('mempool_stats', {}).get('funded_txo_sum', 0) - \
-                                 data.get('mempool_stats', {}).get('spent_txo_sum', 0)
-        
-        # Total balance (confirmed + unconfirmed)
-        total_balance_sat = confirmed_balance_sat + unconfirmed_balance_sat
-        
-        # Convert to BTC
-        total_balance_btc = total_balance_sat / 100_000_000
-        
-        # Get transaction counts
-        confirmed_tx_count = data.get('chain_stats', {}).get('tx_count', 0)
-        unconfirmed_tx_count = data.get('mempool_stats', {}).get('tx_count', 0)
-        
+        return _balance_from_stats(backend.get_address_stats(address))
+    except requests.exceptions.RequestException as e:
         return {
-            "balance_sat": total_balance_sat,
-            "balance_btc": total_balance_btc,
-            "confirmed_balance_btc": confirmed_balance_sat / 100_000_000,
-            "unconfirmed_balance_btc": unconfirmed_balance_sat / 100_000_000,
-            "tx_count": confirmed_tx_count + unconfirmed_tx_count,
-            "confirmed_tx_count": confirmed_tx_count,
-            "unconfirmed_tx_count": unconfirmed_tx_count,
-            "error": None
+            "balance_sat": None,
+            "balance_btc": None,
+            "tx_count": None,
+            "error": f"API request failed: {str(e)}"
         }
+
+def _balance_from_stats(data: Dict) -> Dict[str, Union[int, str, None]]:
+    """
+    Build balance information from Esplora-style address statistics.
+    
+    Args:
+        data: Address stats with chain_stats and mempool_stats
+        
+    Returns:
+        Balance information dictionary
+    """
+    # Calculate confirmed balance
+    confirmed_balance_sat = data.get('chain_stats', {}).get('funded_txo_sum', 0) - \
+                          data.get('chain_stats', {}).get('spent_txo_sum', 0)
+    
+    # Calculate unconfirmed balance
+    unconfirmed_balance_sat = data.get('mempool_stats', {}).get('funded_txo_sum', 0) - \
+                             data.get('mempool_stats', {}).get('spent_txo_sum', 0)
+    
+    # Total balance (confirmed + unconfirmed)
+    total_balance_sat = confirmed_balance_sat + unconfirmed_balance_sat
+    
+    # Convert to BTC
+    total_balance_btc = total_balance_sat / 100_000_000
+    
+    # Get transaction counts
+    confirmed_tx_count = data.get('chain_stats', {}).get('tx_count', 0)
+    unconfirmed_tx_count = data.get('mempool_stats', {}).get('tx_count', 0)
+    
+    return {
+        "balance_sat": total_balance_sat,
+        "balance_btc": total_balance_btc,
+        "confirmed_balance_btc": confirmed_balance_sat / 100_000_000,
+        "unconfirmed_balance_btc": unconfirmed_balance_sat / 100_000_000,
+        "tx_count": confirmed_tx_count + unconfirmed_tx_count,
+        "confirmed_tx_count": confirmed_tx_count,
+        "unconfirmed_tx_count": unconfirmed_tx_count,
+        "error": None
+    }
+
+def iter_address_balances(addresses: Iterable[str], network: str,
+                          max_in_flight: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Fetch balances for many addresses concurrently.
+    
+    Backends that batch requests (such as Electrum) get every uncached
+    address in a single call instead.
+    
+    Args:
+        addresses: Bitcoin addresses to check
+        network: Network type (mainnet, testnet, signet)
+        max_in_flight: Maximum number of requests in flight at once
         
+    Yields:
+        (address, balance_info) pairs as each lookup completes
+    """
+    addresses = list(addresses)
+    try:
+        backend = get_backend(network)
+    except ValueError:
+        backend = None
+    
+    if backend is not None and backend.batches_requests:
+        yield from _iter_batched_balances(backend, addresses, network)
+        return
+    
+    yield from _run_concurrently(
+        lambda address: fetch_address_balance(address, network),
+        addresses,
+        max_in_flight
+    )
+
+def _iter_batched_balances(backend, addresses: List[str], network: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Fetch balances through a backend that batches lookups.
+    
+    Every address the balance cache cannot answer is looked up in a single
+    get_balances call.
+    """
+    _observe_chain_tip(network, addresses)
+    missing = [address for address in addresses if not balance_cache.contains(network, address)]
+    stats = {}
+    error = None
+    try:
+        if missing:
+            stats = backend.get_balances(missing)
     except requests.exceptions.RequestException as e:
-        return {
+        error = {
             "balance_sat": None,
             "balance_btc": None,
             "tx_count": None,
             "error": f"API request failed: {str(e)}"
         }
+    
+    for address in addresses:
+        if address in stats:
+            result = balance_cache.get(network, address, lambda: _balance_from_stats(stats[address]))
+        elif error is not None and address in missing:
+            result = error
+        else:
+            result = fetch_address_balance(address, network)
+        yield address, result
+
 def fetch_utxos(address: str, network: str) -> List[Dict]:
     """
     Fetch unspent transaction outputs (UTXOs) for an address.
@@ -68,51 +215,26 @@ def fetch_utxos(address: str, network: str) -> List[Dict]:
     This function gets the list of unspent outputs that can be used as inputs
     for new transactions.
     """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    base_url = api_urls.get(network)
-    
     try:
-        response = requests.get(f"{base_url}/address/{address}/utxo")
-        response.raise_for_status()
-        return response.json()
+        return get_backend(network).get_utxos(address)
     except requests.exceptions.RequestException as e:
         raise Exception(f"Failed to fetch UTXOs: {str(e)}")
     
 def get_recommended_fee_rate(network: str) -> dict:
     """
-    Fetch recommended fee rates from Mempool.space API.
-    For testnet, use lower fee rates as the network is less congested.
-    """
-    # For testnet/signet, use lower fixed fees
-    if network in ["testnet", "signet"]:
-        return {
-            'high': 10,    # 10 sat/vB for high priority
-            'medium': 5,   # 5 sat/vB for medium priority
-            'low': 1       # 1 sat/vB for low priority
-        }
+    Get fee rates for the high, medium and low priorities.
     
-    # For mainnet, use the API
+    Rates come from the mempool fee histogram for 1, 3 and 6 block
+    targets. If no estimate can be made the configured fee levels are
+    returned with a "warning" explaining why.
+    """
+    fee_levels = config.network_configs[network].fee_levels if network in config.network_configs \
+        else {'high': 20, 'medium': 10, 'low': 5}
     try:
-        response = requests.get("https://mempool.space/api/v1/fees/recommended")
-        response.raise_for_status()
-        
-        fee_recommendations = response.json()
-        return {
-            'high': fee_recommendations.get('fastestFee', 20),
-            'medium': fee_recommendations.get('halfHourFee', 10),
-            'low': fee_recommendations.get('hourFee', 5)
-        }
-    except requests.exceptions.RequestException:
-        # Fallback fees if API is unreachable
-        return {
-            'high': 20,
-            'medium': 10,
-            'low': 5
-        }
+        # Levels the backend had no estimate for keep their configured rate
+        return {**fee_levels, **fee_estimator.fee_levels(network)}
+    except FeeEstimationError as e:
+        return {**fee_levels, "warning": f"{e.message}; using configured fee levels"}
     
 def get_blockchain_info(network: str = "testnet") -> dict:
     """
@@ -124,30 +246,54 @@ def get_blockchain_info(network: str = "testnet") -> dict:
     Returns:
         Dictionary with blockchain information
     """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    
-    base_url = api_urls.get(network, api_urls["testnet"])
-    
     try:
-        # Fetch block height
-        block_height_response = requests.get(f"{base_url}/blocks/tip/height")
-        block_height = block_height_response.text
-        
-        # Fetch block hash
-        block_hash_response = requests.get(f"{base_url}/blocks/tip/hash")
-        block_hash = block_hash_response.text
+        tip = chain_tip.get(network)
         
         return {
-            "block_height": int(block_height),
-            "block_hash": block_hash
+            "block_height": tip["height"],
+            "block_hash": tip["hash"]
         }
     except Exception as e:
         return {"error": str(e)}
 
+def get_backend_status(network: str = "testnet", probe: bool = True) -> dict:
+    """
+    Report the health of each configured endpoint of a network.
+    
+    Args:
+        network: Bitcoin network (mainnet, testnet, signet)
+        probe: Check every endpoint once first so the report is current
+    
+    Returns:
+        Dictionary with the backend type and per-endpoint statistics,
+        healthiest endpoint first
+    """
+    network_config = config.network_configs.get(network)
+    if network_config is None:
+        return {"error": f"Unsupported network: {network}"}
+    
+    status = {"network": network, "backend": network_config.backend, "endpoints": []}
+    if network_config.backend != "esplora":
+        return status
+    
+    urls = [url.rstrip('/') for url in [network_config.api_url] + network_config.mirror_urls]
+    if probe:
+        endpoint_registry.check(urls)
+    
+    for url in endpoint_registry.rank(urls, config.hedge_initial_delay):
+        stats = endpoint_registry.get(url)
+        status["endpoints"].append({
+            "url": url,
+            "requests": stats.requests,
+            "error_rate": stats.error_rate(),
+            "p50": stats.percentile(50, min_samples=1),
+            "p95": stats.percentile(95, min_samples=1),
+            "p99": stats.percentile(99, min_samples=1),
+            "score": stats.score(config.hedge_initial_delay),
+            "down": stats.is_down
+        })
+    return status
+
 def get_mempool_info(network: str = "testnet") -> dict:
     """
     Fetch detailed network information.
@@ -158,35 +304,12 @@ def get_mempool_info(network: str = "testnet") -> dict:
     Returns:
         Dictionary with network statistics
     """
-    # Updated API URLs
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    
-    base_url = api_urls.get(network, api_urls["testnet"])
-    
     try:
-        # Fetch recent blocks
-        recent_blocks_response = requests.get(f"{base_url}/blocks")
-        recent_blocks_response.raise_for_status()
-        recent_blocks = recent_blocks_response.json()
-        
-        # Fetch blockchain tip height
-        block_height_response = requests.get(f"{base_url}/blocks/tip/height")
-        block_height_response.raise_for_status()
-        block_height = block_height_response.text
-        
-        # Fetch blockchain tip hash
-        block_hash_response = requests.get(f"{base_url}/blocks/tip/hash")
-        block_hash_response.raise_for_status()
-        block_hash = block_hash_response.text
+        tip = chain_tip.get(network)
         
         return {
-            "block_tip": int(block_height),
-            "recent_blocks_count": len(recent_blocks),
-            "last_block_hash": block_hash,
+            "block_tip": tip["height"],
+            "last_block_hash": tip["hash"],
             "fee_info": "Estimated from Blockstream API"
         }
     
@@ -194,7 +317,6 @@ def get_mempool_info(network: str = "testnet") -> dict:
         return {
             "error": f"Network error: {str(e)}",
             "details": {
-                "url": base_url,
                 "network": network
             }
         }
@@ -203,10 +325,107 @@ def get_mempool_info(network: str = "testnet") -> dict:
             "error": f"Unexpected error: {str(e)}",
             "traceback": str(e)
         }
+
+def _fetch_address_transactions(address: str, limit: int, network: str) -> List[Dict]:
+    """
+    Fetch raw transactions for an address, newest first.
+    
+    The first page holds mempool transactions plus the newest confirmed ones;
+    older confirmed transactions are paged through /txs/chain/{last_seen_txid}
+    only until the limit is reached or the history is exhausted. Confirmed
+    pages are immutable, so they are served from the transaction store when
+    already cached.
+    
+    Args:
+        address: Bitcoin address to check
+        limit: Maximum number of transactions to return
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        List of Esplora transaction objects (including vin/vout/status)
+    """
+    backend = get_backend(network)
+    page = backend.get_address_transactions(address)
+    transaction_store.put_many(network, page)
+    txs = page[:limit]
+    
+    while len(txs) < limit:
+        confirmed = [tx for tx in page if tx.get('status', {}).get('confirmed')]
+        if len(confirmed) < CHAIN_PAGE_SIZE:
+            break  # Last page of confirmed history
+        
+        last_seen_txid = confirmed[-1].get('txid')
+        page = transaction_store.get_chain_page(network, address, last_seen_txid)
+        if page is None:
+            page = backend.get_address_transactions_chain(address, last_seen_txid)
+            transaction_store.put_chain_page(network, address, last_seen_txid, page)
+        if not page:
+            break
+        txs.extend(page[:limit - len(txs)])
+    
+    return txs
+
+def _summarize_transaction(tx: Dict, address: str, explorer_url: str,
+                           tip_height: Optional[int] = None) -> Dict:
+    """
+    Classify a transaction relative to an address and format its details.
+    
+    Args:
+        tx: Esplora transaction object with vin prevouts and status
+        address: The wallet address the history was fetched for
+        explorer_url: Block explorer base URL for links
+        tip_height: Chain tip height used to count confirmations
+        
+    Returns:
+        Dictionary with transaction details
+    """
+    tx_id = tx.get('txid')
+    status = tx.get('status', {})
+    
+    # Check inputs to see if our address is there (outgoing)
+    is_incoming = not any(
+        vin.get('prevout', {}).get('scriptpubkey_address') == address
+        for vin in tx.get('vin', [])
+    )
+    
+    if is_incoming:
+        # Sum outputs to our address
+        tx_value = sum(
+            vout.get('value', 0) for vout in tx.get('vout', [])
+            if vout.get('scriptpubkey_address') == address
+        )
+    else:
+        # For outgoing, report the outputs to other addresses plus the fee.
+        # A more accurate calculation would track all wallet addresses as potential change
+        outgoing = sum(
+            vout.get('value', 0) for vout in tx.get('vout', [])
+            if vout.get('scriptpubkey_address') != address
+        )
+        tx_value = -(outgoing + tx.get('fee', 0))
+    
+    return {
+        "txid": tx_id,
+        "date": datetime.datetime.fromtimestamp(status.get('block_time', 0)).strftime('%Y-%m-%d %H:%M'),
+        "confirmations": (tip_height - status['block_height'] + 1)
+                         if status.get('confirmed') and tip_height is not None else 0,
+        "type": "received" if is_incoming else "sent",
+        "amount_sat": tx_value,
+        "amount_btc": tx_value / 100_000_000,
+        "fee_sat": tx.get('fee', 0),
+        "status": "confirmed" if status.get('confirmed') else "pending",
+        "block_height": status.get('block_height'),
+        "block_hash": status.get('block_hash'),
+        "explorer_url": f"{explorer_url}/tx/{tx_id}"
+    }
+
 def fetch_transaction_history(address: str, network: str, limit: int = 10) -> List[Dict]:
     """
     Fetch transaction history for an address with detailed information.
     
+    Transactions are classified straight from the address history payload,
+    which already carries inputs, outputs and confirmation status, so no
+    per-transaction lookups are needed.
+    
     Args:
         address: Bitcoin address to check
         network: Network type (mainnet, testnet, signet)
@@ -215,164 +434,186 @@ def fetch_transaction_history(address: str, network: str, limit: int = 10) -> Li
     Returns:
         List of transaction details
     """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    
-    base_url = api_urls.get(network)
-    if not base_url:
-        return [{"error": f"Unsupported network: {network}"}]
+    try:
+        backend = get_backend(network)
+    except ValueError as e:
+        return [{"error": str(e)}]
     
     try:
-        # Get transactions for the address
-        response = requests.get(f"{base_url}/address/{address}/txs")
-        response.raise_for_status()
-        txs = response.json()[:limit]  # Limit number of transactions
+        txs = _fetch_address_transactions(address, limit, network)
         
-        # Process each transaction to get more details
-        tx_details = []
-        for tx in txs:
-            tx_id = tx.get('txid')
-            
-            # Get full transaction details
-            tx_response = requests.get(f"{base_url}/tx/{tx_id}")
-            tx_response.raise_for_status()
-            full_tx = tx_response.json()
-            
-            # Determine if this is incoming or outgoing
-            is_incoming = True
-            tx_value = 0
-            
-            # Check inputs to see if our address is there (outgoing)
-            for vin in full_tx.get('vin', []):
-                if vin.get('prevout', {}).get('scriptpubkey_address') == address:
-                    is_incoming = False
-                    break
-            
-            # Calculate value based on inputs/outputs
-            if is_incoming:
-                # Sum outputs to our address
-                for vout in full_tx.get('vout', []):
-                    if vout.get('scriptpubkey_address') == address:
-                        tx_value += vout.get('value', 0)
-            else:
-                # For outgoing, calculate the net amount sent
-                # This is more complex as we need to consider change outputs
-                # For simplicity, we'll just report the fee and outputs to non-change addresses
-                # A more accurate calculation would track all wallet addresses as potential change
-                fee = full_tx.get('fee', 0)
-                outgoing = 0
-                
-                for vout in full_tx.get('vout', []):
-                    out_addr = vout.get('scriptpubkey_address')
-                    if out_addr != address:  # Assume all other outputs are true sends
-                        outgoing += vout.get('value', 0)
-                
-                tx_value = -(outgoing + fee)
-            
-            # Format transaction details
-            tx_detail = {
-                "txid": tx_id,
-                "date": datetime.datetime.fromtimestamp(full_tx.get('status', {}).get('block_time', 0)).strftime('%Y-%m-%d %H:%M'),
-                "confirmations": full_tx.get('status', {}).get('confirmed') and full_tx.get('status', {}).get('block_height', 0) or 0,
-                "type": "received" if is_incoming else "sent",
-                "amount_sat": tx_value,
-                "amount_btc": tx_value / 100_000_000,
-                "fee_sat": full_tx.get('fee', 0),
-                "status": "confirmed" if full_tx.get('status', {}).get('confirmed') else "pending",
-                "block_height": full_tx.get('status', {}).get('block_height'),
-                "block_hash": full_tx.get('status', {}).get('block_hash'),
-                "explorer_url": f"{api_urls.get(network).replace('/api', '')}/tx/{tx_id}"
-            }
-            
-            tx_details.append(tx_detail)
-            
-        return tx_details
+        # Confirmations are counted against the shared tip snapshot
+        tip_height = None
+        if any(tx.get('status', {}).get('confirmed') for tx in txs):
+            tip_height = chain_tip.height(network)
+        
+        return [_summarize_transaction(tx, address, backend.explorer_url, tip_height) for tx in txs]
         
     except requests.exceptions.RequestException as e:
         return [{"error": f"Failed to fetch transaction history: {str(e)}"}]
     
-def get_exchange_rates() -> Dict[str, float]:
-    """Fetch current Bitcoin exchange rates from CoinGecko API."""
+def get_exchange_rates() -> Dict:
+    """
+    Get current Bitcoin exchange rates.
+    
+    Rates are the median over several price sources and come from the
+    local rates cache when it is fresh enough. "as_of" and "stale" tell
+    how old they are.
+    """
     try:
-        response = requests.get("https://api.coingecko.com/api/v3/simple/price",
-                              params={
-                                  "ids": "bitcoin",
-                                  "vs_currencies": "usd,eur,gbp,jpy,cad,aud,cny"
-                              })
-        response.raise_for_status()
-        data = response.json()
-        return data.get("bitcoin", {})
+        return rate_service.get_rates()
     except Exception as e:
         return {"error": f"Failed to fetch exchange rates: {str(e)}"}
 
-def fetch_utxos_with_details(address: str, network: str) -> List[Dict]:
+def get_transaction(txid: str, network: str) -> Dict:
+    """
+    Get a transaction, consulting the local transaction store first.
+    
+    Args:
+        txid: Transaction ID
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        Esplora-style transaction object
+    """
+    tx = transaction_store.get(network, txid)
+    if tx is not None:
+        return tx
+    
+    tx = get_backend(network).get_transaction(txid)
+    transaction_store.put(network, tx)
+    return tx
+
+def fetch_tip_height(network: str) -> int:
+    """
+    Fetch the current chain tip height.
+    
+    Args:
+        network: Network type (mainnet, testnet, signet)
+        
+    Returns:
+        Block height of the chain tip
+    """
+    return chain_tip.height(network)
+
+def fetch_utxos_with_details(address: str, network: str,
+                             tip_height: Optional[int] = None) -> List[Dict]:
     """
     Fetch unspent transaction outputs (UTXOs) with additional details.
     
+    Confirmation data comes from the status block the /utxo endpoint already
+    returns, and every output pays to `address`, so its script is derived
+    from the address. No parent transactions are fetched.
+    
     Args:
         address: Bitcoin address to check
         network: Network type (mainnet, testnet, signet)
+        tip_height: Chain tip snapshot to count confirmations against;
+            fetched once for this call if not provided
         
     Returns:
         List of UTXOs with details
     """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
-    
-    base_url = api_urls.get(network)
-    if not base_url:
-        return [{"error": f"Unsupported network: {network}"}]
+    try:
+        backend = get_backend(network)
+    except ValueError as e:
+        return [{"error": str(e)}]
     
     try:
-        # Get basic UTXOs
-        response = requests.get(f"{base_url}/address/{address}/utxo")
-        response.raise_for_status()
+        return _detail_utxos(address, backend.get_utxos(address), network, tip_height)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return [{"error": f"Failed to fetch UTXOs: {str(e)}"}]
+
+def iter_utxos_with_details(addresses: Iterable[str], network: str,
+                            tip_height: Optional[int] = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Fetch UTXOs with details for many addresses.
+    
+    Backends that batch requests get every address in a single
+    get_utxos_for call, which for bitcoind is one UTXO set scan instead
+    of one per address. Others are looked up concurrently.
+    
+    Args:
+        addresses: Bitcoin addresses to check
+        network: Network type (mainnet, testnet, signet)
+        tip_height: Chain tip snapshot to count confirmations against
         
-        utxos = response.json()
-        detailed_utxos = []
+    Yields:
+        (address, fetch_utxos_with_details result) pairs
+    """
+    addresses = list(addresses)
+    try:
+        backend = get_backend(network)
+    except ValueError:
+        backend = None
+    
+    if backend is None or not backend.batches_requests:
+        yield from _run_concurrently(
+            lambda address: fetch_utxos_with_details(address, network, tip_height),
+            addresses
+        )
+        return
+    
+    try:
+        utxos = backend.get_utxos_for(addresses) if addresses else {}
+    except requests.exceptions.RequestException as e:
+        for address in addresses:
+            yield address, [{"error": f"Failed to fetch UTXOs: {str(e)}"}]
+        return
+    
+    for address in addresses:
+        try:
+            yield address, _detail_utxos(address, utxos.get(address, []), network, tip_height)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            yield address, [{"error": f"Failed to fetch UTXOs: {str(e)}"}]
+
+def _detail_utxos(address: str, utxos: List[Dict], network: str,
+                  tip_height: Optional[int]) -> List[Dict]:
+    """
+    Add confirmations, dates and output scripts to an address's UTXOs.
+    
+    Raises:
+        requests.exceptions.RequestException: If the tip lookup fails
+        ValueError: If the address cannot be decoded
+    """
+    if not utxos:
+        return []
+    
+    # Take a single tip snapshot so every UTXO is measured against the same height
+    if tip_height is None and any(u.get('status', {}).get('confirmed') for u in utxos):
+        tip_height = fetch_tip_height(network)
+    
+    # Every output pays to the address, so they all share its script
+    script_pubkey = address_to_script(address).hex()
+    
+    detailed_utxos = []
+    for utxo in utxos:
+        tx_id = utxo.get('txid')
+        vout = utxo.get('vout')
+        status = utxo.get('status', {})
+        block_time = status.get('block_time', 0)
         
-        for utxo in utxos:
-            tx_id = utxo.get('txid')
-            vout = utxo.get('vout')
-            
-            # Get transaction details to enrich UTXO information
-            tx_response = requests.get(f"{base_url}/tx/{tx_id}")
-            tx_response.raise_for_status()
-            tx_data = tx_response.json()
-            
-            # Calculate confirmations
-            confirmations = 0
-            if 'status' in tx_data and tx_data['status'].get('confirmed'):
-                current_height_response = requests.get(f"{base_url}/blocks/tip/height")
-                current_height_response.raise_for_status()
-                current_height = int(current_height_response.text)
-                block_height = tx_data['status'].get('block_height', current_height)
-                confirmations = (current_height - block_height) + 1
-            
-            # Extract relevant details
-            detailed_utxo = {
-                "txid": tx_id,
-                "vout": vout,
-                "value": utxo.get('value', 0),
-                "value_btc": utxo.get('value', 0) / 100_000_000,
-                "script_pubkey": tx_data['vout'][vout]['scriptpubkey'],
-                "address": address,
-                "confirmations": confirmations,
-                "time": tx_data.get('status', {}).get('block_time', 0),
-                "date": datetime.datetime.fromtimestamp(tx_data.get('status', {}).get('block_time', 0)).strftime('%Y-%m-%d %H:%M') if tx_data.get('status', {}).get('block_time', 0) else "Pending",
-                "label": "",  # Optional user-assigned label
-                "selected": False  # For coin selection
-            }
-            
-            detailed_utxos.append(detailed_utxo)
+        # Calculate confirmations
+        confirmations = 0
+        if status.get('confirmed'):
+            block_height = status.get('block_height', tip_height)
+            confirmations = (tip_height - block_height) + 1
         
-        return detailed_utxos
+        # Extract relevant details
+        detailed_utxo = {
+            "txid": tx_id,
+            "vout": vout,
+            "value": utxo.get('value', 0),
+            "value_btc": utxo.get('value', 0) / 100_000_000,
+            "script_pubkey": script_pubkey,
+            "address": address,
+            "confirmations": confirmations,
+            "time": block_time,
+            "date": datetime.datetime.fromtimestamp(block_time).strftime('%Y-%m-%d %H:%M') if block_time else "Pending",
+            "label": "",  # Optional user-assigned label
+            "selected": False  # For coin selection
+        }
         
-    except requests.exceptions.RequestException as e:
-        return [{"error": f"Failed to fetch UTXOs: {str(e)}"}]
\ No newline at end of file
+        detailed_utxos.append(detailed_utxo)
+    
+    return detailed_utxos
\ No newline at end of file
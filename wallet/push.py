@@ -0,0 +1,463 @@
+"""
+Push updates from a mempool.space-style WebSocket feed.
+
+Instead of polling, interactive mode can subscribe to new blocks and to
+transactions touching the wallet's addresses. A background thread keeps
+one WebSocket open, records what it hears in a small in-memory wallet
+state and invalidates exactly the caches that went stale: a new block
+moves the shared chain tip (dropping balances from the old one) and an
+address event drops that address's cached balance. While the REPL sits
+idle nothing is polled; the connection only carries keepalive pings.
+
+No feed is configured by default: the feed learns every wallet address,
+so push_url has to be set for the network in config.json first.
+"""
+import os
+import json
+import ssl
+import time
+import base64
+import socket
+import struct
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from . import backends, network as chain
+from .config import config
+from .exceptions import ConfigurationError
+
+# Magic value from RFC 6455 used to check the handshake answer
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Frame opcodes
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+def get_push_url(network: str) -> str:
+    """
+    Get the push feed URL configured for a network.
+
+    Args:
+        network: Network type (mainnet, testnet, signet)
+
+    Returns:
+        The network's push_url
+
+    Raises:
+        ConfigurationError: If no feed is configured
+    """
+    url = config.network_configs[network].push_url
+    if not url:
+        raise ConfigurationError(
+            "push_url",
+            f"no push feed is set for {network}. Add \"push_url\" (for example "
+            f"wss://mempool.space/api/v1/ws) under network_configs.{network} in "
+            f"~/.bitcoin_wallet/config.json; the feed will see every wallet address"
+        )
+    return url
+
+class WebSocketError(requests.exceptions.ConnectionError):
+    """Raised when the WebSocket handshake fails or the server closes the connection."""
+
+class WebSocketClient:
+    """
+    Minimal RFC 6455 client for text messages.
+
+    Only what a JSON feed needs is implemented: the opening handshake,
+    masked text frames, fragmented messages, ping/pong and close.
+    """
+
+    def __init__(self, url: str, timeout: Optional[float] = None, verify_ssl: bool = True):
+        """
+        Initialize the client. Call connect() to open the connection.
+
+        Args:
+            url: ws:// or wss:// URL of the feed
+            timeout: Socket timeout in seconds; recv() raises socket.timeout
+                when nothing arrives for this long (default: config.api_timeout)
+            verify_ssl: Whether to verify the server certificate
+        """
+        self.url = url
+        self.timeout = timeout or config.api_timeout
+        self.verify_ssl = verify_ssl
+        self._sock = None
+        self._buffer = bytearray()
+        self._send_lock = threading.Lock()
+
+    def connect(self) -> None:
+        """
+        Open the connection and perform the opening handshake.
+
+        Raises:
+            WebSocketError: If the server does not accept the upgrade
+            OSError: If the connection cannot be opened
+        """
+        parts = urlsplit(self.url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        sock = socket.create_connection((parts.hostname, port), timeout=self.timeout)
+        if secure:
+            context = ssl.create_default_context()
+            if not self.verify_ssl:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=parts.hostname)
+        self._sock = sock
+        self._buffer.clear()
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            "\r\n"
+        )
+        sock.sendall(request.encode())
+
+        status_line, *header_lines = self._read_until(b"\r\n\r\n").decode("latin-1").split("\r\n")
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        expected = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        if status_line.split(" ")[1:2] != ["101"] or headers.get("sec-websocket-accept") != expected:
+            self.close()
+            raise WebSocketError(f"WebSocket upgrade rejected: {status_line}")
+
+    def _read_until(self, marker: bytes) -> bytes:
+        """Read up to and including a marker, keeping anything after it buffered."""
+        while marker not in self._buffer:
+            self._fill()
+        end = self._buffer.index(marker) + len(marker)
+        data = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        return data[:-len(marker)]
+
+    def _read_exact(self, size: int) -> bytes:
+        """Read exactly `size` bytes. A timeout leaves partial data buffered."""
+        while len(self._buffer) < size:
+            self._fill()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _fill(self) -> None:
+        sock = self._sock
+        if sock is None:
+            raise WebSocketError("Connection closed")
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise WebSocketError("Connection closed by server")
+        self._buffer.extend(chunk)
+
+    def _send_frame(self, opcode: int, payload: bytes = b"") -> None:
+        """Send one final, masked frame as clients must."""
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header.extend(struct.pack("!H", length))
+        else:
+            header.append(0x80 | 127)
+            header.extend(struct.pack("!Q", length))
+
+        mask = os.urandom(4)
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        with self._send_lock:
+            if self._sock is None:
+                raise WebSocketError("Connection closed")
+            self._sock.sendall(bytes(header) + mask + masked)
+
+    def _read_frame(self) -> Tuple[bool, int, bytes]:
+        """Read one frame and return (final, opcode, payload)."""
+        first, second = self._read_exact(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        mask = self._read_exact(4) if second & 0x80 else None
+        payload = self._read_exact(length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def send(self, message: str) -> None:
+        """Send a text message."""
+        self._send_frame(OP_TEXT, message.encode())
+
+    def ping(self) -> None:
+        """Send a ping to keep the connection alive."""
+        self._send_frame(OP_PING)
+
+    def recv(self) -> str:
+        """
+        Wait for the next text message, answering pings on the way.
+
+        Raises:
+            WebSocketError: If the server closes the connection
+            socket.timeout: If nothing arrives within the timeout
+        """
+        parts: List[bytes] = []
+        while True:
+            final, opcode, payload = self._read_frame()
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_CLOSE:
+                self.close()
+                raise WebSocketError("Connection closed by server")
+            else:
+                parts.append(payload)
+                if final:
+                    return b"".join(parts).decode()
+
+    def close(self) -> None:
+        """Close the connection, telling the server if it is still reachable."""
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        try:
+            with self._send_lock:
+                sock.sendall(bytes([0x80 | OP_CLOSE, 0x80]) + os.urandom(4))
+        except OSError:
+            pass
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+@dataclass
+class WalletState:
+    """What the push feed has told us since it connected."""
+    tip: Optional[Dict] = None
+    unconfirmed: Dict[str, Set[str]] = field(default_factory=dict)
+    updated_at: float = 0.0
+    skipped: int = 0
+
+def _block_tip(block) -> Optional[Dict]:
+    """Get {"height", "hash"} from a feed block, or None if it is malformed."""
+    if not isinstance(block, dict):
+        return None
+    height, block_hash = block.get("height"), block.get("id")
+    if not isinstance(height, int) or isinstance(height, bool) or not isinstance(block_hash, str):
+        return None
+    return {"height": height, "hash": block_hash}
+
+def _txids(entries) -> Optional[List[str]]:
+    if not isinstance(entries, list):
+        return None
+    txids = [tx.get("txid") if isinstance(tx, dict) else None for tx in entries]
+    return txids if all(isinstance(txid, str) for txid in txids) else None
+
+def _address_updates(changes) -> Optional[List[Tuple[str, List[str], List[str]]]]:
+    """
+    Get (address, added txids, settled txids) from an address event.
+
+    Returns:
+        The updates, or None if the event is malformed
+    """
+    if not isinstance(changes, dict):
+        return None
+    updates = []
+    for address, change in changes.items():
+        if not isinstance(change, dict):
+            return None
+        added = _txids(change.get("mempool", []))
+        confirmed = _txids(change.get("confirmed", []))
+        removed = _txids(change.get("removed", []))
+        if added is None or confirmed is None or removed is None:
+            return None
+        updates.append((address, added, confirmed + removed))
+    return updates
+
+class PushSubscriber:
+    """
+    Background subscription to block and address events for one network.
+
+    The subscriber reconnects with exponential backoff when the feed drops.
+    While it is connected the shared chain tip is trusted until the next
+    block arrives instead of expiring after a few seconds.
+    """
+
+    def __init__(self, network: str, addresses: Iterable[str] = (), url: Optional[str] = None,
+                 on_event: Optional[Callable[[str], None]] = None,
+                 keepalive: Optional[float] = None, max_backoff: float = 60.0):
+        """
+        Initialize the subscriber. Call start() to connect.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            addresses: Addresses whose transactions should be tracked
+            url: WebSocket feed URL (default: the network's push_url)
+            on_event: Called with a short description of each block or payment
+            keepalive: Seconds of silence before pinging the server
+                (default: config.push_keepalive)
+            max_backoff: Longest wait between reconnection attempts
+
+        Raises:
+            ConfigurationError: If no url is given and the network has no push_url
+        """
+        self.network = network
+        self.addresses = list(dict.fromkeys(addresses))
+        self.url = url or get_push_url(network)
+        self.on_event = on_event
+        self.keepalive = keepalive or config.push_keepalive
+        self.max_backoff = max_backoff
+        self.state = WalletState()
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._client: Optional[WebSocketClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the background connection."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Close the connection and stop reconnecting."""
+        self._stop.set()
+        client = self._client
+        if client is not None:
+            client.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            client = WebSocketClient(self.url, timeout=self.keepalive)
+            try:
+                client.connect()
+                self._client = client
+                self._subscribe(client)
+                self.connected.set()
+                backoff = 1.0
+                self._listen(client)
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._client = None
+                client.close()
+                if self.connected.is_set():
+                    # Without the feed the tip must be polled again
+                    chain.chain_tip.invalidate(self.network)
+                    self.connected.clear()
+
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _subscribe(self, client: WebSocketClient) -> None:
+        client.send(json.dumps({"action": "want", "data": ["blocks"]}))
+        if self.addresses:
+            client.send(json.dumps({"track-addresses": self.addresses}))
+
+    def _listen(self, client: WebSocketClient) -> None:
+        while not self._stop.is_set():
+            try:
+                message = client.recv()
+            except socket.timeout:
+                client.ping()
+                continue
+            try:
+                self.handle(json.loads(message))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # One bad message must not end the subscription
+                self._skip(message, str(e))
+
+    def handle(self, message: Dict) -> bool:
+        """
+        Apply one feed message to the wallet state and caches.
+
+        Messages that do not have the expected shape are skipped whole.
+
+        Args:
+            message: Decoded JSON message from the feed
+
+        Returns:
+            True if the message was applied, False if it was skipped
+        """
+        if not isinstance(message, dict):
+            return self._skip(message, "not an object")
+
+        blocks = message.get("blocks")
+        tips = []
+        if blocks:
+            # Sent once after subscribing; the last entry is the current tip
+            tips.append((_block_tip(blocks[-1]) if isinstance(blocks, list) else None, False))
+        if message.get("block"):
+            tips.append((_block_tip(message["block"]), True))
+
+        changes = message.get("multi-address-transactions") or {}
+        if message.get("address-transactions") and len(self.addresses) == 1:
+            changes = {self.addresses[0]: {"mempool": message["address-transactions"]}}
+        updates = _address_updates(changes)
+
+        if any(tip is None for tip, _ in tips) or updates is None:
+            return self._skip(message, "unexpected message shape")
+
+        for tip, announce in tips:
+            self._on_block(tip, announce)
+        for address, added, settled in updates:
+            self._on_address(address, added, settled)
+        return True
+
+    def _skip(self, message, reason: str) -> bool:
+        with self._lock:
+            self.state.skipped += 1
+        if config.debug_mode:
+            self._notify(f"Ignored feed message ({reason}): {str(message)[:80]}")
+        return False
+
+    def _on_block(self, tip: Dict, announce: bool) -> None:
+        with self._lock:
+            if self.state.tip == tip:
+                return
+            self.state.tip = tip
+            self.state.updated_at = time.time()
+        chain.chain_tip.update(self.network, tip, pinned=True)
+        chain.balance_cache.observe_tip(self.network, tip["hash"])
+        backends.request_coalescer.clear()
+        if announce:
+            self._notify(f"New block {tip['height']}")
+
+    def _on_address(self, address: str, added: List[str], settled: List[str]) -> None:
+        with self._lock:
+            pending = self.state.unconfirmed.setdefault(address, set())
+            new = [txid for txid in added if txid not in pending]
+            pending.update(added)
+            pending.difference_update(settled)
+            self.state.updated_at = time.time()
+        chain.balance_cache.invalidate(self.network, address)
+        backends.request_coalescer.clear()
+        for txid in new:
+            self._notify(f"Incoming transaction {txid[:16]}... for {address}")
+
+    def _notify(self, text: str) -> None:
+        if self.on_event is not None:
+            self.on_event(text)
@@ -0,0 +1,191 @@
+"""
+Client-side rate limiting for explorer hosts.
+
+Each host gets a token bucket that paces requests and an adaptive
+concurrency limit. Both adapt the same way: the concurrency limit grows by
+one slot for every window of successful requests and the rate by one
+request per second for every success, and both are halved when the host
+answers 429 or 503 (additive increase, multiplicative decrease), so scans
+settle at the highest rate the host will sustain. Loopback hosts and the
+hosts listed in config.unmetered_hosts (a self-hosted explorer or node)
+are not paced at all; only their concurrency is limited.
+"""
+import time
+import ipaddress
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from .config import config
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens held
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        """Change the rate, keeping the tokens earned at the old one."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self) -> None:
+        """Take one token, waiting until one is available."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def is_unmetered(host: str) -> bool:
+    """
+    Check whether requests to a host skip rate pacing.
+
+    Args:
+        host: Host name or host:port from a URL
+
+    Returns:
+        True for loopback hosts and hosts listed in config.unmetered_hosts
+    """
+    hostname = urlsplit(f"//{host}").hostname or host
+    if host in config.unmetered_hosts or hostname in config.unmetered_hosts:
+        return True
+    if hostname == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(hostname).is_loopback
+    except ValueError:
+        return False
+
+class HostLimiter:
+    """Adaptive rate and concurrency limits for a single host."""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, max_rate: Optional[float] = None,
+                 paced: bool = True):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Starting requests per second (default: config.rate_limit_per_second)
+            burst: Requests allowed in a burst (default: config.rate_limit_burst)
+            max_concurrency: Ceiling for concurrent requests
+                (default: config.max_concurrent_requests)
+            max_rate: Ceiling for the adaptive rate
+                (default: config.rate_limit_max_per_second)
+            paced: Whether requests are paced by the token bucket at all
+        """
+        rate = rate or config.rate_limit_per_second
+        self.min_rate = min(1.0, rate)
+        self.max_rate = max(rate, max_rate or config.rate_limit_max_per_second)
+        self.bucket = TokenBucket(rate, burst or config.rate_limit_burst) if paced else None
+        self.max_concurrency = max_concurrency or config.max_concurrent_requests
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(1, int(self.concurrency))
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Current requests per second, or None if the host is not paced."""
+        return self.bucket.rate if self.bucket else None
+
+    def acquire(self) -> None:
+        """Wait for a concurrency slot, any Retry-After pause and a rate token."""
+        with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.in_flight >= self.limit:
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+
+        if self.bucket:
+            self.bucket.acquire()
+
+    def release(self, throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        """
+        Return a slot and adjust the concurrency and rate limits.
+
+        Args:
+            throttled: Whether the host rejected the request as overloaded
+            retry_after: Seconds the host asked clients to wait
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.concurrency = max(1.0, self.concurrency / 2)
+            else:
+                self.concurrency = min(float(self.max_concurrency),
+                                       self.concurrency + 1 / self.concurrency)
+            if self.bucket:
+                if throttled:
+                    self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+                else:
+                    self.bucket.set_rate(min(self.max_rate, self.bucket.rate + 1))
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+class RateLimiter:
+    """Hands out one HostLimiter per host."""
+
+    def __init__(self):
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> HostLimiter:
+        """Get the limiter for the host a URL points to."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostLimiter(paced=not is_unmetered(host))
+            return self._hosts[host]
+
+    def stats(self) -> Dict[str, Dict]:
+        """Current limit, rate, requests in flight and throttle count per host."""
+        with self._lock:
+            return {
+                host: {
+                    "limit": limiter.limit,
+                    "rate": limiter.rate,
+                    "in_flight": limiter.in_flight,
+                    "throttled": limiter.throttled
+                }
+                for host, limiter in self._hosts.items()
+            }
+
+    def reset(self) -> None:
+        """Forget all hosts."""
+        with self._lock:
+            self._hosts.clear()
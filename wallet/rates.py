@@ -0,0 +1,209 @@
+"""
+Bitcoin exchange rates from several price sources.
+
+Sources are queried concurrently and whatever answers within a short
+deadline is combined into a per-currency median, so one slow or wrong
+API cannot stall or skew the result. Rates are cached on disk: fresh
+values are served directly, and stale ones are served immediately while
+a background refresh fetches new ones for the next caller. Every result
+says when its rates were fetched, so old prices are never shown as
+current.
+"""
+import os
+import json
+import time
+import statistics
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .config import config
+from .transport import HttpTransport
+
+# Fiat currencies shown by --rates
+CURRENCIES = ("usd", "eur", "gbp", "jpy", "cad", "aud", "cny")
+
+class PriceSource:
+    """One price API and how to read BTC rates out of its response."""
+
+    def __init__(self, name: str, url: str, parse: Callable[[Dict], Dict[str, float]],
+                 params: Optional[Dict[str, str]] = None):
+        """
+        Initialize the source.
+
+        Args:
+            name: Short name used in logs and tests
+            url: Endpoint returning the rates as JSON
+            parse: Turns the JSON response into lowercase currency -> BTC price
+            params: Optional query parameters
+        """
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.params = params
+
+def _parse_coingecko(data: Dict) -> Dict[str, float]:
+    return {currency: float(rate) for currency, rate in data["bitcoin"].items()}
+
+def _parse_coinbase(data: Dict) -> Dict[str, float]:
+    return {currency.lower(): float(rate) for currency, rate in data["data"]["rates"].items()}
+
+def _parse_blockchain_info(data: Dict) -> Dict[str, float]:
+    return {currency.lower(): float(ticker["last"]) for currency, ticker in data.items()}
+
+def default_sources() -> List[PriceSource]:
+    """The public price APIs queried by default."""
+    return [
+        PriceSource("coingecko", "https://api.coingecko.com/api/v3/simple/price", _parse_coingecko,
+                    {"ids": "bitcoin", "vs_currencies": ",".join(CURRENCIES)}),
+        PriceSource("coinbase", "https://api.coinbase.com/v2/exchange-rates", _parse_coinbase,
+                    {"currency": "BTC"}),
+        PriceSource("blockchain.info", "https://blockchain.info/ticker", _parse_blockchain_info)
+    ]
+
+class RateService:
+    """Cached, multi-source exchange rates."""
+
+    # Constants
+    CACHE_DIR = os.path.expanduser("~/.bitcoin_wallet")
+    CACHE_FILE = os.path.join(CACHE_DIR, "rates.json")
+
+    def __init__(self, sources: Optional[List[PriceSource]] = None,
+                 cache_path: Optional[str] = None, ttl: Optional[float] = None,
+                 stale_ttl: Optional[float] = None, deadline: Optional[float] = None):
+        """
+        Initialize the service.
+
+        Args:
+            sources: Price sources to query (default: default_sources())
+            cache_path: Rates cache file (default: ~/.bitcoin_wallet/rates.json)
+            ttl: Seconds cached rates are fresh (default: config.rates_cache_ttl)
+            stale_ttl: Seconds stale rates may still be served while refreshing
+                (default: config.rates_stale_ttl)
+            deadline: Seconds to wait for sources (default: config.rates_deadline)
+        """
+        self.sources = sources if sources is not None else default_sources()
+        self.cache_path = cache_path or self.CACHE_FILE
+        self.ttl = ttl if ttl is not None else config.rates_cache_ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else config.rates_stale_ttl
+        self.deadline = deadline if deadline is not None else config.rates_deadline
+        # Retrying would outlast the deadline; a slow source is simply left out
+        self.transport = HttpTransport(timeout=self.deadline, max_retries=0)
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            return cached if cached.get("rates") else None
+        except (OSError, ValueError):
+            return None
+
+    def _save_cache(self, rates: Dict[str, float]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, 'w') as f:
+                json.dump({"fetched_at": time.time(), "rates": rates}, f)
+        except OSError:
+            pass
+
+    def _query(self, source: PriceSource) -> Dict[str, float]:
+        response = self.transport.get(source.url, params=source.params)
+        response.raise_for_status()
+        return source.parse(response.json())
+
+    def fetch(self) -> Dict[str, float]:
+        """
+        Query every source concurrently and combine what arrives in time.
+
+        Returns:
+            Median BTC price per currency over the sources that answered
+            before the deadline; empty if none did
+        """
+        answers: List[Dict[str, float]] = []
+        answers_lock = threading.Lock()
+
+        def query(source: PriceSource) -> None:
+            try:
+                rates = self._query(source)
+            except Exception:
+                return
+            with answers_lock:
+                answers.append(rates)
+
+        # Daemon threads, so a source that hangs never delays exit
+        threads = [threading.Thread(target=query, args=(source,), daemon=True) for source in self.sources]
+        end = time.monotonic() + self.deadline
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(0.0, end - time.monotonic()))
+
+        with answers_lock:
+            answers = list(answers)
+
+        rates = {}
+        for currency in CURRENCIES:
+            prices = [answer[currency] for answer in answers if answer.get(currency, 0) > 0]
+            if prices:
+                rates[currency] = statistics.median(prices)
+        return rates
+
+    def refresh(self) -> Dict[str, float]:
+        """Fetch rates now and cache them if any source answered."""
+        rates = self.fetch()
+        if rates:
+            self._save_cache(rates)
+        return rates
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        # Not a daemon: the refresh is bounded by the deadline and its result
+        # should reach the cache even when the command finishes first
+        threading.Thread(target=run).start()
+
+    def _result(self, rates: Dict[str, float], fetched_at: float) -> Dict:
+        """Rates with the time they were fetched and whether that is past the TTL."""
+        return {**rates, "as_of": fetched_at, "stale": time.time() - fetched_at >= self.ttl}
+
+    def get_rates(self) -> Dict:
+        """
+        Get exchange rates, preferring the cache.
+
+        Returns:
+            Currency -> BTC price, plus "as_of" (Unix time the rates were
+            fetched) and "stale" (True when older than the TTL), or a
+            dictionary with an "error" key if no rates are cached and no
+            source answered
+        """
+        cached = self._load_cache()
+        if cached is not None:
+            fetched_at = cached.get("fetched_at", 0)
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                return self._result(cached["rates"], fetched_at)
+            if age < self.stale_ttl:
+                self._refresh_in_background()
+                return self._result(cached["rates"], fetched_at)
+
+        rates = self.refresh()
+        if rates:
+            return self._result(rates, time.time())
+        if cached is not None:
+            # Too old to serve normally, but better than nothing
+            return self._result(cached["rates"], cached.get("fetched_at", 0))
+        return {"error": "No price source answered in time"}
+
+# Create global rate service instance
+rate_service = RateService()
@@ -0,0 +1,113 @@
+"""
+Request coalescing for identical explorer reads.
+
+Concurrent callers asking for the same key share one in-flight request,
+and callers arriving shortly after it finished reuse its parsed result.
+This removes duplicate round trips within a single command, such as the
+same fee estimates being read twice or a shared parent transaction
+being fetched once per output.
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .config import config
+
+class _Call:
+    """One request shared by every caller with the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished = 0.0
+
+class SingleFlight:
+    """
+    Runs at most one request per key at a time and memoizes results briefly.
+
+    Failed requests are shared with callers already waiting on them but are
+    never memoized, so the next caller tries again.
+    """
+
+    # Expired entries are swept once this many keys are held
+    SWEEP_THRESHOLD = 256
+
+    def __init__(self, window: Optional[float] = None):
+        """
+        Initialize the coalescer.
+
+        Args:
+            window: Seconds a finished result is reused
+                (default: config.request_coalesce_window)
+        """
+        self.window = window if window is not None else config.request_coalesce_window
+        self.requests = 0
+        self.saved = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _reusable(self, call: _Call, now: float) -> bool:
+        if not call.done.is_set():
+            return True
+        return call.error is None and now - call.finished < self.window
+
+    def _sweep(self, now: float) -> None:
+        """Drop finished entries that can no longer be reused."""
+        expired = [key for key, call in self._calls.items() if not self._reusable(call, now)]
+        for key in expired:
+            del self._calls[key]
+
+    def do(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        Get the result for a key, sharing any identical request.
+
+        Args:
+            key: Identifies the request, e.g. its URL
+            fetch: Performs the request and returns its parsed result
+
+        Returns:
+            The parsed result
+
+        Raises:
+            Whatever fetch raised, for every caller sharing the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            call = self._calls.get(key)
+            leader = call is None or not self._reusable(call, now)
+            if leader:
+                if len(self._calls) >= self.SWEEP_THRESHOLD:
+                    self._sweep(now)
+                call = self._calls[key] = _Call()
+                self.requests += 1
+            else:
+                self.saved += 1
+
+        if leader:
+            try:
+                call.result = fetch()
+            except BaseException as e:
+                call.error = e
+            finally:
+                call.finished = time.monotonic()
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def clear(self) -> None:
+        """Forget memoized results, e.g. after a broadcast changed chain state."""
+        with self._lock:
+            self._calls = {key: call for key, call in self._calls.items() if not call.done.is_set()}
+
+    def stats(self) -> Dict[str, int]:
+        """Number of requests made and saved by coalescing."""
+        with self._lock:
+            return {"requests": self.requests, "saved": self.saved}
+
+# Create global request coalescer instance
+request_coalescer = SingleFlight()
@@ -1,5 +1,6 @@
 import bitcoin
 import requests
+import math
 import random
 from bitcoin.core import CMutableTransaction, CMutableTxIn, CMutableTxOut, COutPoint, CTxWitness, CTxInWitness
 from bitcoin.core.script import CScript, SignatureHash, SIGHASH_ALL, OP_0, OP_HASH160, OP_EQUAL, SIGVERSION_WITNESS_V0
@@ -7,8 +8,13 @@ from bitcoin.core.script import OP_DUP, OP_HASH160, OP_EQUALVERIFY, OP_CHECKSIG
 from bitcoin.wallet import CBitcoinSecret, P2PKHBitcoinAddress, CBech32BitcoinAddress
 from bitcoin.core import Hash160
 from typing import Dict, List, Optional, Tuple
-from .network import fetch_utxos, get_recommended_fee_rate
+from .network import fetch_utxos, get_recommended_fee_rate, forget_balances
 from .privacy import address_manager, randomize_amount
+from .backends import get_backend
+from .exceptions import TransactionError, FeeEstimationError
+from .fees import fee_estimator
+from .keys import wif_to_secret
+from . import crypto
 
 def create_payment_request(address: str, amount: Optional[float] = None, 
                          message: Optional[str] = None, network: str = "testnet") -> str:
@@ -76,12 +82,20 @@ def calculate_tx_size(num_inputs: int, num_outputs: int, is_segwit: bool = True)
             4    # Locktime
         )
 
-def create_and_sign_transaction(from_address: str, from_privkey: str,
+def create_and_sign_transaction(from_address: str, from_privkey: Optional[str],
                               to_address: str, amount: float, 
                               network: str, fee_priority: str = 'medium',
-                              derived_addresses: List[Tuple] = None) -> bitcoin.core.CTransaction:
+                              derived_addresses: List[Tuple] = None,
+                              target_blocks: Optional[int] = None,
+                              signer: Optional[Tuple[bytes, crypto.Signer]] = None) -> bitcoin.core.CTransaction:
     """
     Create and sign a Bitcoin transaction with improved privacy and SegWit support.
+    
+    The fee rate is estimated for `target_blocks` when given, otherwise
+    taken from the fee priority level. Inputs are signed with `signer`,
+    a (public key, signing function) pair such as
+    WalletManager.get_signer() returns, when given; `from_privkey` is then
+    not needed.
     """
     # Randomize the amount slightly to avoid round numbers
     actual_amount = randomize_amount(amount)
@@ -93,10 +107,17 @@ def create_and_sign_transaction(from_address: str, from_privkey: str,
     # Determine if we're using SegWit - now all addresses are SegWit
     is_segwit_from = True  # Added this line - was missing before
     
-    # Get recommended fee rates with small random adjustment
-    fee_rates = get_recommended_fee_rate(network)
-    base_fee_rate = fee_rates.get(fee_priority, fee_rates['medium'])
-    fee_rate = base_fee_rate + random.randint(-1, 1)  # Add slight randomness
+    # Get the fee rate for the target or priority with small random adjustment
+    base_fee_rate = None
+    if target_blocks:
+        try:
+            base_fee_rate = fee_estimator.estimate(network, target_blocks)
+        except FeeEstimationError:
+            pass
+    if base_fee_rate is None:
+        fee_rates = get_recommended_fee_rate(network)
+        base_fee_rate = fee_rates.get(fee_priority, fee_rates['medium'])
+    fee_rate = max(1, base_fee_rate + random.randint(-1, 1))  # Add slight randomness
     
     # Fetch available UTXOs
     utxos = fetch_utxos(from_address, network)
@@ -120,7 +141,7 @@ def create_and_sign_transaction(from_address: str, from_privkey: str,
             num_outputs=2,  # Assuming recipient output + change output
             is_segwit=is_segwit_from
         )
-        estimated_fee = estimated_size * fee_rate
+        estimated_fee = math.ceil(estimated_size * fee_rate)
         
         if total_input >= amount_sat + estimated_fee:
             break
@@ -133,8 +154,10 @@ def create_and_sign_transaction(from_address: str, from_privkey: str,
     
     # Create transaction inputs
     tx_inputs = []
-    private_key = CBitcoinSecret(from_privkey)
-    public_key = private_key.pub
+    if signer is None:
+        secret = wif_to_secret(from_privkey, network)
+        signer = crypto.pubkey_from_secret(secret), lambda digest: crypto.sign(secret, digest)
+    public_key, sign = signer
     #print("Public key length:", len(public_key))
 
     
@@ -214,7 +237,7 @@ def create_and_sign_transaction(from_address: str, from_privkey: str,
         witness_script = CScript([OP_DUP, OP_HASH160, Hash160(public_key), OP_EQUALVERIFY, OP_CHECKSIG])
         sighash = SignatureHash(witness_script, tx, i, SIGHASH_ALL, 
                                 amount=utxo['value'], sigversion=SIGVERSION_WITNESS_V0)
-        sig = private_key.sign(sighash) + bytes([SIGHASH_ALL])
+        sig = sign(sighash) + bytes([SIGHASH_ALL])
         signatures.append(sig)
         
         witness.vtxinwit.append(CTxInWitness(CScript([sig, public_key])))
@@ -230,7 +253,7 @@ def broadcast_transaction(tx: bitcoin.core.CTransaction, network: str) -> str:
     Broadcast a signed transaction to the Bitcoin network.
     
     This function takes a signed transaction and broadcasts it to the network
-    using the Blockstream API. It handles the conversion of the transaction
+    using the network's configured backend. It handles the conversion of the transaction
     to the proper format and manages the API interaction.
     
     Args:
@@ -239,29 +262,22 @@ def broadcast_transaction(tx: bitcoin.core.CTransaction, network: str) -> str:
     
     Returns:
         Transaction ID of the broadcast transaction
-    """
-    api_urls = {
-        "mainnet": "https://blockstream.info/api",
-        "testnet": "https://blockstream.info/testnet/api",
-        "signet": "https://blockstream.info/signet/api"
-    }
     
-    base_url = api_urls.get(network)
-    if not base_url:
-        raise ValueError(f"Unsupported network: {network}")
+    Cached balances of the network are dropped once the transaction is
+    accepted, as its inputs cannot be mapped back to addresses here.
+    """
+    backend = get_backend(network)
     
     try:
         # Convert transaction to hex
         tx_hex = tx.serialize().hex()
         
         # Broadcast transaction
-        response = requests.post(f"{base_url}/tx", data=tx_hex)
-        
-        if response.status_code == 200:
-            return response.text.strip()
-        else:
-            error_msg = response.text if response.text else f"HTTP {response.status_code}"
-            raise Exception(f"Failed to broadcast transaction: {error_msg}")
+        tx_id = backend.broadcast(tx_hex)
+        forget_balances(network)
+        return tx_id
             
+    except TransactionError as e:
+        raise Exception(f"Failed to broadcast transaction: {e.message}")
     except requests.exceptions.RequestException as e:
-        raise Exception(f"Network error while broadcasting transaction: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Network error while broadcasting transaction: {str(e)}")
@@ -0,0 +1,258 @@
+"""
+Shared HTTP transport for all explorer and price API calls.
+
+Every request made by the wallet goes through a single pooled session so
+that TCP connections and TLS sessions are reused across calls instead of
+being re-established for each request.
+
+Requests are also paced per host by the rate limiter, and transient
+failures (connection errors, timeouts, 429 and 5xx responses) are retried
+with jittered exponential backoff, honouring any Retry-After header.
+A request made inside abandon_when() stops retrying once its event is set,
+which the hedger uses to drop the requests that lost a race.
+"""
+import time
+import random
+import threading
+import email.utils
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import config
+from .exceptions import TransientNetworkError
+from .ratelimit import RateLimiter
+
+# Responses worth retrying, and the subset that means the host is overloaded
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# Event that, once set, stops retries of requests made on this thread
+_abandon = threading.local()
+
+@contextmanager
+def abandon_when(event: threading.Event):
+    """
+    Stop retrying the requests made in this block once `event` is set.
+
+    A request already on the wire still completes, but no further attempt
+    is made and any backoff wait is cut short.
+
+    Args:
+        event: Set by another thread when the result is no longer needed
+    """
+    previous = getattr(_abandon, "event", None)
+    _abandon.event = event
+    try:
+        yield
+    finally:
+        _abandon.event = previous
+
+class HttpTransport:
+    """
+    Pooled, keep-alive HTTP client shared by every network function.
+
+    Connections are pooled per host by the underlying urllib3 pool manager,
+    so repeated calls to the same explorer reuse an open connection. All
+    requests get a timeout and advertise gzip support, pass through the
+    per-host rate limiter and are retried on transient failures.
+    """
+
+    USER_AGENT = "bitcoin-wallet-cli/0.1.0"
+
+    def __init__(self, timeout: Optional[float] = None,
+                 pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
+                 max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None,
+                 max_delay: Optional[float] = None,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Initialize the transport.
+
+        Args:
+            timeout: Request timeout in seconds (default: config.api_timeout)
+            pool_connections: Number of per-host pools to keep open
+            pool_maxsize: Maximum number of connections kept per host
+            max_retries: Retries after a transient failure (default: config.max_retries)
+            backoff_base: First backoff delay in seconds (default: config.retry_backoff_base)
+            max_delay: Longest wait between attempts (default: config.retry_max_delay)
+            limiter: Per-host rate limiter (default: a new one)
+        """
+        self.timeout = timeout if timeout is not None else config.api_timeout
+        self.pool_connections = pool_connections or config.http_pool_connections
+        self.pool_maxsize = pool_maxsize or config.http_pool_maxsize
+        self.max_retries = max_retries if max_retries is not None else config.max_retries
+        self.backoff_base = backoff_base if backoff_base is not None else config.retry_backoff_base
+        self.max_delay = max_delay if max_delay is not None else config.retry_max_delay
+        self.limiter = limiter or RateLimiter()
+        self.retries = 0
+        self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """Create a session with pooled adapters and default headers."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": self.USER_AGENT,
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+        return session
+
+    def configure(self, timeout: Optional[float] = None,
+                  pool_connections: Optional[int] = None,
+                  pool_maxsize: Optional[int] = None) -> None:
+        """
+        Change timeout or pool sizes, rebuilding the session if needed.
+
+        Args:
+            timeout: New request timeout in seconds
+            pool_connections: New number of per-host pools
+            pool_maxsize: New maximum connections per host
+        """
+        if timeout is not None:
+            self.timeout = timeout
+
+        if pool_connections or pool_maxsize:
+            self.pool_connections = pool_connections or self.pool_connections
+            self.pool_maxsize = pool_maxsize or self.pool_maxsize
+            self.session.close()
+            self.session = self._create_session()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, url: str,
+                retry_statuses: frozenset = RETRY_STATUSES,
+                retry_errors: Tuple[type, ...] = (requests.exceptions.ConnectionError,
+                                                  requests.exceptions.Timeout),
+                **kwargs) -> requests.Response:
+        """
+        Send a rate-limited request, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            retry_statuses: Response statuses that are retried
+            retry_errors: Request exceptions that are retried
+            **kwargs: Passed on to the session
+
+        Returns:
+            The response object; permanent errors such as 404 are returned
+            for the caller to handle
+
+        Raises:
+            TransientNetworkError: If the request still fails after all retries
+        """
+        kwargs["timeout"] = kwargs.get("timeout") or self.timeout
+        host = self.limiter.for_url(url)
+        abandon = getattr(_abandon, "event", None)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                if abandon is None:
+                    time.sleep(self._backoff(attempt - 1))
+                elif abandon.wait(self._backoff(attempt - 1)):
+                    break
+                self.retries += 1
+
+            host.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except retry_errors as e:
+                host.release()
+                failure = TransientNetworkError(f"{method} {url} failed", str(e))
+                continue
+            except BaseException:
+                host.release()
+                raise
+
+            throttled = response.status_code in THROTTLE_STATUSES
+            retry_after = None
+            if throttled:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    retry_after = min(retry_after, self.max_delay)
+            host.release(throttled=throttled, retry_after=retry_after)
+
+            if response.status_code not in retry_statuses:
+                return response
+            failure = TransientNetworkError(
+                f"{method} {url} failed", f"HTTP {response.status_code}", response.status_code
+            )
+
+        raise failure
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        """
+        Send a GET request over the pooled session.
+
+        Args:
+            url: Full request URL
+            params: Optional query parameters
+            timeout: Optional per-call timeout override
+
+        Returns:
+            The response object
+        """
+        return self.request("GET", url, params=params, timeout=timeout)
+
+    def post(self, url: str, data: Any = None, json: Any = None,
+             timeout: Optional[float] = None,
+             auth: Optional[Tuple[str, str]] = None) -> requests.Response:
+        """
+        Send a POST request over the pooled session.
+        
+        Only failures where the server cannot have acted on the request
+        (connection errors, 429 and 503) are retried.
+
+        Args:
+            url: Full request URL
+            data: Optional raw request body
+            json: Optional JSON request body
+            timeout: Optional per-call timeout override
+            auth: Optional (user, password) for HTTP basic authentication
+
+        Returns:
+            The response object
+        """
+        return self.request("POST", url, data=data, json=json, timeout=timeout, auth=auth,
+                            retry_statuses=THROTTLE_STATUSES,
+                            retry_errors=(requests.exceptions.ConnectionError,))
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+# Create global transport instance
+transport = HttpTransport()
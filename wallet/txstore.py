@@ -0,0 +1,364 @@
+"""
+On-disk cache of confirmed transactions and address history pages.
+
+History and UTXO views fetch the same transactions again and again, and a
+confirmed transaction only changes if its block is reorganized away.
+Transactions and pages of confirmed address history are therefore kept
+in SQLite under ~/.bitcoin_wallet and served without a network request.
+Each new chain tip is checked against the blocks just below it, and
+anything cached from a block that left the chain is dropped.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .config import config
+
+class TransactionStore:
+    """
+    Persistent cache of confirmed transactions keyed by txid.
+
+    Confirmed transactions never change, so once downloaded they are kept in
+    a small SQLite database next to the wallet state. Each entry records the
+    block hash it was confirmed in, and when the chain tip changes the
+    newest cached blocks are checked against the chain so entries from a
+    reorganized block are dropped. The store is bounded and evicts least
+    recently used entries.
+    """
+
+    # Constants
+    STORE_DIR = os.path.expanduser("~/.bitcoin_wallet")
+    STORE_FILE = os.path.join(STORE_DIR, "transactions.db")
+    REORG_DEPTH = 10  # Blocks below the tip checked for reorganizations
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the store. The database is opened lazily on first use.
+
+        Args:
+            path: Database file path (default: ~/.bitcoin_wallet/transactions.db)
+            max_entries: Maximum number of cached transactions
+        """
+        self.path = path or self.STORE_FILE
+        self.max_entries = max_entries or config.tx_cache_max_entries
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self._conn = None
+        self._count = 0
+        # Last tip hash checked for reorganizations, per network
+        self._tips: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database and create tables if needed."""
+        if self._conn is not None or not self.enabled:
+            return self._conn
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    network TEXT NOT NULL,
+                    txid TEXT NOT NULL,
+                    block_hash TEXT,
+                    block_height INTEGER,
+                    data TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (network, txid)
+                );
+                CREATE INDEX IF NOT EXISTS idx_transactions_access
+                    ON transactions (last_access);
+                CREATE INDEX IF NOT EXISTS idx_transactions_block
+                    ON transactions (network, block_hash);
+                CREATE TABLE IF NOT EXISTS chain_pages (
+                    network TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    last_seen_txid TEXT NOT NULL,
+                    txids TEXT NOT NULL,
+                    PRIMARY KEY (network, address, last_seen_txid)
+                );
+            """)
+            self._count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            self._conn = conn
+        except sqlite3.Error as e:
+            print(f"Transaction cache disabled: {str(e)}")
+            self.enabled = False
+
+        return self._conn
+
+    def get(self, network: str, txid: str) -> Optional[Dict]:
+        """
+        Look up a cached transaction.
+
+        Args:
+            network: Network type (mainnet, testnet, signet)
+            txid: Transaction ID
+
+        Returns:
+            The transaction data or None on a cache miss
+        """
+        with self._lock:
+            conn = self._connect()
+            row = None
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT data FROM transactions WHERE network = ? AND txid = ?",
+                    (network, txid)
+                ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            conn.execute(
+                "UPDATE transactions SET last_access = ? WHERE network = ? AND txid = ?",
+                (time.time(), network, txid)
+            )
+            conn.commit()
+            return json.loads(row[0])
+
+    def get_many(self, network: str, txids: List[str]) -> Optional[List[Dict]]:
+        """
+        Look up several cached transactions at once.
+
+        Args:
+            network: Network type
+            txids: Transaction IDs, in the order they should be returned
+
+        Returns:
+            The transactions in order, or None if any of them is missing
+        """
+        txs = []
+        for txid in txids:
+            tx = self.get(network, txid)
+            if tx is None:
+                return None
+            txs.append(tx)
+        return txs
+
+    def put(self, network: str, tx: Dict) -> None:
+        """
+        Cache a transaction if it is confirmed.
+
+        Args:
+            network: Network type
+            tx: Esplora-style transaction with a status block
+        """
+        self.put_many(network, [tx])
+
+    def put_many(self, network: str, txs: List[Dict]) -> None:
+        """
+        Cache all confirmed transactions from a list.
+
+        Args:
+            network: Network type
+            txs: Esplora-style transactions; unconfirmed ones are skipped
+        """
+        now = time.time()
+        rows = [
+            (network, tx['txid'], tx['status'].get('block_hash'),
+             tx['status'].get('block_height'), json.dumps(tx), now)
+            for tx in txs
+            if tx.get('txid') and tx.get('status', {}).get('confirmed')
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO transactions "
+                "(network, txid, block_hash, block_height, data, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            self._evict(conn)
+            conn.commit()
+
+    def get_chain_page(self, network: str, address: str, last_seen_txid: str) -> Optional[List[Dict]]:
+        """
+        Look up a cached page of confirmed address history.
+
+        Args:
+            network: Network type
+            address: Bitcoin address
+            last_seen_txid: The txid the page continues after
+
+        Returns:
+            The page's transactions, or None if the page or any of its
+            transactions is not cached
+        """
+        with self._lock:
+            conn = self._connect()
+            row = None
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT txids FROM chain_pages "
+                    "WHERE network = ? AND address = ? AND last_seen_txid = ?",
+                    (network, address, last_seen_txid)
+                ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+        return self.get_many(network, json.loads(row[0]))
+
+    def put_chain_page(self, network: str, address: str, last_seen_txid: str,
+                       txs: List[Dict]) -> None:
+        """
+        Cache a page of confirmed address history.
+
+        Args:
+            network: Network type
+            address: Bitcoin address
+            last_seen_txid: The txid the page continues after
+            txs: The page's transactions
+        """
+        self.put_many(network, txs)
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO chain_pages "
+                "(network, address, last_seen_txid, txids) VALUES (?, ?, ?, ?)",
+                (network, address, last_seen_txid, json.dumps([tx['txid'] for tx in txs]))
+            )
+            conn.commit()
+
+    def invalidate_block(self, network: str, block_hash: str) -> None:
+        """
+        Drop every transaction recorded as confirmed in a given block.
+
+        Args:
+            network: Network type
+            block_hash: Hash of a block that is no longer in the best chain
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            cursor = conn.execute(
+                "DELETE FROM transactions WHERE network = ? AND block_hash = ?",
+                (network, block_hash)
+            )
+            self._count -= cursor.rowcount
+            conn.commit()
+
+    def invalidate_pages(self, network: str) -> None:
+        """
+        Drop every cached address history page of a network.
+
+        Args:
+            network: Network type
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute("DELETE FROM chain_pages WHERE network = ?", (network,))
+            conn.commit()
+
+    def observe_tip(self, network: str, tip: Dict, block_hash_at: Callable[[int], str]) -> List[str]:
+        """
+        Drop cached transactions from blocks that left the best chain.
+
+        Called when the chain tip may have changed. Cached blocks from the
+        last REORG_DEPTH heights are compared with the chain, newest first.
+        Blocks link to their parents, so checking stops at the first one
+        still in the chain and a tip change without a reorganization costs
+        one lookup. When a block was orphaned the network's cached history
+        pages are dropped as well, since they may list its transactions.
+
+        Args:
+            network: Network type
+            tip: Dictionary with "height" and "hash" of the best block
+            block_hash_at: Returns the best chain's block hash at a height
+
+        Returns:
+            Hashes of the orphaned blocks
+
+        Raises:
+            requests.RequestException: If a block hash cannot be fetched;
+                the tip is then checked again on the next call
+        """
+        with self._lock:
+            if self._tips.get(network) == tip["hash"]:
+                return []
+            conn = self._connect()
+            if conn is None:
+                return []
+            rows = conn.execute(
+                "SELECT DISTINCT block_height, block_hash FROM transactions "
+                "WHERE network = ? AND block_height > ? ORDER BY block_height DESC",
+                (network, tip["height"] - self.REORG_DEPTH)
+            ).fetchall()
+
+        heights: Dict[int, List[str]] = {}
+        for height, block_hash in rows:
+            heights.setdefault(height, []).append(block_hash)
+
+        orphaned = []
+        for height, block_hashes in heights.items():
+            # Blocks above the tip are not in the best chain
+            actual = block_hash_at(height) if height <= tip["height"] else None
+            orphaned.extend(block_hash for block_hash in block_hashes if block_hash != actual)
+            if actual in block_hashes:
+                break
+
+        for block_hash in orphaned:
+            self.invalidate_block(network, block_hash)
+        if orphaned:
+            self.invalidate_pages(network)
+
+        with self._lock:
+            self._tips[network] = tip["hash"]
+        return orphaned
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove least recently used entries beyond the size limit."""
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+
+        conn.execute(
+            "DELETE FROM transactions WHERE rowid IN ("
+            "SELECT rowid FROM transactions ORDER BY last_access ASC LIMIT ?)",
+            (excess,)
+        )
+        self._count = self.max_entries
+
+        # Pages only reference transactions, so keep roughly one page per 25 entries
+        conn.execute(
+            "DELETE FROM chain_pages WHERE rowid NOT IN ("
+            "SELECT rowid FROM chain_pages ORDER BY rowid DESC LIMIT ?)",
+            (max(1, self.max_entries // 25),)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._count
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Create global transaction store instance
+transaction_store = TransactionStore()
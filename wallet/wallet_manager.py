@@ -8,6 +8,10 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+from . import agent, crypto
+from .config import config
+from .keys import wif_to_secret
+
 class WalletManager:
     """
     Manages the active wallet state between CLI commands.
@@ -20,12 +24,14 @@ class WalletManager:
     STATE_DIR = os.path.expanduser("~/.bitcoin_wallet")
     STATE_FILE = os.path.join(STATE_DIR, "wallet_state.json")
     SESSION_TIMEOUT = 30 * 60  # 30 minutes in seconds
+    TOUCH_INTERVAL = 60  # Refresh the session timestamp at most once a minute
     
     def __init__(self):
         """Initialize wallet manager and create state directory if needed."""
         os.makedirs(self.STATE_DIR, exist_ok=True)
         self.active_wallet = None
         self.password = None
+        self._privkey = None  # Decrypted private key, kept for this process
         self._load_state()
     
     def _load_state(self) -> None:
@@ -67,10 +73,21 @@ class WalletManager:
         except Exception as e:
             print(f"Error saving wallet state: {str(e)}")
     
+    def _touch(self) -> None:
+        """Extend the session, rewriting the state file only when its timestamp is stale."""
+        if time.time() - self.active_wallet.get('timestamp', 0) > self.TOUCH_INTERVAL:
+            self._save_state()
+    
     def _clear_state(self) -> None:
-        """Clear active wallet state and remove state file."""
+        """Clear active wallet state, forget its key in the agent and remove state file."""
+        if self.active_wallet and self.active_wallet.get('encrypted'):
+            try:
+                agent.key_agent.remove(self._split_encrypted(self.active_wallet['private_key'])[0])
+            except ValueError:
+                pass
         self.active_wallet = None
         self.password = None
+        self._privkey = None
         
         if os.path.exists(self.STATE_FILE):
             try:
@@ -78,6 +95,29 @@ class WalletManager:
             except Exception as e:
                 print(f"Error clearing wallet state: {str(e)}")
     
+    def _derive_key(self, salt: bytes) -> bytes:
+        """Derive the Fernet key for a salt from the password (PBKDF2, slow by design)."""
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=100000,
+        )
+        return base64.urlsafe_b64encode(kdf.derive(self.password.encode()))
+    
+    def _share_key(self, salt: bytes, key: bytes) -> None:
+        """Hand a derived key to the key agent so later commands skip the KDF."""
+        if config.key_agent:
+            agent.key_agent.add_key(salt, key, self.SESSION_TIMEOUT)
+    
+    @staticmethod
+    def _split_encrypted(encrypted_data: str) -> Tuple[bytes, bytes]:
+        """Split a stored private key into its salt and Fernet token."""
+        raw_data = base64.b64decode(encrypted_data)
+        if len(raw_data) <= 16:
+            raise ValueError("Encrypted private key is truncated")
+        return raw_data[:16], raw_data[16:]
+    
     def _encrypt_privkey(self, privkey: str) -> str:
         """Encrypt private key using a derived key."""
         if not self.password:
@@ -85,13 +125,8 @@ class WalletManager:
             
         # Generate salt and derive key
         salt = os.urandom(16)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.password.encode()))
+        key = self._derive_key(salt)
+        self._share_key(salt, key)
         
         # Encrypt private key
         f = Fernet(key)
@@ -106,27 +141,22 @@ class WalletManager:
             raise ValueError("No password set for decryption")
             
         # Decode the combined salt+data
-        raw_data = base64.b64decode(encrypted_data)
-        salt, encrypted_privkey = raw_data[:16], raw_data[16:]
+        salt, encrypted_privkey = self._split_encrypted(encrypted_data)
         
         # Derive key
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.password.encode()))
+        key = self._derive_key(salt)
         
         # Decrypt private key
         f = Fernet(key)
         decrypted_data = f.decrypt(encrypted_privkey)
         
+        # Only a key that worked is worth keeping
+        self._share_key(salt, key)
         return decrypted_data.decode()
     
     def load_wallet(self, privkey: str, network: str = "testnet", 
                addresses: List = None, address_type: str = "segwit", pubkey: str = None, 
-               encrypt: bool = True) -> bool:
+               encrypt: bool = True, account_xpub: Optional[str] = None) -> bool:
         """
         Load a wallet and make it active for future commands.
         
@@ -136,11 +166,16 @@ class WalletManager:
             addresses: Optional list of pre-generated addresses
             pubkey: Optional public key
             encrypt: Whether to encrypt the private key
+            account_xpub: Optional BIP-84 account extended public key used to
+                derive addresses without the private key
             
         Returns:
             True if wallet was loaded successfully
         """
         try:
+            # A previously active wallet's key is no longer needed
+            self._privkey = None
+            
             # Encrypt private key if requested
             if encrypt:
                 # Encryption code...
@@ -160,10 +195,20 @@ class WalletManager:
 
             }
             
+            # Keep the public key so signing needs no decrypted private key
+            if not pubkey:
+                try:
+                    pubkey = crypto.pubkey_from_secret(wif_to_secret(privkey)).hex()
+                except ValueError:
+                    pass
+            
             # Add optional data if available
             if pubkey:
                 self.active_wallet['public_key'] = pubkey
                 
+            if account_xpub:
+                self.active_wallet['account_xpub'] = account_xpub
+                
             if addresses:
                 # Only store addresses, not private keys
                 self.active_wallet['addresses'] = [
@@ -228,7 +273,8 @@ class WalletManager:
                 address_type=address_type,
                 addresses=addresses,
                 pubkey=wallet_data.get('public_key'),
-                encrypt=True
+                encrypt=True,
+                account_xpub=wallet_data.get('account_xpub')
             )
             
         except FileNotFoundError:
@@ -269,24 +315,79 @@ class WalletManager:
         # Create a copy to avoid modifying the stored state
         wallet = dict(self.active_wallet)
         
-        # Decrypt private key if necessary
+        # Decrypt private key if necessary, once per process
         if wallet.get('encrypted', False):
-            if not self.password:
-                # Prompt for password if not set
-                self.password = getpass.getpass("Enter wallet password: ")
-                
-            try:
-                wallet['private_key'] = self._decrypt_privkey(wallet['private_key'])
-                wallet['encrypted'] = False  # Mark as decrypted for this instance
-            except Exception as e:
-                print(f"Error decrypting private key: {str(e)}")
-                return None
+            if self._privkey is None:
+                if not self.password:
+                    # Prompt for password if not set
+                    self.password = getpass.getpass("Enter wallet password: ")
+                    
+                try:
+                    self._privkey = self._decrypt_privkey(wallet['private_key'])
+                except Exception as e:
+                    print(f"Error decrypting private key: {str(e)}")
+                    return None
+                    
+            wallet['private_key'] = self._privkey
+            wallet['encrypted'] = False  # Mark as decrypted for this instance
                 
         # Update access timestamp
-        self._save_state()
+        self._touch()
             
         return wallet
     
+    def get_public_key(self) -> Optional[bytes]:
+        """
+        Get the active wallet's compressed public key.
+        
+        It is read from the wallet state; only wallets saved without one
+        have their private key decrypted to compute it.
+        
+        Returns:
+            The public key, or None if no wallet is active or its key
+            cannot be decrypted
+        """
+        if not self.active_wallet:
+            return None
+        if self.active_wallet.get('public_key'):
+            return bytes.fromhex(self.active_wallet['public_key'])
+        
+        wallet = self.get_active_wallet()
+        if not wallet:
+            return None
+        return crypto.pubkey_from_secret(wif_to_secret(wallet['private_key']))
+    
+    def get_signer(self) -> Optional[Tuple[bytes, crypto.Signer]]:
+        """
+        Get the active wallet's public key and a function signing digests with its key.
+        
+        The public key comes from the wallet state. With the key agent
+        enabled (config.key_agent), an encrypted key signs inside the agent
+        while the agent holds it, so neither the password nor the private
+        key is needed in this process; otherwise the key is decrypted here
+        on the first signature.
+        
+        Returns:
+            (compressed public key, signer), or None if no wallet is active
+        """
+        public_key = self.get_public_key()
+        if public_key is None:
+            return None
+        
+        def sign(digest: bytes) -> bytes:
+            if config.key_agent and self.active_wallet.get('encrypted', False):
+                salt, token = self._split_encrypted(self.active_wallet['private_key'])
+                signature = agent.key_agent.sign(salt, token, digest)
+                if signature is not None:
+                    return signature
+                    
+            wallet = self.get_active_wallet()
+            if not wallet:
+                raise ValueError("The private key could not be decrypted")
+            return crypto.sign(wif_to_secret(wallet['private_key']), digest)
+            
+        return public_key, sign
+    
     def is_wallet_loaded(self) -> bool:
         """Check if a wallet is currently loaded."""
         return self.active_wallet is not None
@@ -303,6 +404,12 @@ class WalletManager:
             return "segwit"  # Default
         return self.active_wallet.get('address_type', 'segwit')
     
+    def get_account_xpub(self) -> Optional[str]:
+        """Get the account extended public key of the active wallet, if known."""
+        if not self.active_wallet:
+            return None
+        return self.active_wallet.get('account_xpub')
+    
     def get_addresses(self) -> List[str]:
         """Get addresses from the active wallet."""
         if not self.active_wallet or 'addresses' not in self.active_wallet: